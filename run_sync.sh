@@ -34,7 +34,7 @@ if [ $? -eq 0 ]; then
   echo "✅ Synchronisation terminée avec succès!"
   
   # Recherche du dernier log généré
-  LATEST_LOG=$(ls -t sync_log_*.txt 2>/dev/null | head -1)
+  LATEST_LOG=$(python3 -m synchro.retention latest --kind log 2>/dev/null)
   if [ -n "$LATEST_LOG" ]; then
     echo "   Log détaillé disponible: $LATEST_LOG"
     echo
@@ -51,7 +51,7 @@ else
   echo "   Consultez les fichiers de log pour plus de détails."
   
   # Recherche du dernier log généré
-  LATEST_LOG=$(ls -t sync_log_*.txt | head -1)
+  LATEST_LOG=$(python3 -m synchro.retention latest --kind log 2>/dev/null)
   if [ -n "$LATEST_LOG" ]; then
     echo "   Log d'erreur: $LATEST_LOG"
   fi
@@ -18,6 +18,7 @@ cat > "$SCRIPT_DIR/run_sync_cron.sh" << EOF
 #!/bin/bash
 cd "$SCRIPT_DIR"
 source .env 2>/dev/null || true
+$PYTHON_PATH -m synchro.retention rotate "$SCRIPT_DIR/sync_cron.log" --max-mb 10 --keep 5 >/dev/null 2>&1
 $PYTHON_PATH "$SCRIPT_PATH" >> "$SCRIPT_DIR/sync_cron.log" 2>&1
 EOF
 
@@ -104,7 +105,7 @@ echo ""
 echo "La synchronisation s'exécutera maintenant $DESCRIPTION"
 echo ""
 echo "📄 Logs disponibles dans : $SCRIPT_DIR/sync_cron.log"
-echo "📄 Logs détaillés dans : $SCRIPT_DIR/sync_log_*.txt"
+echo "📄 Logs détaillés dans : $SCRIPT_DIR/runs/ (rétention automatique)"
 echo ""
 echo "Commandes utiles :"
 echo "- Voir le crontab : crontab -l"
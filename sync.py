@@ -3,33 +3,93 @@
 Version finale du script avec synchronisation des tags vers Mailchimp
 """
 
+import argparse
+import io
 import os
 import requests
-import hashlib
 import traceback
-from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
 import json
+import sys
+import tarfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
-load_dotenv()
+from synchro.utils import (
+    normalize_email,
+    get_subscriber_hash,
+    is_delete_tag_robust,
+    is_inactive_tag,
+    contacts_are_identical,
+    person_emails,
+    primary_email
+)
+from synchro.config import ConfigError, resolve_settings, add_setting_arguments
+from synchro.shard import LockError, RunLock, shard_of, shard_path, shard_suffix
+from synchro.audiences import Audience, build_audiences
+from synchro.scope import ScopeMatcher, read_exclusion_file
+from synchro.copper_index import CopperEmailIndex, CopperLookupCache
+from synchro.records import CopperPerson, MailchimpMember
+from synchro.plan import PLAN_VERSION, estimate_cost, load_plan, save_plan, summarize, tags_added
+from synchro.metrics import MetricsRegistry, MetricsServer, endpoint_template, write_textfile
+from synchro.profiling import PhaseTimer, RunProfiler, phase_label
+from synchro.retention import RetentionPolicy, record_run
+from synchro.tracing import RequestStats, format_request_table
+from synchro.budget import BudgetExhausted, CallBudget, fit_plan
+from synchro.progress import NO_PROGRESS, InFlight, ProgressReporter
+from synchro.runlog import LEVELS, URGENT_LEVEL, LogBuffer, console_shows, format_line, level_value
+from synchro.report import Operation, OperationRecorder, ReportWriter, count_errors, open_sinks, run_summary, sink_path
 
 # ==================== CONFIGURATION MODE TEST/PROD ====================
-# IMPORTANT: Changer cette variable pour passer en mode production
-TEST_MODE = True  # True = emails @exemple uniquement, False = toute la BD
-TEST_DOMAIN = "@exemple"  # Domaine de test
+# Le mode se choisit à l'exécution (--mode, SYNC_MODE ou fichier de config),
+# voir load_settings : plus besoin de modifier ce fichier
+TEST_MODE = True  # True = périmètre de test uniquement, False = toute la BD
+TEST_DOMAIN = "@exemple"  # Domaine de test (périmètre par défaut en mode test)
+SCOPE_PATTERNS = ()  # Motifs explicites (--scope), prioritaires sur TEST_DOMAIN
+SCOPE_EXCLUDE = ()  # Motifs refusés (--scope-exclude), prioritaires sur les motifs autorisés
+SCOPE_EXCLUDE_FILE = None  # Liste d'exclusion (une adresse par ligne)
+SHARD = None  # (i, N) avec --shard i/N : seule la tranche i des contacts est traitée
 # ====================================================================
 
-# Configuration du logging
-log_filename = f"sync_log_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.txt"
-log_file = open(log_filename, "w", encoding='utf-8')
+# Fichiers de log et de rapport : créés au démarrage d'une exécution
+# (open_run_files) dans OUTPUT_DIR, jamais à l'import du module
+log_filename = None
+log_file = None
+report_filename = None
+report_file = None
+# Date et shard de l'exécution en cours (fichiers <préfixe>_<run_id>.*), inscrite dans l'index en fin d'exécution
+run_id = None
 
-# Configuration du rapport d'importation
-report_filename = f"import_report_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.txt"
-report_file = open(report_filename, "w", encoding='utf-8')
+# Opérations de l'exécution en cours, pour le rapport (plafond en mémoire : voir load_settings)
+operation_details = OperationRecorder()
 
-# Liste globale pour collecter les détails des opérations
-operation_details = []
+# Métriques Prometheus du processus (fichier texte METRICS_FILE, endpoint METRICS_PORT)
+METRICS = MetricsRegistry()
+
+# Durées des étapes de l'exécution en cours (rapport, résumé JSON, métriques)
+phase_timer = PhaseTimer(
+    on_phase=lambda name, seconds: METRICS.set("sync_phase_duration_seconds", seconds, phase=name)
+)
+# Profilage cProfile/tracemalloc (--profile), écrit avec les fichiers de l'exécution
+profiler = None
+
+# Appels HTTP de l'exécution en cours : latences par endpoint (rapport, résumé JSON)
+request_stats = RequestStats()
+
+# Appels consommés par API et opérations reportées faute de budget (COPPER_/MAILCHIMP_CALL_BUDGET)
+call_budget = CallBudget()
+
+# Appels HTTP en cours et avancement affiché de la boucle d'écritures en cours (synchro.progress)
+requests_in_flight = InFlight()
+active_progress = None
+
+# Verrou des écritures de log (les workers d'écriture loggent en parallèle)
+_log_lock = threading.Lock()
+# Lignes du fichier de log en attente d'écriture
+_log_buffer = LogBuffer()
 
 class Colors:
     GREEN = '\033[92m'
@@ -38,171 +98,520 @@ class Colors:
     BLUE = '\033[94m'
     END = '\033[0m'
 
-def log(message, level="INFO"):
-    timestamp = datetime.now().strftime('%H:%M:%S')
+def console_mode():
+    """Console complète en mode test ou interactif, résumé (étapes, avertissements, erreurs) en production,
+    sauf choix explicite (LOG_CONSOLE)"""
+    if LOG_CONSOLE == "auto":
+        return "full" if TEST_MODE or MARKED_POLICY == "interactive" else "summary"
+    return LOG_CONSOLE
+
+def log(message, level="INFO", email=None):
+    """Journalise un message (console et fichier de log), email renseigné pour une ligne propre à un contact
+    
+    Les lignes sous LOG_LEVEL sont ignorées. Le fichier est écrit par blocs
+    (voir synchro.runlog) : flush_log() vide le tampon.
+    """
+    if level_value(level) < LEVELS[LOG_LEVEL]:
+        return
+    now = datetime.now()
     color = {"INFO": Colors.BLUE, "SUCCESS": Colors.GREEN, "WARNING": Colors.YELLOW, "ERROR": Colors.RED}.get(level, "")
     icon = {"INFO": "ℹ️", "SUCCESS": "✅", "WARNING": "⚠️", "ERROR": "❌"}.get(level, "📝")
     
-    console_message = f"{color}[{timestamp}] {icon} {message}{Colors.END}"
-    file_message = f"[{timestamp}] {icon} {message}"
-    
-    print(console_message)
-    log_file.write(file_message + "\n")
+    with _log_lock:
+        if console_shows(level, email, console_mode(), LOG_LEVEL):
+            # Barre d'avancement effacée le temps d'écrire la ligne, puis redessinée dessous
+            bar = active_progress or NO_PROGRESS
+            bar.clear()
+            print(f"{color}[{now.strftime('%H:%M:%S')}] {icon} {message}{Colors.END}")
+            bar.redraw()
+        if log_file is not None:
+            line = format_line(LOG_FORMAT, now, level, icon, message, email)
+            if _log_buffer.add(line, urgent=level_value(level) >= URGENT_LEVEL):
+                _write_log_buffer()
+
+def _write_log_buffer():
+    log_file.write(_log_buffer.drain())
     log_file.flush()
 
+def flush_log():
+    """Écrit dans le fichier de log les lignes encore en tampon"""
+    with _log_lock:
+        if log_file is not None and len(_log_buffer):
+            _write_log_buffer()
+
+def output_path(filename):
+    """Chemin d'un fichier d'exécution dans OUTPUT_DIR (créé au besoin)"""
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    return os.path.join(OUTPUT_DIR, filename)
+
+def open_log_file(run_stamp=None):
+    """Crée le fichier de log de l'exécution (si pas déjà ouvert)"""
+    global log_filename, log_file, run_id
+    if log_file is None:
+        stamp = run_stamp or datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+        extension = "jsonl" if LOG_FORMAT == "json" else "txt"
+        run_id = f"{stamp}{shard_suffix(SHARD)}"
+        log_filename = output_path(f"sync_log_{run_id}.{extension}")
+        log_file = open(log_filename, "w", encoding='utf-8')
+
+def open_report_file(run_stamp=None, suffix=None):
+    """Crée le fichier de rapport de l'exécution (si pas déjà ouvert), suffixé par shard"""
+    global report_filename, report_file, run_id
+    if report_file is None:
+        stamp = run_stamp or datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+        suffix = shard_suffix(SHARD) if suffix is None else suffix
+        run_id = f"{stamp}{suffix}"
+        report_filename = output_path(f"import_report_{run_id}.txt")
+        report_file = open(report_filename, "w", encoding='utf-8')
+
+def open_run_files():
+    """Crée les fichiers de log et de rapport au démarrage d'une exécution"""
+    run_stamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    open_log_file(run_stamp)
+    open_report_file(run_stamp)
+
+def close_log_file():
+    """Ferme le fichier de log de l'exécution"""
+    global log_file
+    flush_log()
+    if log_file is not None:
+        log_file.close()
+        log_file = None
+
+def log_progress(message):
+    """Ligne d'avancement (mode lines) : fichier de log vidé aussitôt, console même résumée"""
+    log(message, "INFO")
+    if console_mode() == "summary" and LEVELS[LOG_LEVEL] <= LEVELS["INFO"]:
+        # La console résumée masque les lignes INFO : l'avancement y reste visible sous cron
+        with _log_lock:
+            print(f"{Colors.BLUE}[{datetime.now().strftime('%H:%M:%S')}] ℹ️ {message}{Colors.END}")
+    flush_log()
+
+def progress_mode():
+    """Rendu de l'avancement : barre si la console est un terminal, lignes périodiques sinon (PROGRESS)"""
+    if PROGRESS == "auto":
+        return "bar" if sys.stdout.isatty() else "lines"
+    return PROGRESS
+
+@contextmanager
+def progress(label, total=0):
+    """Avancement d'une boucle d'écritures (advance() par contact traité, add() si le total croît)"""
+    global active_progress
+    mode = progress_mode()
+    if mode == "off":
+        yield NO_PROGRESS
+        return
+    reporter = ProgressReporter(label, total, mode, emit=log_progress, interval=PROGRESS_INTERVAL,
+                                in_flight=requests_in_flight, output_lock=_log_lock)
+    active_progress = reporter if mode == "bar" else None
+    try:
+        yield reporter
+    finally:
+        active_progress = None
+        reporter.finish()
+
+def phase(name):
+    """Chronomètre une étape de l'exécution (voir synchro.profiling.PHASES)"""
+    return phase_timer.phase(name)
+
+def start_profiling():
+    """Lance cProfile et tracemalloc pour l'exécution (--profile)"""
+    global profiler
+    profiler = RunProfiler().start()
+
+def stop_profiling():
+    """Arrête le profilage sans rien écrire (exécution qui n'a pas démarré, ex. verrou déjà pris)"""
+    global profiler
+    if profiler is not None:
+        profiler.stop()
+        profiler = None
+
+def write_profile():
+    """Écrit le profil de l'exécution (profile_<run_id>.prof et tableau des étapes profile_<run_id>.txt)"""
+    global profiler
+    try:
+        profile_path, table_path = profiler.write(output_path(f"profile_{run_id}"), phase_timer)
+    except OSError as e:
+        log(f"⚠️ Profil non écrit: {e}", "WARNING")
+    else:
+        log(f"🔬 Profil écrit: {table_path} (brut: {profile_path})", "INFO")
+    profiler = None
+
+def discard_report_file():
+    """Ferme et supprime le rapport ouvert mais jamais écrit (exécution arrêtée avant le rapport)"""
+    global report_file, report_filename
+    if report_file is None:
+        return
+    report_file.close()
+    report_file = None
+    if report_filename and os.path.exists(report_filename):
+        os.remove(report_filename)
+    report_filename = None
+
+def finish_run_files():
+    """Ferme le log, inscrit les fichiers de l'exécution dans l'index et applique la rétention (synchro.retention)"""
+    global run_id
+    if profiler is not None and run_id is not None:
+        write_profile()
+    close_log_file()
+    # write_import_report ferme le rapport : encore ouvert, il est vide et ne doit pas être indexé
+    discard_report_file()
+    if run_id is None:
+        return
+    finished, run_id = run_id, None
+    try:
+        removed = record_run(OUTPUT_DIR, finished, RETENTION)
+    except (OSError, LockError) as e:
+        log(f"⚠️ Index des exécutions non mis à jour: {e}", "WARNING")
+        return
+    if removed:
+        log(f"🧹 Rétention: {removed} ancienne(s) exécution(s) supprimée(s) de {OUTPUT_DIR}", "INFO")
+
 def add_operation_detail(email, name, direction, success=True, error=None, tags=None):
     """Ajouter les détails d'une opération au rapport"""
-    global operation_details
-    operation_details.append({
-        'email': email,
-        'name': name,
-        'direction': direction,
-        'success': success,
-        'error': error,
-        'tags': tags or []
-    })
-
-def normalize_contact_data(contact_data):
-    """Normalise les données d'un contact pour comparaison"""
-    return {
-        'first_name': (contact_data.get('first_name') or '').strip(),
-        'last_name': (contact_data.get('last_name') or '').strip(),
-        'email': normalize_email(contact_data.get('email', ''))
-    }
+    operation_details.append(Operation(email, name, direction, success, error, tags))
+    METRICS.inc("sync_operations_total", direction=direction, result="success" if success else "error")
+
+MARKED_ACTIONS = ("archive", "delete", "defer", "ignore")
+MARKED_ACTION_LABELS = {"archive": "archivé", "delete": "supprimé", "defer": "en attente", "ignore": "ignoré"}
 
-def contacts_are_identical(copper_contact, mailchimp_member):
-    """Vérifie si un contact Copper et un membre Mailchimp sont identiques"""
-    # Normaliser les données Copper
-    emails = copper_contact.get('emails', [])
-    copper_email = emails[0].get('email', '') if emails else ''
+def load_settings(config_path=None, overrides=None, environ=None):
+    """Résout la configuration d'exécution (défauts < environnement < fichier de config < ligne de commande)
     
-    copper_data = {
-        'first_name': (copper_contact.get('first_name') or '').strip(),
-        'last_name': (copper_contact.get('last_name') or '').strip(),
-        'email': normalize_email(copper_email)
-    }
+    Les identifiants API ne viennent que de l'environnement ; les réglages
+    d'exécution sont décrits dans synchro.config.SETTINGS. environ remplace
+    os.environ pour les réglages (environ={} : défauts seuls).
+    """
+    global COPPER_API_URL, COPPER_API_EMAIL, COPPER_API_KEY, COPPER_HEADERS
+    global MC_API_KEY, MC_DC, MC_LIST_ID, MC_BASE, MC_AUTH
+    global TEST_MODE, SCOPE_PATTERNS, SCOPE_EXCLUDE, SCOPE_EXCLUDE_FILE, FETCH_MODE, SYNC_STATE_FILE, DELTA_OVERLAP, SYNC_ENGINE
+    global SHARD, SYNC_LOCK_FILE, AUDIENCES, VERIFY_CREATIONS
+    global COPPER_WRITE_WORKERS, COPPER_RATE_LIMIT, COPPER_PAGE_SIZE, COPPER_CALL_BUDGET, MAILCHIMP_CALL_BUDGET
+    global MAILCHIMP_PAGE_SIZE, MAILCHIMP_BATCH_SIZE, REQUEST_TIMEOUT, MAX_RETRIES, RETRY_DELAY, SLOW_REQUEST_SECONDS
+    global MARKED_POLICY, MARKED_QUEUE_FILE, ARCHIVE_CONCURRENCY_CHECK, REPORT_FORMATS
+    global LOG_LEVEL, LOG_FORMAT, LOG_CONSOLE, PROGRESS, PROGRESS_INTERVAL, OUTPUT_DIR, RETENTION, METRICS_FILE, METRICS_PORT
+    global ASYNC_COPPER_CONCURRENCY, ASYNC_MAILCHIMP_CONCURRENCY, ASYNC_POOL_SIZE, ASYNC_COPPER_PAGE_WINDOW
     
-    # Normaliser les données Mailchimp
-    mailchimp_data = {
-        'first_name': (mailchimp_member.get('merge_fields', {}).get('FNAME') or '').strip(),
-        'last_name': (mailchimp_member.get('merge_fields', {}).get('LNAME') or '').strip(),
-        'email': normalize_email(mailchimp_member.get('email_address', ''))
+    settings = resolve_settings(os.environ if environ is None else environ, config_path, overrides)
+    
+    # Configuration APIs
+    COPPER_API_URL = os.getenv("COPPER_API_URL", "https://api.copper.com/developer_api/v1")
+    COPPER_API_EMAIL = os.getenv("COPPER_API_EMAIL")
+    COPPER_API_KEY = os.getenv("COPPER_API_KEY")
+    
+    MC_API_KEY = os.getenv("MAILCHIMP_API_KEY")
+    MC_DC = os.getenv("MAILCHIMP_DC")
+    MC_LIST_ID = os.getenv("MAILCHIMP_LIST_ID")
+    MC_BASE = f"https://{MC_DC}.api.mailchimp.com/3.0"
+    MC_AUTH = ("anystring", MC_API_KEY)
+    # Audiences alimentées par une même lecture de Copper (vide = MAILCHIMP_LIST_ID seule)
+    AUDIENCES = build_audiences(settings["audiences"], settings["audience_sections"])
+    
+    COPPER_HEADERS = {
+        "X-PW-AccessToken": COPPER_API_KEY,
+        "X-PW-Application": "developer_api",
+        "X-PW-UserEmail": COPPER_API_EMAIL,
+        "Content-Type": "application/json"
     }
     
-    # Comparer les données
-    return copper_data == mailchimp_data
-
-# Configuration APIs
-COPPER_API_URL = os.getenv("COPPER_API_URL", "https://api.copper.com/developer_api/v1")
-COPPER_API_EMAIL = os.getenv("COPPER_API_EMAIL")
-COPPER_API_KEY = os.getenv("COPPER_API_KEY")
-
-MC_API_KEY = os.getenv("MAILCHIMP_API_KEY")
-MC_DC = os.getenv("MAILCHIMP_DC")
-MC_LIST_ID = os.getenv("MAILCHIMP_LIST_ID")
-MC_BASE = f"https://{MC_DC}.api.mailchimp.com/3.0"
-MC_AUTH = ("anystring", MC_API_KEY)
-
-COPPER_HEADERS = {
-    "X-PW-AccessToken": COPPER_API_KEY,
-    "X-PW-Application": "developer_api",
-    "X-PW-UserEmail": COPPER_API_EMAIL,
-    "Content-Type": "application/json"
-}
-
-def is_delete_tag_robust(tag):
-    """Détection robuste du tag de suppression"""
-    if not tag or not isinstance(tag, str):
-        return False
+    # Périmètre et mode de récupération
+    TEST_MODE = settings["mode"] == "test"
+    SCOPE_PATTERNS = tuple(settings["scope"])
+    SCOPE_EXCLUDE = tuple(settings["scope_exclude"])
+    SCOPE_EXCLUDE_FILE = settings["scope_exclude_file"] or None
+    FETCH_MODE = settings["fetch"]
+    DELTA_OVERLAP = settings["delta_overlap"]
+    VERIFY_CREATIONS = settings["verify_creations"]
     
-    normalized = str(tag).strip().upper()
-    normalized = normalized.replace('À', 'A').replace('Á', 'A').replace('Â', 'A')
-    normalized = normalized.replace('È', 'E').replace('É', 'É').replace('Ê', 'E')
+    # Partitionnement : état, file d'attente et verrou propres à chaque shard
+    SHARD = settings["shard"]
+    SYNC_STATE_FILE = shard_path(settings["state_file"], SHARD)
+    SYNC_LOCK_FILE = shard_path(settings["lock_file"], SHARD)
+    SYNC_ENGINE = settings["engine"]
     
-    conditions = [
-        "SUPPRIMER" in normalized,
-        "🗑" in normalized,
-        "DELETE" in normalized,
-        "REMOVE" in normalized,
-        "A SUPPRIMER" in normalized
-    ]
+    # Écritures Copper parallèles (Copper limite à 180 requêtes/minute, soit 3/s)
+    COPPER_WRITE_WORKERS = settings["copper_write_workers"]
+    COPPER_RATE_LIMIT = settings["copper_rate_limit"]
     
-    return any(conditions)
-
-def is_inactive_tag(tag):
-    """Détection du tag inactif"""
-    if not tag or not isinstance(tag, str):
-        return False
+    # Quotas d'appels par exécution (quotas d'API partagés avec d'autres intégrations)
+    COPPER_CALL_BUDGET = settings["copper_call_budget"]
+    MAILCHIMP_CALL_BUDGET = settings["mailchimp_call_budget"]
+    
+    # Tailles de pages et de lots, délais HTTP
+    COPPER_PAGE_SIZE = settings["copper_page_size"]
+    MAILCHIMP_PAGE_SIZE = settings["mailchimp_page_size"]
+    MAILCHIMP_BATCH_SIZE = settings["mailchimp_batch_size"]
+    REQUEST_TIMEOUT = settings["request_timeout"] or None
+    MAX_RETRIES = settings["max_retries"]
+    RETRY_DELAY = settings["retry_delay"]
+    # Appels plus longs que ce seuil (retries compris) signalés dans le log
+    SLOW_REQUEST_SECONDS = settings["slow_request_seconds"]
     
-    normalized = str(tag).strip().upper()
-    normalized = normalized.replace('À', 'A').replace('Á', 'A').replace('Â', 'A')
-    normalized = normalized.replace('È', 'E').replace('É', 'É').replace('Ê', 'E')
+    # Logs et rapports dans un répertoire dédié, avec rotation et compression
+    OUTPUT_DIR = settings["output_dir"]
+    RETENTION = RetentionPolicy(settings["retention_days"], settings["retention_runs"],
+                                int(settings["retention_max_mb"] * 1024 * 1024), settings["retention_keep_plain"])
     
-    conditions = [
-        "INACTIF" in normalized,
-        "📥" in normalized,
-        "INACTIVE" in normalized,
-        "ARCHIVED" in normalized
-    ]
+    # Journal : niveau minimal, format du fichier (texte ou JSON), console complète ou résumée
+    LOG_LEVEL = settings["log_level"]
+    LOG_FORMAT = settings["log_format"]
+    LOG_CONSOLE = settings["log_console"]
     
-    return any(conditions)
+    # Avancement des écritures : barre (terminal) ou lignes périodiques (cron)
+    PROGRESS = settings["progress"]
+    PROGRESS_INTERVAL = settings["progress_interval"]
+    
+    # Métriques Prometheus : fichier texte (un par shard) et endpoint HTTP
+    METRICS_FILE = shard_path(settings["metrics_file"], SHARD) if settings["metrics_file"] else None
+    METRICS_PORT = settings["metrics_port"]
+    
+    # Sorties structurées écrites à côté du rapport texte (jsonl, json, csv)
+    REPORT_FORMATS = tuple(settings["report_formats"])
+    # Opérations gardées en mémoire avant déversement sur disque
+    operation_details.memory_limit = settings["operations_memory_limit"]
+    operation_details.spill_dir = settings["operations_spill_dir"] or None
+    
+    # Politique des contacts marqués pour suppression : "interactive" (opt-in) ou
+    # règles "action:âge_min_jours" évaluées dans l'ordre, ex. "delete:90,archive:7,defer"
+    MARKED_POLICY = settings["marked_policy"]
+    MARKED_QUEUE_FILE = shard_path(settings["marked_queue_file"], SHARD)
+    # Contrôle optimiste (date_modified) avant archivage : les contacts marqués sont relus
+    # par lots d'emails pour détecter ceux modifiés depuis leur récupération
+    ARCHIVE_CONCURRENCY_CHECK = settings["archive_concurrency_check"]
+    
+    # Moteur asynchrone
+    ASYNC_COPPER_CONCURRENCY = settings["async_copper_concurrency"]
+    ASYNC_MAILCHIMP_CONCURRENCY = settings["async_mailchimp_concurrency"]
+    ASYNC_POOL_SIZE = settings["async_pool_size"]
+    ASYNC_COPPER_PAGE_WINDOW = settings["async_copper_page_window"]
+    return settings
+
+def load_environment():
+    """Charge le fichier .env dans l'environnement (appelé au démarrage d'une exécution)"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+# Lecture de l'environnement courant uniquement (pas d'accès disque à l'import). Une valeur
+# invalide n'empêche pas l'import : défauts ici, l'erreur est signalée par run() (parser.error)
+try:
+    load_settings()
+except ValueError:
+    load_settings(environ={})
+
+_scope_cache = None
+
+def scope_matcher():
+    """Périmètre compilé, reconstruit seulement quand les réglages de périmètre changent"""
+    global _scope_cache
+    key = (SCOPE_PATTERNS or ((TEST_DOMAIN,) if TEST_MODE else ()), SCOPE_EXCLUDE, SCOPE_EXCLUDE_FILE)
+    if _scope_cache is None or _scope_cache[0] != key:
+        allow, deny, exclude_file = key
+        excluded = read_exclusion_file(exclude_file) if exclude_file else ()
+        _scope_cache = (key, ScopeMatcher(allow, deny, excluded))
+    return _scope_cache[1]
+
+def in_scope(email):
+    """Vérifie si l'email fait partie du périmètre configuré (tout en production sans --scope)"""
+    return scope_matcher().matches(email)
+
+def get_audiences():
+    """Audiences Mailchimp de l'exécution (par défaut la seule liste MC_LIST_ID)"""
+    return AUDIENCES or [Audience("default", MC_LIST_ID)]
+
+def mailchimp_direction(audience=None):
+    """Libellé de direction du rapport (nom de l'audience si plusieurs sont configurées)"""
+    if audience is None or len(get_audiences()) == 1:
+        return "Copper → Mailchimp"
+    return f"Copper → Mailchimp ({audience.name})"
+
+def audiences_for(contact):
+    """Audiences concernées par un contact marqué (toutes si ses tags sont inconnus)"""
+    tags = contact.get("tags")
+    return [a for a in get_audiences() if tags is None or a.accepts(tags)]
 
-def normalize_email(email):
-    """Normalise un email"""
-    return email.lower().strip()
+def in_shard(email):
+    """Vérifie si l'email appartient au shard de ce processus (toujours vrai sans --shard)"""
+    return SHARD is None or shard_of(email, SHARD[1]) == SHARD[0]
 
-def is_target_email(email):
-    """Vérifie si l'email est dans le scope de test"""
-    return "@exemple" in email.lower()
+def is_selected(email):
+    """Email à traiter par cette exécution : dans le périmètre et dans le shard"""
+    return in_scope(email) and in_shard(email)
 
-def get_subscriber_hash(email):
-    """Génère le hash subscriber pour Mailchimp"""
-    return hashlib.md5(email.lower().encode()).hexdigest()
+def contact_email(contact):
+    """Email principal d'une personne Copper : son premier email dans le périmètre"""
+    return primary_email(contact, in_scope)
+
+def is_selected_person(contact):
+    """Personne Copper à récupérer : au moins un de ses emails est sélectionné"""
+    return any(is_selected(email) for email in person_emails(contact))
+
+def find_member(contact, mc_by_email):
+    """Membre Mailchimp d'une personne Copper, quel que soit l'email inscrit (principal d'abord)"""
+    member = mc_by_email.get(contact_email(contact))
+    if member is None:
+        for email in person_emails(contact):
+            member = mc_by_email.get(email)
+            if member is not None:
+                break
+    return member
+
+def scope_restricted():
+    """Un périmètre explicite (motifs autorisés ou exclusions) est configuré"""
+    return bool(SCOPE_PATTERNS or SCOPE_EXCLUDE or SCOPE_EXCLUDE_FILE)
+
+def scope_label():
+    """Libellé du périmètre pour les logs et le rapport"""
+    patterns = SCOPE_PATTERNS or ((TEST_DOMAIN,) if TEST_MODE else ())
+    label = f"{', '.join(patterns)} uniquement" if patterns else "toute la base"
+    exclusions = list(SCOPE_EXCLUDE) + ([os.path.basename(SCOPE_EXCLUDE_FILE)] if SCOPE_EXCLUDE_FILE else [])
+    return f"{label}, sauf {', '.join(exclusions)}" if exclusions else label
+
+def request_labels(url):
+    """API (copper, mailchimp) et gabarit de chemin d'une URL, pour les métriques"""
+    for api, base in (("copper", COPPER_API_URL), ("mailchimp", MC_BASE)):
+        if url.startswith(base):
+            return api, endpoint_template(url[len(base):])
+    return "other", endpoint_template(urlsplit(url).path)
+
+def spend_call(api):
+    """Compte une tentative dans le budget d'appels de l'exécution ; BudgetExhausted si la limite est atteinte"""
+    call_budget.spend(api, call_limits().get(api))
+
+def record_request(api, method, endpoint, status, elapsed):
+    """Enregistre une tentative de requête HTTP (latence, statut, 429) dans METRICS"""
+    METRICS.observe("sync_http_request_duration_seconds", elapsed, api=api, method=method, endpoint=endpoint)
+    METRICS.inc("sync_http_requests_total", api=api, method=method, endpoint=endpoint, status=status)
+    if status == 429:
+        METRICS.inc("sync_http_rate_limited_total", api=api)
+
+def trace_call(api, method, endpoint, status, size, attempts, elapsed):
+    """Trace d'un appel HTTP terminé (toutes tentatives) : statistiques par endpoint, log DEBUG ou appel lent"""
+    request_stats.record(api, method, endpoint, status, size, attempts, elapsed)
+    details = (f"{method} {api} {endpoint} → {status} en {elapsed * 1000:.0f} ms "
+               f"({attempts} tentative(s), {size} octets)")
+    if SLOW_REQUEST_SECONDS and elapsed >= SLOW_REQUEST_SECONDS:
+        log(f"🐢 Appel lent: {details}", "WARNING")
+    else:
+        log(f"🌐 {details}", "DEBUG")
 
 def safe_request(func, *args, **kwargs):
-    """Wrapper pour les requêtes avec retry"""
-    max_retries = 2
-    retry_delay = 0.5
+    """Wrapper pour les requêtes avec retry
+    
+    Chaque tentative est comptée dans le budget d'appels (BudgetExhausted, sans
+    envoi, une fois la limite atteinte) et mesurée dans METRICS ; l'appel complet
+    (statut final, taille, tentatives, latence retries compris) est tracé par trace_call.
+    """
+    max_retries = MAX_RETRIES
+    retry_delay = RETRY_DELAY
+    api, endpoint = request_labels(args[0]) if args else ("other", "")
+    method = getattr(func, "__name__", "request").upper()
+    call_started = time.perf_counter()
     
     for attempt in range(max_retries):
+        spend_call(api)
+        if api == "copper":
+            # Chaque tentative (retries compris) passe par le limiteur de débit Copper
+            copper_rate_limiter().acquire()
+        started = time.perf_counter()
         try:
-            response = func(*args, **kwargs)
+            with requests_in_flight:
+                response = func(*args, **kwargs)
+            record_request(api, method, endpoint, response.status_code, time.perf_counter() - started)
             response.raise_for_status()
+            trace_call(api, method, endpoint, response.status_code, len(response.content), attempt + 1,
+                       time.perf_counter() - call_started)
             return response
         except requests.exceptions.RequestException as e:
+            if e.response is None:
+                # Pas de réponse (connexion, délai) : tentative comptée sans statut HTTP
+                record_request(api, method, endpoint, "error", time.perf_counter() - started)
             if attempt == max_retries - 1:
+                status = e.response.status_code if e.response is not None else "error"
+                trace_call(api, method, endpoint, status, 0, max_retries, time.perf_counter() - call_started)
                 log(f"Échec définitif après {max_retries} tentatives: {e}", "ERROR")
                 raise
+            METRICS.inc("sync_http_retries_total", api=api)
             log(f"Tentative {attempt + 1} échouée: {e}. Retry dans {retry_delay}s", "WARNING")
             time.sleep(retry_delay)
 
-def get_target_copper_contacts():
-    """Récupère seulement les contacts Copper avec emails @exemple (optimisé)"""
-    log("🔄 Récupération des contacts Copper cibles (@exemple)...", "INFO")
+def load_sync_state():
+    """Charge l'état persistant des exécutions (date de la dernière exécution réussie)"""
+    if not os.path.exists(SYNC_STATE_FILE):
+        return {}
+    try:
+        with open(SYNC_STATE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        log(f"⚠️ Fichier d'état illisible ({SYNC_STATE_FILE}): {e} - parcours complet", "WARNING")
+        return {}
+
+def save_sync_state(state):
+    """Écrit l'état persistant des exécutions"""
+    with open(SYNC_STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+def delta_since():
+    """Début de la fenêtre delta (timestamp Unix), ou None pour un parcours complet"""
+    if FETCH_MODE != "delta":
+        return None
+    last_success = load_sync_state().get("last_success")
+    if last_success is None:
+        log("⚠️ Mode delta sans exécution réussie enregistrée - parcours complet", "WARNING")
+        return None
+    return max(0, int(last_success) - DELTA_OVERLAP)
+
+def record_successful_run(started_at):
+    """Enregistre le début de l'exécution comme point de départ du prochain delta"""
+    if count_errors(operation_details):
+        log("⚠️ Opérations en échec : la fenêtre delta n'est pas avancée", "WARNING")
+        return
+    if call_budget.deferred or call_budget.exhausted:
+        log("⏳ Opérations reportées (budget d'appels) : la fenêtre delta n'est pas avancée", "WARNING")
+        return
+    state = load_sync_state()
+    state["last_success"] = int(started_at)
+    save_sync_state(state)
+
+def copper_search_payload(page, since=None):
+    """Payload de recherche Copper (filtré sur la date de modification en mode delta)"""
+    payload = {"page_number": page, "page_size": COPPER_PAGE_SIZE}
+    if since is not None:
+        payload["minimum_modified_date"] = since
+    return payload
+
+def mailchimp_members_params(offset, since=None):
+    """Paramètres de pagination des membres Mailchimp (filtrés sur la dernière modification en delta)"""
+    params = {"offset": offset, "count": MAILCHIMP_PAGE_SIZE, "status": "subscribed"}
+    if since is not None:
+        params["since_last_changed"] = datetime.fromtimestamp(since, timezone.utc).isoformat()
+    return params
+
+def get_target_copper_contacts(since=None):
+    """Récupère seulement les contacts Copper du périmètre (modifiés depuis since en delta)"""
+    log(f"🔄 Récupération des contacts Copper cibles ({scope_label()})...", "INFO")
     contacts = []
     page = 1
     
     while True:
         url = f"{COPPER_API_URL}/people/search"
-        payload = {"page_number": page, "page_size": 200}
+        payload = copper_search_payload(page, since)
         
-        response = safe_request(requests.post, url, headers=COPPER_HEADERS, json=payload)
+        response = safe_request(requests.post, url, headers=COPPER_HEADERS, json=payload, timeout=REQUEST_TIMEOUT)
         data = response.json()
         
         if not data:
             break
         
-        # Filtrer immédiatement les contacts avec @exemple
+        # Filtrer immédiatement les contacts hors périmètre (seuls les champs utiles sont gardés)
         target_contacts = []
         for contact in data:
-            emails = contact.get("emails", [])
-            if emails and is_target_email(emails[0]["email"]):
-                target_contacts.append(contact)
+            if is_selected_person(contact):
+                target_contacts.append(CopperPerson.from_api(contact))
         
         contacts.extend(target_contacts)
         log(f"   Page {page}: +{len(target_contacts)} contacts cibles (Total: {len(contacts)})", "INFO")
         
-        if len(data) < 200:
+        if len(data) < COPPER_PAGE_SIZE:
             break
             
         page += 1
@@ -210,22 +619,26 @@ def get_target_copper_contacts():
     log(f"✅ {len(contacts)} contacts Copper cibles récupérés", "SUCCESS")
     return contacts
 
-def sync_contact_to_mailchimp(contact, tags_to_sync=None, existing_member=None):
+def sync_contact_to_mailchimp(contact, tags_to_sync=None, existing_member=None, audience=None):
     """Synchronise un contact vers Mailchimp avec ses tags (optimisé avec vérification)"""
-    emails = contact.get("emails", [])
-    if not emails:
+    if not contact.get("emails"):
         return False
     
-    email = emails[0]["email"]
+    # L'adresse déjà inscrite dans Mailchimp, sinon l'email principal
+    email = (existing_member or {}).get("email_address") or contact_email(contact)
     first_name = contact.get("first_name", "")
     last_name = contact.get("last_name", "")
     
     # Vérifier si les données sont identiques (pas besoin de synchroniser)
     if existing_member:
         if contacts_are_identical(contact, existing_member):
-            log(f"⏭️ Contact identique ignoré: {email}", "INFO")
+            log(f"⏭️ Contact identique ignoré: {email}", "INFO", email=email)
             return False  # Pas de synchronisation nécessaire
     
+    return push_mailchimp_member(email, first_name, last_name, tags_to_sync, audience)
+
+def push_mailchimp_member(email, first_name, last_name, tags_to_sync=None, audience=None):
+    """Écrit un abonné Mailchimp (PUT du membre puis POST de ses tags), sans vérification préalable"""
     # Préparer les tags pour Mailchimp
     mailchimp_tags = []
     if tags_to_sync:
@@ -244,42 +657,220 @@ def sync_contact_to_mailchimp(contact, tags_to_sync=None, existing_member=None):
         }
     }
     
+    list_id = audience.list_id if audience else MC_LIST_ID
+    direction = mailchimp_direction(audience)
+    
     try:
         subscriber_hash = get_subscriber_hash(email)
-        url = f"{MC_BASE}/lists/{MC_LIST_ID}/members/{subscriber_hash}"
+        url = f"{MC_BASE}/lists/{list_id}/members/{subscriber_hash}"
         
         # Synchroniser le contact
-        response = safe_request(requests.put, url, auth=MC_AUTH, json=mailchimp_data)
+        response = safe_request(requests.put, url, auth=MC_AUTH, json=mailchimp_data, timeout=REQUEST_TIMEOUT)
         
         # Synchroniser les tags si fournis
         if mailchimp_tags:
-            tags_url = f"{MC_BASE}/lists/{MC_LIST_ID}/members/{subscriber_hash}/tags"
+            tags_url = f"{MC_BASE}/lists/{list_id}/members/{subscriber_hash}/tags"
             tags_payload = {"tags": mailchimp_tags}
             
-            tag_response = safe_request(requests.post, tags_url, auth=MC_AUTH, json=tags_payload)
-            log(f"✅ Synchronisé avec tags: {email} ({len(mailchimp_tags)} tags)", "SUCCESS")
+            tag_response = safe_request(requests.post, tags_url, auth=MC_AUTH, json=tags_payload, timeout=REQUEST_TIMEOUT)
+            log(f"✅ Synchronisé avec tags: {email} ({len(mailchimp_tags)} tags)", "SUCCESS", email=email)
         else:
-            log(f"✅ Synchronisé: {email}", "SUCCESS")
+            log(f"✅ Synchronisé: {email}", "SUCCESS", email=email)
         
-        add_operation_detail(email, f"{first_name} {last_name}", "Copper → Mailchimp", success=True, tags=tags_to_sync)
+        add_operation_detail(email, f"{first_name} {last_name}", direction, success=True, tags=tags_to_sync)
         return True
         
     except Exception as e:
-        log(f"❌ Erreur sync {email}: {e}", "ERROR")
-        add_operation_detail(email, f"{first_name} {last_name}", "Copper → Mailchimp", success=False, error=str(e))
+        log(f"❌ Erreur sync {email}: {e}", "ERROR", email=email)
+        add_operation_detail(email, f"{first_name} {last_name}", direction, success=False, error=str(e))
         return False
 
-def handle_marked_contacts(marked_contacts):
-    """Gère les contacts marqués pour suppression"""
+def parse_marked_policy(spec):
+    """Analyse une politique déclarative, ex. "delete:90,archive:7,defer" → [(action, âge min en jours)]"""
+    rules = []
+    for part in str(spec).split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        action, _, min_age = part.partition(":")
+        if action not in MARKED_ACTIONS:
+            raise ConfigError(f"Valeur invalide pour marked_policy: {spec!r} (action inconnue '{action}')")
+        try:
+            min_age = float(min_age) if min_age else 0.0
+        except ValueError:
+            raise ConfigError(f"Valeur invalide pour marked_policy: {spec!r} (âge en jours attendu, reçu '{min_age}')")
+        if min_age < 0:
+            raise ConfigError(f"Valeur invalide pour marked_policy: {spec!r} (âge négatif pour '{action}')")
+        rules.append((action, min_age))
+    if not rules:
+        raise ConfigError(f"Valeur invalide pour marked_policy: {spec!r} (aucune règle)")
+    return rules
+
+def load_marked_queue():
+    """Charge la file des contacts marqués en attente (copper_id → entrée)"""
+    if not os.path.exists(MARKED_QUEUE_FILE):
+        return {}
+    try:
+        with open(MARKED_QUEUE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        log(f"⚠️ File des contacts marqués illisible ({MARKED_QUEUE_FILE}): {e}", "WARNING")
+        return {}
+
+def save_marked_queue(queue):
+    """Enregistre la file des contacts marqués en attente"""
+    with open(MARKED_QUEUE_FILE, "w", encoding="utf-8") as f:
+        json.dump(queue, f, ensure_ascii=False, indent=2)
+
+def decide_marked_actions(marked_contacts, rules, queue, now=None):
+    """Applique la politique : renvoie {action: [contacts]} selon l'âge du marquage"""
+    now = now if now is not None else time.time()
+    decisions = {action: [] for action in MARKED_ACTIONS}
+    
+    for contact in marked_contacts:
+        entry = queue.get(str(contact["copper_id"]))
+        first_seen = entry["first_seen"] if entry else now
+        age_days = (now - first_seen) / 86400
+        
+        # Première règle dont l'âge minimal est atteint ; sinon le contact reste en file
+        action = next((action for action, min_age in rules if age_days >= min_age), "defer")
+        contact["first_seen"] = first_seen
+        contact["action"] = action
+        decisions[action].append(contact)
+    
+    return decisions
+
+def plan_marked_contacts(marked_contacts, policy=None):
+    """Décide l'action de chaque contact marqué sans rien exécuter (clés "action" et "first_seen")
+    
+    En politique interactive la décision revient à l'utilisateur au moment de l'application.
+    """
+    policy = policy or MARKED_POLICY
+    if policy == "interactive":
+        for contact in marked_contacts:
+            contact["action"] = "interactive"
+        return
+    decide_marked_actions(marked_contacts, parse_marked_policy(policy), load_marked_queue())
+
+def unmarked_queue_ids(copper_contacts):
+    """copper_id en file relus par cette exécution sans tag de suppression (à retirer de la file)
+    
+    En récupération delta, les contacts en file non relus n'y figurent pas et y restent.
+    """
+    queue = load_marked_queue()
+    if not queue:
+        return []
+    return sorted(str(contact.get("id")) for contact in copper_contacts
+                  if str(contact.get("id")) in queue and get_contact_status(contact.get("tags", []))[0] != "marked")
+
+def update_marked_queue(marked_contacts, processed=(), unmarked_ids=()):
+    """Fusionne les contacts marqués de l'exécution dans la file existante
+    
+    Les entrées déjà en file gardent leur date de première détection ; seuls les
+    contacts traités, ignorés ou relus sans tag de suppression quittent la file.
+    """
+    queue = load_marked_queue()
+    for copper_id in unmarked_ids:
+        queue.pop(str(copper_id), None)
+    
+    for contact in marked_contacts:
+        copper_id = str(contact["copper_id"])
+        # Tags rechargés par le contrôle optimiste : le tag de suppression a été retiré
+        unmarked = contact.get("tags") is not None and get_contact_status(contact["tags"])[0] != "marked"
+        if contact.get("action") == "ignore" or copper_id in processed or unmarked:
+            queue.pop(copper_id, None)
+            continue
+        first_seen = queue.get(copper_id, {}).get("first_seen", contact.get("first_seen", time.time()))
+        queue[copper_id] = {
+            "email": contact["email"],
+            "name": contact["name"],
+            "detected_tag": contact["detected_tag"],
+            "first_seen": first_seen
+        }
+    
+    save_marked_queue(queue)
+    return queue
+
+def handle_marked_contacts(marked_contacts, archive_func=None, delete_func=None, policy=None, decided=False,
+                           unmarked_ids=()):
+    """Gère les contacts marqués pour suppression selon la politique (interactive ou déclarative)
+    
+    decided : actions déjà décidées par plan_marked_contacts (application d'un plan) ;
+    unmarked_ids : contacts en file relus sans tag de suppression (unmarked_queue_ids).
+    """
+    policy = policy or MARKED_POLICY
+    
     if not marked_contacts:
         log("✅ Aucun contact marqué pour suppression", "SUCCESS")
+        if unmarked_ids:
+            update_marked_queue([], unmarked_ids=unmarked_ids)
         return
     
     log(f"⚠️ {len(marked_contacts)} contact(s) marqué(s) pour suppression détecté(s)", "WARNING")
     
     # Affichage des contacts
     for i, contact in enumerate(marked_contacts, 1):
-        log(f"   {i}. {contact['email']} - {contact['name']} (Tag: '{contact['detected_tag']}')", "INFO")
+        log(f"   {i}. {contact['email']} - {contact['name']} (Tag: '{contact['detected_tag']}')", "INFO", email=contact['email'])
+    
+    if decided and any(contact.get("action") == "interactive" for contact in marked_contacts):
+        decided, policy = False, "interactive"
+    
+    if policy == "interactive" and not decided:
+        try:
+            handle_marked_contacts_interactive(marked_contacts, archive_func, delete_func)
+            if unmarked_ids:
+                update_marked_queue([], unmarked_ids=unmarked_ids)
+            return
+        except EOFError:
+            # Pas de terminal (cron) : ne jamais bloquer, les contacts restent en file
+            log("⚠️ Aucune entrée interactive disponible - contacts mis en file d'attente", "WARNING")
+            policy = "defer"
+    
+    if decided:
+        policy = "plan"
+        decisions = {action: [c for c in marked_contacts if c["action"] == action] for action in MARKED_ACTIONS}
+    else:
+        queue = load_marked_queue()
+        decisions = decide_marked_actions(marked_contacts, parse_marked_policy(policy), queue)
+    
+    for action in MARKED_ACTIONS:
+        if decisions[action]:
+            METRICS.inc("sync_marked_contacts_total", len(decisions[action]), action=action)
+    log(f"📋 Politique '{policy}': {len(decisions['archive'])} à archiver, {len(decisions['delete'])} à supprimer, "
+        f"{len(decisions['defer'])} en attente, {len(decisions['ignore'])} ignoré(s)", "INFO")
+    
+    if archive_func or delete_func:
+        # Actions unitaires fournies : seules celles qui renvoient un succès quittent la file
+        processed = set()
+        for contact in decisions["archive"]:
+            if (archive_func or archive_contact)(contact):
+                processed.add(str(contact["copper_id"]))
+        for contact in decisions["delete"]:
+            if (delete_func or delete_contact)(contact):
+                processed.add(str(contact["copper_id"]))
+    else:
+        processed = set()
+        if decisions["archive"]:
+            log(f"🔄 Archivage en masse de {len(decisions['archive'])} contact(s)...", "INFO")
+            processed |= archive_contacts_bulk(decisions["archive"])
+        if decisions["delete"]:
+            log(f"🔄 Suppression en masse de {len(decisions['delete'])} contact(s)...", "INFO")
+            processed |= delete_contacts_bulk(decisions["delete"])
+    
+    # File fusionnée : les contacts en file non relus (récupération delta) y restent
+    new_queue = update_marked_queue(marked_contacts, processed, unmarked_ids)
+    
+    if new_queue:
+        log(f"📥 {len(new_queue)} contact(s) marqué(s) en file d'attente ({MARKED_QUEUE_FILE})", "INFO")
+
+def handle_marked_contacts_interactive(marked_contacts, archive_func=None, delete_func=None):
+    """Mode interactif (opt-in) : demande l'action à l'utilisateur"""
+    archive_func = archive_func or archive_contact
+    delete_func = delete_func or delete_contact
+    
+    def still_marked(contacts):
+        # Contrôle optimiste au moment d'archiver (la réponse peut arriver longtemps après la lecture)
+        return refresh_stale_marked_contacts(contacts) if ARCHIVE_CONCURRENCY_CHECK else contacts
     
     choice = input("\n🤔 Que voulez-vous faire ? (t=traiter un par un, g=traiter en groupe, i=ignorer): ").lower()
     
@@ -289,104 +880,333 @@ def handle_marked_contacts(marked_contacts):
         action = input("Action pour tous (a=archiver, s=supprimer): ").lower()
         if action == "a":
             log("🔄 Archivage en cours...", "INFO")
-            for contact in marked_contacts:
-                archive_contact(contact)
+            for contact in still_marked(marked_contacts):
+                archive_func(contact)
         elif action == "s":
             log("🔄 Suppression en cours...", "INFO")
             for contact in marked_contacts:
-                delete_contact(contact)
+                delete_func(contact)
     elif choice == "t":
         for contact in marked_contacts:
             print(f"\n📧 Contact: {contact['email']} - {contact['name']}")
             action = input("Action (a=archiver, s=supprimer, i=ignorer): ").lower()
             if action == "a":
-                archive_contact(contact)
+                for fresh_contact in still_marked([contact]):
+                    archive_func(fresh_contact)
             elif action == "s":
-                delete_contact(contact)
+                delete_func(contact)
+
+def build_archived_tags(tags):
+    """Remplace les tags de suppression par le tag "📥 INACTIF" """
+    archived_tags = [tag for tag in tags if not is_delete_tag_robust(str(tag))]
+    if "📥 INACTIF" not in archived_tags:
+        archived_tags.append("📥 INACTIF")
+    return archived_tags
+
+def archive_in_copper(contact):
+    """Remplace le tag de suppression par le tag "📥 INACTIF" dans Copper"""
+    copper_url = f"{COPPER_API_URL}/people/{contact['copper_id']}"
+    
+    tags = contact.get("tags")
+    if tags is None:
+        # Entrée sans données Copper : récupérer le contact pour conserver ses tags
+        response = safe_request(requests.get, copper_url, headers=COPPER_HEADERS, timeout=REQUEST_TIMEOUT)
+        tags = response.json().get("tags", [])
+    
+    # Mettre à jour le contact dans Copper (une seule écriture)
+    safe_request(requests.put, copper_url, headers=COPPER_HEADERS, json={"tags": build_archived_tags(tags)},
+                 timeout=REQUEST_TIMEOUT)
+
+def refresh_stale_marked_contacts(contacts):
+    """Contrôle optimiste : relit les contacts marqués et repère ceux modifiés depuis leur récupération
+    
+    Renvoie les contacts encore marqués, avec tags et date_modified à jour pour ceux
+    modifiés entre-temps ; ceux dont le tag de suppression a été retiré sont écartés.
+    """
+    emails = sorted({c["email"] for c in contacts if c.get("date_modified") is not None})
+    if not emails:
+        return contacts
+    
+    # Recherche par lots d'emails des seuls contacts marqués, au lieu d'un GET par contact
+    fresh = {}
+    for i in range(0, len(emails), COPPER_PAGE_SIZE):
+        for person in search_copper_people(emails[i:i + COPPER_PAGE_SIZE]):
+            fresh[str(person.get("id"))] = person
+    
+    still_marked = []
+    for contact in contacts:
+        person = fresh.get(str(contact["copper_id"]))
+        if person and person.get("date_modified") != contact.get("date_modified"):
+            contact["tags"] = list(person.get("tags", []))
+            contact["date_modified"] = person.get("date_modified")
+            if get_contact_status(contact["tags"])[0] != "marked":
+                log(f"⚠️ {contact['email']} modifié depuis la récupération et plus marqué - archivage annulé", "WARNING", email=contact['email'])
+                continue
+            log(f"ℹ️ {contact['email']} modifié depuis la récupération - tags rechargés", "INFO", email=contact['email'])
+        still_marked.append(contact)
+    
+    return still_marked
+
+# Direction des opérations du rapport pour les actions sur les contacts marqués
+MARKED_DIRECTIONS = {"archive": "Archivage (contact marqué)", "delete": "Suppression (contact marqué)"}
+
+def record_marked_failure(contact, action, error):
+    """Action en échec sur un contact marqué : opération en erreur dans le rapport (la fenêtre delta n'avance pas)"""
+    add_operation_detail(contact["email"], contact.get("name", ""), MARKED_DIRECTIONS[action],
+                         success=False, error=str(error))
 
 def archive_contact(contact):
-    """Archive un contact (statut Inactif dans Copper + désabonnement Mailchimp)"""
+    """Archive un contact (statut Inactif dans Copper + désabonnement Mailchimp), renvoie True si réussi"""
     try:
         email = contact["email"]
-        copper_id = contact["copper_id"]
         
         # 1. Marquer comme inactif dans Copper (ajout d'un tag)
-        copper_url = f"{COPPER_API_URL}/people/{copper_id}"
+        archive_in_copper(contact)
         
-        # Récupérer le contact actuel pour conserver ses tags existants
-        response = safe_request(requests.get, copper_url, headers=COPPER_HEADERS)
-        current_contact = response.json()
-        
-        # Ajouter le tag "📥 INACTIF" aux tags existants
-        existing_tags = current_contact.get("tags", [])
-        if "📥 INACTIF" not in existing_tags:
-            existing_tags.append("📥 INACTIF")
-        
-        # Supprimer le tag de suppression et ajouter le tag inactif
-        existing_tags = [tag for tag in existing_tags if not is_delete_tag_robust(str(tag))]
-        existing_tags.append("📥 INACTIF")
-        
-        # Mettre à jour le contact dans Copper
-        update_payload = {"tags": existing_tags}
-        response = safe_request(requests.put, copper_url, headers=COPPER_HEADERS, json=update_payload)
-        
-        # 2. Désabonner de Mailchimp
+        # 2. Désabonner de Mailchimp (chaque audience concernée)
         subscriber_hash = get_subscriber_hash(email)
-        mc_url = f"{MC_BASE}/lists/{MC_LIST_ID}/members/{subscriber_hash}"
-        
-        response = safe_request(requests.patch, mc_url, auth=MC_AUTH, 
-                              json={"status": "unsubscribed"})
+        for audience in audiences_for(contact):
+            mc_url = f"{MC_BASE}/lists/{audience.list_id}/members/{subscriber_hash}"
+            response = safe_request(requests.patch, mc_url, auth=MC_AUTH, 
+                                  json={"status": "unsubscribed"}, timeout=REQUEST_TIMEOUT)
         
-        log(f"✅ Contact {email} archivé (Inactif dans Copper + désabonné Mailchimp)", "SUCCESS")
+        log(f"✅ Contact {email} archivé (Inactif dans Copper + désabonné Mailchimp)", "SUCCESS", email=email)
+        return True
     except Exception as e:
-        log(f"❌ Erreur archivage {contact['email']}: {e}", "ERROR")
+        log(f"❌ Erreur archivage {contact['email']}: {e}", "ERROR", email=contact['email'])
+        record_marked_failure(contact, "archive", e)
+        return False
 
 def delete_contact(contact):
-    """Supprime un contact (Copper + Mailchimp)"""
+    """Supprime un contact (Copper + Mailchimp), renvoie True si réussi"""
     try:
         email = contact["email"]
         
-        # Supprimer de Mailchimp
+        # Supprimer de Mailchimp (chaque audience concernée)
         subscriber_hash = get_subscriber_hash(email)
-        url = f"{MC_BASE}/lists/{MC_LIST_ID}/members/{subscriber_hash}"
-        response = safe_request(requests.delete, url, auth=MC_AUTH)
+        for audience in audiences_for(contact):
+            url = f"{MC_BASE}/lists/{audience.list_id}/members/{subscriber_hash}"
+            response = safe_request(requests.delete, url, auth=MC_AUTH, timeout=REQUEST_TIMEOUT)
         
         # Supprimer de Copper
         copper_url = f"{COPPER_API_URL}/people/{contact['copper_id']}"
-        response = safe_request(requests.delete, copper_url, headers=COPPER_HEADERS)
+        response = safe_request(requests.delete, copper_url, headers=COPPER_HEADERS, timeout=REQUEST_TIMEOUT)
         
-        log(f"✅ Contact {email} supprimé (Copper + Mailchimp)", "SUCCESS")
+        log(f"✅ Contact {email} supprimé (Copper + Mailchimp)", "SUCCESS", email=email)
+        return True
     except Exception as e:
-        log(f"❌ Erreur suppression {contact['email']}: {e}", "ERROR")
+        log(f"❌ Erreur suppression {contact['email']}: {e}", "ERROR", email=contact['email'])
+        record_marked_failure(contact, "delete", e)
+        return False
 
-def get_target_mailchimp_contacts():
-    """Récupère seulement les contacts Mailchimp avec emails @exemple (optimisé)"""
-    log("🔄 Récupération des contacts Mailchimp cibles (@exemple)...", "INFO")
+def run_copper_writes(func, contacts):
+    """Exécute une écriture Copper par contact sur le pool borné ; renvoie les copper_id réussis"""
+    def worker(contact):
+        try:
+            func(contact)
+            return True
+        except Exception as e:
+            log(f"❌ Erreur Copper pour {contact['email']}: {e}", "ERROR", email=contact['email'])
+            return False
+    
+    workers = max(1, min(COPPER_WRITE_WORKERS, len(contacts)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(worker, contacts))
+    
+    return {str(contact["copper_id"]) for contact, ok in zip(contacts, results) if ok}
+
+def unsubscribe_mailchimp_bulk(contacts):
+    """Désabonne des membres Mailchimp par lots (POST /lists/{id}, 500 membres par appel)"""
+    failed = set()
+    for audience in get_audiences():
+        members = [c for c in contacts if c.get("tags") is None or audience.accepts(c["tags"])]
+        failed |= unsubscribe_audience_bulk(audience, members)
+    return failed
+
+def unsubscribe_audience_bulk(audience, contacts):
+    """Désabonne par lots les contacts d'une audience, renvoie les emails en échec"""
+    failed = set()
+    url = f"{MC_BASE}/lists/{audience.list_id}"
+    # Un seul désabonnement par abonné (personnes Copper de même email)
+    unique = {}
+    for c in contacts:
+        unique.setdefault(normalize_email(c["email"]), c)
+    contacts = list(unique.values())
+    
+    for start in range(0, len(contacts), MAILCHIMP_BATCH_SIZE):
+        chunk = contacts[start:start + MAILCHIMP_BATCH_SIZE]
+        payload = {
+            "members": [{"email_address": c["email"], "status": "unsubscribed"} for c in chunk],
+            "update_existing": True
+        }
+        try:
+            response = safe_request(requests.post, url, auth=MC_AUTH, json=payload, timeout=REQUEST_TIMEOUT)
+            for error in response.json().get("errors", []):
+                log(f"❌ Erreur désabonnement {error.get('email_address')}: {error.get('error')}", "ERROR")
+                failed.add(normalize_email(error.get("email_address", "")))
+        except Exception as e:
+            log(f"❌ Erreur lot de désabonnement Mailchimp: {e}", "ERROR")
+            failed.update(normalize_email(c["email"]) for c in chunk)
+    
+    return failed
+
+# Suivi des lots Mailchimp (POST /batches est traité en différé côté Mailchimp)
+MAILCHIMP_BATCH_POLL_INTERVAL = 2.0
+MAILCHIMP_BATCH_TIMEOUT = 300.0
+
+def wait_mailchimp_batch(batch_id):
+    """Attend la fin d'un lot Mailchimp (GET /batches/{id}) ; renvoie son état final, None s'il est toujours en cours"""
+    url = f"{MC_BASE}/batches/{batch_id}"
+    deadline = time.monotonic() + MAILCHIMP_BATCH_TIMEOUT
+    while True:
+        batch = safe_request(requests.get, url, auth=MC_AUTH, timeout=REQUEST_TIMEOUT).json()
+        if batch.get("status") == "finished":
+            return batch
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(MAILCHIMP_BATCH_POLL_INTERVAL)
+
+def mailchimp_batch_errors(batch):
+    """operation_id des opérations en échec d'un lot terminé (archive response_body_url : tar.gz de résultats JSON)"""
+    response = safe_request(requests.get, batch["response_body_url"], timeout=REQUEST_TIMEOUT)
+    failed = set()
+    with tarfile.open(fileobj=io.BytesIO(response.content), mode="r:gz") as archive:
+        for member in archive.getmembers():
+            if not member.isfile():
+                continue
+            for result in json.load(archive.extractfile(member)):
+                # 404 : membre déjà absent, la suppression est acquise
+                if result.get("status_code", 200) >= 400 and result.get("status_code") != 404:
+                    failed.add(result.get("operation_id"))
+    return failed
+
+def mailchimp_batch_failures(batch_id, chunk):
+    """Emails en échec d'un lot de suppression soumis : attend sa fin puis lit ses opérations en erreur
+    
+    Lot toujours en cours ou suivi impossible : tout le lot est compté en échec, les
+    contacts restent en file (une nouvelle suppression d'un membre absent est sans effet).
+    """
+    every = {normalize_email(c["email"]) for c, _ in chunk}
+    try:
+        batch = wait_mailchimp_batch(batch_id)
+        if batch is None:
+            log(f"⚠️ Lot de suppression Mailchimp {batch_id} toujours en cours après "
+                f"{MAILCHIMP_BATCH_TIMEOUT:.0f}s - contacts gardés en file", "WARNING")
+            return every
+        errored = batch.get("errored_operations", 0)
+        failed_ids = mailchimp_batch_errors(batch) if errored else set()
+    except Exception as e:
+        log(f"❌ Suivi du lot de suppression Mailchimp {batch_id} impossible: {e}", "ERROR")
+        return every
+    
+    contacts_by_operation = {operation["operation_id"]: c for c, operation in chunk}
+    failed = {normalize_email(contacts_by_operation[i]["email"]) for i in failed_ids if i in contacts_by_operation}
+    if failed:
+        log(f"⚠️ Lot de suppression Mailchimp {batch_id} terminé: {len(failed)} membre(s) en échec", "WARNING")
+    else:
+        log(f"✅ Lot de suppression Mailchimp {batch_id} terminé ({len(chunk)} membres)", "SUCCESS")
+    return failed
+
+def delete_mailchimp_bulk(contacts):
+    """Supprime des membres Mailchimp via l'API batch (POST /batches), puis suit chaque lot jusqu'à sa fin"""
+    failed = set()
+    url = f"{MC_BASE}/batches"
+    # Une opération par (audience, abonné) : un même lot couvre toutes les audiences,
+    # et deux personnes Copper de même email ne suppriment le membre qu'une fois.
+    # operation_id (le chemin) relie les résultats du lot aux contacts.
+    operations = {}
+    for c in contacts:
+        for audience in audiences_for(c):
+            path = f"/lists/{audience.list_id}/members/{get_subscriber_hash(c['email'])}"
+            operations.setdefault(path, (c, {"method": "DELETE", "path": path, "operation_id": path}))
+    operations = list(operations.values())
+    
+    submitted = []
+    for start in range(0, len(operations), MAILCHIMP_BATCH_SIZE):
+        chunk = operations[start:start + MAILCHIMP_BATCH_SIZE]
+        payload = {"operations": [operation for _, operation in chunk]}
+        try:
+            response = safe_request(requests.post, url, auth=MC_AUTH, json=payload, timeout=REQUEST_TIMEOUT)
+            batch_id = response.json().get("id")
+            log(f"📦 Lot de suppression Mailchimp soumis: {batch_id} ({len(chunk)} membres)", "INFO")
+            submitted.append((batch_id, chunk))
+        except Exception as e:
+            log(f"❌ Erreur lot de suppression Mailchimp: {e}", "ERROR")
+            failed.update(normalize_email(c["email"]) for c, _ in chunk)
+    
+    # Lots soumis d'abord, suivis ensuite : Mailchimp les traite en parallèle
+    for batch_id, chunk in submitted:
+        failed |= mailchimp_batch_failures(batch_id, chunk)
+    
+    return failed
+
+def record_bulk_failures(contacts, done, failed_emails, action, mailchimp_error, copper_error):
+    """Opérations en erreur pour les contacts d'une action en masse absents de done"""
+    for contact in contacts:
+        if str(contact["copper_id"]) not in done:
+            failed_mailchimp = normalize_email(contact["email"]) in failed_emails
+            record_marked_failure(contact, action, mailchimp_error if failed_mailchimp else copper_error)
+
+def archive_contacts_bulk(contacts):
+    """Archive en masse : désabonnements Mailchimp par lots + mises à jour Copper en parallèle"""
+    if ARCHIVE_CONCURRENCY_CHECK:
+        contacts = refresh_stale_marked_contacts(contacts)
+        if not contacts:
+            return set()
+    
+    failed_emails = unsubscribe_mailchimp_bulk(contacts)
+    archived = run_copper_writes(archive_in_copper, contacts)
+    
+    done = {str(c["copper_id"]) for c in contacts if normalize_email(c["email"]) not in failed_emails} & archived
+    record_bulk_failures(contacts, done, failed_emails, "archive", "désabonnement Mailchimp en échec",
+                         "mise à jour Copper en échec")
+    log(f"✅ {len(done)}/{len(contacts)} contact(s) archivé(s) (Inactif dans Copper + désabonné Mailchimp)", "SUCCESS")
+    return done
+
+def delete_contacts_bulk(contacts):
+    """Supprime en masse : lot Mailchimp suivi jusqu'à sa fin, puis suppressions Copper en parallèle"""
+    failed_emails = delete_mailchimp_bulk(contacts)
+    
+    def delete_in_copper(contact):
+        safe_request(requests.delete, f"{COPPER_API_URL}/people/{contact['copper_id']}", headers=COPPER_HEADERS, timeout=REQUEST_TIMEOUT)
+    
+    # Membre Mailchimp non supprimé : la fiche Copper reste marquée pour la prochaine exécution
+    # (supprimée seule, le membre restant serait recréé dans Copper par Mailchimp → Copper)
+    deleted = run_copper_writes(delete_in_copper,
+                                [c for c in contacts if normalize_email(c["email"]) not in failed_emails])
+    
+    done = {str(c["copper_id"]) for c in contacts if normalize_email(c["email"]) not in failed_emails} & deleted
+    record_bulk_failures(contacts, done, failed_emails, "delete", "suppression Mailchimp en échec",
+                         "suppression Copper en échec")
+    log(f"✅ {len(done)}/{len(contacts)} contact(s) supprimé(s) (Copper + Mailchimp)", "SUCCESS")
+    return done
+
+def get_target_mailchimp_contacts(since=None, audience=None):
+    """Récupère seulement les membres Mailchimp du périmètre (modifiés depuis since en delta)"""
+    audience_info = f" - audience {audience.name}" if audience and len(get_audiences()) > 1 else ""
+    log(f"🔄 Récupération des contacts Mailchimp cibles ({scope_label()}){audience_info}...", "INFO")
+    list_id = audience.list_id if audience else MC_LIST_ID
     members = []
     offset = 0
-    count = 1000
+    count = MAILCHIMP_PAGE_SIZE
     
     while True:
-        url = f"{MC_BASE}/lists/{MC_LIST_ID}/members"
-        params = {
-            "offset": offset,
-            "count": count,
-            "status": "subscribed"
-        }
+        url = f"{MC_BASE}/lists/{list_id}/members"
+        params = mailchimp_members_params(offset, since)
         
-        response = safe_request(requests.get, url, auth=MC_AUTH, params=params)
+        response = safe_request(requests.get, url, auth=MC_AUTH, params=params, timeout=REQUEST_TIMEOUT)
         data = response.json()
         
         batch = data.get("members", [])
         if not batch:
             break
         
-        # Filtrer immédiatement les contacts avec @exemple
+        # Filtrer immédiatement les membres hors périmètre (seuls les champs utiles sont gardés)
         target_members = []
         for member in batch:
             email = member.get("email_address", "")
-            if is_target_email(email):
-                target_members.append(member)
+            if is_selected(email):
+                target_members.append(MailchimpMember.from_api(member))
         
         members.extend(target_members)
         log(f"   Offset {offset}: +{len(target_members)} membres cibles (Total: {len(members)})", "INFO")
@@ -399,9 +1219,165 @@ def get_target_mailchimp_contacts():
     log(f"✅ {len(members)} membres Mailchimp cibles récupérés", "SUCCESS")
     return members
 
-def sync_mailchimp_to_copper(mc_members, copper_contacts_by_email):
-    """Synchronise Mailchimp vers Copper (optimisé)"""
-    synced_count = 0
+class RateLimiter:
+    """Limiteur de débit partagé entre threads (intervalle minimal entre deux requêtes)"""
+    
+    def __init__(self, rate_per_second):
+        self.rate = rate_per_second
+        self.interval = 1.0 / rate_per_second if rate_per_second else 0
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+    
+    def reserve(self):
+        """Réserve le prochain créneau ; renvoie l'attente (secondes) avant de l'utiliser"""
+        if not self.interval:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        return slot - now
+    
+    def acquire(self):
+        """Réserve le prochain créneau et attend qu'il soit atteint"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+_copper_limiter = None
+_copper_limiter_lock = threading.Lock()
+
+def copper_rate_limiter():
+    """Limiteur Copper unique de l'exécution (COPPER_RATE_LIMIT), partagé par safe_request et le moteur asynchrone"""
+    global _copper_limiter
+    with _copper_limiter_lock:
+        if _copper_limiter is None or _copper_limiter.rate != COPPER_RATE_LIMIT:
+            _copper_limiter = RateLimiter(COPPER_RATE_LIMIT)
+        return _copper_limiter
+
+def create_copper_person(member):
+    """Crée une personne Copper à partir d'un membre Mailchimp (exécuté dans un worker)"""
+    email = normalize_email(member.get("email_address", ""))
+    first_name = member.get("merge_fields", {}).get("FNAME", "")
+    last_name = member.get("merge_fields", {}).get("LNAME", "")
+    
+    contact_data = {
+        "name": f"{first_name} {last_name}".strip(),
+        "emails": [{"email": email, "category": "work"}],
+        "first_name": first_name,
+        "last_name": last_name
+    }
+    
+    try:
+        url = f"{COPPER_API_URL}/people"
+        safe_request(requests.post, url, headers=COPPER_HEADERS, json=contact_data, timeout=REQUEST_TIMEOUT)
+        
+        log(f"✅ Nouveau contact créé dans Copper: {email}", "SUCCESS", email=email)
+        return email, f"{first_name} {last_name}", True, None
+        
+    except Exception as e:
+        log(f"❌ Erreur création {email} dans Copper: {e}", "ERROR", email=email)
+        return email, f"{first_name} {last_name}", False, str(e)
+
+# Résultats des recherches d'existence Copper, partagés par les moteurs (vidé à chaque exécution)
+COPPER_LOOKUP_CACHE = CopperLookupCache()
+
+def should_verify_creations(since=None):
+    """Recherche d'existence avant création : toujours, jamais, ou seulement en delta (index partiel)"""
+    if VERIFY_CREATIONS == "auto":
+        return since is not None
+    return VERIFY_CREATIONS == "always"
+
+def copper_email_search_payload(chunk, page):
+    """Payload d'une page de recherche Copper par lot d'emails"""
+    return dict(copper_search_payload(page), emails=chunk)
+
+def search_copper_people(chunk):
+    """Personnes Copper d'un lot d'emails (toutes les pages de la recherche par emails)"""
+    people = []
+    url = f"{COPPER_API_URL}/people/search"
+    page = 1
+    while True:
+        payload = copper_email_search_payload(chunk, page)
+        data = safe_request(requests.post, url, headers=COPPER_HEADERS, json=payload, timeout=REQUEST_TIMEOUT).json()
+        people.extend(data or [])
+        if not data or len(data) < COPPER_PAGE_SIZE:
+            return people
+        page += 1
+
+def search_copper_emails(chunk):
+    """Emails d'un lot trouvés dans Copper"""
+    found = set()
+    for person in search_copper_people(chunk):
+        found.update(person_emails(person))
+    return found
+
+def pending_lookup_chunks(emails):
+    """Lots d'emails absents du cache à rechercher dans Copper (lots de COPPER_PAGE_SIZE)"""
+    pending = COPPER_LOOKUP_CACHE.unknown(emails)
+    chunks = [pending[i:i + COPPER_PAGE_SIZE] for i in range(0, len(pending), COPPER_PAGE_SIZE)]
+    if chunks:
+        log(f"🔎 Vérification de {len(pending)} email(s) dans Copper ({len(chunks)} lot(s), "
+            f"{len(set(emails)) - len(pending)} en cache)", "INFO")
+    return chunks
+
+def record_lookup_results(emails, chunks, results):
+    """Met en cache les emails trouvés par lot ; renvoie (existants, non vérifiés)
+    
+    results : emails trouvés pour chaque lot, ou l'exception d'une recherche en
+    échec (lot non mis en cache, ses emails ne doivent pas être créés).
+    """
+    unverified = set()
+    for chunk, found in zip(chunks, results):
+        if isinstance(found, Exception):
+            log(f"❌ Erreur recherche d'existence Copper ({len(chunk)} emails): {found}", "ERROR")
+            unverified.update(chunk)
+        else:
+            COPPER_LOOKUP_CACHE.record(chunk, found)
+    return COPPER_LOOKUP_CACHE.existing(emails), unverified
+
+def find_existing_copper_emails(emails):
+    """Recherche dans Copper lesquels de ces emails existent déjà
+    
+    Lots d'emails recherchés en parallèle ; seuls les emails absents du cache sont
+    recherchés. Renvoie (existants, non vérifiés).
+    """
+    chunks = pending_lookup_chunks(emails)
+    
+    def search(chunk):
+        try:
+            return search_copper_emails(chunk)
+        except Exception as e:
+            return e
+    
+    results = []
+    if chunks:
+        workers = max(1, min(COPPER_WRITE_WORKERS, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(search, chunks))
+    return record_lookup_results(emails, chunks, results)
+
+def split_verified_creations(to_create, existing, unverified):
+    """Écarte les candidats déjà présents dans Copper ; renvoie (à créer, non vérifiés)"""
+    remaining, blocked = [], []
+    for member in to_create:
+        email = normalize_email(member.get("email_address", ""))
+        if email in existing:
+            continue
+        (blocked if email in unverified else remaining).append(member)
+    return remaining, blocked
+
+def record_blocked_creations(blocked):
+    """Note en échec les créations dont l'existence dans Copper n'a pas pu être vérifiée"""
+    for member in blocked:
+        email = normalize_email(member.get("email_address", ""))
+        name = f"{member.get('merge_fields', {}).get('FNAME', '')} {member.get('merge_fields', {}).get('LNAME', '')}"
+        add_operation_detail(email, name, "Mailchimp → Copper", success=False,
+                             error="Existence dans Copper non vérifiée (recherche en échec)")
+
+def copper_creation_candidates(mc_members, copper_contacts_by_email):
+    """Membres Mailchimp absents de l'index Copper et nommés (candidats à la création), sans appel API"""
+    to_create = []
     
     for member in mc_members:
         email = normalize_email(member.get("email_address", ""))
@@ -409,52 +1385,128 @@ def sync_mailchimp_to_copper(mc_members, copper_contacts_by_email):
         # Vérifier si le contact existe déjà dans Copper
         if email in copper_contacts_by_email:
             continue  # Contact déjà présent
-            
-        # Créer le contact dans Copper
+        
         first_name = member.get("merge_fields", {}).get("FNAME", "")
         last_name = member.get("merge_fields", {}).get("LNAME", "")
         
         if not first_name and not last_name:
             continue  # Skip si pas de nom
-            
-        contact_data = {
-            "name": f"{first_name} {last_name}".strip(),
-            "emails": [{"email": email, "category": "work"}],
-            "first_name": first_name,
-            "last_name": last_name
-        }
         
-        try:
-            url = f"{COPPER_API_URL}/people"
-            response = safe_request(requests.post, url, headers=COPPER_HEADERS, json=contact_data)
-            
-            log(f"✅ Nouveau contact créé dans Copper: {email}", "SUCCESS")
-            add_operation_detail(email, f"{first_name} {last_name}", "Mailchimp → Copper", success=True)
+        to_create.append(member)
+    
+    return to_create
+
+def plan_copper_creations(mc_members, copper_contacts_by_email, verify_existing=False):
+    """Membres Mailchimp à créer dans Copper : renvoie (à créer, bloqués faute de vérification)
+    
+    En mode delta l'index Copper ne contient que les contacts modifiés : verify_existing
+    recherche alors les candidats dans Copper avant de les créer (pas de doublons),
+    par lots parallèles et avec un cache des emails déjà vérifiés. Le moteur
+    asynchrone enchaîne les mêmes étapes, seule la recherche y est asynchrone.
+    """
+    to_create = copper_creation_candidates(mc_members, copper_contacts_by_email)
+    
+    if to_create and verify_existing:
+        existing, unverified = find_existing_copper_emails([normalize_email(m.get("email_address", "")) for m in to_create])
+        return split_verified_creations(to_create, existing, unverified)
+    
+    return to_create, []
+
+def create_copper_people(to_create):
+    """Crée les personnes Copper (pool de workers), renvoie le nombre de créations réussies"""
+    if not to_create:
+        return 0
+    
+    # Copper n'a pas de création en masse : les POST /people sont répartis sur
+    # un pool borné, derrière le limiteur de débit Copper (safe_request). executor.map
+    # conserve l'ordre d'entrée, le rapport reste donc déterministe.
+    workers = max(1, min(COPPER_WRITE_WORKERS, len(to_create)))
+    with progress("Mailchimp → Copper", len(to_create)) as reporter:
+        def create(member):
+            result = create_copper_person(member)
+            reporter.advance()
+            return result
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(create, to_create))
+    
+    synced_count = 0
+    for email, name, success, error in results:
+        add_operation_detail(email, name, "Mailchimp → Copper", success=success, error=error)
+        if success:
+            COPPER_LOOKUP_CACHE.add_existing([email])
             synced_count += 1
-            
-        except Exception as e:
-            log(f"❌ Erreur création {email} dans Copper: {e}", "ERROR")
-            add_operation_detail(email, f"{first_name} {last_name}", "Mailchimp → Copper", success=False, error=str(e))
     
     return synced_count
 
+def sync_mailchimp_to_copper(mc_members, copper_contacts_by_email, verify_existing=False):
+    """Synchronise Mailchimp vers Copper (créations réparties sur un pool de workers)"""
+    to_create, blocked = plan_copper_creations(mc_members, copper_contacts_by_email, verify_existing)
+    record_blocked_creations(blocked)
+    return create_copper_people(to_create)
+
+def write_operation_lines(writer, operations, sinks=()):
+    """Écrit le détail des opérations, une entrée à la fois (rapport texte et sorties structurées)"""
+    for i, operation in enumerate(operations, 1):
+        for sink in sinks:
+            sink.write(i, operation)
+        status_icon = "✅ SUCCÈS" if operation['success'] else "❌ ERREUR"
+        lines = [
+            f"  {i}. {status_icon} | {operation['email']}\n",
+            f"     Direction: {operation['direction']}\n",
+            f"     Nom: {operation['name']}\n"
+        ]
+        if operation.get('tags'):
+            lines.append(f"     Tags synchronisés: {', '.join(operation['tags'])}\n")
+        if not operation['success'] and operation.get('error'):
+            lines.append(f"     Erreur: {operation['error']}\n")
+        lines.append("\n")
+        writer.write("".join(lines))
+
+# Libellés des opérations reportées faute de budget (rapport)
+DEFERRED_LABELS = {"mailchimp_writes": "écritures Mailchimp", "copper_creates": "créations Copper",
+                   "marked": "actions sur contacts marqués"}
+
 def write_import_report(report_data):
-    """Génère le rapport d'importation selon la documentation"""
+    """Génère le rapport d'importation selon la documentation
+    
+    Le rapport est écrit au fil de l'eau (ReportWriter) : les statistiques de
+    l'en-tête viennent des compteurs tenus pendant l'exécution (OperationRecorder),
+    puis chaque opération est écrite sans construire le rapport en mémoire.
+    Les sorties structurées demandées (REPORT_FORMATS) sont écrites dans le même
+    parcours. Renvoie le nom du fichier de rapport.
+    """
+    global report_file
+    open_report_file()
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
-    # Calculer les statistiques
-    total_operations = len(report_data['operations'])
-    success_count = sum(1 for op in report_data['operations'] if op['success'])
-    error_count = total_operations - success_count
+    # Statistiques : compteurs de l'exécution (un seul parcours pour une liste simple)
+    operations = report_data['operations']
+    total_operations = len(operations)
+    error_count = count_errors(operations)
+    success_count = total_operations - error_count
     success_rate = (success_count / total_operations * 100) if total_operations > 0 else 0
     
+    shard_info = ""
+    if report_data.get('shards'):
+        missing = report_data.get('missing_shards')
+        shard_info = f"Shards fusionnés: {', '.join(report_data['shards'])}"
+        shard_info += f" (manquants: {', '.join(missing)})\n" if missing else "\n"
+    elif SHARD:
+        shard_info = f"Shard: {SHARD[0]}/{SHARD[1]}\n"
+    
+    writer = ReportWriter(report_file)
+    # Shard : les opérations partent aussi en JSON Lines, relues au fil de l'eau par l'outil de fusion
+    formats = REPORT_FORMATS + (("jsonl",) if SHARD and "jsonl" not in REPORT_FORMATS else ())
+    sinks = open_sinks(report_filename, formats)
+    
     # En-tête du rapport
-    report_content = f"""================================================================================
+    writer.write(f"""================================================================================
 RAPPORT D'IMPORTATION COPPER ↔ MAILCHIMP
 ================================================================================
 Date: {timestamp}
-Mode: {"TEST (@exemple uniquement)" if TEST_MODE else "PRODUCTION (toute la base)"}
-Total d'opérations: {total_operations}
+Mode: {"TEST" if TEST_MODE else "PRODUCTION"} ({scope_label()})
+{shard_info}Total d'opérations: {total_operations}
 
 ✅ Succès: {success_count}
 ❌ Erreurs: {error_count}
@@ -468,62 +1520,81 @@ STATISTIQUES DÉTAILLÉES:
 • Contacts exclus (inactifs): {report_data['excluded']}
 • Contacts marqués pour suppression: {report_data['marked_for_deletion']}
 
-DÉTAILS DES OPÉRATIONS:
---------------------------------------------------
-"""
+""")
+    
+    # Durée des étapes (l'écriture du rapport elle-même n'y figure pas encore)
+    if report_data.get('phases'):
+        writer.write("DURÉE DES ÉTAPES:\n--------------------------------------------------\n")
+        for name, seconds in report_data['phases'].items():
+            writer.write(f"• {phase_label(name)}: {seconds:.2f}s\n")
+        writer.write("\n")
+    
+    # Appels d'API par endpoint, du plus coûteux au moins coûteux
+    if report_data.get('requests'):
+        writer.write("REQUÊTES API (par appel, retries compris):\n--------------------------------------------------\n")
+        writer.write(format_request_table(report_data['requests']))
+        writer.write("\n")
+    
+    # Budget d'appels : consommé et restant par API, opérations reportées
+    budget = report_data.get('budget')
+    if budget and budget['calls']:
+        writer.write("BUDGET D'APPELS API:\n--------------------------------------------------\n")
+        for api, calls in budget['calls'].items():
+            if calls['limit'] is None:
+                writer.write(f"• {api.capitalize()}: {calls['used']} appel(s) (sans limite)\n")
+            else:
+                writer.write(f"• {api.capitalize()}: {calls['used']} appel(s) sur {calls['limit']}, "
+                             f"{calls['remaining']} restant(s)\n")
+        for kind, count in budget['deferred'].items():
+            writer.write(f"• Reporté à la prochaine exécution ({DEFERRED_LABELS.get(kind, kind)}): {count}\n")
+        for api in budget.get('exhausted', []):
+            writer.write(f"• ⛔ Budget {api.capitalize()} épuisé en cours d'exécution : appels suivants non envoyés\n")
+        writer.write("\n")
+    
+    writer.write("DÉTAILS DES OPÉRATIONS:\n--------------------------------------------------\n")
 
     # Détails des opérations
-    if report_data['operations']:
-        for i, operation in enumerate(report_data['operations'], 1):
-            status_icon = "✅ SUCCÈS" if operation['success'] else "❌ ERREUR"
-            
-            report_content += f"  {i}. {status_icon} | {operation['email']}\n"
-            report_content += f"     Direction: {operation['direction']}\n"
-            report_content += f"     Nom: {operation['name']}\n"
-            
-            if operation.get('tags'):
-                report_content += f"     Tags synchronisés: {', '.join(operation['tags'])}\n"
-            
-            if not operation['success'] and operation.get('error'):
-                report_content += f"     Erreur: {operation['error']}\n"
-            
-            report_content += "\n"
+    if operations:
+        write_operation_lines(writer, operations, sinks)
     else:
-        report_content += "  Aucune opération de synchronisation effectuée.\n\n"
+        writer.write("  Aucune opération de synchronisation effectuée.\n\n")
     
     # Contacts marqués mais non traités
     if report_data['marked_for_deletion'] > 0:
-        report_content += """CONTACTS MARQUÉS POUR SUPPRESSION:
+        writer.write("""CONTACTS MARQUÉS POUR SUPPRESSION:
 --------------------------------------------------
-Les contacts suivants ont été détectés avec des tags de suppression
-mais n'ont pas été traités automatiquement. Utilisez l'interface
-pour les archiver ou supprimer selon vos besoins.
+Les contacts suivants ont été détectés avec des tags de suppression.
+L'action appliquée par la politique (MARKED_POLICY) est indiquée ;
+les contacts en attente restent en file et seront réévalués au
+prochain passage. Le mode interactif reste disponible sur demande.
 
-"""
+""")
         for marked_contact in report_data.get('marked_contacts', []):
-            report_content += f"• {marked_contact['email']} - {marked_contact['name']}\n"
+            writer.write(f"• {marked_contact['email']} - {marked_contact['name']}\n")
             if marked_contact.get('detected_tag'):
-                report_content += f"  Tag détecté: {marked_contact['detected_tag']}\n"
-            report_content += "\n"
+                writer.write(f"  Tag détecté: {marked_contact['detected_tag']}\n")
+            if marked_contact.get('action'):
+                writer.write(f"  Action (politique): {MARKED_ACTION_LABELS[marked_contact['action']]}\n")
+            writer.write("\n")
     
     # Conseils et actions recommandées
-    report_content += """ACTIONS RECOMMANDÉES:
+    writer.write("""ACTIONS RECOMMANDÉES:
 --------------------------------------------------
-"""
+""")
     
     if error_count > 0:
-        report_content += f"• ⚠️ {error_count} erreur(s) détectée(s) - consultez les logs détaillés\n"
+        writer.write(f"• ⚠️ {error_count} erreur(s) détectée(s) - consultez les logs détaillés\n")
     
     if report_data['marked_for_deletion'] > 0:
-        report_content += f"• 🗑️ {report_data['marked_for_deletion']} contact(s) marqué(s) pour suppression - action requise\n"
+        writer.write(f"• 🗑️ {report_data['marked_for_deletion']} contact(s) marqué(s) pour suppression - action requise\n")
     
     if success_count > 0:
-        report_content += f"• ✅ {success_count} contact(s) synchronisé(s) avec succès\n"
+        writer.write(f"• ✅ {success_count} contact(s) synchronisé(s) avec succès\n")
     
     if total_operations == 0:
-        report_content += "• ℹ️ Aucune synchronisation nécessaire - tous les contacts sont à jour\n"
+        writer.write("• ℹ️ Aucune synchronisation nécessaire - tous les contacts sont à jour\n")
     
-    report_content += f"""
+    writer.write(f"""
 FICHIERS GÉNÉRÉS:
 --------------------------------------------------
 • Log détaillé: {log_filename}
@@ -531,165 +1602,678 @@ FICHIERS GÉNÉRÉS:
 
 Pour plus d'informations, consultez DOCUMENTATION.md
 ================================================================================
-"""
+""")
     
-    # Écrire le rapport dans le fichier
-    report_file.write(report_content)
+    # Vider le tampon et fermer le fichier
+    writer.flush()
     report_file.flush()
     report_file.close()
+    report_file = None
+    for sink in sinks:
+        sink.close()
+    
+    if "json" in REPORT_FORMATS:
+        write_run_summary(report_data, error_count, [sink.path for sink in sinks])
+    if SHARD:
+        write_report_summary(report_data, error_count)
     
-    return report_content
+    return report_filename
 
-def main():
-    """Fonction principale avec synchronisation des tags"""
-    start_time = time.time()
+def run_identity():
+    """Shard, mode et périmètre de l'exécution (résumé JSON des shards, plan de synchronisation)"""
+    return {
+        "shard": f"{SHARD[0]}/{SHARD[1]}" if SHARD else None,
+        "mode": "test" if TEST_MODE else "production",
+        "scope": list(SCOPE_PATTERNS),
+        "scope_exclude": list(SCOPE_EXCLUDE) + ([SCOPE_EXCLUDE_FILE] if SCOPE_EXCLUDE_FILE else [])
+    }
+
+def write_run_summary(report_data, error_count, sink_files=()):
+    """Écrit le résumé JSON de l'exécution (--report-formats json) à côté du rapport texte"""
+    summary_filename = sink_path(report_filename, "json")
+    identity = run_identity()
+    if report_data.get('shards'):
+        # Rapport fusionné (synchro.merge_reports) : shards présents et manquants
+        identity.update(shards=report_data['shards'], missing_shards=report_data.get('missing_shards', []))
+    summary = run_summary(
+        report_data, error_count,
+        generated_at=datetime.now().isoformat(timespec="seconds"),
+        **identity,
+        phases=report_data.get('phases', {}),
+        requests=report_data.get('requests', []),
+        budget=report_data.get('budget'),
+        files={"log": log_filename, "report": report_filename, "operations": list(sink_files)}
+    )
+    with open(summary_filename, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2, default=str)
+    return summary_filename
+
+def write_report_summary(report_data, error_count):
+    """Écrit à côté du rapport un résumé JSON du shard, relu par l'outil de fusion (synchro.merge_reports)
     
-    log("🚀 SYNCHRONISATION BIDIRECTIONNELLE COPPER ↔ MAILCHIMP", "INFO")
-    log("=" * 60, "INFO")
+    Les opérations n'y figurent pas : elles sont dans le fichier JSON Lines écrit avec
+    le rapport (operations_file, relatif au résumé), seuls leurs compteurs sont repris.
+    """
+    summary_filename = os.path.splitext(report_filename)[0] + ".json"
+    summary = dict(
+        {key: value for key, value in report_data.items() if key != 'operations'},
+        operations_file=os.path.basename(sink_path(report_filename, "jsonl")),
+        operations_count=len(report_data['operations']),
+        operations_errors=error_count,
+        **run_identity(),
+        generated_at=datetime.now().isoformat(timespec="seconds"),
+        log_file=log_filename,
+        report_file=report_filename
+    )
+    with open(summary_filename, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2, default=str)
+    return summary_filename
+
+def get_contact_status(tags):
+    """Détermine le statut d'un contact Copper à partir de ses tags (marked, inactive ou active)"""
+    for tag_name in tags:
+        if is_delete_tag_robust(str(tag_name)):
+            return "marked", tag_name
+        elif is_inactive_tag(str(tag_name)):
+            return "inactive", None
+    return "active", None
+
+def build_marked_entry(contact, detected_tag):
+    """Construit l'entrée d'un contact marqué pour suppression (None si pas d'email)"""
+    emails = contact.get("emails", [])
+    if not emails:
+        return None
+    return {
+        "email": contact_email(contact),
+        "name": f"{contact.get('first_name', '')} {contact.get('last_name', '')}".strip(),
+        "copper_id": contact.get("id"),
+        "detected_tag": detected_tag,
+        # Données déjà récupérées, réutilisées à l'archivage (pas de GET /people/{id})
+        "tags": list(contact.get("tags", [])),
+        "date_modified": contact.get("date_modified")
+    }
+
+def classify_copper_contacts(copper_contacts):
+    """Répartit les contacts Copper : marqués pour suppression, exclus (compte), actifs à synchroniser
+    
+    Seules les personnes dont l'email principal est sélectionné sont traitées (les
+    autres ne servent qu'à l'index) ; les personnes qui partagent un email sont
+    fusionnées plus tard en une seule écriture (plan_mailchimp_writes).
+    """
+    marked_contacts = []
+    excluded_contacts = 0
+    active_contacts = []
     
-    # Afficher le mode de fonctionnement
+    for contact in copper_contacts:
+        email = contact_email(contact)
+        if not email or not is_selected(email):
+            continue
+        
+        status, detected_tag = get_contact_status(contact.get("tags", []))
+        
+        if status == "marked":
+            # Contact marqué pour suppression
+            marked_entry = build_marked_entry(contact, detected_tag)
+            if marked_entry:
+                marked_contacts.append(marked_entry)
+            excluded_contacts += 1
+        elif status == "inactive":
+            # Contact inactif - exclure de la synchronisation
+            excluded_contacts += 1
+        else:
+            active_contacts.append(contact)
+    
+    return marked_contacts, excluded_contacts, active_contacts
+
+def fetch_audience_members(audiences, since=None):
+    """Récupère les membres de chaque audience (en parallèle s'il y en a plusieurs)"""
+    if len(audiences) == 1:
+        return [get_target_mailchimp_contacts(since, audiences[0])]
+    with ThreadPoolExecutor(max_workers=len(audiences)) as executor:
+        return list(executor.map(lambda audience: get_target_mailchimp_contacts(since, audience), audiences))
+
+def merge_audience_members(members_by_audience):
+    """Membres de toutes les audiences sans doublon (première audience prioritaire)"""
+    merged = {}
+    for members in members_by_audience:
+        for member in members:
+            merged.setdefault(normalize_email(member.get("email_address", "")), member)
+    return list(merged.values())
+
+def coalesce_writes(entries):
+    """Fusionne les écritures d'un même abonné en une seule (contact, tags, membre existant)
+    
+    La personne Copper d'identifiant le plus petit fournit le nom, les tags sont
+    réunis dans l'ordre ; des noms différents sont signalés dans le log.
+    """
+    entries = sorted(entries, key=lambda entry: (entry[0].get("id") is None, entry[0].get("id") or 0))
+    contact, _, _ = entries[0]
+    if len(entries) == 1:
+        return entries[0]
+    
+    tags = list(dict.fromkeys(tag for _, entry_tags, _ in entries for tag in entry_tags))
+    existing_member = next((member for _, _, member in entries if member), None)
+    names = {((c.get("first_name") or "").strip(), (c.get("last_name") or "").strip()) for c, _, _ in entries}
+    ids = ", ".join(str(c.get("id")) for c, _, _ in entries)
+    if len(names) > 1:
+        log(f"⚠️ Données différentes pour un même abonné Mailchimp (personnes Copper {ids}) : "
+            f"nom de la personne {contact.get('id')} retenu", "WARNING")
+    else:
+        log(f"ℹ️ Personnes Copper {ids} fusionnées en une écriture Mailchimp", "INFO")
+    return dict(contact, tags=tags), tags, existing_member
+
+def plan_mailchimp_writes(audience, active_contacts, mc_by_email):
+    """Écritures vers une audience, une seule par abonné (hash de l'email écrit)
+    
+    Renvoie des (contact, tags, membre existant) dans l'ordre des contacts ; les
+    personnes qui visent le même abonné sont fusionnées par coalesce_writes.
+    """
+    groups = {}
+    for contact in active_contacts:
+        tags = contact.get("tags", [])
+        if not audience.accepts(tags):
+            continue
+        existing_member = find_member(contact, mc_by_email)
+        email = (existing_member or {}).get("email_address") or contact_email(contact)
+        groups.setdefault(get_subscriber_hash(email), []).append((contact, tags, existing_member))
+    return [coalesce_writes(entries) for entries in groups.values()]
+
+def build_mailchimp_plan(audiences, active_contacts, members_by_audience):
+    """Écritures Mailchimp de toutes les audiences ; renvoie (écritures, contacts identiques)"""
+    writes = []
+    identical = 0
+    
+    for audience, audience_members in zip(audiences, members_by_audience):
+        _, mc_by_email = build_email_indexes([], audience_members)
+        for contact, tags, existing_member in plan_mailchimp_writes(audience, active_contacts, mc_by_email):
+            if not contact.get("emails"):
+                continue
+            email = (existing_member or {}).get("email_address") or contact_email(contact)
+            if existing_member and contacts_are_identical(contact, existing_member):
+                log(f"⏭️ Contact identique ignoré: {email}", "INFO", email=email)
+                identical += 1
+                continue
+            writes.append({
+                "audience": audience.name,
+                "copper_id": contact.get("id"),
+                "email": email,
+                "first_name": contact.get("first_name", ""),
+                "last_name": contact.get("last_name", ""),
+                "tags": list(tags),
+                "action": "update" if existing_member else "create",
+                "tags_added": tags_added(tags, existing_member)
+            })
+    
+    return writes, identical
+
+def plan_member(entry):
+    """Membre Mailchimp minimal (format de create_copper_person) d'une création Copper du plan"""
+    return {"email_address": entry["email"],
+            "merge_fields": {"FNAME": entry["first_name"], "LNAME": entry["last_name"]}}
+
+def build_sync_plan(started_at, since, audiences, copper_contacts, members_by_audience, copper_by_email):
+    """Planifie l'exécution sans rien écrire : écritures, créations, contacts marqués et coût estimé
+    
+    Le plan est un dict sérialisable en JSON (voir synchro.plan), appliqué par apply_plan.
+    """
+    marked_contacts, excluded_contacts, active_contacts = classify_copper_contacts(copper_contacts)
+    writes, identical_contacts = build_mailchimp_plan(audiences, active_contacts, members_by_audience)
+    to_create, blocked = plan_copper_creations(merge_audience_members(members_by_audience), copper_by_email,
+                                               verify_existing=should_verify_creations(since))
+    plan_marked_contacts(marked_contacts)
+    
+    def creation(member):
+        merge_fields = member.get("merge_fields", {})
+        return {"email": normalize_email(member.get("email_address", "")),
+                "first_name": merge_fields.get("FNAME", ""), "last_name": merge_fields.get("LNAME", "")}
+    
+    plan = dict(
+        version=PLAN_VERSION,
+        created_at=datetime.now().isoformat(timespec="seconds"),
+        started_at=started_at,
+        since=since,
+        **run_identity(),
+        audiences=[{"name": audience.name, "list_id": audience.list_id} for audience in audiences],
+        mailchimp_writes=writes,
+        copper_creates=[creation(member) for member in to_create],
+        copper_blocked=[creation(member) for member in blocked],
+        marked=marked_contacts,
+        unmarked=unmarked_queue_ids(copper_contacts),
+        skipped={"identical": identical_contacts, "excluded": excluded_contacts}
+    )
+    plan["estimate"] = estimate_cost(plan, COPPER_RATE_LIMIT, COPPER_WRITE_WORKERS, MAILCHIMP_BATCH_SIZE)
+    return plan
+
+def log_plan(plan):
+    """Affiche le contenu du plan par type d'opération et son coût estimé"""
+    counts = summarize(plan)
+    estimate = plan["estimate"]
+    blocked = f", {counts['copper_blocked']} bloquée(s) (existence non vérifiée)" if counts["copper_blocked"] else ""
+    log("📋 Plan de synchronisation:", "INFO")
+    log(f"   Mailchimp: {counts['mailchimp_create']} création(s), {counts['mailchimp_update']} mise(s) à jour "
+        f"({counts['tags_added']} tag(s) ajouté(s))", "INFO")
+    log(f"   Copper: {counts['copper_create']} création(s){blocked}", "INFO")
+    log(f"   Contacts marqués: {counts['archive']} à archiver, {counts['delete']} à supprimer, "
+        f"{counts['defer']} en attente", "INFO")
+    log(f"   Ignorés: {counts['identical']} identique(s), {counts['excluded']} exclu(s)", "INFO")
+    log(f"💰 Coût estimé: {estimate['total_calls']} appel(s) API ({estimate['mailchimp_calls']} Mailchimp, "
+        f"{estimate['copper_calls']} Copper), ~{estimate['estimated_seconds']}s", "INFO")
+
+def call_limits():
+    """Quotas d'appels par exécution et par API (0 = sans limite)"""
+    return {"copper": COPPER_CALL_BUDGET, "mailchimp": MAILCHIMP_CALL_BUDGET}
+
+def plan_cost(plan):
+    return estimate_cost(plan, COPPER_RATE_LIMIT, COPPER_WRITE_WORKERS, MAILCHIMP_BATCH_SIZE)
+
+def fit_plan_to_budget(plan):
+    """Réduit le plan au budget d'appels restant ; les opérations qui n'y tiennent pas sont reportées
+    
+    Estimation préalable seulement : chaque tentative reste plafonnée par
+    safe_request (spend_call). Le report empêche la fenêtre delta d'avancer
+    (record_successful_run) : la prochaine exécution relit et reprend ces opérations.
+    """
+    limits = call_limits()
+    if not any(limits.values()):
+        return plan
+    available = call_budget.available(limits)
+    estimate = plan["estimate"]
+    log("💰 Budget d'appels de l'exécution:", "INFO")
+    for api, limit in limits.items():
+        if limit:
+            log(f"   {api.capitalize()}: {call_budget.used.get(api, 0)} consommé(s) sur {limit}, "
+                f"{estimate[f'{api}_calls']} prévu(s) par le plan, {available[api]} disponible(s)", "INFO")
+    
+    fitted, deferred = fit_plan(plan, available, plan_cost)
+    if not any(deferred.values()):
+        log("✅ Le plan tient dans le budget d'appels", "SUCCESS")
+        return plan
+    call_budget.defer(deferred)
+    log(f"⏳ Budget d'appels insuffisant : {deferred['mailchimp_writes']} écriture(s) Mailchimp, "
+        f"{deferred['copper_creates']} création(s) Copper et {deferred['marked']} action(s) sur contacts marqués "
+        f"reportées à la prochaine exécution", "WARNING")
+    return fitted
+
+def log_budget_exhausted(error):
+    """Arrêt propre d'une exécution dont une lecture a épuisé le budget d'appels (pas de traceback)"""
+    log(f"⛔ {error} : exécution arrêtée, la fenêtre delta n'avance pas et la prochaine exécution reprend", "WARNING")
+
+def check_plan(plan):
+    """Vérifie qu'un plan relu a été établi avec le mode, le périmètre et le shard courants (ValueError sinon)"""
+    identity = run_identity()
+    for key, value in identity.items():
+        if plan.get(key) != value:
+            raise ValueError(f"plan établi avec {key}={plan.get(key)!r}, exécution courante {key}={value!r}")
+
+def apply_audience_writes(audience, writes, reporter=NO_PROGRESS):
+    """Exécute les écritures d'une audience dans l'ordre du plan, renvoie le nombre de réussites"""
+    synced = 0
+    for write in writes:
+        if push_mailchimp_member(write["email"], write["first_name"], write["last_name"], write["tags"], audience):
+            synced += 1
+        reporter.advance()
+    return synced
+
+def apply_mailchimp_writes(audiences, writes):
+    """Exécute les écritures Mailchimp du plan (audiences en parallèle, rapport dans l'ordre des audiences)"""
+    by_audience = [[write for write in writes if write["audience"] == audience.name] for audience in audiences]
+    with progress("Copper → Mailchimp", len(writes)) as reporter:
+        if len(audiences) == 1:
+            return apply_audience_writes(audiences[0], by_audience[0], reporter)
+        
+        def apply_buffered(audience, writes):
+            with operation_details.buffered() as details:
+                return apply_audience_writes(audience, writes, reporter), details
+        
+        with ThreadPoolExecutor(max_workers=len(audiences)) as executor:
+            results = list(executor.map(apply_buffered, audiences, by_audience))
+    
+    # Chaque audience écrit séquentiellement dans son tampon : détails versés dans l'ordre des audiences
+    for _, details in results:
+        operation_details.extend(details)
+        details.clear()
+    results = [synced for synced, _ in results]
+    
+    for audience, synced in zip(audiences, results):
+        log(f"   Audience {audience.name}: {synced} synchronisé(s)", "INFO")
+    return sum(results)
+
+def apply_plan(plan):
+    """Exécute un plan (Mailchimp, créations Copper, contacts marqués), renvoie les données du rapport"""
+    audiences_by_name = {audience.name: audience for audience in get_audiences()}
+    audiences = [audiences_by_name.get(a["name"]) or Audience(a["name"], a["list_id"]) for a in plan["audiences"]]
+    plan = fit_plan_to_budget(plan)
+    
+    log("🔄 Synchronisation Copper → Mailchimp...", "INFO")
+    with phase("copper_to_mailchimp"):
+        copper_to_mc_synced = apply_mailchimp_writes(audiences, plan["mailchimp_writes"])
+    
+    log("🔄 Synchronisation Mailchimp → Copper...", "INFO")
+    with phase("mailchimp_to_copper"):
+        record_blocked_creations([plan_member(entry) for entry in plan["copper_blocked"]])
+        mc_to_copper_synced = create_copper_people([plan_member(entry) for entry in plan["copper_creates"]])
+    
+    identical_contacts = plan["skipped"]["identical"]
+    excluded_contacts = plan["skipped"]["excluded"]
+    marked_contacts = plan["marked"]
+    log_sync_results(copper_to_mc_synced, mc_to_copper_synced, identical_contacts,
+                     excluded_contacts, len(marked_contacts))
+    
+    with phase("marked"):
+        handle_marked_contacts(marked_contacts, decided=True, unmarked_ids=plan.get("unmarked", []))
+    
+    return build_report_data(copper_to_mc_synced, mc_to_copper_synced, identical_contacts,
+                             excluded_contacts, marked_contacts)
+
+def build_email_indexes(copper_contacts, mailchimp_members):
+    """Construit les index email → contact pour Copper (tous les emails) et Mailchimp"""
+    copper_by_email = CopperEmailIndex(copper_contacts)
+    mc_by_email = {}
+    
+    for email, ids in copper_by_email.conflicts().items():
+        log(f"⚠️ Email partagé par plusieurs personnes Copper: {email} (ids {', '.join(map(str, ids))})", "WARNING", email=email)
+    
+    for member in mailchimp_members:
+        email = normalize_email(member.get("email_address", ""))
+        mc_by_email[email] = member
+    
+    return copper_by_email, mc_by_email
+
+def log_mode_banner():
+    """Affiche le mode de fonctionnement (TEST ou PRODUCTION)"""
     if TEST_MODE:
-        log(f"🧪 MODE TEST ACTIVÉ - Traitement des emails {TEST_DOMAIN} uniquement", "WARNING")
-        log(f"   Pour passer en mode production, définir TEST_MODE = False", "INFO")
+        log(f"🧪 MODE TEST ACTIVÉ - Traitement des emails {scope_label()}", "WARNING")
+        log(f"   Pour passer en mode production : --mode production (ou SYNC_MODE=production)", "INFO")
+    elif scope_restricted():
+        log(f"🔥 MODE PRODUCTION ACTIVÉ - Périmètre : {scope_label()}", "WARNING")
     else:
         log("🔥 MODE PRODUCTION ACTIVÉ - Traitement de TOUTE la base de données", "WARNING")
         log("   Assurez-vous que c'est bien voulu !", "WARNING")
     
+    if SHARD:
+        log(f"🧩 Shard {SHARD[0]}/{SHARD[1]} - seuls les contacts de cette tranche sont traités", "INFO")
+    
     log("=" * 60, "INFO")
+
+def log_fetch_scope(since=None):
+    """Affiche le périmètre de récupération selon le mode configuré"""
+    if since is not None:
+        window = datetime.fromtimestamp(since).strftime('%Y-%m-%d %H:%M:%S')
+        log(f"🎯 RÉCUPÉRATION DELTA ({scope_label()}) - modifications depuis {window}", "INFO")
+        return
+    
+    mode_text = f"RÉCUPÉRATION OPTIMISÉE ({scope_label()})" if scope_restricted() or TEST_MODE else "RÉCUPÉRATION COMPLÈTE (toute la base)"
+    log(f"🎯 {mode_text}", "INFO")
     
+    if scope_restricted() or TEST_MODE:
+        log(f"   ⚠️ Parcours de TOUTE la BD pour trouver les emails du périmètre", "WARNING")
+        log(f"   💡 Ceci peut prendre plusieurs minutes selon la taille de la BD", "INFO")
+
+def log_sync_results(copper_to_mc_synced, mc_to_copper_synced, identical_contacts, excluded_contacts, marked_count):
+    """Affiche les résultats détaillés de la synchronisation"""
+    total_synced = copper_to_mc_synced + mc_to_copper_synced
+    log(f"📊 Résultats de la synchronisation bidirectionnelle:", "INFO")
+    log(f"   Contacts Copper → Mailchimp: {copper_to_mc_synced}", "INFO")
+    log(f"   Contacts Mailchimp → Copper: {mc_to_copper_synced}", "INFO")
+    log(f"   Total synchronisé: {total_synced}", "INFO")
+    log(f"   Contacts identiques ignorés: {identical_contacts}", "INFO")
+    log(f"   Contacts exclus (inactifs): {excluded_contacts}", "INFO")
+    log(f"   Contacts marqués pour suppression: {marked_count}", "INFO")
+    
+    if total_synced > 0:
+        log(f"✅ Synchronisation réussie : {total_synced} contact(s) traité(s)", "SUCCESS")
+    else:
+        log(f"ℹ️ Aucune synchronisation nécessaire - tous les contacts sont à jour", "INFO")
+
+def build_report_data(copper_to_mc_synced, mc_to_copper_synced, identical_contacts, excluded_contacts, marked_contacts):
+    """Assemble les données du rapport d'importation"""
+    return {
+        'operations': operation_details,
+        'copper_to_mc': copper_to_mc_synced,
+        'mc_to_copper': mc_to_copper_synced,
+        'identical_contacts': identical_contacts,
+        'excluded': excluded_contacts,
+        'marked_for_deletion': len(marked_contacts),
+        'marked_contacts': marked_contacts,
+        'phases': phase_timer.summary(),
+        'requests': request_stats.summary(),
+        'budget': call_budget.summary(call_limits())
+    }
+
+def publish_run_metrics(start_time, succeeded):
+    """Jauges de fin d'exécution (durée, débit, succès) puis fichier texte METRICS_FILE pour le textfile collector"""
+    now = time.time()
+    duration = now - start_time
+    METRICS.set("sync_run_duration_seconds", duration)
+    METRICS.set("sync_contacts_per_second", len(operation_details) / duration if duration > 0 else 0)
+    METRICS.set("sync_last_run_timestamp_seconds", now)
+    METRICS.set("sync_last_run_success", 1 if succeeded else 0)
+    for api, calls in call_budget.summary(call_limits())["calls"].items():
+        if calls["limit"] is not None:
+            METRICS.set("sync_api_budget_remaining", calls["remaining"], api=api)
+    if METRICS_FILE:
+        try:
+            write_textfile(METRICS, METRICS_FILE)
+        except OSError as e:
+            log(f"⚠️ Fichier de métriques non écrit ({METRICS_FILE}): {e}", "WARNING")
+
+def start_metrics_server():
+    """Sert /metrics pendant toute la durée du processus (METRICS_PORT, 0 = désactivé)"""
+    if not METRICS_PORT:
+        return None
     try:
-        # 1. Récupération selon le mode configuré
-        mode_text = f"RÉCUPÉRATION OPTIMISÉE ({TEST_DOMAIN} uniquement)" if TEST_MODE else "RÉCUPÉRATION COMPLÈTE (toute la base)"
-        log(f"🎯 {mode_text}", "INFO")
-        
-        if TEST_MODE:
-            log(f"   ⚠️ Mode test : parcours de TOUTE la BD pour trouver les emails {TEST_DOMAIN}", "WARNING")
-            log(f"   💡 Ceci peut prendre plusieurs minutes selon la taille de la BD", "INFO")
-        copper_contacts = get_target_copper_contacts()
-        mailchimp_members = get_target_mailchimp_contacts()
+        server = MetricsServer(METRICS, METRICS_PORT).start()
+    except OSError as e:
+        log(f"⚠️ Endpoint /metrics indisponible sur le port {METRICS_PORT}: {e}", "WARNING")
+        return None
+    log(f"📈 Métriques Prometheus servies sur le port {server.port} (/metrics)", "INFO")
+    return server
+
+def main(dry_run=False, plan_file=None):
+    """Fonction principale avec synchronisation des tags
+    
+    dry_run : planifie sans rien écrire (ni API, ni rapport, ni état delta) ;
+    plan_file : enregistre le plan JSON de l'exécution (relu par --apply).
+    """
+    start_time = time.time()
+    if dry_run:
+        open_log_file()
+    else:
+        open_run_files()
+    
+    log("🚀 SYNCHRONISATION BIDIRECTIONNELLE COPPER ↔ MAILCHIMP", "INFO")
+    log("=" * 60, "INFO")
+    
+    log_mode_banner()
+    COPPER_LOOKUP_CACHE.clear()
+    operation_details.clear()
+    phase_timer.reset()
+    request_stats.clear()
+    call_budget.clear()
+    failed = False
+    
+    try:
+        # 1. Récupération selon le mode configuré (complète ou delta)
+        since = delta_since()
+        log_fetch_scope(since)
+        audiences = get_audiences()
+        with phase("copper_fetch"):
+            copper_contacts = get_target_copper_contacts(since)
+        with phase("mailchimp_fetch"):
+            members_by_audience = fetch_audience_members(audiences, since)
+            mailchimp_members = merge_audience_members(members_by_audience)
         
         # 2. Construction des index optimisés
         log("🔧 Construction des index email...", "INFO")
-        copper_by_email = {}
-        mc_by_email = {}
-        
-        for contact in copper_contacts:
-            emails = contact.get("emails", [])
-            if emails:
-                email = normalize_email(emails[0]["email"])
-                copper_by_email[email] = contact
-        
-        for member in mailchimp_members:
-            email = normalize_email(member.get("email_address", ""))
-            mc_by_email[email] = member
+        with phase("index"):
+            copper_by_email, mc_by_email = build_email_indexes(copper_contacts, mailchimp_members)
         
         log(f"✅ Index créés: {len(copper_by_email)} contacts Copper cibles, {len(mc_by_email)} membres Mailchimp cibles", "SUCCESS")
         
         # Vérification s'il y a des contacts à traiter
         if len(copper_by_email) == 0 and len(mc_by_email) == 0:
-            mode_msg = f"({TEST_DOMAIN} uniquement)" if TEST_MODE else "(toute la base)"
-            log(f"ℹ️ Aucun contact cible trouvé {mode_msg} - rien à synchroniser", "INFO")
+            log(f"ℹ️ Aucun contact cible trouvé ({scope_label()}) - rien à synchroniser", "INFO")
             execution_time = time.time() - start_time
             log(f"✅ SYNCHRONISATION TERMINÉE en {execution_time:.2f}s (aucun contact à traiter)", "SUCCESS")
+            if not dry_run:
+                record_successful_run(start_time)
             return
         
-        # 3. Analyse et traitement des contacts Copper
-        marked_contacts = []
-        copper_to_mc_synced = 0
-        excluded_contacts = 0
-        identical_contacts = 0
-        
-        log("🔄 Analyse et synchronisation Copper → Mailchimp...", "INFO")
+        # 3. Planification : toutes les décisions, sans écriture (une lecture, toutes les audiences)
+        log("🔄 Analyse des contacts et planification des opérations...", "INFO")
+        with phase("classify"):
+            plan = build_sync_plan(start_time, since, audiences, copper_contacts, members_by_audience, copper_by_email)
+        log_plan(plan)
+        if plan_file:
+            save_plan(plan, plan_file)
+            log(f"💾 Plan enregistré: {plan_file} (appliquer avec --apply {plan_file})", "INFO")
         
-        for contact in copper_contacts:
-            tags = contact.get("tags", [])
-            
-            # Vérifier si marqué pour suppression
-            is_marked = False
-            is_inactive = False
-            detected_tag = None
-            
-            for tag_name in tags:
-                if is_delete_tag_robust(str(tag_name)):
-                    is_marked = True
-                    detected_tag = tag_name
-                    break
-                elif is_inactive_tag(str(tag_name)):
-                    is_inactive = True
-                    break
-            
-            if is_marked:
-                # Contact marqué pour suppression
-                emails = contact.get("emails", [])
-                if emails:
-                    marked_contacts.append({
-                        "email": emails[0]["email"],
-                        "name": f"{contact.get('first_name', '')} {contact.get('last_name', '')}".strip(),
-                        "copper_id": contact.get("id"),
-                        "detected_tag": detected_tag
-                    })
-                excluded_contacts += 1
-            elif is_inactive:
-                # Contact inactif - exclure de la synchronisation
-                excluded_contacts += 1
-            else:
-                # Contact normal - vérifier s'il faut synchroniser
-                emails = contact.get("emails", [])
-                if emails:
-                    email = normalize_email(emails[0]["email"])
-                    existing_member = mc_by_email.get(email)
-                    
-                    sync_result = sync_contact_to_mailchimp(contact, tags, existing_member)
-                    if sync_result:
-                        copper_to_mc_synced += 1
-                    elif existing_member and contacts_are_identical(contact, existing_member):
-                        identical_contacts += 1
-        
-        # 4. Synchronisation Mailchimp → Copper (optimisée)
-        log("🔄 Synchronisation Mailchimp → Copper...", "INFO")
-        mc_to_copper_synced = sync_mailchimp_to_copper(mailchimp_members, copper_by_email)
-        
-        # 5. Résultats détaillés
-        total_synced = copper_to_mc_synced + mc_to_copper_synced
-        log(f"📊 Résultats de la synchronisation bidirectionnelle:", "INFO")
-        log(f"   Contacts Copper → Mailchimp: {copper_to_mc_synced}", "INFO")
-        log(f"   Contacts Mailchimp → Copper: {mc_to_copper_synced}", "INFO")
-        log(f"   Total synchronisé: {total_synced}", "INFO")
-        log(f"   Contacts identiques ignorés: {identical_contacts}", "INFO")
-        log(f"   Contacts exclus (inactifs): {excluded_contacts}", "INFO")
-        log(f"   Contacts marqués pour suppression: {len(marked_contacts)}", "INFO")
-        
-        if total_synced > 0:
-            log(f"✅ Synchronisation réussie : {total_synced} contact(s) traité(s)", "SUCCESS")
-        else:
-            log(f"ℹ️ Aucune synchronisation nécessaire - tous les contacts sont à jour", "INFO")
+        if dry_run:
+            # Projection seule : opérations qui seraient reportées faute de budget
+            fit_plan_to_budget(plan)
+            execution_time = time.time() - start_time
+            log(f"🧪 SIMULATION TERMINÉE en {execution_time:.2f}s - aucune écriture (--dry-run)", "SUCCESS")
+            return
         
-        # 6. Gestion des contacts marqués
-        handle_marked_contacts(marked_contacts)
+        # 4. Application du plan et résultats détaillés
+        report_data = apply_plan(plan)
         
         # Génération du rapport d'importation
-        report_data = {
-            'operations': operation_details,
-            'copper_to_mc': copper_to_mc_synced,
-            'mc_to_copper': mc_to_copper_synced,
-            'identical_contacts': identical_contacts,
-            'excluded': excluded_contacts,
-            'marked_for_deletion': len(marked_contacts),
-            'marked_contacts': marked_contacts
-        }
-        
-        report_content = write_import_report(report_data)
+        with phase("report"):
+            write_import_report(report_data)
         log("📄 Rapport d'importation généré", "INFO")
         
         execution_time = time.time() - start_time
         log(f"✅ SYNCHRONISATION BIDIRECTIONNELLE TERMINÉE en {execution_time:.2f}s", "SUCCESS")
+        record_successful_run(start_time)
         
+    except BudgetExhausted as e:
+        failed = True
+        log_budget_exhausted(e)
     except Exception as e:
+        failed = True
         log(f"❌ ERREUR CRITIQUE: {e}", "ERROR")
         log(f"🔍 Traceback: {traceback.format_exc()}", "ERROR")
     
     finally:
-        log_file.close()
+        publish_run_metrics(start_time, not failed)
+        finish_run_files()
+
+def apply_saved_plan(plan, plan_file):
+    """Applique un plan enregistré par --plan-out sans relire Copper ni Mailchimp
+    
+    La fenêtre delta avance jusqu'au début de l'exécution qui a établi le plan :
+    les modifications faites depuis seront relues par le prochain delta.
+    """
+    start_time = time.time()
+    open_run_files()
+    
+    log("🚀 APPLICATION D'UN PLAN DE SYNCHRONISATION COPPER ↔ MAILCHIMP", "INFO")
+    log("=" * 60, "INFO")
+    
+    log_mode_banner()
+    COPPER_LOOKUP_CACHE.clear()
+    operation_details.clear()
+    phase_timer.reset()
+    request_stats.clear()
+    call_budget.clear()
+    failed = False
+    
+    try:
+        log(f"📂 Plan {plan_file} établi le {plan['created_at']}", "INFO")
+        log_plan(plan)
+        
+        report_data = apply_plan(plan)
+        
+        with phase("report"):
+            write_import_report(report_data)
+        log("📄 Rapport d'importation généré", "INFO")
+        
+        execution_time = time.time() - start_time
+        log(f"✅ PLAN APPLIQUÉ en {execution_time:.2f}s", "SUCCESS")
+        record_successful_run(plan["started_at"])
+        
+    except BudgetExhausted as e:
+        failed = True
+        log_budget_exhausted(e)
+    except Exception as e:
+        failed = True
+        log(f"❌ ERREUR CRITIQUE: {e}", "ERROR")
+        log(f"🔍 Traceback: {traceback.format_exc()}", "ERROR")
+    
+    finally:
+        publish_run_metrics(start_time, not failed)
+        finish_run_files()
+
+def run(argv=None):
+    """Point d'entrée en ligne de commande (configuration d'exécution et choix du moteur)"""
+    load_environment()
+    
+    parser = argparse.ArgumentParser(
+        description="Synchronisation bidirectionnelle Copper ↔ Mailchimp",
+        epilog="Priorité des réglages : ligne de commande > fichier de config > environnement > défauts"
+    )
+    parser.add_argument("--config", default=os.getenv("SYNC_CONFIG"),
+                        help="Fichier de configuration INI (section [sync]) propre au job [env SYNC_CONFIG]")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Planifie et affiche le coût estimé sans rien écrire (ni API, ni rapport, ni état delta)")
+    parser.add_argument("--plan-out", metavar="FICHIER",
+                        help="Enregistre le plan JSON de l'exécution, relisible avec --apply")
+    parser.add_argument("--apply", metavar="FICHIER",
+                        help="Applique un plan enregistré au lieu de relire Copper et Mailchimp")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile l'exécution (cProfile, tracemalloc) : profil et pic mémoire par étape "
+                             "écrits avec les fichiers de l'exécution")
+    add_setting_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    run_options = ("config", "dry_run", "plan_out", "apply", "profile")
+    overrides = {name: value for name, value in vars(args).items() if name not in run_options}
+    plan = None
+    try:
+        load_settings(args.config, overrides)
+        scope_matcher()
+        if MARKED_POLICY != "interactive":
+            parse_marked_policy(MARKED_POLICY)
+        if SYNC_ENGINE == "async":
+            # Plan, simulation et budget passent par le plan, que seul le moteur synchrone établit
+            planned = [option for option, used in (("--dry-run", args.dry_run), ("--plan-out", args.plan_out),
+                                                   ("--apply", args.apply)) if used]
+            if any(call_limits().values()):
+                planned.append("un budget d'appels (copper_call_budget, mailchimp_call_budget)")
+            if planned:
+                raise ValueError(f"{', '.join(planned)} ne se combine pas avec --engine async")
+        if args.apply:
+            if args.dry_run or args.plan_out:
+                raise ValueError("--apply ne se combine pas avec --dry-run ni --plan-out")
+            plan = load_plan(args.apply)
+            check_plan(plan)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    planning = args.dry_run or args.plan_out or plan is not None
+    
+    metrics_server = start_metrics_server()
+    if args.profile:
+        start_profiling()
+    try:
+        with RunLock(SYNC_LOCK_FILE):
+            if plan is not None:
+                apply_saved_plan(plan, args.apply)
+            elif planning:
+                main(dry_run=args.dry_run, plan_file=args.plan_out)
+            elif SYNC_ENGINE == "async":
+                # Import paresseux : aiohttp n'est requis que pour le moteur asynchrone
+                from synchro import async_engine
+                async_engine.main()
+            else:
+                main()
+    except LockError as e:
+        parser.exit(1, f"❌ {e}\n")
+    finally:
+        stop_profiling()
+        if metrics_server is not None:
+            metrics_server.stop()
 
 if __name__ == "__main__":
-    main()
+    run()
@@ -0,0 +1,7 @@
+"""
+Bibliothèque de synchronisation Copper ↔ Mailchimp
+
+L'import du paquet est léger et sans effet de bord : aucun fichier n'est créé
+et le fichier .env n'est pas lu. Les sous-modules sont importés à la demande
+(l'orchestration et le point d'entrée restent dans sync.py).
+"""
@@ -0,0 +1,540 @@
+"""
+Moteur asynchrone (asyncio + aiohttp) pour la synchronisation Copper ↔ Mailchimp
+
+Même logique que sync.main() mais toutes les requêtes passent par une session
+aiohttp partagée (pool de connexions) et sont bornées par un sémaphore par API,
+ce qui permet de garder des centaines de requêtes en vol sur un seul thread.
+Les décisions (écritures Mailchimp, candidats à la création Copper) viennent
+des mêmes fonctions pures de sync ; seules les entrées-sorties sont asynchrones.
+
+Exception : sous une politique déclarative, les contacts marqués sont traités par
+sync.handle_marked_contacts dans un thread (requests et pool d'écritures Copper),
+hors de la session aiohttp et de ses sémaphores. Ces actions en masse (lots et
+suivi des lots Mailchimp) n'existent qu'une fois ; elles restent soumises au
+limiteur de débit Copper et au budget d'appels partagés. Le mode interactif
+passe par le client asynchrone.
+
+Le moteur n'établit pas de plan : --dry-run, --plan-out, --apply et un budget
+d'appels sont refusés avec --engine async (sync.run).
+"""
+
+import asyncio
+import functools
+import json
+import time
+import traceback
+
+import aiohttp
+
+import sync
+from synchro.budget import BudgetExhausted
+from synchro.records import CopperPerson, MailchimpMember
+
+# Concurrence par API, taille du pool, fenêtre de pages Copper, délais et tailles
+# de pages viennent de la configuration d'exécution (sync.load_settings)
+
+
+class AsyncClient:
+    """Client HTTP asynchrone avec pool de connexions, sémaphore par API et limiteur de débit Copper"""
+
+    def __init__(self, copper_concurrency=None, mailchimp_concurrency=None, pool_size=None):
+        self.copper_concurrency = copper_concurrency or sync.ASYNC_COPPER_CONCURRENCY
+        self.mailchimp_concurrency = mailchimp_concurrency or sync.ASYNC_MAILCHIMP_CONCURRENCY
+        self.pool_size = pool_size or sync.ASYNC_POOL_SIZE
+        self.session = None
+        self.semaphores = {}
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.pool_size)
+        timeout = aiohttp.ClientTimeout(total=sync.REQUEST_TIMEOUT)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        self.semaphores = {
+            "copper": asyncio.Semaphore(self.copper_concurrency),
+            "mailchimp": asyncio.Semaphore(self.mailchimp_concurrency)
+        }
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+
+    async def request(self, api, method, url, **kwargs):
+        """Requête avec retry (équivalent asynchrone de sync.safe_request)"""
+        max_retries = sync.MAX_RETRIES
+        retry_delay = sync.RETRY_DELAY
+
+        if api == "copper":
+            # Comme requests, ignorer les en-têtes non configurés (valeur None)
+            kwargs.setdefault("headers", {k: v for k, v in sync.COPPER_HEADERS.items() if v is not None})
+        else:
+            kwargs.setdefault("auth", aiohttp.BasicAuth(*[str(part) for part in sync.MC_AUTH]))
+
+        endpoint = sync.request_labels(url)[1]
+        # Trace de l'appel complet (sync.trace_call) : attente du sémaphore et retries compris
+        call_started = time.perf_counter()
+        status = "error"
+        for attempt in range(max_retries):
+            # Budget d'appels de l'exécution, compté à chaque tentative comme dans safe_request
+            sync.spend_call(api)
+            try:
+                async with self.semaphores[api]:
+                    if api == "copper":
+                        # Limiteur de débit Copper partagé avec safe_request, à chaque tentative
+                        delay = sync.copper_rate_limiter().reserve()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                    # Latence mesurée une fois le créneau du sémaphore obtenu (attente exclue)
+                    started = time.perf_counter()
+                    status = "error"
+                    try:
+                        with sync.requests_in_flight:
+                            async with self.session.request(method, url, **kwargs) as response:
+                                status = response.status
+                                response.raise_for_status()
+                                body = await response.read()
+                    finally:
+                        sync.record_request(api, method, endpoint, status, time.perf_counter() - started)
+                sync.trace_call(api, method, endpoint, status, len(body), attempt + 1,
+                                time.perf_counter() - call_started)
+                if status == 204 or not body:
+                    return None
+                return json.loads(body)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == max_retries - 1:
+                    sync.trace_call(api, method, endpoint, status, 0, max_retries, time.perf_counter() - call_started)
+                    sync.log(f"Échec définitif après {max_retries} tentatives: {e}", "ERROR")
+                    raise
+                sync.METRICS.inc("sync_http_retries_total", api=api)
+                sync.log(f"Tentative {attempt + 1} échouée: {e}. Retry dans {retry_delay}s", "WARNING")
+                await asyncio.sleep(retry_delay)
+
+
+# ==================== RÉCUPÉRATION ====================
+
+async def get_target_copper_contacts(client, since=None):
+    """Récupère les contacts Copper cibles en demandant plusieurs pages en parallèle"""
+    sync.log(f"🔄 Récupération des contacts Copper cibles ({sync.scope_label()})...", "INFO")
+    url = f"{sync.COPPER_API_URL}/people/search"
+    contacts = []
+    page = 1
+    window = max(1, sync.ASYNC_COPPER_PAGE_WINDOW)
+
+    while True:
+        pages = list(range(page, page + window))
+        results = await asyncio.gather(*[
+            client.request("copper", "POST", url, json=sync.copper_search_payload(p, since))
+            for p in pages
+        ])
+
+        last_page_reached = False
+        for page_number, data in zip(pages, results):
+            if not data:
+                last_page_reached = True
+                break
+
+            target_contacts = []
+            for contact in data:
+                if sync.is_selected_person(contact):
+                    target_contacts.append(CopperPerson.from_api(contact))
+
+            contacts.extend(target_contacts)
+            sync.log(f"   Page {page_number}: +{len(target_contacts)} contacts cibles (Total: {len(contacts)})", "INFO")
+
+            if len(data) < sync.COPPER_PAGE_SIZE:
+                last_page_reached = True
+                break
+
+        if last_page_reached:
+            break
+        page += window
+
+    sync.log(f"✅ {len(contacts)} contacts Copper cibles récupérés", "SUCCESS")
+    return contacts
+
+
+def _filter_target_members(batch):
+    """Filtre les membres Mailchimp dans le scope (enregistrements compacts)"""
+    return [MailchimpMember.from_api(member) for member in batch if sync.is_selected(member.get("email_address", ""))]
+
+
+async def get_target_mailchimp_contacts(client, since=None, audience=None):
+    """Récupère les membres Mailchimp cibles (pages suivantes en parallèle grâce à total_items)"""
+    audience_info = f" - audience {audience.name}" if audience and len(sync.get_audiences()) > 1 else ""
+    sync.log(f"🔄 Récupération des contacts Mailchimp cibles ({sync.scope_label()}){audience_info}...", "INFO")
+    list_id = audience.list_id if audience else sync.MC_LIST_ID
+    url = f"{sync.MC_BASE}/lists/{list_id}/members"
+    count = sync.MAILCHIMP_PAGE_SIZE
+
+    def params(offset):
+        return sync.mailchimp_members_params(offset, since)
+
+    first = await client.request("mailchimp", "GET", url, params=params(0))
+    batch = first.get("members", [])
+    members = _filter_target_members(batch)
+    sync.log(f"   Offset 0: +{len(members)} membres cibles (Total: {len(members)})", "INFO")
+
+    if len(batch) == count:
+        total_items = first.get("total_items")
+        if total_items is not None:
+            # Le total est connu : toutes les pages restantes partent en même temps
+            offsets = list(range(count, total_items, count))
+            pages = await asyncio.gather(*[
+                client.request("mailchimp", "GET", url, params=params(offset)) for offset in offsets
+            ])
+            for offset, data in zip(offsets, pages):
+                target_members = _filter_target_members(data.get("members", []))
+                members.extend(target_members)
+                sync.log(f"   Offset {offset}: +{len(target_members)} membres cibles (Total: {len(members)})", "INFO")
+        else:
+            offset = count
+            while True:
+                data = await client.request("mailchimp", "GET", url, params=params(offset))
+                batch = data.get("members", [])
+                if not batch:
+                    break
+                target_members = _filter_target_members(batch)
+                members.extend(target_members)
+                sync.log(f"   Offset {offset}: +{len(target_members)} membres cibles (Total: {len(members)})", "INFO")
+                if len(batch) < count:
+                    break
+                offset += count
+
+    sync.log(f"✅ {len(members)} membres Mailchimp cibles récupérés", "SUCCESS")
+    return members
+
+
+# ==================== ÉCRITURES ====================
+# Les fonctions _push_* renvoient (résultat, détail) : le détail est enregistré
+# dans operation_details après asyncio.gather, dans l'ordre d'entrée, pour que
+# le rapport reste déterministe quel que soit l'ordre de complétion.
+
+async def _push_contact_to_mailchimp(client, contact, tags_to_sync=None, existing_member=None, audience=None):
+    """Écrit un contact dans Mailchimp, renvoie (synchronisé, détail d'opération)"""
+    if not contact.get("emails"):
+        return False, None
+
+    email = (existing_member or {}).get("email_address") or sync.contact_email(contact)
+    first_name = contact.get("first_name", "")
+    last_name = contact.get("last_name", "")
+    name = f"{first_name} {last_name}"
+
+    if existing_member and sync.contacts_are_identical(contact, existing_member):
+        sync.log(f"⏭️ Contact identique ignoré: {email}", "INFO", email=email)
+        return False, None
+
+    mailchimp_tags = [{"name": str(tag)[:50], "status": "active"} for tag in (tags_to_sync or [])]
+    mailchimp_data = {
+        "email_address": email,
+        "status_if_new": "subscribed",
+        "merge_fields": {
+            "FNAME": first_name,
+            "LNAME": last_name
+        }
+    }
+
+    list_id = audience.list_id if audience else sync.MC_LIST_ID
+    direction = sync.mailchimp_direction(audience)
+
+    try:
+        subscriber_hash = sync.get_subscriber_hash(email)
+        url = f"{sync.MC_BASE}/lists/{list_id}/members/{subscriber_hash}"
+        await client.request("mailchimp", "PUT", url, json=mailchimp_data)
+
+        if mailchimp_tags:
+            await client.request("mailchimp", "POST", f"{url}/tags", json={"tags": mailchimp_tags})
+            sync.log(f"✅ Synchronisé avec tags: {email} ({len(mailchimp_tags)} tags)", "SUCCESS", email=email)
+        else:
+            sync.log(f"✅ Synchronisé: {email}", "SUCCESS", email=email)
+
+        return True, dict(email=email, name=name, direction=direction, success=True, tags=tags_to_sync)
+
+    except Exception as e:
+        sync.log(f"❌ Erreur sync {email}: {e}", "ERROR", email=email)
+        return False, dict(email=email, name=name, direction=direction, success=False, error=str(e))
+
+
+async def _push_person_to_copper(client, member):
+    """Crée une personne Copper à partir d'un membre Mailchimp, renvoie (créé, détail)"""
+    email = sync.normalize_email(member.get("email_address", ""))
+    first_name = member.get("merge_fields", {}).get("FNAME", "")
+    last_name = member.get("merge_fields", {}).get("LNAME", "")
+    name = f"{first_name} {last_name}"
+
+    contact_data = {
+        "name": name.strip(),
+        "emails": [{"email": email, "category": "work"}],
+        "first_name": first_name,
+        "last_name": last_name
+    }
+
+    try:
+        await client.request("copper", "POST", f"{sync.COPPER_API_URL}/people", json=contact_data)
+        sync.log(f"✅ Nouveau contact créé dans Copper: {email}", "SUCCESS", email=email)
+        return True, dict(email=email, name=name, direction="Mailchimp → Copper", success=True)
+    except Exception as e:
+        sync.log(f"❌ Erreur création {email} dans Copper: {e}", "ERROR", email=email)
+        return False, dict(email=email, name=name, direction="Mailchimp → Copper", success=False, error=str(e))
+
+
+def _record_details(results):
+    """Enregistre les détails d'opération dans l'ordre d'entrée et compte les succès"""
+    synced_count = 0
+    for synced, detail in results:
+        if detail:
+            sync.add_operation_detail(**detail)
+        if synced:
+            synced_count += 1
+    return synced_count
+
+
+async def sync_contact_to_mailchimp(client, contact, tags_to_sync=None, existing_member=None, audience=None):
+    """Synchronise un contact vers Mailchimp avec ses tags"""
+    result = await _push_contact_to_mailchimp(client, contact, tags_to_sync, existing_member, audience)
+    return _record_details([result]) == 1
+
+
+async def sync_contacts_to_mailchimp(client, contacts_with_members, audience=None):
+    """Synchronise en parallèle une liste de (contact, tags, membre existant) vers Mailchimp"""
+    results = await asyncio.gather(*[
+        _push_contact_to_mailchimp(client, contact, tags, existing_member, audience)
+        for contact, tags, existing_member in contacts_with_members
+    ])
+    return _record_details(results)
+
+
+async def counted(reporter, awaitable):
+    """Attend une écriture puis la compte dans l'avancement"""
+    result = await awaitable
+    reporter.advance()
+    return result
+
+
+async def sync_copper_to_audiences(client, audiences, active_contacts, members_by_audience, reporter=sync.NO_PROGRESS):
+    """Écrit vers toutes les audiences en parallèle à partir de la même lecture Copper
+
+    Renvoie (synchronisés, identiques) cumulés ; les détails sont enregistrés dans
+    l'ordre des audiences puis des contacts.
+    """
+    identical_contacts = 0
+    pushes = []
+    for audience, members in zip(audiences, members_by_audience):
+        _, mc_by_email = sync.build_email_indexes([], members)
+        to_sync = []
+        for contact, tags, existing_member in sync.plan_mailchimp_writes(audience, active_contacts, mc_by_email):
+            if existing_member and sync.contacts_are_identical(contact, existing_member):
+                identical_contacts += 1
+            to_sync.append(counted(reporter, _push_contact_to_mailchimp(client, contact, tags, existing_member, audience)))
+        pushes.append(to_sync)
+        reporter.add(len(to_sync))
+
+    results = await asyncio.gather(*[asyncio.gather(*to_sync) for to_sync in pushes])
+    synced = [_record_details(audience_results) for audience_results in results]
+    if len(audiences) > 1:
+        for audience, count in zip(audiences, synced):
+            sync.log(f"   Audience {audience.name}: {count} synchronisé(s)", "INFO")
+    return sum(synced), identical_contacts
+
+
+async def find_existing_copper_emails(client, emails):
+    """Recherche en parallèle dans Copper lesquels de ces emails existent déjà (voir sync.find_existing_copper_emails)"""
+    url = f"{sync.COPPER_API_URL}/people/search"
+    chunks = sync.pending_lookup_chunks(emails)
+
+    async def search_chunk(chunk):
+        found, page = set(), 1
+        while True:
+            data = await client.request("copper", "POST", url, json=sync.copper_email_search_payload(chunk, page))
+            for person in data or []:
+                found.update(sync.person_emails(person))
+            if not data or len(data) < sync.COPPER_PAGE_SIZE:
+                return found
+            page += 1
+
+    results = await asyncio.gather(*[search_chunk(chunk) for chunk in chunks], return_exceptions=True)
+    return sync.record_lookup_results(emails, chunks, results)
+
+
+async def sync_mailchimp_to_copper(client, mc_members, copper_contacts_by_email, verify_existing=False,
+                                   reporter=sync.NO_PROGRESS):
+    """Crée en parallèle dans Copper les membres Mailchimp absents (mêmes étapes que sync.plan_copper_creations)"""
+    to_create = sync.copper_creation_candidates(mc_members, copper_contacts_by_email)
+
+    if to_create and verify_existing:
+        existing, unverified = await find_existing_copper_emails(
+            client, [sync.normalize_email(m.get("email_address", "")) for m in to_create])
+        to_create, blocked = sync.split_verified_creations(to_create, existing, unverified)
+        sync.record_blocked_creations(blocked)
+
+    reporter.add(len(to_create))
+    results = await asyncio.gather(*[counted(reporter, _push_person_to_copper(client, member)) for member in to_create])
+    sync.COPPER_LOOKUP_CACHE.add_existing(detail["email"] for created, detail in results if created)
+    return _record_details(results)
+
+
+async def archive_contact(client, contact):
+    """Archive un contact (tag Inactif dans Copper + désabonnement Mailchimp), renvoie True si réussi"""
+    try:
+        email = contact["email"]
+        copper_url = f"{sync.COPPER_API_URL}/people/{contact['copper_id']}"
+        subscriber_hash = sync.get_subscriber_hash(email)
+
+        tags = contact.get("tags")
+        if tags is None:
+            current_contact = await client.request("copper", "GET", copper_url)
+            tags = current_contact.get("tags", [])
+        existing_tags = sync.build_archived_tags(tags)
+
+        # La mise à jour Copper et les désabonnements Mailchimp (chaque audience) sont indépendants
+        await asyncio.gather(
+            client.request("copper", "PUT", copper_url, json={"tags": existing_tags}),
+            *[client.request("mailchimp", "PATCH", f"{sync.MC_BASE}/lists/{audience.list_id}/members/{subscriber_hash}",
+                             json={"status": "unsubscribed"})
+              for audience in sync.audiences_for(contact)]
+        )
+
+        sync.log(f"✅ Contact {email} archivé (Inactif dans Copper + désabonné Mailchimp)", "SUCCESS", email=email)
+        return True
+    except Exception as e:
+        sync.log(f"❌ Erreur archivage {contact['email']}: {e}", "ERROR", email=contact['email'])
+        sync.record_marked_failure(contact, "archive", e)
+        return False
+
+
+async def delete_contact(client, contact):
+    """Supprime un contact (Copper + Mailchimp), renvoie True si réussi"""
+    try:
+        email = contact["email"]
+        subscriber_hash = sync.get_subscriber_hash(email)
+
+        await asyncio.gather(
+            *[client.request("mailchimp", "DELETE", f"{sync.MC_BASE}/lists/{audience.list_id}/members/{subscriber_hash}")
+              for audience in sync.audiences_for(contact)],
+            client.request("copper", "DELETE", f"{sync.COPPER_API_URL}/people/{contact['copper_id']}")
+        )
+
+        sync.log(f"✅ Contact {email} supprimé (Copper + Mailchimp)", "SUCCESS", email=email)
+        return True
+    except Exception as e:
+        sync.log(f"❌ Erreur suppression {contact['email']}: {e}", "ERROR", email=contact['email'])
+        sync.record_marked_failure(contact, "delete", e)
+        return False
+
+
+async def handle_marked_contacts(client, marked_contacts, unmarked_ids=()):
+    """Gère les contacts marqués : politique déclarative via les actions en masse, mode interactif en parallèle"""
+    if sync.MARKED_POLICY != "interactive":
+        # Actions en masse du moteur synchrone, dans un thread (voir la docstring du module)
+        await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(sync.handle_marked_contacts, marked_contacts, unmarked_ids=unmarked_ids))
+        return
+    actions = []
+    sync.handle_marked_contacts(
+        marked_contacts,
+        archive_func=lambda contact: actions.append(archive_contact(client, contact)),
+        delete_func=lambda contact: actions.append(delete_contact(client, contact)),
+        unmarked_ids=unmarked_ids
+    )
+    await asyncio.gather(*actions)
+
+
+# ==================== ORCHESTRATION ====================
+
+async def timed(name, awaitable):
+    """Attend une étape menée en parallèle d'autres en mesurant sa propre durée"""
+    with sync.phase(name):
+        return await awaitable
+
+
+async def main_async():
+    """Fonction principale du moteur asynchrone"""
+    start_time = time.time()
+    sync.open_run_files()
+
+    sync.log("🚀 SYNCHRONISATION BIDIRECTIONNELLE COPPER ↔ MAILCHIMP (moteur asynchrone)", "INFO")
+    sync.log("=" * 60, "INFO")
+    sync.log_mode_banner()
+    sync.COPPER_LOOKUP_CACHE.clear()
+    sync.operation_details.clear()
+    sync.phase_timer.reset()
+    sync.request_stats.clear()
+    sync.call_budget.clear()
+    failed = False
+
+    try:
+        async with AsyncClient() as client:
+            # 1. Récupération : Copper (une fois) et chaque audience Mailchimp en parallèle
+            since = sync.delta_since()
+            sync.log_fetch_scope(since)
+            audiences = sync.get_audiences()
+            copper_contacts, members_by_audience = await asyncio.gather(
+                timed("copper_fetch", get_target_copper_contacts(client, since)),
+                timed("mailchimp_fetch", asyncio.gather(
+                    *[get_target_mailchimp_contacts(client, since, audience) for audience in audiences]
+                ))
+            )
+            mailchimp_members = sync.merge_audience_members(members_by_audience)
+
+            # 2. Construction des index
+            sync.log("🔧 Construction des index email...", "INFO")
+            with sync.phase("index"):
+                copper_by_email, mc_by_email = sync.build_email_indexes(copper_contacts, mailchimp_members)
+            sync.log(f"✅ Index créés: {len(copper_by_email)} contacts Copper cibles, {len(mc_by_email)} membres Mailchimp cibles", "SUCCESS")
+
+            if len(copper_by_email) == 0 and len(mc_by_email) == 0:
+                sync.log(f"ℹ️ Aucun contact cible trouvé ({sync.scope_label()}) - rien à synchroniser", "INFO")
+                execution_time = time.time() - start_time
+                sync.log(f"✅ SYNCHRONISATION TERMINÉE en {execution_time:.2f}s (aucun contact à traiter)", "SUCCESS")
+                sync.record_successful_run(start_time)
+                return
+
+            # 3. Classification des contacts Copper
+            sync.log("🔄 Analyse et synchronisation Copper → Mailchimp...", "INFO")
+            with sync.phase("classify"):
+                marked_contacts, excluded_contacts, active_contacts = sync.classify_copper_contacts(copper_contacts)
+
+            # 4. Écritures dans les deux sens en parallèle (un seul avancement pour les deux)
+            sync.log("🔄 Synchronisation Mailchimp → Copper...", "INFO")
+            with sync.progress("Copper ↔ Mailchimp") as reporter:
+                (copper_to_mc_synced, identical_contacts), mc_to_copper_synced = await asyncio.gather(
+                    timed("copper_to_mailchimp",
+                          sync_copper_to_audiences(client, audiences, active_contacts, members_by_audience,
+                                                   reporter)),
+                    timed("mailchimp_to_copper",
+                          sync_mailchimp_to_copper(client, mailchimp_members, copper_by_email,
+                                                   verify_existing=sync.should_verify_creations(since),
+                                                   reporter=reporter))
+                )
+
+            # 5. Résultats détaillés
+            sync.log_sync_results(copper_to_mc_synced, mc_to_copper_synced, identical_contacts,
+                                  excluded_contacts, len(marked_contacts))
+
+            # 6. Gestion des contacts marqués
+            with sync.phase("marked"):
+                await handle_marked_contacts(client, marked_contacts, sync.unmarked_queue_ids(copper_contacts))
+
+        report_data = sync.build_report_data(copper_to_mc_synced, mc_to_copper_synced, identical_contacts,
+                                             excluded_contacts, marked_contacts)
+        with sync.phase("report"):
+            sync.write_import_report(report_data)
+        sync.log("📄 Rapport d'importation généré", "INFO")
+
+        execution_time = time.time() - start_time
+        sync.log(f"✅ SYNCHRONISATION BIDIRECTIONNELLE TERMINÉE en {execution_time:.2f}s", "SUCCESS")
+        sync.record_successful_run(start_time)
+
+    except BudgetExhausted as e:
+        failed = True
+        sync.log_budget_exhausted(e)
+    except Exception as e:
+        failed = True
+        sync.log(f"❌ ERREUR CRITIQUE: {e}", "ERROR")
+        sync.log(f"🔍 Traceback: {traceback.format_exc()}", "ERROR")
+
+    finally:
+        sync.publish_run_metrics(start_time, not failed)
+        sync.finish_run_files()
+
+
+def main():
+    """Point d'entrée synchrone du moteur asynchrone"""
+    asyncio.run(main_async())
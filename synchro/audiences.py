@@ -0,0 +1,62 @@
+"""
+Audiences Mailchimp alimentées par une même lecture de Copper
+
+Une audience est une liste Mailchimp (list_id) avec ses règles de sélection
+sur les tags Copper : include_tags (au moins un requis, vide = tous les
+contacts) et exclude_tags (aucun autorisé). Sans configuration, l'audience
+unique "default" correspond à MAILCHIMP_LIST_ID.
+"""
+
+
+def _normalize_tags(tags):
+    return {str(tag).strip().lower() for tag in tags or [] if str(tag).strip()}
+
+
+class Audience:
+    """Liste Mailchimp cible et règles de sélection des contacts Copper"""
+
+    def __init__(self, name, list_id, include_tags=(), exclude_tags=()):
+        self.name = name
+        self.list_id = list_id
+        self.include_tags = _normalize_tags(include_tags)
+        self.exclude_tags = _normalize_tags(exclude_tags)
+
+    def accepts(self, tags):
+        """Vérifie si un contact portant ces tags Copper appartient à l'audience"""
+        tags = _normalize_tags(tags)
+        if self.exclude_tags & tags:
+            return False
+        return not self.include_tags or bool(self.include_tags & tags)
+
+    def __repr__(self):
+        return f"Audience({self.name!r}, {self.list_id!r})"
+
+
+def build_audiences(specs, sections=None):
+    """Construit les audiences depuis "nom=list_id" (environnement / ligne de commande)
+    et les sections [audience:nom] du fichier de config (list_id, include_tags, exclude_tags)
+
+    Les sections complètent ou remplacent les entrées du même nom ; l'ordre est
+    celui des entrées puis des nouvelles sections.
+    """
+    definitions = {}
+    for spec in specs or []:
+        name, sep, list_id = spec.partition("=")
+        if not sep or not name.strip() or not list_id.strip():
+            raise ValueError(f"audience attendue au format nom=list_id, reçu '{spec}'")
+        definitions[name.strip()] = {"list_id": list_id.strip()}
+
+    for name, values in (sections or {}).items():
+        definitions.setdefault(name, {}).update(values)
+
+    audiences = []
+    for name, values in definitions.items():
+        if not values.get("list_id"):
+            raise ValueError(f"audience '{name}' sans list_id")
+        audiences.append(Audience(name, values["list_id"],
+                                  values.get("include_tags", ()), values.get("exclude_tags", ())))
+
+    list_ids = [audience.list_id for audience in audiences]
+    if len(set(list_ids)) != len(list_ids):
+        raise ValueError("plusieurs audiences pointent vers la même liste Mailchimp")
+    return audiences
@@ -0,0 +1,142 @@
+"""
+Budget d'appels API par exécution (quotas partagés avec d'autres intégrations)
+
+Chaque tentative de requête HTTP est comptée par API (CallBudget), lectures
+comprises. Avant d'appliquer un plan, son coût estimé (synchro.plan.estimate_cost)
+est comparé au budget restant de chaque API limitée : fit_plan garde, dans
+l'ordre du plan, les écritures Mailchimp, créations Copper puis actions sur les
+contacts marqués qui tiennent dans ce budget. Le reste est reporté : la fenêtre
+delta n'avance pas et les contacts marqués restent en file, la prochaine
+exécution les reprend. Le rapport donne le consommé et le restant par API.
+
+L'ajustement du plan n'est qu'une estimation préalable : la limite est
+appliquée à chaque tentative réelle (spend, appelé par sync.safe_request et
+le client asynchrone), lectures, recherches, suivi des lots et retries compris.
+Limite atteinte : BudgetExhausted, l'appel n'est pas envoyé ; l'opération en
+cours est en échec et la fenêtre delta n'avance pas.
+"""
+
+import threading
+
+# Opérations du plan réductibles, dans l'ordre d'application
+DEFERRABLE = ("mailchimp_writes", "copper_creates", "marked")
+
+# Actions des contacts marqués qui coûtent des appels (les autres restent en file)
+MARKED_CALL_ACTIONS = ("archive", "delete")
+
+
+class BudgetExhausted(Exception):
+    """Budget d'appels d'une API épuisé : la requête n'est pas envoyée"""
+
+    def __init__(self, api, limit):
+        super().__init__(f"Budget d'appels {api.capitalize()} épuisé ({limit} appel(s))")
+        self.api = api
+        self.limit = limit
+
+
+class CallBudget:
+    """Appels consommés par API pendant l'exécution et opérations reportées, partagés entre threads"""
+
+    def __init__(self):
+        self.used = {}
+        self.deferred = {}
+        self.exhausted = set()
+        self.lock = threading.Lock()
+
+    def consume(self, api, count=1):
+        with self.lock:
+            self.used[api] = self.used.get(api, 0) + count
+
+    def spend(self, api, limit):
+        """Réserve un appel avant de l'envoyer ; BudgetExhausted si la limite (0 = aucune) est atteinte"""
+        with self.lock:
+            if limit and self.used.get(api, 0) >= limit:
+                self.exhausted.add(api)
+                raise BudgetExhausted(api, limit)
+            self.used[api] = self.used.get(api, 0) + 1
+
+    def defer(self, deferred):
+        with self.lock:
+            for kind, count in deferred.items():
+                if count:
+                    self.deferred[kind] = self.deferred.get(kind, 0) + count
+
+    def clear(self):
+        with self.lock:
+            self.used = {}
+            self.deferred = {}
+            self.exhausted = set()
+
+    def available(self, limits):
+        """Appels encore disponibles par API (None si l'API n'est pas limitée)"""
+        return {api: max(0, limit - self.used.get(api, 0)) if limit else None for api, limit in limits.items()}
+
+    def summary(self, limits):
+        """Consommé, limite et restant par API (limite et restant None si illimité), opérations reportées,
+        APIs dont le budget a été épuisé en cours d'exécution"""
+        with self.lock:
+            used = dict(self.used)
+            deferred = dict(self.deferred)
+            exhausted = sorted(self.exhausted)
+        apis = list(limits) + sorted(api for api in used if api not in limits)
+        calls = {}
+        for api in apis:
+            limit = limits.get(api) or None
+            consumed = used.get(api, 0)
+            calls[api] = {"used": consumed, "limit": limit,
+                          "remaining": limit - consumed if limit is not None else None}
+        return {"calls": calls, "deferred": deferred, "exhausted": exhausted}
+
+
+def _with_marked_prefix(marked, count):
+    """Contacts marqués dont seules les count premières actions coûteuses sont gardées (les autres en attente)"""
+    kept = []
+    for contact in marked:
+        if contact.get("action") in MARKED_CALL_ACTIONS:
+            if count <= 0:
+                contact = dict(contact, action="defer")
+            count -= 1
+        kept.append(contact)
+    return kept
+
+
+def fit_plan(plan, available, cost):
+    """Plan réduit aux opérations qui tiennent dans le budget disponible
+
+    available : appels disponibles par API (None = illimité) ; cost(plan) renvoie
+    au moins "<api>_calls" pour chaque API. Chaque type d'opération garde son plus
+    long préfixe qui tient, dans l'ordre de DEFERRABLE. Renvoie (plan réduit,
+    nombre d'opérations reportées par type).
+    """
+    def fits(candidate):
+        estimate = cost(candidate)
+        return all(limit is None or estimate.get(f"{api}_calls", 0) <= limit for api, limit in available.items())
+
+    costly_marked = sum(1 for contact in plan["marked"] if contact.get("action") in MARKED_CALL_ACTIONS)
+    sizes = {"mailchimp_writes": len(plan["mailchimp_writes"]), "copper_creates": len(plan["copper_creates"]),
+             "marked": costly_marked}
+
+    def candidate(kept):
+        return dict(plan,
+                    mailchimp_writes=plan["mailchimp_writes"][:kept.get("mailchimp_writes", 0)],
+                    copper_creates=plan["copper_creates"][:kept.get("copper_creates", 0)],
+                    marked=_with_marked_prefix(plan["marked"], kept.get("marked", 0)))
+
+    if fits(plan):
+        return plan, {kind: 0 for kind in DEFERRABLE}
+
+    kept = {}
+    for kind in DEFERRABLE:
+        # Coût croissant avec la longueur du préfixe : recherche dichotomique du plus long qui tient
+        low, high = 0, sizes[kind]
+        while low < high:
+            middle = (low + high + 1) // 2
+            if fits(candidate(dict(kept, **{kind: middle}))):
+                low = middle
+            else:
+                high = middle - 1
+        kept[kind] = low
+
+    fitted = candidate(kept)
+    fitted["estimate"] = cost(fitted)
+    return fitted, {kind: sizes[kind] - kept[kind] for kind in DEFERRABLE}
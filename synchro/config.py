@@ -0,0 +1,248 @@
+"""
+Configuration d'exécution : valeurs par défaut, environnement, fichier de config, ligne de commande
+
+Chaque réglage a un nom (clé du fichier de config et option --nom-avec-tirets),
+une variable d'environnement, un type et une valeur par défaut. La résolution
+applique, du moins au plus prioritaire : défauts < environnement < fichier de
+config < ligne de commande. Le fichier de config est propre à un job (delta
+toutes les 5 minutes, balayage complet la nuit...) et l'emporte donc sur
+l'environnement commun (.env).
+"""
+
+import configparser
+
+from synchro.shard import parse_shard
+
+CONFIG_SECTION = "sync"
+AUDIENCE_SECTION_PREFIX = "audience:"
+AUDIENCE_KEYS = ("list_id", "include_tags", "exclude_tags")
+
+
+class ConfigError(ValueError):
+    """Valeur de configuration invalide"""
+
+
+def _parse_bool(raw):
+    value = str(raw).strip().lower()
+    if value in ("1", "true", "yes", "oui", "on"):
+        return True
+    if value in ("0", "false", "no", "non", "off", ""):
+        return False
+    raise ValueError(f"booléen attendu, reçu '{raw}'")
+
+
+def _parse_list(raw):
+    if isinstance(raw, (list, tuple)):
+        return [str(item).strip() for item in raw if str(item).strip()]
+    return [item.strip() for item in str(raw).split(",") if item.strip()]
+
+
+PARSERS = {
+    "str": str,
+    "shard": parse_shard,
+    "int": int,
+    "float": float,
+    "bool": _parse_bool,
+    "list": _parse_list
+}
+
+# (nom, variable d'environnement, type, défaut, choix possibles, minimum, aide)
+# minimum : tailles, workers et concurrence ≥ 1 ; 0 n'est admis que s'il signifie « sans limite » ou « désactivé »
+SETTINGS = [
+    ("mode", "SYNC_MODE", "str", "test", ("test", "production"), None,
+     "test : seuls les emails du périmètre de test ; production : toute la base"),
+    ("scope", "SYNC_SCOPE", "list", [], None, None,
+     "Motifs d'email à traiter, séparés par des virgules : @exemple, domain:, suffix:, regex:, email: "
+     "(défaut : domaine de test en mode test, tout en production)"),
+    ("scope_exclude", "SYNC_SCOPE_EXCLUDE", "list", [], None, None,
+     "Motifs d'email à ne jamais traiter (même syntaxe que --scope, prioritaires)"),
+    ("scope_exclude_file", "SYNC_SCOPE_EXCLUDE_FILE", "str", None, None, None,
+     "Liste d'exclusion : une adresse (ou un motif préfixé) par ligne"),
+    ("fetch", "SYNC_FETCH", "str", "full", ("full", "delta"), None,
+     "full : parcours complet ; delta : seulement ce qui a changé depuis la dernière exécution réussie"),
+    ("state_file", "SYNC_STATE_FILE", "str", "sync_state.json", None, None,
+     "Fichier d'état (date de la dernière exécution réussie, utilisée par le mode delta)"),
+    ("delta_overlap", "SYNC_DELTA_OVERLAP", "int", 300, None, 0,
+     "Recouvrement en secondes appliqué à la fenêtre delta (décalage d'horloge, écritures en cours)"),
+    ("shard", "SYNC_SHARD", "shard", None, None, None,
+     "Tranche i/N des contacts (hash de l'email) traitée par ce processus ; état, verrou et rapports par shard"),
+    ("lock_file", "SYNC_LOCK_FILE", "str", "sync.lock", None, None,
+     "Verrou empêchant deux exécutions simultanées (par shard)"),
+    ("audiences", "MAILCHIMP_AUDIENCES", "list", [], None, None,
+     "Audiences Mailchimp nom=list_id séparées par des virgules (défaut : MAILCHIMP_LIST_ID seule) ; "
+     "règles de tags dans les sections [audience:nom] du fichier de config"),
+    ("verify_creations", "VERIFY_CREATIONS", "str", "auto", ("auto", "always", "never"), None,
+     "Recherche des candidats dans Copper avant création : auto (mode delta), always, never"),
+    ("engine", "SYNC_ENGINE", "str", "sync", ("sync", "async"), None,
+     "Moteur d'exécution : sync (requests) ou async (asyncio + aiohttp)"),
+    ("copper_write_workers", "COPPER_WRITE_WORKERS", "int", 4, None, 1,
+     "Workers d'écriture Copper en parallèle"),
+    ("copper_rate_limit", "COPPER_RATE_LIMIT", "float", 3.0, None, 0,
+     "Requêtes Copper par seconde, retries compris (0 = illimité)"),
+    ("copper_call_budget", "SYNC_COPPER_CALL_BUDGET", "int", 0, None, 0,
+     "Appels API Copper autorisés par exécution, lectures comprises ; le reste est reporté (0 = sans limite)"),
+    ("mailchimp_call_budget", "SYNC_MAILCHIMP_CALL_BUDGET", "int", 0, None, 0,
+     "Appels API Mailchimp autorisés par exécution, lectures comprises ; le reste est reporté (0 = sans limite)"),
+    ("copper_page_size", "COPPER_PAGE_SIZE", "int", 200, None, 1,
+     "Taille des pages de recherche Copper (200 maximum)"),
+    ("mailchimp_page_size", "MAILCHIMP_PAGE_SIZE", "int", 1000, None, 1,
+     "Taille des pages de membres Mailchimp (1000 maximum)"),
+    ("mailchimp_batch_size", "MAILCHIMP_BATCH_SIZE", "int", 500, None, 1,
+     "Membres par lot Mailchimp (500 maximum)"),
+    ("request_timeout", "REQUEST_TIMEOUT", "float", 30.0, None, 0,
+     "Délai maximal d'une requête HTTP en secondes"),
+    ("slow_request_seconds", "SYNC_SLOW_REQUEST_SECONDS", "float", 5.0, None, 0,
+     "Appel HTTP signalé comme lent dans le log au-delà de ce délai, retries compris (0 = jamais)"),
+    ("max_retries", "MAX_RETRIES", "int", 2, None, 1,
+     "Tentatives par requête HTTP"),
+    ("retry_delay", "RETRY_DELAY", "float", 0.5, None, 0,
+     "Attente entre deux tentatives en secondes"),
+    ("log_level", "SYNC_LOG_LEVEL", "str", "INFO", ("DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR"), None,
+     "Niveau minimal des messages journalisés (console et fichier)"),
+    ("log_format", "SYNC_LOG_FORMAT", "str", "text", ("text", "json"), None,
+     "Format du fichier de log : text (sync_log_*.txt) ou json (une ligne JSON par message, sync_log_*.jsonl)"),
+    ("log_console", "SYNC_LOG_CONSOLE", "str", "auto", ("auto", "full", "summary"), None,
+     "Console : full (tous les messages), summary (étapes, avertissements, erreurs), auto (full en test, summary en production)"),
+    ("progress", "SYNC_PROGRESS", "str", "auto", ("auto", "bar", "lines", "off"), None,
+     "Avancement des écritures : bar (barre dans le terminal), lines (lignes périodiques), auto (bar si terminal), off"),
+    ("progress_interval", "SYNC_PROGRESS_INTERVAL", "float", 30.0, None, 1,
+     "Intervalle des lignes d'avancement en secondes (mode lines)"),
+    ("output_dir", "SYNC_OUTPUT_DIR", "str", "runs", None, None,
+     "Répertoire des logs et rapports (index des exécutions, rotation, compression)"),
+    ("retention_days", "SYNC_RETENTION_DAYS", "float", 30.0, None, 0,
+     "Exécutions gardées dans le répertoire de sortie, en jours (0 = sans limite)"),
+    ("retention_runs", "SYNC_RETENTION_RUNS", "int", 0, None, 0,
+     "Nombre maximal d'exécutions gardées (0 = sans limite)"),
+    ("retention_max_mb", "SYNC_RETENTION_MAX_MB", "float", 1024.0, None, 0,
+     "Taille maximale du répertoire de sortie en Mo, exécutions les plus anciennes supprimées (0 = sans limite)"),
+    ("retention_keep_plain", "SYNC_RETENTION_KEEP_PLAIN", "int", 20, None, 0,
+     "Exécutions les plus récentes laissées non compressées, les autres en .gz (0 = pas de compression)"),
+    ("metrics_file", "SYNC_METRICS_FILE", "str", None, None, None,
+     "Fichier des métriques Prometheus pour le textfile collector, écrit en fin d'exécution (un par shard)"),
+    ("metrics_port", "SYNC_METRICS_PORT", "int", 0, None, 0,
+     "Port de l'endpoint HTTP /metrics servi pendant l'exécution (0 = désactivé)"),
+    ("report_formats", "SYNC_REPORT_FORMATS", "list", [], ("jsonl", "json", "csv"), None,
+     "Sorties structurées en plus du rapport texte, séparées par des virgules : "
+     "jsonl (une ligne par opération), json (résumé de l'exécution), csv"),
+    ("operations_memory_limit", "OPERATIONS_MEMORY_LIMIT", "int", 100000, None, 0,
+     "Opérations du rapport gardées en mémoire, au-delà déversées sur disque (0 = sans plafond)"),
+    ("operations_spill_dir", "OPERATIONS_SPILL_DIR", "str", None, None, None,
+     "Répertoire du journal temporaire des opérations déversées (défaut : répertoire temporaire du système)"),
+    ("marked_policy", "MARKED_POLICY", "str", "defer", None, None,
+     "Politique des contacts marqués : interactive, ou règles comme \"delete:90,archive:7,defer\""),
+    ("marked_queue_file", "MARKED_QUEUE_FILE", "str", "marked_contacts_queue.json", None, None,
+     "File d'attente des contacts marqués"),
+    ("archive_concurrency_check", "ARCHIVE_CONCURRENCY_CHECK", "bool", False, None, None,
+     "Contrôle optimiste des modifications avant archivage"),
+    ("async_copper_concurrency", "ASYNC_COPPER_CONCURRENCY", "int", 8, None, 1,
+     "Moteur async : requêtes Copper simultanées"),
+    ("async_mailchimp_concurrency", "ASYNC_MAILCHIMP_CONCURRENCY", "int", 10, None, 1,
+     "Moteur async : requêtes Mailchimp simultanées"),
+    ("async_pool_size", "ASYNC_POOL_SIZE", "int", 100, None, 1,
+     "Moteur async : taille du pool de connexions"),
+    ("async_copper_page_window", "ASYNC_COPPER_PAGE_WINDOW", "int", 4, None, 1,
+     "Moteur async : pages Copper récupérées en parallèle")
+]
+
+
+def parse_setting(name, raw):
+    """Convertit et valide une valeur brute (chaîne) pour le réglage donné"""
+    for setting_name, _, kind, _, choices, minimum, _ in SETTINGS:
+        if setting_name == name:
+            break
+    else:
+        raise ConfigError(f"Réglage inconnu: {name}")
+
+    try:
+        value = PARSERS[kind](raw)
+    except (TypeError, ValueError) as e:
+        raise ConfigError(f"Valeur invalide pour {name}: {raw!r} ({e})")
+
+    if choices and kind == "list":
+        invalid = [item for item in value if item not in choices]
+        if invalid:
+            raise ConfigError(f"Valeur invalide pour {name}: {raw!r} (choix : {', '.join(choices)})")
+    elif choices and value not in choices:
+        raise ConfigError(f"Valeur invalide pour {name}: {raw!r} (choix : {', '.join(choices)})")
+    if minimum is not None and value < minimum:
+        raise ConfigError(f"Valeur invalide pour {name}: {raw!r} (minimum {minimum})")
+    return value
+
+
+def _read_ini(path):
+    parser = configparser.ConfigParser()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            parser.read_file(f)
+    except OSError as e:
+        raise ConfigError(f"Fichier de config illisible: {path} ({e})")
+    except configparser.Error as e:
+        raise ConfigError(f"Fichier de config invalide: {path} ({e})")
+    return parser
+
+
+def read_config_file(path):
+    """Lit la section [sync] d'un fichier INI et renvoie les valeurs brutes par réglage"""
+    parser = _read_ini(path)
+
+    if not parser.has_section(CONFIG_SECTION):
+        if any(section.startswith(AUDIENCE_SECTION_PREFIX) for section in parser.sections()):
+            return {}
+        raise ConfigError(f"Section [{CONFIG_SECTION}] absente de {path}")
+
+    values = dict(parser.items(CONFIG_SECTION))
+    known = {setting[0] for setting in SETTINGS}
+    unknown = sorted(set(values) - known)
+    if unknown:
+        raise ConfigError(f"Réglage(s) inconnu(s) dans {path}: {', '.join(unknown)}")
+    return values
+
+
+def read_audience_sections(path):
+    """Lit les sections [audience:nom] (list_id, include_tags, exclude_tags) d'un fichier INI"""
+    parser = _read_ini(path)
+    audiences = {}
+    for section in parser.sections():
+        if not section.startswith(AUDIENCE_SECTION_PREFIX):
+            continue
+        name = section[len(AUDIENCE_SECTION_PREFIX):].strip()
+        values = dict(parser.items(section))
+        unknown = sorted(set(values) - set(AUDIENCE_KEYS))
+        if not name or unknown:
+            raise ConfigError(f"Section [{section}] invalide dans {path}: {', '.join(unknown) or 'nom manquant'}")
+        audiences[name] = {
+            key: _parse_list(value) if key.endswith("_tags") else value.strip()
+            for key, value in values.items()
+        }
+    return audiences
+
+
+def resolve_settings(environ, config_path=None, overrides=None):
+    """Fusionne défauts, environnement, fichier de config et surcharges (ligne de commande)
+
+    Les règles des audiences du fichier de config sont renvoyées sous 'audience_sections'.
+    """
+    file_values = read_config_file(config_path) if config_path else {}
+    overrides = overrides or {}
+
+    settings = {}
+    for name, env_var, _, default, _, _, _ in SETTINGS:
+        if overrides.get(name) is not None:
+            settings[name] = parse_setting(name, overrides[name])
+        elif name in file_values:
+            settings[name] = parse_setting(name, file_values[name])
+        elif environ.get(env_var) is not None:
+            settings[name] = parse_setting(name, environ[env_var])
+        else:
+            settings[name] = list(default) if isinstance(default, list) else default
+    settings["audience_sections"] = read_audience_sections(config_path) if config_path else {}
+    return settings
+
+
+def add_setting_arguments(parser):
+    """Ajoute une option --nom-du-réglage par réglage (valeurs brutes, validées à la résolution)"""
+    for name, env_var, kind, default, choices, _, help_text in SETTINGS:
+        option = "--" + name.replace("_", "-")
+        # Listes séparées par des virgules : éléments validés à la résolution
+        parser.add_argument(option, dest=name, default=None, choices=None if kind == "list" else choices,
+                            help=f"{help_text} [env {env_var}, défaut {default!r}]")
@@ -0,0 +1,82 @@
+"""
+Index inversé des emails Copper : chaque email normalisé d'une personne → ses identifiants
+
+Une personne Copper peut avoir plusieurs emails ; l'adresse inscrite dans
+Mailchimp n'est pas forcément la première. L'index couvre tous les emails pour
+que la recherche d'existence (Mailchimp → Copper) reste un accès dictionnaire,
+et signale les emails partagés par plusieurs personnes (conflits).
+
+CopperLookupCache garde le résultat des recherches d'existence faites avant
+de créer des personnes, pour ne jamais rechercher deux fois le même email.
+"""
+
+from synchro.utils import person_emails
+
+
+class CopperEmailIndex:
+    """Email normalisé → personnes Copper (la première rencontrée est la propriétaire)"""
+
+    def __init__(self, contacts=()):
+        self.people = {}
+        self.ids_by_email = {}
+        for contact in contacts:
+            self.add(contact)
+
+    def add(self, contact):
+        person_id = contact.get("id")
+        self.people[person_id] = contact
+        for email in person_emails(contact):
+            ids = self.ids_by_email.setdefault(email, [])
+            if person_id not in ids:
+                ids.append(person_id)
+
+    def __contains__(self, email):
+        return email in self.ids_by_email
+
+    def __len__(self):
+        return len(self.people)
+
+    def get(self, email, default=None):
+        """Personne propriétaire de l'email (default si inconnu)"""
+        ids = self.ids_by_email.get(email)
+        return self.people[ids[0]] if ids else default
+
+    def ids(self, email):
+        return list(self.ids_by_email.get(email, []))
+
+    def owns(self, contact, email):
+        """La personne est-elle la propriétaire de l'email (pas un doublon de la même adresse) ?"""
+        ids = self.ids_by_email.get(email)
+        return not ids or ids[0] == contact.get("id")
+
+    def conflicts(self):
+        """Emails partagés par plusieurs personnes Copper : {email: [ids]}"""
+        return {email: list(ids) for email, ids in self.ids_by_email.items() if len(ids) > 1}
+
+
+class CopperLookupCache:
+    """Résultats des recherches d'existence dans Copper : email → présent (True) ou absent (False)
+
+    Vidé au début de chaque exécution ; un email créé pendant l'exécution devient présent.
+    """
+
+    def __init__(self):
+        self.known = {}
+
+    def unknown(self, emails):
+        """Emails jamais recherchés (sans doublon, ordre conservé)"""
+        return [email for email in dict.fromkeys(emails) if email not in self.known]
+
+    def record(self, checked, found):
+        for email in checked:
+            self.known[email] = email in found
+
+    def add_existing(self, emails):
+        for email in emails:
+            self.known[email] = True
+
+    def existing(self, emails):
+        return {email for email in emails if self.known.get(email)}
+
+    def clear(self):
+        self.known.clear()
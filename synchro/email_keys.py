@@ -0,0 +1,54 @@
+"""
+Mémo des clés d'email : email brut → (email normalisé, hash subscriber Mailchimp)
+
+Une même adresse est normalisée et hachée plusieurs fois par exécution (index,
+comparaison, écriture, archivage, désabonnement). Le mémo calcule les deux clés
+une seule fois par adresse brute et renvoie des chaînes internées : tous les
+index partagent le même objet au lieu d'en allouer un par appel.
+
+Le mémo n'est pas persisté entre exécutions : relire un million d'entrées
+depuis le disque coûte plus cher que de les recalculer (MD5 sur une adresse
+courte). Il est vidé quand il dépasse max_entries pour borner la mémoire d'un
+processus de longue durée.
+"""
+
+import hashlib
+import sys
+
+# Au-delà, le mémo repart de zéro (quelques centaines d'octets par entrée)
+MAX_ENTRIES = 2000000
+
+
+class EmailKeyCache:
+    """Email brut → (email normalisé, hash subscriber), calculés une fois et internés"""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.keys = {}
+
+    def key(self, email):
+        entry = self.keys.get(email)
+        if entry is None:
+            lowered = email.lower()
+            # Mailchimp hache l'adresse en minuscules (sans retirer les espaces)
+            entry = (sys.intern(lowered.strip()), sys.intern(hashlib.md5(lowered.encode()).hexdigest()))
+            if len(self.keys) >= self.max_entries:
+                self.keys = {}
+            self.keys[email] = entry
+        return entry
+
+    def normalize(self, email):
+        return self.key(email)[0]
+
+    def subscriber_hash(self, email):
+        return self.key(email)[1]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def clear(self):
+        self.keys = {}
+
+
+# Mémo partagé par synchro.utils (normalize_email, get_subscriber_hash)
+EMAIL_KEYS = EmailKeyCache()
@@ -0,0 +1,143 @@
+"""
+Fusion des rapports de shards (--shard i/N) en un rapport d'importation unique
+
+Usage : python -m synchro.merge_reports import_report_<date>_shard*of4.json
+
+Chaque shard écrit un résumé JSON à côté de son rapport texte, et ses opérations
+en JSON Lines (operations_file) ; ce module additionne les résumés et génère un
+rapport au format habituel (import_report_<date>_merged.txt) en relisant les
+opérations fichier par fichier, sans les charger toutes en mémoire.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+COUNTERS = ("copper_to_mc", "mc_to_copper", "identical_contacts", "excluded", "marked_for_deletion")
+
+
+def load_summaries(paths):
+    """Charge les résumés JSON des shards (operations_file résolu à côté du résumé)"""
+    summaries = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            summary = json.load(f)
+        if summary.get("operations_file"):
+            summary["operations_file"] = os.path.join(os.path.dirname(path), summary["operations_file"])
+        summaries.append(summary)
+    return summaries
+
+
+def shard_operations(summary):
+    """Opérations d'un shard : lues ligne à ligne dans operations_file (ou liste du résumé, anciens shards)"""
+    if not summary.get("operations_file"):
+        yield from summary.get("operations", [])
+        return
+    with open(summary["operations_file"], "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class MergedOperations:
+    """Opérations de tous les shards, dans l'ordre des shards, relues à chaque parcours
+
+    Nombre d'opérations et d'erreurs tirés des compteurs des résumés (count_errors
+    n'a pas à tout relire) ; chaque itération ne garde qu'une opération en mémoire.
+    """
+
+    def __init__(self, summaries):
+        self.summaries = summaries
+        self.count = sum(s.get("operations_count", len(s.get("operations", []))) for s in summaries)
+        self.errors = sum(
+            s["operations_errors"] if "operations_errors" in s
+            else sum(1 for op in s.get("operations", []) if not op["success"])
+            for s in summaries
+        )
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for summary in self.summaries:
+            yield from shard_operations(summary)
+
+
+def merge_summaries(summaries):
+    """Additionne les compteurs et concatène opérations et contacts marqués (dans l'ordre des shards)
+
+    Lève ValueError si les shards ne viennent pas du même découpage ou du même mode,
+    ou si un shard apparaît deux fois. Les shards manquants sont signalés dans 'missing_shards'.
+    """
+    if not summaries:
+        raise ValueError("aucun résumé de shard à fusionner")
+
+    def shard_key(summary):
+        index, count = (int(part) for part in summary["shard"].split("/"))
+        return index, count
+
+    summaries = sorted(summaries, key=shard_key)
+    counts = {shard_key(s)[1] for s in summaries}
+    if len(counts) > 1:
+        raise ValueError(f"découpages différents: {', '.join(sorted(s['shard'] for s in summaries))}")
+    modes = {(s["mode"], tuple(s.get("scope", [])), tuple(s.get("scope_exclude", []))) for s in summaries}
+    if len(modes) > 1:
+        raise ValueError("les shards n'ont pas été exécutés avec le même mode et le même périmètre")
+    seen = [s["shard"] for s in summaries]
+    duplicates = sorted({shard for shard in seen if seen.count(shard) > 1})
+    if duplicates:
+        raise ValueError(f"shard(s) en double: {', '.join(duplicates)}")
+
+    count = counts.pop()
+    merged = {name: sum(s.get(name, 0) for s in summaries) for name in COUNTERS}
+    merged.update(
+        operations=MergedOperations(summaries),
+        marked_contacts=[c for s in summaries for c in s.get("marked_contacts", [])],
+        shards=seen,
+        missing_shards=[f"{i}/{count}" for i in range(1, count + 1) if f"{i}/{count}" not in seen],
+        mode=summaries[0]["mode"],
+        scope=summaries[0].get("scope", []),
+        scope_exclude=summaries[0].get("scope_exclude", []),
+        log_files=[s.get("log_file") for s in summaries if s.get("log_file")],
+        report_files=[s.get("report_file") for s in summaries if s.get("report_file")]
+    )
+    return merged
+
+
+def write_merged_report(merged):
+    """Écrit le rapport fusionné avec le générateur de rapport habituel, renvoie son nom"""
+    import sync
+
+    sync.TEST_MODE = merged["mode"] == "test"
+    sync.SCOPE_PATTERNS = tuple(merged["scope"])
+    sync.SCOPE_EXCLUDE = tuple(merged["scope_exclude"])
+    sync.SCOPE_EXCLUDE_FILE = None
+    sync.SHARD = None
+    sync.log_filename = ", ".join(merged["log_files"]) or None
+    sync.open_report_file(suffix="_merged")
+    report_filename = sync.write_import_report(merged)
+    sync.finish_run_files()
+    return report_filename
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fusionne les rapports JSON des shards en un rapport unique")
+    parser.add_argument("summaries", nargs="+", help="Résumés JSON des shards (import_report_*_shard*.json)")
+    args = parser.parse_args(argv)
+
+    try:
+        merged = merge_summaries(load_summaries(args.summaries))
+    except (OSError, ValueError, KeyError) as e:
+        parser.exit(1, f"❌ Fusion impossible: {e}\n")
+
+    if merged["missing_shards"]:
+        print(f"⚠️ Shard(s) manquant(s): {', '.join(merged['missing_shards'])}", file=sys.stderr)
+
+    report_filename = write_merged_report(merged)
+    print(f"📄 Rapport fusionné ({len(merged['shards'])} shard(s)): {report_filename}")
+    return report_filename
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Métriques d'exécution au format Prometheus (sans dépendance)
+
+Un registre (MetricsRegistry) tient les compteurs, histogrammes et jauges
+déclarés dans DEFINITIONS ; les deux moteurs l'alimentent (opérations du
+rapport, requêtes HTTP, durées des étapes mesurées par synchro.profiling). Deux sorties :
+- fichier texte pour le textfile collector de node_exporter, écrit à la fin de
+  chaque exécution (exécutions cron) : SYNC_METRICS_FILE
+- endpoint HTTP /metrics servi pendant toute la durée du processus (longues
+  exécutions, scrape direct) : SYNC_METRICS_PORT
+
+Les chemins d'API sont réduits à un gabarit (/people/:id, /lists/:id/members/:id)
+pour garder un nombre de séries borné.
+"""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Limites des histogrammes de latence (secondes)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# nom : (type, labels, description)
+DEFINITIONS = {
+    "sync_operations_total": ("counter", ("direction", "result"),
+                              "Opérations du rapport par sens et résultat"),
+    "sync_marked_contacts_total": ("counter", ("action",),
+                                   "Contacts marqués pour suppression par action décidée"),
+    "sync_http_requests_total": ("counter", ("api", "method", "endpoint", "status"),
+                                 "Tentatives de requêtes HTTP par API, gabarit de chemin et statut"),
+    "sync_http_request_duration_seconds": ("histogram", ("api", "method", "endpoint"),
+                                           "Latence des requêtes HTTP (par tentative)"),
+    "sync_http_retries_total": ("counter", ("api",), "Nouvelles tentatives après échec"),
+    "sync_http_rate_limited_total": ("counter", ("api",), "Réponses 429 (limite de débit atteinte)"),
+    "sync_api_budget_remaining": ("gauge", ("api",),
+                                  "Appels restants sur le budget par exécution (APIs limitées, dernière exécution)"),
+    "sync_phase_duration_seconds": ("gauge", ("phase",), "Durée de chaque étape de la dernière exécution"),
+    "sync_run_duration_seconds": ("gauge", (), "Durée de la dernière exécution"),
+    "sync_contacts_per_second": ("gauge", (), "Opérations du rapport par seconde sur la dernière exécution"),
+    "sync_last_run_timestamp_seconds": ("gauge", (), "Fin de la dernière exécution (timestamp Unix)"),
+    "sync_last_run_success": ("gauge", (), "1 si la dernière exécution s'est terminée sans erreur critique"),
+}
+
+
+def endpoint_template(path):
+    """Gabarit d'un chemin d'API : segments non alphabétiques (ids, hash, list_id) remplacés par :id"""
+    path = path.split("?", 1)[0]
+    return "/".join(segment if segment.isalpha() or not segment else ":id" for segment in path.split("/"))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """Valeurs des métriques déclarées, partagées entre threads"""
+
+    def __init__(self, definitions=None, buckets=LATENCY_BUCKETS):
+        self.definitions = definitions or DEFINITIONS
+        self.buckets = tuple(buckets)
+        self.values = {name: {} for name in self.definitions}
+        self.lock = threading.Lock()
+
+    def _key(self, name, labels):
+        return tuple(str(labels.get(label, "")) for label in self.definitions[name][1])
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            series = self.values[name]
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.values[name][key] = value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            series = self.values[name]
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def get(self, name, **labels):
+        """Valeur d'une série (compteur, jauge ; nombre d'observations d'un histogramme)"""
+        value = self.values[name].get(self._key(name, labels), 0)
+        return value[-1] if isinstance(value, list) else value
+
+    def clear(self):
+        with self.lock:
+            for series in self.values.values():
+                series.clear()
+
+    def render(self):
+        """Exposition texte Prometheus (version 0.0.4)"""
+        lines = []
+        with self.lock:
+            for name, (kind, label_names, description) in self.definitions.items():
+                series = self.values[name]
+                if not series:
+                    continue
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(series.items()):
+                    if kind != "histogram":
+                        lines.append(f"{name}{_labels(label_names, key)} {_number(value)}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(self.buckets + (float("inf"),), value[:-2] + [0]):
+                        cumulative = cumulative + count if bound != float("inf") else value[-1]
+                        le = 'le="%s"' % _number(bound)
+                        lines.append(f"{name}_bucket{_labels(label_names, key, le)} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(label_names, key)} {_number(value[-2])}")
+                    lines.append(f"{name}_count{_labels(label_names, key)} {value[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def write_textfile(registry, path):
+    """Écrit les métriques pour le textfile collector (fichier temporaire puis remplacement atomique)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(registry.render())
+    os.replace(temporary, path)
+
+
+class MetricsServer:
+    """Endpoint HTTP /metrics servi par un thread d'arrière-plan"""
+
+    def __init__(self, registry, port, host=""):
+        handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Pas de ligne par scrape sur la sortie d'erreur
+        pass
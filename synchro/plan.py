@@ -0,0 +1,109 @@
+"""
+Plan de synchronisation : décisions d'une exécution, sérialisables et relisibles
+
+La phase de planification (sync.build_sync_plan) lit Copper et Mailchimp et
+décide de tout sans rien écrire ; la phase d'application (sync.apply_plan)
+exécute un plan, éventuellement relu depuis un fichier (--plan-out / --apply).
+Ce module ne contient que les fonctions pures : estimation du coût, tags
+ajoutés, résumé, lecture et écriture du fichier.
+"""
+
+import json
+
+PLAN_VERSION = 1
+
+# Durée moyenne observée d'un appel API (secondes), base de l'estimation
+ESTIMATED_CALL_SECONDS = 0.3
+
+
+def member_tag_names(member):
+    """Tags actuels d'un membre Mailchimp (liste de {"name": ...} ou de chaînes)"""
+    names = []
+    for tag in (member or {}).get("tags") or []:
+        names.append(tag.get("name") if isinstance(tag, dict) else str(tag))
+    return names
+
+
+def tags_added(tags, member):
+    """Tags Copper absents du membre Mailchimp (tous si le membre est nouveau)"""
+    current = {name.lower() for name in member_tag_names(member)}
+    return [tag for tag in tags if str(tag)[:50].lower() not in current]
+
+
+def _batches(count, size):
+    return -(-count // size) if count else 0
+
+
+def estimate_cost(plan, copper_rate_limit, copper_workers, mailchimp_batch_size,
+                  call_seconds=ESTIMATED_CALL_SECONDS):
+    """Appels API et durée estimés pour appliquer le plan
+
+    Écritures Mailchimp : un PUT par abonné (+ un POST de tags), séquentielles par
+    audience, audiences en parallèle ; un lot de suppression coûte sa soumission et
+    au moins une lecture de son statut. Écritures Copper : limitées par le débit
+    copper_rate_limit (0 = illimité, seuls les workers comptent).
+    """
+    audiences = [audience["name"] for audience in plan["audiences"]] or [None]
+    per_audience = {name: 0 for name in audiences}
+    for write in plan["mailchimp_writes"]:
+        per_audience[write["audience"]] = per_audience.get(write["audience"], 0) + 1 + (1 if write["tags"] else 0)
+
+    marked = plan["marked"]
+    archive = [c for c in marked if c.get("action") == "archive"]
+    delete = [c for c in marked if c.get("action") == "delete"]
+    marked_mailchimp = (_batches(len(archive), mailchimp_batch_size) * len(audiences)
+                        + _batches(len(delete) * len(audiences), mailchimp_batch_size) * 2)
+
+    mailchimp_calls = sum(per_audience.values()) + marked_mailchimp
+    copper_calls = len(plan["copper_creates"]) + len(archive) + len(delete)
+
+    workers = max(1, copper_workers)
+    copper_seconds = copper_calls * call_seconds / workers
+    if copper_rate_limit:
+        copper_seconds = max(copper_seconds, copper_calls / copper_rate_limit)
+    mailchimp_seconds = (max(per_audience.values()) + marked_mailchimp) * call_seconds
+
+    return {
+        "mailchimp_calls": mailchimp_calls,
+        "copper_calls": copper_calls,
+        "total_calls": mailchimp_calls + copper_calls,
+        "estimated_seconds": round(mailchimp_seconds + copper_seconds, 1)
+    }
+
+
+def summarize(plan):
+    """Nombre d'opérations du plan par type"""
+    writes = plan["mailchimp_writes"]
+    actions = {}
+    for contact in plan["marked"]:
+        actions[contact.get("action")] = actions.get(contact.get("action"), 0) + 1
+    return {
+        "mailchimp_create": sum(1 for w in writes if w["action"] == "create"),
+        "mailchimp_update": sum(1 for w in writes if w["action"] == "update"),
+        "tags_added": sum(len(w["tags_added"]) for w in writes),
+        "copper_create": len(plan["copper_creates"]),
+        "copper_blocked": len(plan["copper_blocked"]),
+        "archive": actions.get("archive", 0),
+        "delete": actions.get("delete", 0),
+        "defer": actions.get("defer", 0) + actions.get("interactive", 0),
+        "identical": plan["skipped"]["identical"],
+        "excluded": plan["skipped"]["excluded"]
+    }
+
+
+def save_plan(plan, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2, default=str)
+    return path
+
+
+def load_plan(path):
+    """Relit un plan ; ValueError si le fichier est illisible ou d'une autre version"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            plan = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"plan illisible: {path} ({e})")
+    if not isinstance(plan, dict) or plan.get("version") != PLAN_VERSION:
+        raise ValueError(f"version de plan non prise en charge dans {path}")
+    return plan
@@ -0,0 +1,136 @@
+"""
+Chronométrage des étapes d'une exécution et profilage optionnel (--profile)
+
+Chaque exécution mesure ses étapes (PhaseTimer) : récupération Copper et
+Mailchimp, index, classification, écritures dans chaque sens, contacts marqués,
+rapport. Les durées vont dans le rapport, le résumé JSON et les métriques.
+
+Avec --profile, l'exécution tourne sous cProfile et tracemalloc (RunProfiler) :
+le profil brut (.prof, lisible par pstats ou snakeviz) et un tableau texte
+(durée et pic mémoire de chaque étape, fonctions les plus coûteuses) sont
+écrits avec les fichiers de l'exécution. cProfile ne suit que le thread
+principal (pas les workers d'écriture) ; tracemalloc suit tous les threads.
+Avec le moteur asynchrone, des étapes menées en parallèle partagent leur pic
+mémoire.
+"""
+
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Étapes dans l'ordre d'une exécution, avec leur libellé
+PHASES = {
+    "copper_fetch": "Récupération Copper",
+    "mailchimp_fetch": "Récupération Mailchimp",
+    "index": "Construction des index",
+    "classify": "Classification et plan",
+    "copper_to_mailchimp": "Écritures Copper → Mailchimp",
+    "mailchimp_to_copper": "Écritures Mailchimp → Copper",
+    "marked": "Contacts marqués",
+    "report": "Rapport",
+}
+
+# Fonctions listées dans le tableau du profil
+PROFILE_TOP = 30
+
+
+class PhaseTimer:
+    """Durées des étapes de l'exécution (et pic mémoire de chacune si tracemalloc est actif)"""
+
+    def __init__(self, on_phase=None):
+        self.on_phase = on_phase
+        self.durations = {}
+        self.peaks = {}
+
+    def reset(self):
+        self.durations = {}
+        self.peaks = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Mesure une étape ; une étape répétée cumule ses durées"""
+        tracing = tracemalloc.is_tracing()
+        if tracing and hasattr(tracemalloc, "reset_peak"):
+            # Python 3.9+ : pic propre à l'étape (sinon pic depuis le début de l'exécution)
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + time.perf_counter() - started
+            if tracing and tracemalloc.is_tracing():
+                self.peaks[name] = max(self.peaks.get(name, 0), tracemalloc.get_traced_memory()[1])
+            if self.on_phase:
+                self.on_phase(name, self.durations[name])
+
+    def summary(self):
+        """Durées arrondies (secondes) dans l'ordre des étapes, pour le rapport et le résumé JSON"""
+        return {name: round(seconds, 3) for name, seconds in ordered(self.durations)}
+
+
+def ordered(values):
+    """(étape, valeur) dans l'ordre de PHASES, étapes inconnues à la fin"""
+    rank = {name: i for i, name in enumerate(PHASES)}
+    return sorted(values.items(), key=lambda item: rank.get(item[0], len(rank)))
+
+
+def phase_label(name):
+    return PHASES.get(name, name)
+
+
+def format_phase_table(durations, peaks=None):
+    """Tableau texte des étapes : durée, part du total et pic mémoire (si mesuré)"""
+    peaks = peaks or {}
+    total = sum(durations.values())
+    lines = [f"{'Étape':<32}{'Durée (s)':>12}{'Part':>8}{'Pic mémoire (Mo)':>20}"]
+    for name, seconds in ordered(durations):
+        share = f"{seconds / total * 100:.1f}%" if total else "-"
+        peak = f"{peaks[name] / 1024 / 1024:.1f}" if name in peaks else "-"
+        lines.append(f"{phase_label(name):<32}{seconds:>12.3f}{share:>8}{peak:>20}")
+    lines.append(f"{'Total':<32}{total:>12.3f}")
+    return "\n".join(lines) + "\n"
+
+
+class RunProfiler:
+    """cProfile et tracemalloc autour d'une exécution"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.peak = 0
+        self.running = False
+
+    def start(self):
+        tracemalloc.start()
+        self.profile.enable()
+        self.running = True
+        return self
+
+    def stop(self):
+        if not self.running:
+            return
+        self.profile.disable()
+        self.peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.running = False
+
+    def write(self, base_path, timer):
+        """Arrête le profilage, écrit <base>.prof et <base>.txt ; renvoie les deux chemins"""
+        self.stop()
+        profile_path = f"{base_path}.prof"
+        table_path = f"{base_path}.txt"
+        self.profile.dump_stats(profile_path)
+
+        stats_text = io.StringIO()
+        pstats.Stats(self.profile, stream=stats_text).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        with open(table_path, "w", encoding="utf-8") as f:
+            f.write("DURÉE ET PIC MÉMOIRE PAR ÉTAPE\n")
+            f.write("-" * 72 + "\n")
+            f.write(format_phase_table(timer.durations, timer.peaks))
+            f.write(f"\nPic mémoire de l'exécution: {self.peak / 1024 / 1024:.1f} Mo (tracemalloc)\n\n")
+            f.write(f"FONCTIONS LES PLUS COÛTEUSES (temps cumulé, {PROFILE_TOP} premières)\n")
+            f.write("-" * 72 + "\n")
+            f.write(stats_text.getvalue())
+        return profile_path, table_path
@@ -0,0 +1,159 @@
+"""
+Avancement des écritures : traités/total, débit, appels en cours et fin estimée
+
+Deux rendus selon la sortie :
+- bar : barre redessinée sur place dans le terminal (exécution interactive)
+- lines : une ligne de log à intervalle régulier (cron, sortie redirigée)
+
+advance() est appelé pour chaque contact traité, depuis plusieurs threads ou
+tâches : il ne fait qu'incrémenter un compteur et lire l'horloge, le rendu
+n'a lieu qu'une fois la période écoulée. InFlight compte les appels HTTP en
+cours (safe_request, client asynchrone) pour les afficher avec l'avancement.
+"""
+
+import sys
+import threading
+import time
+
+# Rafraîchissement de la barre (secondes)
+BAR_REFRESH = 0.2
+BAR_WIDTH = 24
+
+
+class InFlight:
+    """Appels HTTP en cours, partagé entre threads (with requests_in_flight: ...)"""
+
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            self.count += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with self.lock:
+            self.count -= 1
+
+
+def format_duration(seconds):
+    """Durée lisible : 42 s, 5 min 06 s, 1 h 05 min"""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes} min {seconds:02d} s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} h {minutes:02d} min"
+
+
+class ProgressReporter:
+    """Avancement d'une boucle de total connu (le total peut croître, add)
+
+    mode : "bar" (stream, redessinée sur place) ou "lines" (emit(message) à
+    chaque intervalle) ; in_flight : InFlight des appels en cours ; output_lock :
+    verrou de la console, pris pour redessiner la barre (clear et redraw sont
+    appelés par le journal qui le détient déjà) ; clock injectable pour les tests.
+    """
+
+    def __init__(self, label, total=0, mode="lines", emit=None, stream=None, interval=30.0,
+                 in_flight=None, output_lock=None, clock=time.monotonic):
+        self.label = label
+        self.total = total
+        self.mode = mode
+        self.emit = emit or (lambda message: None)
+        self.stream = stream or sys.stdout
+        self.period = BAR_REFRESH if mode == "bar" else interval
+        self.in_flight = in_flight
+        self.clock = clock
+        self.done = 0
+        self.started = clock()
+        self.next_render = self.started + self.period
+        self.line = ""
+        self.lock = threading.Lock()
+        self.output_lock = output_lock or threading.Lock()
+
+    def add(self, total):
+        with self.lock:
+            self.total += total
+
+    def advance(self, count=1):
+        with self.lock:
+            self.done += count
+            now = self.clock()
+            if now < self.next_render:
+                return
+            self.next_render = now + self.period
+        self.render(now)
+
+    def status(self, now):
+        """Traités/total, débit, appels en cours et fin estimée"""
+        elapsed = max(now - self.started, 1e-9)
+        rate = self.done / elapsed
+        percent = self.done / self.total * 100 if self.total else 100.0
+        parts = [f"{self.label}: {self.done}/{self.total} ({percent:.1f}%)", f"{rate:.1f} contacts/s"]
+        if self.in_flight is not None:
+            parts.append(f"{self.in_flight.count} appel(s) en cours")
+        if rate > 0 and self.done < self.total:
+            parts.append(f"fin dans ~{format_duration((self.total - self.done) / rate)}")
+        return ", ".join(parts)
+
+    def render(self, now=None):
+        now = self.clock() if now is None else now
+        text = self.status(now)
+        if self.mode != "bar":
+            self.emit(f"⏳ {text}")
+            return
+        filled = int(BAR_WIDTH * min(self.done, self.total) / self.total) if self.total else BAR_WIDTH
+        with self.output_lock:
+            self.line = f"[{'█' * filled}{'░' * (BAR_WIDTH - filled)}] {text}"
+            self.redraw()
+
+    def clear(self):
+        """Efface la barre (avant une ligne de log sur la même console)"""
+        if self.mode == "bar" and self.line:
+            self.stream.write("\r\033[K")
+            self.stream.flush()
+
+    def redraw(self):
+        if self.mode == "bar" and self.line:
+            self.stream.write(f"\r{self.line}\033[K")
+            self.stream.flush()
+
+    def finish(self):
+        """Dernier état, puis fin de ligne (barre) ou durée totale (lignes)"""
+        if not self.done:
+            return
+        now = self.clock()
+        if self.mode == "bar":
+            self.render(now)
+            with self.output_lock:
+                self.stream.write("\n")
+                self.stream.flush()
+                self.line = ""
+        else:
+            self.emit(f"⏳ {self.label}: {self.done}/{self.total} traité(s) en {format_duration(now - self.started)}")
+
+
+class NullProgress:
+    """Avancement désactivé : mêmes méthodes, sans effet"""
+
+    def add(self, total):
+        pass
+
+    def advance(self, count=1):
+        pass
+
+    def clear(self):
+        pass
+
+    def redraw(self):
+        pass
+
+    def finish(self):
+        pass
+
+
+NO_PROGRESS = NullProgress()
@@ -0,0 +1,98 @@
+"""
+Enregistrements compacts des personnes Copper et des membres Mailchimp
+
+Les réponses des API contiennent bien plus que ce que la synchronisation utilise
+(adresses postales, réseaux sociaux, champs personnalisés, statistiques,
+_links...). À la lecture de chaque page, seuls les champs utiles sont copiés
+dans un objet à __slots__ et la réponse brute est abandonnée ; les emails sont
+normalisés et les tags internés (les mêmes chaînes reviennent sur des milliers
+de contacts).
+
+Les enregistrements restent consultables comme les dicts de l'API
+(record["tags"], record.get("emails"), record.get("merge_fields", {})), en
+lecture seule : dict(record, tags=...) en fait une copie modifiable.
+"""
+
+import sys
+from collections.abc import Mapping
+
+
+def _intern_all(values):
+    return tuple(sys.intern(value) if isinstance(value, str) else value for value in values or ())
+
+
+class Record(Mapping):
+    """Base : accès par clé aux champs listés dans KEYS"""
+
+    __slots__ = ()
+    KEYS = ()
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+class CopperPerson(Record):
+    """Personne Copper : identifiant, nom, emails normalisés (sans doublon), tags, date de modification"""
+
+    __slots__ = ("id", "first_name", "last_name", "addresses", "tags", "date_modified")
+    KEYS = ("id", "first_name", "last_name", "emails", "tags", "date_modified")
+
+    def __init__(self, id, first_name, last_name, addresses, tags, date_modified=None):
+        self.id = id
+        self.first_name = first_name
+        self.last_name = last_name
+        self.addresses = addresses
+        self.tags = tags
+        self.date_modified = date_modified
+
+    @classmethod
+    def from_api(cls, person):
+        addresses = []
+        for entry in person.get("emails") or []:
+            # Même règle que normalize_email, hors mémo : l'adresse brute n'y serait gardée que pour cette lecture
+            email = sys.intern((entry.get("email") or "").lower().strip())
+            if email and email not in addresses:
+                addresses.append(email)
+        return cls(person.get("id"), person.get("first_name"), person.get("last_name"),
+                   tuple(addresses), _intern_all(person.get("tags")), person.get("date_modified"))
+
+    @property
+    def emails(self):
+        """Format de l'API (liste de {"email": ...}), reconstruit à la demande"""
+        return [{"email": email} for email in self.addresses]
+
+
+class MailchimpMember(Record):
+    """Membre Mailchimp : email tel qu'inscrit, prénom et nom (merge_fields), noms des tags"""
+
+    __slots__ = ("email_address", "first_name", "last_name", "tags")
+    KEYS = ("email_address", "merge_fields", "tags")
+
+    def __init__(self, email_address, first_name, last_name, tags=()):
+        self.email_address = email_address
+        self.first_name = first_name
+        self.last_name = last_name
+        self.tags = tags
+
+    @classmethod
+    def from_api(cls, member):
+        merge_fields = member.get("merge_fields") or {}
+        tags = [tag.get("name") if isinstance(tag, dict) else tag for tag in member.get("tags") or []]
+        return cls(member.get("email_address", ""), merge_fields.get("FNAME", ""), merge_fields.get("LNAME", ""),
+                   _intern_all(tags))
+
+    @property
+    def merge_fields(self):
+        """Format de l'API ({"FNAME", "LNAME"}), reconstruit à la demande"""
+        return {"FNAME": self.first_name, "LNAME": self.last_name}
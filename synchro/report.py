@@ -0,0 +1,294 @@
+"""
+Rapport d'importation : opérations avec compteurs, écriture bufferisée
+
+OperationRecorder garde les opérations de l'exécution sous forme compacte
+(Operation, à __slots__), avec un plafond en mémoire au-delà duquel elles
+sont déversées sur disque, et tient à jour le nombre d'erreurs à chaque
+ajout : l'en-tête du rapport (succès, erreurs, taux) ne demande plus de
+parcourir les opérations.
+
+ReportWriter écrit le rapport au fil de l'eau : les lignes sont accumulées
+dans un tampon borné puis écrites par blocs, au lieu de construire tout le
+rapport par concaténations successives (coût quadratique sur 100k opérations).
+Un petit rapport tient dans le tampon et part en une seule écriture.
+
+Sorties structurées (--report-formats), écrites dans le même parcours que le
+rapport texte et à côté de lui :
+- jsonl : une ligne JSON par opération (OPERATION_FIELDS)
+- csv : les mêmes colonnes, tags séparés par des points-virgules
+- json : résumé de l'exécution (run_summary), sans le détail des opérations
+Le schéma est versionné (REPORT_SCHEMA_VERSION) : un champ n'est jamais
+renommé ni retiré sans changer de version.
+"""
+
+import csv
+import json
+import os
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from synchro.records import Record
+
+REPORT_SCHEMA_VERSION = 1
+REPORT_FORMATS = ("jsonl", "json", "csv")
+OPERATION_FIELDS = ("seq", "email", "name", "direction", "success", "error", "tags")
+SUMMARY_COUNTERS = ("copper_to_mc", "mc_to_copper", "identical_contacts", "excluded", "marked_for_deletion")
+
+# Tampon des fichiers de sortie structurée
+SINK_BUFFER_SIZE = 65536
+
+
+class Operation(Record):
+    """Opération du rapport : email, nom, direction, succès, erreur, tags (lecture comme un dict)"""
+
+    __slots__ = ("email", "name", "direction", "success", "error", "tag_names")
+    KEYS = ("email", "name", "direction", "success", "error", "tags")
+
+    def __init__(self, email, name, direction, success=True, error=None, tags=()):
+        self.email = email
+        self.name = name
+        # Quelques directions et tags distincts reviennent sur chaque opération
+        self.direction = sys.intern(direction) if isinstance(direction, str) else direction
+        self.success = bool(success)
+        self.error = None if error is None else str(error)
+        self.tag_names = tuple(sys.intern(tag) if isinstance(tag, str) else tag for tag in tags or ())
+
+    @classmethod
+    def from_mapping(cls, operation):
+        if isinstance(operation, cls):
+            return operation
+        return cls(operation['email'], operation['name'], operation['direction'], operation['success'],
+                   operation.get('error'), operation.get('tags'))
+
+    @property
+    def tags(self):
+        return list(self.tag_names)
+
+    def to_row(self):
+        return [self.email, self.name, self.direction, self.success, self.error, self.tag_names]
+
+
+class OperationRecorder:
+    """Opérations d'une exécution : enregistrements compacts, plafond en mémoire, compteurs
+
+    Au-delà de memory_limit opérations en mémoire (0 = sans plafond), les plus
+    anciennes sont écrites dans un journal temporaire sur disque (une ligne JSON
+    par opération, fichier supprimé à la fermeture) ; l'itération relit le
+    journal puis les opérations en mémoire, dans l'ordre d'enregistrement.
+    Succès et erreurs sont comptés à l'enregistrement.
+    """
+
+    def __init__(self, operations=(), memory_limit=0, spill_dir=None):
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
+        self.memory = []
+        self.spill = None
+        self.spilled = 0
+        self.errors = 0
+        self.lock = threading.RLock()
+        self.local = threading.local()
+        self.extend(operations)
+
+    @property
+    def successes(self):
+        return len(self) - self.errors
+
+    def __len__(self):
+        return self.spilled + len(self.memory)
+
+    def append(self, operation):
+        operation = Operation.from_mapping(operation)
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is not None:
+            buffer.append(operation)
+            return
+        with self.lock:
+            self.memory.append(operation)
+            if not operation.success:
+                self.errors += 1
+            if self.memory_limit and len(self.memory) > self.memory_limit:
+                self._spill()
+
+    def extend(self, operations):
+        for operation in operations:
+            self.append(operation)
+
+    def _spill(self):
+        """Écrit sur disque les plus anciennes opérations, en garde la moitié du plafond en mémoire"""
+        keep = self.memory_limit // 2
+        spilled = self.memory[:len(self.memory) - keep]
+        if self.spill is None:
+            self.spill = tempfile.TemporaryFile(dir=self.spill_dir, prefix="sync_operations_")
+        self.spill.seek(0, os.SEEK_END)
+        self.spill.write("".join(
+            json.dumps(operation.to_row(), ensure_ascii=False) + "\n" for operation in spilled
+        ).encode("utf-8"))
+        self.spilled += len(spilled)
+        del self.memory[:len(spilled)]
+
+    def _read_spilled(self):
+        position = 0
+        while True:
+            with self.lock:
+                self.spill.flush()
+                self.spill.seek(position)
+                lines = self.spill.readlines(SINK_BUFFER_SIZE)
+                position = self.spill.tell()
+            if not lines:
+                return
+            for line in lines:
+                email, name, direction, success, error, tags = json.loads(line)
+                yield Operation(email, name, direction, success, error, tags)
+
+    def __iter__(self):
+        if self.spill is not None:
+            yield from self._read_spilled()
+        yield from self.memory
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("index d'opération hors limites")
+        if index >= self.spilled:
+            return self.memory[index - self.spilled]
+        for i, operation in enumerate(self._read_spilled()):
+            if i == index:
+                return operation
+
+    def clear(self):
+        with self.lock:
+            self.memory = []
+            if self.spill is not None:
+                self.spill.close()
+                self.spill = None
+            self.spilled = 0
+            self.errors = 0
+
+    @contextmanager
+    def buffered(self):
+        """Redirige les enregistrements du fil courant vers un enregistreur séparé (même plafond)
+
+        Sert à regrouper les opérations de fils parallèles : chaque fil remplit
+        son tampon, versé ensuite avec extend dans l'ordre voulu.
+        """
+        buffer = OperationRecorder(memory_limit=self.memory_limit, spill_dir=self.spill_dir)
+        self.local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            self.local.buffer = None
+
+
+def count_errors(operations):
+    """Nombre d'erreurs : compteur d'un OperationRecorder, sinon un parcours (rapports fusionnés, tests)"""
+    errors = getattr(operations, "errors", None)
+    return errors if errors is not None else sum(1 for op in operations if not op['success'])
+
+
+class ReportWriter:
+    """Écriture bufferisée d'un rapport texte : blocs d'au plus buffer_size caractères"""
+
+    def __init__(self, file, buffer_size=65536):
+        self.file = file
+        self.buffer_size = buffer_size
+        self.parts = []
+        self.size = 0
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.file.write("".join(self.parts))
+            self.parts = []
+            self.size = 0
+
+
+def sink_path(report_filename, report_format):
+    """Fichier d'une sortie structurée, à côté du rapport texte (.jsonl, .csv, .summary.json)"""
+    base = os.path.splitext(report_filename)[0]
+    return base + (".summary.json" if report_format == "json" else f".{report_format}")
+
+
+def operation_record(seq, operation):
+    """Opération du rapport au schéma stable (OPERATION_FIELDS)"""
+    return {
+        "seq": seq,
+        "email": operation['email'],
+        "name": operation['name'],
+        "direction": operation['direction'],
+        "success": bool(operation['success']),
+        "error": operation.get('error'),
+        "tags": list(operation.get('tags') or [])
+    }
+
+
+class JsonLinesSink:
+    """Une ligne JSON par opération"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8", buffering=SINK_BUFFER_SIZE)
+
+    def write(self, seq, operation):
+        self.file.write(json.dumps(operation_record(seq, operation), ensure_ascii=False, default=str) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class CsvSink:
+    """Une ligne CSV par opération (en-tête OPERATION_FIELDS, tags séparés par ';')"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8", newline="", buffering=SINK_BUFFER_SIZE)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(OPERATION_FIELDS)
+
+    def write(self, seq, operation):
+        record = operation_record(seq, operation)
+        record["success"] = "true" if record["success"] else "false"
+        record["error"] = record["error"] or ""
+        record["tags"] = ";".join(str(tag) for tag in record["tags"])
+        self.writer.writerow([record[field] for field in OPERATION_FIELDS])
+
+    def close(self):
+        self.file.close()
+
+
+OPERATION_SINKS = {"jsonl": JsonLinesSink, "csv": CsvSink}
+
+
+def open_sinks(report_filename, formats):
+    """Ouvre les sorties par opération demandées (jsonl, csv)"""
+    return [OPERATION_SINKS[name](sink_path(report_filename, name)) for name in formats if name in OPERATION_SINKS]
+
+
+def run_summary(report_data, errors, **fields):
+    """Résumé de l'exécution au schéma stable : totaux, compteurs, contacts marqués et champs fournis
+    (identité de l'exécution, date, fichiers)"""
+    total = len(report_data['operations'])
+    summary = {"schema_version": REPORT_SCHEMA_VERSION}
+    summary.update(fields)
+    summary.update(
+        operations=total,
+        successes=total - errors,
+        errors=errors,
+        success_rate=round((total - errors) / total * 100, 1) if total else 0.0
+    )
+    summary.update({name: report_data.get(name, 0) for name in SUMMARY_COUNTERS})
+    summary["marked_contacts"] = [
+        {"email": c['email'], "name": c['name'], "detected_tag": c.get('detected_tag'), "action": c.get('action')}
+        for c in report_data.get('marked_contacts', [])
+    ]
+    return summary
@@ -0,0 +1,299 @@
+"""
+Rétention des logs et rapports : répertoire dédié, index des exécutions, rotation, compression
+
+Chaque exécution écrit ses fichiers (sync_log_*, import_report_*, sorties
+structurées et profil --profile) dans un répertoire dédié (SYNC_OUTPUT_DIR, runs/ par défaut). En
+fin d'exécution, ses fichiers sont inscrits dans un petit index (index.json) et
+la politique de rétention est appliquée :
+- exécutions plus anciennes que max_age_days supprimées
+- au plus max_runs exécutions gardées
+- taille totale ramenée sous max_bytes (la plus récente est toujours gardée)
+- au-delà des keep_plain plus récentes, fichiers compressés (.gz)
+Seuls les fichiers inscrits dans l'index sont supprimés ou compressés.
+
+L'index permet de retrouver la dernière exécution sans lister le répertoire :
+    python -m synchro.retention latest --kind log
+    python -m synchro.retention prune
+    python -m synchro.retention rotate sync_cron.log --max-mb 10 --keep 5
+"""
+
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+
+from synchro.shard import LockError, RunLock
+
+INDEX_VERSION = 1
+INDEX_FILE = "index.json"
+DEFAULT_OUTPUT_DIR = "runs"
+RUN_PREFIXES = {"log": "sync_log_", "report": "import_report_", "profile": "profile_"}
+
+# Attente du verrou de l'index (shards terminant en même temps)
+LOCK_ATTEMPTS = 50
+LOCK_DELAY = 0.1
+
+
+class RetentionPolicy:
+    """Limites de rétention (0 = pas de limite)"""
+
+    def __init__(self, max_age_days=30, max_runs=0, max_bytes=0, keep_plain=20):
+        self.max_age_days = max_age_days
+        self.max_runs = max_runs
+        self.max_bytes = max_bytes
+        self.keep_plain = keep_plain
+
+
+def index_path(output_dir):
+    return os.path.join(output_dir, INDEX_FILE)
+
+
+def load_index(output_dir):
+    """Exécutions inscrites, de la plus ancienne à la plus récente (index absent ou illisible : reconstruit)"""
+    try:
+        with open(index_path(output_dir), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") == INDEX_VERSION:
+            return index["runs"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+    return rebuild_index(output_dir)
+
+
+def save_index(output_dir, runs):
+    """Écriture atomique de l'index (fichier temporaire puis remplacement)"""
+    path = index_path(output_dir)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_VERSION, "runs": runs}, f, ensure_ascii=False, indent=1)
+    os.replace(temporary, path)
+
+
+def _run_id(filename):
+    """Identifiant d'exécution d'un fichier : date et shard (sync_log_<id>.txt, import_report_<id>.summary.json)"""
+    for prefix in RUN_PREFIXES.values():
+        if filename.startswith(prefix):
+            return filename[len(prefix):].split(".", 1)[0]
+    return None
+
+
+def _size(output_dir, files):
+    total = 0
+    for name in files:
+        try:
+            total += os.path.getsize(os.path.join(output_dir, name))
+        except OSError:
+            pass
+    return total
+
+
+def run_entry(output_dir, run_id, files, finished_at=None):
+    return {
+        "id": run_id,
+        "finished_at": finished_at if finished_at is not None else time.time(),
+        "files": sorted(files),
+        "bytes": _size(output_dir, files),
+        "compressed": all(name.endswith(".gz") for name in files)
+    }
+
+
+def rebuild_index(output_dir):
+    """Reconstruit l'index depuis les fichiers du répertoire (premier passage, index perdu)"""
+    runs = {}
+    try:
+        names = os.listdir(output_dir)
+    except OSError:
+        return []
+    for name in names:
+        run_id = _run_id(name)
+        if run_id:
+            runs.setdefault(run_id, []).append(name)
+    entries = []
+    for run_id, files in runs.items():
+        finished_at = max(os.path.getmtime(os.path.join(output_dir, name)) for name in files)
+        entries.append(run_entry(output_dir, run_id, files, finished_at))
+    return sorted(entries, key=lambda entry: entry["finished_at"])
+
+
+def run_files(output_dir, run_id):
+    """Fichiers d'une exécution présents dans le répertoire"""
+    prefixes = tuple(f"{prefix}{run_id}." for prefix in RUN_PREFIXES.values())
+    try:
+        return [entry.name for entry in os.scandir(output_dir) if entry.name.startswith(prefixes)]
+    except OSError:
+        return []
+
+
+def _remove(output_dir, entry):
+    for name in entry["files"]:
+        try:
+            os.remove(os.path.join(output_dir, name))
+        except FileNotFoundError:
+            pass
+
+
+def _compress(output_dir, entry):
+    files = []
+    for name in entry["files"]:
+        if name.endswith(".gz"):
+            files.append(name)
+            continue
+        source = os.path.join(output_dir, name)
+        try:
+            with open(source, "rb") as raw, gzip.open(source + ".gz", "wb") as packed:
+                shutil.copyfileobj(raw, packed)
+        except FileNotFoundError:
+            continue
+        os.remove(source)
+        files.append(name + ".gz")
+    entry.update(files=sorted(files), bytes=_size(output_dir, files), compressed=True)
+
+
+def apply_policy(output_dir, runs, policy, now=None):
+    """Applique la rétention à la liste des exécutions (plus ancienne en tête), renvoie (gardées, supprimées)"""
+    now = now if now is not None else time.time()
+    removed = []
+    kept = list(runs)
+
+    if policy.max_age_days:
+        limit = now - policy.max_age_days * 86400
+        removed += [entry for entry in kept[:-1] if entry["finished_at"] < limit]
+        kept = [entry for entry in kept[:-1] if entry["finished_at"] >= limit] + kept[-1:]
+    if policy.max_runs and len(kept) > policy.max_runs:
+        removed += kept[:-policy.max_runs]
+        kept = kept[-policy.max_runs:]
+
+    # Compression avant le contrôle de taille : elle suffit souvent à passer sous la limite
+    if policy.keep_plain:
+        for entry in kept[:-policy.keep_plain]:
+            if not entry["compressed"]:
+                _compress(output_dir, entry)
+    if policy.max_bytes:
+        total = sum(entry["bytes"] for entry in kept)
+        while len(kept) > 1 and total > policy.max_bytes:
+            entry = kept.pop(0)
+            total -= entry["bytes"]
+            removed.append(entry)
+
+    for entry in removed:
+        _remove(output_dir, entry)
+    return kept, removed
+
+
+class IndexLock(RunLock):
+    """Verrou de l'index, attendu quelques secondes (plusieurs shards terminent ensemble)"""
+
+    def __init__(self, output_dir):
+        super().__init__(index_path(output_dir) + ".lock")
+
+    def acquire(self):
+        for _ in range(LOCK_ATTEMPTS - 1):
+            try:
+                return super().acquire()
+            except LockError:
+                time.sleep(LOCK_DELAY)
+        return super().acquire()
+
+
+def record_run(output_dir, run_id, policy):
+    """Inscrit les fichiers d'une exécution terminée dans l'index puis applique la rétention
+
+    Renvoie le nombre d'exécutions supprimées ; LockError si l'index reste verrouillé.
+    """
+    files = run_files(output_dir, run_id)
+    if not files:
+        return 0
+    with IndexLock(output_dir):
+        runs = [entry for entry in load_index(output_dir) if entry["id"] != run_id]
+        runs.append(run_entry(output_dir, run_id, files))
+        runs, removed = apply_policy(output_dir, runs, policy)
+        save_index(output_dir, runs)
+    return len(removed)
+
+
+def latest(output_dir, kind="log"):
+    """Chemin du fichier principal (log, rapport texte ou tableau du profil) de la dernière exécution
+    qui en a un, None s'il n'y en a pas"""
+    for entry in reversed(load_index(output_dir)):
+        for name in entry["files"]:
+            base = name[:-3] if name.endswith(".gz") else name
+            if (base.startswith(RUN_PREFIXES["log"]) if kind == "log"
+                    else base == f"{RUN_PREFIXES[kind]}{entry['id']}.txt"):
+                return os.path.join(output_dir, name)
+    return None
+
+
+def rotate_file(path, max_bytes, keep=5):
+    """Rotation d'un fichier qui grossit sans fin (sync_cron.log) : path.1.gz ... path.<keep>.gz
+
+    À appeler avant que le fichier soit rouvert (ex. au début du script cron).
+    Renvoie True si le fichier a été tourné.
+    """
+    try:
+        if os.path.getsize(path) <= max_bytes:
+            return False
+    except OSError:
+        return False
+    for i in range(keep - 1, 0, -1):
+        older = f"{path}.{i}.gz"
+        if os.path.exists(older):
+            os.replace(older, f"{path}.{i + 1}.gz")
+    if keep > 0:
+        with open(path, "rb") as raw, gzip.open(f"{path}.1.gz", "wb") as packed:
+            shutil.copyfileobj(raw, packed)
+    with open(path, "wb"):
+        pass
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index et rétention des logs et rapports de synchronisation")
+    parser.add_argument("--dir", default=os.getenv("SYNC_OUTPUT_DIR") or DEFAULT_OUTPUT_DIR,
+                        help="Répertoire des exécutions [env SYNC_OUTPUT_DIR, défaut runs]")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    latest_parser = commands.add_parser("latest", help="Affiche le log, le rapport ou le profil de la dernière exécution")
+    latest_parser.add_argument("--kind", choices=tuple(RUN_PREFIXES), default="log")
+
+    prune_parser = commands.add_parser("prune", help="Applique la rétention (reconstruit l'index si besoin)")
+    prune_parser.add_argument("--max-age-days", type=float, default=30)
+    prune_parser.add_argument("--max-runs", type=int, default=0)
+    prune_parser.add_argument("--max-mb", type=float, default=0)
+    prune_parser.add_argument("--keep-plain", type=int, default=20)
+
+    rotate_parser = commands.add_parser("rotate", help="Rotation d'un fichier de log externe (sync_cron.log)")
+    rotate_parser.add_argument("path")
+    rotate_parser.add_argument("--max-mb", type=float, default=10)
+    rotate_parser.add_argument("--keep", type=int, default=5)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "latest":
+        path = latest(args.dir, args.kind)
+        if path is None:
+            return 1
+        print(path)
+        return 0
+
+    if args.command == "rotate":
+        if rotate_file(args.path, args.max_mb * 1024 * 1024, args.keep):
+            print(f"🔄 {args.path} archivé ({datetime.now():%Y-%m-%d %H:%M:%S})")
+        return 0
+
+    policy = RetentionPolicy(args.max_age_days, args.max_runs, int(args.max_mb * 1024 * 1024), args.keep_plain)
+    try:
+        with IndexLock(args.dir):
+            runs, removed = apply_policy(args.dir, load_index(args.dir), policy)
+            save_index(args.dir, runs)
+    except (OSError, LockError) as e:
+        parser.exit(1, f"❌ Rétention impossible: {e}\n")
+    print(f"🧹 {len(removed)} exécution(s) supprimée(s), {len(runs)} gardée(s) dans {args.dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Journal d'exécution : niveaux, filtrage console, écriture bufferisée, format JSON
+
+Le log d'une grosse synchronisation contient une ligne par contact : écrire et
+vider le fichier à chaque ligne coûte un appel système par contact. Les lignes
+sont accumulées dans un tampon (LogBuffer), vidé quand il dépasse buffer_size,
+toutes les flush_interval secondes, et immédiatement pour un avertissement ou
+une erreur (visibles sans délai, conservés si le processus s'arrête).
+
+Niveaux, du plus détaillé au plus important : DEBUG, INFO, SUCCESS, WARNING,
+ERROR. Les lignes propres à un contact (email renseigné) sont des détails : la
+console en mode résumé ne montre que les étapes (SUCCESS et au-delà, hors
+détails) et tous les avertissements et erreurs.
+"""
+
+import json
+import time
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "SUCCESS": 25, "WARNING": 30, "ERROR": 40}
+LOG_FORMATS = ("text", "json")
+CONSOLE_MODES = ("auto", "full", "summary")
+
+# Vidé sans attendre : avertissements et erreurs
+URGENT_LEVEL = LEVELS["WARNING"]
+
+
+def level_value(level):
+    """Niveau numérique (les niveaux inconnus comptent comme INFO)"""
+    return LEVELS.get(level, LEVELS["INFO"])
+
+
+def console_shows(level, email, mode, min_level):
+    """Filtre console : tout au-dessus du niveau (full), ou étapes et problèmes seulement (summary)"""
+    value = level_value(level)
+    if value < LEVELS[min_level]:
+        return False
+    if mode == "summary":
+        return value >= URGENT_LEVEL or (value >= LEVELS["SUCCESS"] and email is None)
+    return True
+
+
+def format_line(log_format, when, level, icon, message, email=None):
+    """Ligne du fichier de log : texte horodaté (format historique) ou objet JSON"""
+    if log_format == "json":
+        record = {"time": when.isoformat(timespec="milliseconds"), "level": level, "message": message}
+        if email is not None:
+            record["email"] = email
+        return json.dumps(record, ensure_ascii=False)
+    return f"[{when.strftime('%H:%M:%S')}] {icon} {message}"
+
+
+class LogBuffer:
+    """Tampon des lignes du fichier de log, vidé par taille, par délai ou sur ligne urgente"""
+
+    def __init__(self, buffer_size=65536, flush_interval=1.0, clock=time.monotonic):
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.lines = []
+        self.size = 0
+        self.last_flush = clock()
+
+    def add(self, line, urgent=False):
+        """Ajoute une ligne ; renvoie True s'il faut vider le tampon maintenant"""
+        self.lines.append(line)
+        self.size += len(line) + 1
+        return urgent or self.size >= self.buffer_size or self.clock() - self.last_flush >= self.flush_interval
+
+    def drain(self):
+        """Contenu du tampon (lignes terminées par un saut de ligne), tampon vidé"""
+        text = "".join(line + "\n" for line in self.lines)
+        self.lines = []
+        self.size = 0
+        self.last_flush = self.clock()
+        return text
+
+    def __len__(self):
+        return len(self.lines)
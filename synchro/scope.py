@@ -0,0 +1,109 @@
+"""
+Périmètre des emails traités : motifs autorisés / refusés et listes d'exclusion
+
+Syntaxe d'un motif (insensible à la casse) :
+  domain:exemple.com   domaine exact et ses sous-domaines (a@exemple.com, a@mail.exemple.com)
+  suffix:.gouv.fr      fin de l'adresse
+  regex:^test\\+        expression régulière (recherche dans l'adresse)
+  email:a@exemple.com  adresse exacte
+  contains:@exemple    sous-chaîne ; c'est aussi le sens d'un motif sans préfixe
+                       (compatibilité avec --scope @exemple)
+
+Les motifs sont compilés une fois : ensembles pour les adresses et les domaines
+(une recherche par niveau de domaine), un tuple pour les suffixes et une seule
+expression régulière pour les sous-chaînes et les regex. Un email est retenu s'il
+ne correspond à aucun motif refusé et à au moins un motif autorisé (aucun motif
+autorisé = tout le monde).
+"""
+
+import re
+
+from synchro.utils import normalize_email
+
+PATTERN_KINDS = ("domain", "suffix", "regex", "email", "contains")
+
+
+def parse_pattern(text, bare="contains"):
+    """Sépare "type:valeur" ; un motif sans préfixe reconnu est du type bare"""
+    text = text.strip()
+    kind, sep, value = text.partition(":")
+    if sep and kind.strip().lower() in PATTERN_KINDS:
+        kind, value = kind.strip().lower(), value.strip()
+    else:
+        kind, value = bare, text
+    if not value:
+        raise ValueError(f"motif de périmètre vide: '{text}'")
+    return kind, value
+
+
+class PatternSet:
+    """Ensemble de motifs compilés pour un test d'appartenance rapide"""
+
+    def __init__(self, patterns=(), bare="contains"):
+        self.emails = set()
+        self.domains = set()
+        suffixes = []
+        expressions = []
+
+        for pattern in patterns:
+            kind, value = parse_pattern(pattern, bare)
+            if kind == "email":
+                self.emails.add(normalize_email(value))
+            elif kind == "domain":
+                self.domains.add(value.lower().lstrip("@").strip("."))
+            elif kind == "suffix":
+                suffixes.append(value.lower())
+            elif kind == "contains":
+                expressions.append(re.escape(value.lower()))
+            else:
+                try:
+                    re.compile(value)
+                except re.error as e:
+                    raise ValueError(f"expression régulière invalide '{value}': {e}")
+                expressions.append(f"(?:{value})")
+
+        self.suffixes = tuple(suffixes)
+        self.expression = re.compile("|".join(expressions), re.IGNORECASE) if expressions else None
+
+    def __bool__(self):
+        return bool(self.emails or self.domains or self.suffixes or self.expression)
+
+    def matches(self, email):
+        """email déjà normalisé (minuscules, sans espaces)"""
+        if email in self.emails:
+            return True
+        if self.domains:
+            domain = email.rpartition("@")[2]
+            while domain:
+                if domain in self.domains:
+                    return True
+                domain = domain.partition(".")[2]
+        if self.suffixes and email.endswith(self.suffixes):
+            return True
+        return self.expression is not None and self.expression.search(email) is not None
+
+
+def read_exclusion_file(path):
+    """Lit une liste d'exclusion : une adresse (ou un motif préfixé) par ligne, # pour commenter"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = [line.split("#", 1)[0].strip() for line in f]
+    except OSError as e:
+        raise ValueError(f"liste d'exclusion illisible: {path} ({e})")
+    return [line for line in lines if line]
+
+
+class ScopeMatcher:
+    """Périmètre compilé : motifs autorisés, motifs refusés et adresses exclues"""
+
+    def __init__(self, allow=(), deny=(), excluded=()):
+        self.allow = PatternSet(allow)
+        self.deny = PatternSet(deny)
+        # Dans une liste d'exclusion, une ligne sans préfixe est une adresse exacte
+        self.excluded = PatternSet(excluded, bare="email")
+
+    def matches(self, email):
+        email = normalize_email(email)
+        if self.excluded.matches(email) or self.deny.matches(email):
+            return False
+        return not self.allow or self.allow.matches(email)
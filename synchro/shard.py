@@ -0,0 +1,123 @@
+"""
+Partitionnement des contacts en shards (--shard i/N) et verrou d'exécution
+
+Un contact appartient au shard déterminé par le hash MD5 de son email normalisé,
+la même fonction côté Copper et côté Mailchimp : N processus (ou machines)
+synchronisent chacun une tranche disjointe de la base. État, file d'attente,
+verrou, logs et rapports sont suffixés par shard (_shard2of4).
+"""
+
+import errno
+import os
+import time
+
+from synchro.utils import normalize_email, get_subscriber_hash
+
+
+class LockError(RuntimeError):
+    """Une autre exécution détient déjà le verrou"""
+
+
+def parse_shard(spec):
+    """Convertit "i/N" (1 <= i <= N) en (i, N) ; une valeur vide désactive le partitionnement"""
+    if spec is None or isinstance(spec, tuple):
+        return spec
+    spec = str(spec).strip()
+    if not spec:
+        return None
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"format attendu i/N, reçu '{spec}'")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"shard hors bornes: '{spec}' (1 <= i <= N)")
+    return index, count
+
+
+def shard_of(email, count):
+    """Shard (1 à count) d'un email : stable entre processus, machines et versions de Python"""
+    return int(get_subscriber_hash(normalize_email(email)), 16) % count + 1
+
+
+def shard_suffix(shard):
+    """Suffixe des fichiers propres au shard ("" sans partitionnement)"""
+    return f"_shard{shard[0]}of{shard[1]}" if shard else ""
+
+
+def shard_path(path, shard):
+    """Insère le suffixe du shard avant l'extension (sync_state.json -> sync_state_shard1of4.json)"""
+    if not shard:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}{shard_suffix(shard)}{ext}"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RunLock:
+    """Verrou fichier (création exclusive, PID du détenteur) ; un verrou orphelin est repris"""
+
+    def __init__(self, path):
+        self.path = path
+        self.acquired = False
+
+    def acquire(self):
+        for _ in range(2):
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+                holder = self.holder()
+                if holder is not None and _pid_alive(holder):
+                    raise LockError(f"Exécution déjà en cours (PID {holder}, verrou {self.path})")
+                if holder is None and self._age() < 10:
+                    # Verrou tout juste créé, PID pas encore écrit
+                    raise LockError(f"Exécution en cours de démarrage (verrou {self.path})")
+                # Processus disparu sans libérer le verrou : le reprendre
+                try:
+                    os.remove(self.path)
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(str(os.getpid()))
+            self.acquired = True
+            return self
+        raise LockError(f"Verrou {self.path} impossible à obtenir")
+
+    def holder(self):
+        """PID inscrit dans le verrou (None si illisible)"""
+        try:
+            with open(self.path, "r") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _age(self):
+        try:
+            return time.time() - os.path.getmtime(self.path)
+        except OSError:
+            return float("inf")
+
+    def release(self):
+        if self.acquired:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.acquired = False
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -0,0 +1,101 @@
+"""
+Traçage des appels HTTP : latence par endpoint, percentiles, appels lents
+
+Chaque appel d'API (safe_request, client asynchrone) est résumé une fois
+terminé, toutes tentatives comprises : méthode, gabarit de chemin, statut
+final, taille de la réponse, nombre de tentatives et latence (attente entre
+tentatives incluse, telle que la subit la synchronisation). RequestStats
+agrège ces appels par endpoint ; le rapport et le résumé JSON en donnent les
+percentiles, triés par temps total pour désigner le goulot d'étranglement.
+"""
+
+import math
+import threading
+from array import array
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values, q):
+    """Percentile q (rang le plus proche) d'une liste triée, 0 si elle est vide"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+class EndpointStats:
+    """Appels d'un endpoint (api, méthode, gabarit) ; latences gardées en tableau compact de doubles"""
+
+    __slots__ = ("calls", "errors", "attempts", "bytes", "latencies")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.attempts = 0
+        self.bytes = 0
+        self.latencies = array("d")
+
+
+class RequestStats:
+    """Statistiques des appels HTTP de l'exécution, partagées entre threads"""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.lock = threading.Lock()
+
+    def record(self, api, method, endpoint, status, size, attempts, seconds):
+        key = (api, method, endpoint)
+        with self.lock:
+            stats = self.endpoints.get(key)
+            if stats is None:
+                stats = self.endpoints[key] = EndpointStats()
+            stats.calls += 1
+            stats.attempts += attempts
+            stats.bytes += size
+            stats.latencies.append(seconds)
+            if not (isinstance(status, int) and status < 400):
+                stats.errors += 1
+
+    def clear(self):
+        with self.lock:
+            self.endpoints = {}
+
+    def __len__(self):
+        return sum(stats.calls for stats in self.endpoints.values())
+
+    def summary(self):
+        """Une entrée par endpoint, du plus coûteux (temps total) au moins coûteux ; latences en ms"""
+        with self.lock:
+            items = list(self.endpoints.items())
+        rows = []
+        for (api, method, endpoint), stats in items:
+            latencies = sorted(stats.latencies)
+            row = {
+                "api": api,
+                "method": method,
+                "endpoint": endpoint,
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "retries": stats.attempts - stats.calls,
+                "bytes": stats.bytes,
+                "total_seconds": round(sum(latencies), 3),
+            }
+            for q in PERCENTILES:
+                row[f"p{q}_ms"] = round(percentile(latencies, q) * 1000, 1)
+            row["max_ms"] = round(latencies[-1] * 1000, 1) if latencies else 0.0
+            rows.append(row)
+        return sorted(rows, key=lambda row: row["total_seconds"], reverse=True)
+
+
+def format_request_table(rows):
+    """Tableau texte des endpoints (rapport d'importation)"""
+    header = f"{'Appels':>8}{'Erreurs':>9}{'Retries':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}{'Total s':>9}  Endpoint"
+    lines = [header]
+    for row in rows:
+        lines.append(
+            f"{row['calls']:>8}{row['errors']:>9}{row['retries']:>9}{row['p50_ms']:>9.0f}{row['p90_ms']:>9.0f}"
+            f"{row['p99_ms']:>9.0f}{row['max_ms']:>9.0f}{row['total_seconds']:>9.1f}  "
+            f"{row['method']} {row['api']} {row['endpoint']}"
+        )
+    return "\n".join(lines) + "\n"
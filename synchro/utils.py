@@ -0,0 +1,105 @@
+"""
+Fonctions utilitaires pures (emails, tags, comparaison de contacts)
+
+Aucune dépendance externe ni effet de bord : ce module peut être importé par
+n'importe quel outil (scripts, tests) sans configuration ni accès disque.
+"""
+
+from synchro.email_keys import EMAIL_KEYS
+from synchro.records import CopperPerson
+
+def normalize_email(email):
+    """Normalise un email (mémoïsé, voir synchro.email_keys)"""
+    return EMAIL_KEYS.normalize(email)
+
+def is_target_email(email, patterns=("@exemple",)):
+    """Vérifie si l'email correspond à l'un des motifs du périmètre (insensible à la casse)"""
+    email = email.lower()
+    return any(pattern.lower() in email for pattern in patterns)
+
+def get_subscriber_hash(email):
+    """Génère le hash subscriber pour Mailchimp (mémoïsé, voir synchro.email_keys)"""
+    return EMAIL_KEYS.subscriber_hash(email)
+
+def is_delete_tag_robust(tag):
+    """Détection robuste du tag de suppression"""
+    if not tag or not isinstance(tag, str):
+        return False
+    
+    normalized = str(tag).strip().upper()
+    normalized = normalized.replace('À', 'A').replace('Á', 'A').replace('Â', 'A')
+    normalized = normalized.replace('È', 'E').replace('É', 'É').replace('Ê', 'E')
+    
+    conditions = [
+        "SUPPRIMER" in normalized,
+        "🗑" in normalized,
+        "DELETE" in normalized,
+        "REMOVE" in normalized,
+        "A SUPPRIMER" in normalized
+    ]
+    
+    return any(conditions)
+
+def is_inactive_tag(tag):
+    """Détection du tag inactif"""
+    if not tag or not isinstance(tag, str):
+        return False
+    
+    normalized = str(tag).strip().upper()
+    normalized = normalized.replace('À', 'A').replace('Á', 'A').replace('Â', 'A')
+    normalized = normalized.replace('È', 'E').replace('É', 'É').replace('Ê', 'E')
+    
+    conditions = [
+        "INACTIF" in normalized,
+        "📥" in normalized,
+        "INACTIVE" in normalized,
+        "ARCHIVED" in normalized
+    ]
+    
+    return any(conditions)
+
+def normalize_contact_data(contact_data):
+    """Normalise les données d'un contact pour comparaison"""
+    return {
+        'first_name': (contact_data.get('first_name') or '').strip(),
+        'last_name': (contact_data.get('last_name') or '').strip(),
+        'email': normalize_email(contact_data.get('email', ''))
+    }
+
+def person_emails(contact):
+    """Tous les emails normalisés d'une personne Copper, sans doublon, dans l'ordre de Copper"""
+    if isinstance(contact, CopperPerson):
+        return list(contact.addresses)
+    emails = []
+    for entry in contact.get('emails') or []:
+        email = normalize_email(entry.get('email') or '')
+        if email and email not in emails:
+            emails.append(email)
+    return emails
+
+def primary_email(contact, accept=None):
+    """Email principal : le premier email retenu par accept (le premier tout court sinon)"""
+    emails = person_emails(contact)
+    for email in emails:
+        if accept is None or accept(email):
+            return email
+    return emails[0] if emails else None
+
+def contacts_are_identical(copper_contact, mailchimp_member):
+    """Vérifie si un contact Copper et un membre Mailchimp sont identiques
+    
+    L'email du membre peut être n'importe lequel des emails de la personne Copper.
+    """
+    copper_names = (
+        (copper_contact.get('first_name') or '').strip(),
+        (copper_contact.get('last_name') or '').strip()
+    )
+    mailchimp_names = (
+        (mailchimp_member.get('merge_fields', {}).get('FNAME') or '').strip(),
+        (mailchimp_member.get('merge_fields', {}).get('LNAME') or '').strip()
+    )
+    
+    # Comparer les données
+    copper_emails = person_emails(copper_contact) or ['']
+    return copper_names == mailchimp_names and \
+        normalize_email(mailchimp_member.get('email_address', '')) in copper_emails
@@ -9,6 +9,12 @@ from unittest.mock import MagicMock, patch
 # Ajouter le répertoire parent au path pour importer sync.py
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from synchro.copper_index import CopperLookupCache
+from synchro.metrics import MetricsRegistry
+from synchro.runlog import LogBuffer
+from synchro.tracing import RequestStats
+from synchro.budget import CallBudget
+
 # Configuration des fixtures globales
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_environment():
@@ -28,10 +34,20 @@ def setup_test_environment():
 
 
 @pytest.fixture(autouse=True)
-def mock_file_operations():
+def mock_file_operations(tmp_path):
     """Mock des opérations de fichiers pour éviter la création de fichiers réels"""
     with patch('sync.log_file') as mock_log_file, \
-         patch('sync.report_file') as mock_report_file:
+         patch('sync.report_file') as mock_report_file, \
+         patch('sync.MARKED_QUEUE_FILE', str(tmp_path / "marked_contacts_queue.json")), \
+         patch('sync.SYNC_STATE_FILE', str(tmp_path / "sync_state.json")), \
+         patch('sync.SYNC_LOCK_FILE', str(tmp_path / "sync.lock")), \
+         patch('sync.COPPER_LOOKUP_CACHE', CopperLookupCache()), \
+         patch('sync._log_buffer', LogBuffer()), \
+         patch('sync.OUTPUT_DIR', str(tmp_path / "runs")), \
+         patch('sync.METRICS', MetricsRegistry()), \
+         patch('sync.request_stats', RequestStats()), \
+         patch('sync.call_budget', CallBudget()), \
+         patch('sync._copper_limiter', None):
         
         # Configurer les mocks
         mock_log_file.write = MagicMock()
@@ -98,10 +114,12 @@ def sample_inactive_contact():
 def reset_operation_details():
     """Fixture pour réinitialiser les détails d'opération"""
     import sync
-    original_details = sync.operation_details.copy()
+    original_details = list(sync.operation_details)
     sync.operation_details.clear()
     yield
-    sync.operation_details = original_details
+    # Restaurer en place : les modules de test ont importé l'enregistreur lui-même
+    sync.operation_details.clear()
+    sync.operation_details.extend(original_details)
 
 
 # Configuration des markers personnalisés
@@ -212,6 +230,21 @@ def mock_mailchimp_api():
         }
 
 
+# Serveur d'API local (Copper + Mailchimp) partagé par les moteurs sync et async
+@pytest.fixture
+def mock_api_server():
+    """Démarre un serveur HTTP local simulant Copper et Mailchimp"""
+    from tests.mock_server import MockAPIServer
+    
+    server = MockAPIServer().start()
+    with patch('sync.COPPER_API_URL', server.copper_url), \
+         patch('sync.MC_BASE', server.mailchimp_url), \
+         patch('sync.MC_LIST_ID', 'test_list_id'), \
+         patch('sync.COPPER_RATE_LIMIT', 0):
+        yield server
+    server.stop()
+
+
 # Fixtures pour les données de test
 @pytest.fixture
 def large_contact_dataset():
@@ -0,0 +1,252 @@
+"""
+Serveur HTTP local simulant les API Copper et Mailchimp pour les tests des moteurs
+"""
+import hashlib
+import io
+import json
+import re
+import tarfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class MockAPIState:
+    """État en mémoire des deux API (personnes Copper, membres Mailchimp, appels reçus)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.people = {}
+        self.members = {}
+        self.calls = []
+        self.next_id = 10000
+        self.fail_paths = set()
+        self.batches = []
+        self.batch_results = []
+
+    def add_person(self, person):
+        self.people[person["id"]] = person
+
+    def add_member(self, subscriber_hash, member):
+        self.members[subscriber_hash] = member
+
+    def calls_for(self, method, pattern=""):
+        """Retourne les appels reçus pour une méthode (et un motif de chemin optionnel)"""
+        with self.lock:
+            return [path for m, path in self.calls if m == method and re.search(pattern, path)]
+
+
+def batch_archive(results):
+    """Archive des résultats d'un lot Mailchimp (tar.gz d'un fichier JSON, comme response_body_url)"""
+    content = json.dumps(results).encode()
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        info = tarfile.TarInfo("results.json")
+        info.size = len(content)
+        archive.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+class MockAPIHandler(BaseHTTPRequestHandler):
+    """Routage minimal des endpoints utilisés par la synchronisation"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def _send(self, status, payload=None):
+        if isinstance(payload, bytes):
+            body, content_type = payload, "application/gzip"
+        else:
+            body, content_type = b"" if payload is None else json.dumps(payload).encode(), "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, method):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        body = self._body() if method in ("POST", "PUT", "PATCH") else {}
+
+        with self.state.lock:
+            self.state.calls.append((method, path))
+            if path in self.state.fail_paths:
+                return self._send(500, {"error": "Erreur simulée"})
+            status, payload = self._route(method, path, parse_qs(parsed.query), body)
+        self._send(status, payload)
+
+    def _route(self, method, path, query, body):
+        state = self.state
+
+        # ---- Copper ----
+        if path == "/copper/people/search" and method == "POST":
+            page, size = body.get("page_number", 1), body.get("page_size", 200)
+            people = sorted(state.people.values(), key=lambda p: p["id"])
+            if "minimum_modified_date" in body:
+                people = [p for p in people if p.get("date_modified", 0) >= body["minimum_modified_date"]]
+            if "emails" in body:
+                wanted = {email.lower() for email in body["emails"]}
+                people = [p for p in people if any(e["email"].lower() in wanted for e in p.get("emails", []))]
+            return 200, people[(page - 1) * size:page * size]
+
+        if path == "/copper/people" and method == "POST":
+            state.next_id += 1
+            person = dict(body, id=state.next_id, tags=body.get("tags", []))
+            state.people[person["id"]] = person
+            return 200, person
+
+        match = re.fullmatch(r"/copper/people/(\d+)", path)
+        if match:
+            person_id = int(match.group(1))
+            if person_id not in state.people:
+                return 404, {"error": "Not found"}
+            if method == "GET":
+                return 200, state.people[person_id]
+            if method == "PUT":
+                state.people[person_id].update(body)
+                return 200, state.people[person_id]
+            if method == "DELETE":
+                del state.people[person_id]
+                return 204, None
+
+        # ---- Mailchimp ----
+        if re.fullmatch(r"/mc/3\.0/lists/[^/]+", path) and method == "POST":
+            # Abonnement/désabonnement par lots
+            updated, errors = [], []
+            for item in body.get("members", []):
+                subscriber_hash = hashlib.md5(item["email_address"].lower().encode()).hexdigest()
+                if subscriber_hash in state.members:
+                    state.members[subscriber_hash]["status"] = item["status"]
+                    updated.append(state.members[subscriber_hash])
+                else:
+                    errors.append({"email_address": item["email_address"], "error": "Member not found"})
+            return 200, {"updated_members": updated, "errors": errors, "error_count": len(errors)}
+
+        if path == "/mc/3.0/batches" and method == "POST":
+            # Opérations en lot appliquées immédiatement (Mailchimp les traite en différé) ;
+            # une opération sur un chemin de fail_paths échoue dans les résultats du lot
+            results = []
+            for operation in body.get("operations", []):
+                if f"/mc/3.0{operation['path']}" in state.fail_paths:
+                    results.append({"status_code": 500, "operation_id": operation.get("operation_id"),
+                                    "response": json.dumps({"detail": "Erreur simulée"})})
+                    continue
+                if operation["method"] == "DELETE":
+                    state.members.pop(operation["path"].rsplit("/", 1)[-1], None)
+                results.append({"status_code": 204, "operation_id": operation.get("operation_id"), "response": ""})
+            state.batches.append(body["operations"])
+            state.batch_results.append(results)
+            return 200, {"id": f"batch{len(state.batches)}", "status": "pending"}
+
+        match = re.fullmatch(r"/mc/3\.0/batches/batch(\d+)", path)
+        if match and method == "GET":
+            index = int(match.group(1))
+            results = state.batch_results[index - 1]
+            errored = sum(1 for result in results if result["status_code"] >= 400)
+            host, port = self.server.server_address
+            return 200, {"id": f"batch{index}", "status": "finished", "total_operations": len(results),
+                         "finished_operations": len(results), "errored_operations": errored,
+                         "response_body_url": f"http://{host}:{port}/mc/batch-results/batch{index}.tar.gz"}
+
+        match = re.fullmatch(r"/mc/batch-results/batch(\d+)\.tar\.gz", path)
+        if match and method == "GET":
+            return 200, batch_archive(state.batch_results[int(match.group(1)) - 1])
+
+        match = re.fullmatch(r"/mc/3\.0/lists/[^/]+/members", path)
+        if match and method == "GET":
+            offset = int(query.get("offset", ["0"])[0])
+            count = int(query.get("count", ["1000"])[0])
+            members = [m for m in state.members.values() if m.get("status") == "subscribed"]
+            if "since_last_changed" in query:
+                since = query["since_last_changed"][0]
+                members = [m for m in members if m.get("last_changed", "") >= since]
+            members.sort(key=lambda m: m["email_address"])
+            return 200, {"members": members[offset:offset + count], "total_items": len(members)}
+
+        match = re.fullmatch(r"/mc/3\.0/lists/[^/]+/members/([0-9a-f]+)(/tags)?", path)
+        if match:
+            subscriber_hash, tags = match.group(1), match.group(2)
+            if tags and method == "POST":
+                member = state.members.setdefault(subscriber_hash, {"status": "subscribed"})
+                member["tags"] = [tag["name"] for tag in body.get("tags", [])]
+                return 204, None
+            if method == "PUT":
+                member = state.members.setdefault(subscriber_hash, {"status": body.get("status_if_new")})
+                member.update({"email_address": body["email_address"], "merge_fields": body.get("merge_fields", {})})
+                return 200, member
+            if method == "PATCH":
+                if subscriber_hash not in state.members:
+                    return 404, {"error": "Not found"}
+                state.members[subscriber_hash].update(body)
+                return 200, state.members[subscriber_hash]
+            if method == "DELETE":
+                state.members.pop(subscriber_hash, None)
+                return 204, None
+
+        return 404, {"error": f"Route inconnue: {method} {path}"}
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+class MockHTTPServer(ThreadingHTTPServer):
+    """File d'attente élargie : le moteur async ouvre de nombreuses connexions simultanées"""
+
+    request_queue_size = 128
+
+
+class MockAPIServer:
+    """Serveur local démarré dans un thread (Copper sous /copper, Mailchimp sous /mc/3.0)"""
+
+    def __init__(self):
+        self.httpd = MockHTTPServer(("127.0.0.1", 0), MockAPIHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = MockAPIState()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    @property
+    def state(self):
+        return self.httpd.state
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    @property
+    def copper_url(self):
+        return f"{self.base_url}/copper"
+
+    @property
+    def mailchimp_url(self):
+        return f"{self.base_url}/mc/3.0"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -20,6 +20,8 @@ from sync import (
     sync_mailchimp_to_copper,
     archive_contact,
     delete_contact,
+    RateLimiter,
+    operation_details,
     COPPER_HEADERS,
     MC_AUTH,
     MC_BASE,
@@ -289,6 +291,30 @@ class TestContactManagement:
         
         assert len(responses.calls) == 3
     
+    @responses.activate
+    def test_archive_contact_reuses_fetched_tags(self):
+        """Avec les tags déjà récupérés, l'archivage ne fait pas de GET Copper"""
+        contact = {
+            "email": "john@exemple.com",
+            "copper_id": 123,
+            "name": "John Doe",
+            "tags": ["VIP", "🗑 À SUPPRIMER"],
+            "date_modified": 1700000000
+        }
+        
+        responses.add(responses.PUT, f"{COPPER_API_URL}/people/123", json={"id": 123}, status=200)
+        responses.add(
+            responses.PATCH,
+            f"{MC_BASE}/lists/{MC_LIST_ID}/members/d9298b228e52f03878c1630fd434e89d",
+            json={"status": "unsubscribed"},
+            status=200
+        )
+        
+        archive_contact(contact)
+        
+        assert [call.request.method for call in responses.calls] == ["PUT", "PATCH"]
+        assert json.loads(responses.calls[0].request.body) == {"tags": ["VIP", "📥 INACTIF"]}
+    
     @responses.activate
     def test_delete_contact_success(self):
         """Test de suppression d'un contact"""
@@ -375,6 +401,74 @@ class TestContactManagement:
         assert synced_count == 0  # Pas de synchronisation car pas de nom
 
 
+class TestCopperWritePool:
+    """Tests du pool de workers pour les créations Mailchimp → Copper"""
+    
+    @responses.activate
+    @patch('sync.COPPER_RATE_LIMIT', 0)
+    @patch('sync.COPPER_WRITE_WORKERS', 8)
+    def test_parallel_creations_keep_input_order(self, reset_operation_details):
+        """Les créations parallèles sont enregistrées dans l'ordre d'entrée"""
+        mc_members = [
+            {"email_address": f"new{i}@exemple.com", "merge_fields": {"FNAME": f"New{i}", "LNAME": "User"}}
+            for i in range(50)
+        ]
+        
+        responses.add(responses.POST, f"{COPPER_API_URL}/people", json={"id": 1}, status=201)
+        
+        synced_count = sync_mailchimp_to_copper(mc_members, {})
+        
+        assert synced_count == 50
+        assert len(responses.calls) == 50
+        assert [op['email'] for op in operation_details] == [f"new{i}@exemple.com" for i in range(50)]
+        assert all(op['direction'] == "Mailchimp → Copper" for op in operation_details)
+    
+    @responses.activate
+    @patch('time.sleep')
+    @patch('sync.COPPER_RATE_LIMIT', 0)
+    def test_parallel_creations_partial_failure(self, mock_sleep, reset_operation_details):
+        """Un échec de création n'interrompt pas les autres workers"""
+        mc_members = [
+            {"email_address": "ok@exemple.com", "merge_fields": {"FNAME": "Ok", "LNAME": "User"}},
+            {"email_address": "ko@exemple.com", "merge_fields": {"FNAME": "Ko", "LNAME": "User"}}
+        ]
+        
+        def callback(request):
+            body = json.loads(request.body)
+            if body["emails"][0]["email"] == "ko@exemple.com":
+                return (400, {}, json.dumps({"error": "Invalid"}))
+            return (201, {}, json.dumps({"id": 1}))
+        
+        responses.add_callback(responses.POST, f"{COPPER_API_URL}/people", callback=callback)
+        
+        synced_count = sync_mailchimp_to_copper(mc_members, {})
+        
+        assert synced_count == 1
+        assert [op['success'] for op in operation_details] == [True, False]
+        assert operation_details[1]['error'] is not None
+    
+    def test_rate_limiter_spacing(self):
+        """Le limiteur espace les créneaux selon le débit configuré"""
+        limiter = RateLimiter(4)
+        
+        with patch('time.sleep') as mock_sleep, patch('time.monotonic', return_value=100.0):
+            for _ in range(3):
+                limiter.acquire()
+        
+        waits = [c.args[0] for c in mock_sleep.call_args_list]
+        assert waits == pytest.approx([0.25, 0.5])
+    
+    def test_rate_limiter_disabled(self):
+        """Un débit nul désactive la limitation"""
+        limiter = RateLimiter(0)
+        
+        with patch('time.sleep') as mock_sleep:
+            for _ in range(10):
+                limiter.acquire()
+        
+        mock_sleep.assert_not_called()
+
+
 class TestIntegration:
     """Tests d'intégration simulant des scénarios réels"""
     
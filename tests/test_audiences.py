@@ -0,0 +1,126 @@
+"""
+Tests des audiences Mailchimp multiples alimentées par une seule lecture de Copper
+"""
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Ajouter le répertoire parent au path pour importer sync.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sync
+from synchro import async_engine
+from synchro.audiences import Audience, build_audiences
+from synchro.config import ConfigError, resolve_settings
+from synchro.utils import get_subscriber_hash
+from tests.test_engines import add_person, add_member
+
+
+class TestAudienceRules:
+    """Règles de sélection par tags"""
+
+    def test_accepts(self):
+        audience = Audience("vip", "l1", include_tags=["VIP"], exclude_tags=["NoNews"])
+        assert audience.accepts(["vip"])
+        assert not audience.accepts(["VIP", "nonews"])
+        assert not audience.accepts([])
+        assert Audience("all", "l2").accepts([])
+
+    def test_build_audiences_from_specs_and_sections(self):
+        audiences = build_audiences(["newsletter=l1", "vip=l2"],
+                                    {"vip": {"include_tags": ["VIP"]}, "events": {"list_id": "l3"}})
+        assert [(a.name, a.list_id) for a in audiences] == [("newsletter", "l1"), ("vip", "l2"), ("events", "l3")]
+        assert audiences[1].include_tags == {"vip"}
+
+    @pytest.mark.parametrize("specs,sections", [
+        (["newsletter"], None),
+        (["=l1"], None),
+        (["a=l1", "b=l1"], None),
+        ([], {"vip": {"include_tags": ["VIP"]}})
+    ])
+    def test_build_audiences_invalid(self, specs, sections):
+        with pytest.raises(ValueError):
+            build_audiences(specs, sections)
+
+    def test_config_sections(self, tmp_path):
+        config = tmp_path / "sync.ini"
+        config.write_text("[audience:vip]\nlist_id = l2\ninclude_tags = VIP, Partenaire\n")
+        settings = resolve_settings({"MAILCHIMP_AUDIENCES": "newsletter=l1"}, str(config))
+        assert settings["audiences"] == ["newsletter=l1"]
+        assert settings["audience_sections"] == {"vip": {"list_id": "l2", "include_tags": ["VIP", "Partenaire"]}}
+
+        config.write_text("[audience:vip]\nlist = l2\n")
+        with pytest.raises(ConfigError):
+            resolve_settings({}, str(config))
+
+    @patch('sync.load_environment')
+    @patch('sync.main')
+    def test_run_rejects_invalid_audiences(self, mock_main, mock_load_environment):
+        try:
+            with pytest.raises(SystemExit) as exc:
+                sync.run(["--audiences", "newsletter=l1,vip=l1"])
+            assert exc.value.code == 2
+            mock_main.assert_not_called()
+        finally:
+            sync.load_settings()
+
+    def test_default_audience(self):
+        with patch('sync.AUDIENCES', []), patch('sync.MC_LIST_ID', 'main_list'):
+            assert [(a.name, a.list_id) for a in sync.get_audiences()] == [("default", "main_list")]
+            assert sync.mailchimp_direction(sync.get_audiences()[0]) == "Copper → Mailchimp"
+
+
+def lists_touched(state, method, email):
+    """Listes Mailchimp ayant reçu une écriture pour un email (individuelle ou par lots)"""
+    subscriber_hash = get_subscriber_hash(email)
+    paths = state.calls_for(method, f"/members/{subscriber_hash}$")
+    return sorted(path.split("/lists/")[1].split("/")[0] for path in paths)
+
+
+@pytest.mark.parametrize("engine", ["sync", "async"])
+class TestMultiAudienceRun:
+    """Exécution complète vers plusieurs audiences contre le serveur local"""
+
+    def test_fan_out(self, engine, mock_api_server, reset_operation_details):
+        add_person(mock_api_server, 1, "john@exemple.com", "John", "Doe", ["VIP"])
+        add_person(mock_api_server, 2, "jane@exemple.com", "Jane", "Doe")
+        add_person(mock_api_server, 3, "bob@exemple.com", "Bob", "Doe", ["VIP", "NoNews"])
+        add_person(mock_api_server, 4, "marked@exemple.com", "Marked", "User", ["VIP", "🗑 À SUPPRIMER"])
+        add_member(mock_api_server, "marked@exemple.com", "Marked", "User")
+        add_member(mock_api_server, "mc@exemple.com", "Mc", "Only")
+
+        audiences = [Audience("newsletter", "news_list", exclude_tags=["NoNews"]),
+                     Audience("vip", "vip_list", include_tags=["VIP"])]
+        with patch('sync.TEST_MODE', True), \
+             patch('sync.AUDIENCES', audiences), \
+             patch('sync.MARKED_POLICY', 'archive'), \
+             patch('sync.ASYNC_COPPER_PAGE_WINDOW', 1), \
+             patch('sync.write_import_report') as mock_report:
+            if engine == "sync":
+                sync.main()
+            else:
+                async_engine.main()
+
+        state = mock_api_server.state
+        # Une seule lecture de Copper, une lecture par audience
+        assert len(state.calls_for("POST", "^/copper/people/search$")) == 1
+        assert len(state.calls_for("GET", "/lists/news_list/members$")) == 1
+        assert len(state.calls_for("GET", "/lists/vip_list/members$")) == 1
+
+        assert lists_touched(state, "PUT", "john@exemple.com") == ["news_list", "vip_list"]
+        assert lists_touched(state, "PUT", "jane@exemple.com") == ["news_list"]
+        assert lists_touched(state, "PUT", "bob@exemple.com") == ["vip_list"]
+
+        # Membre présent dans les deux audiences : créé une seule fois dans Copper
+        created = [p for p in state.people.values() if p["emails"][0]["email"] == "mc@exemple.com"]
+        assert len(created) == 1
+
+        # Contact marqué désabonné (en masse) de chaque audience qui le contient
+        unsubscribed = sorted(path.rsplit("/", 1)[-1] for path in state.calls_for("POST", "^/mc/3.0/lists/[^/]+$"))
+        assert unsubscribed == ["news_list", "vip_list"]
+
+        report = mock_report.call_args[0][0]
+        assert report["copper_to_mc"] == 4
+        directions = [op["direction"] for op in report["operations"] if op["direction"].startswith("Copper")]
+        assert directions == ["Copper → Mailchimp (newsletter)"] * 2 + ["Copper → Mailchimp (vip)"] * 2
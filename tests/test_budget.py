@@ -0,0 +1,200 @@
+"""
+Tests du budget d'appels API par exécution (comptage, ajustement du plan, report)
+"""
+import pytest
+import asyncio
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Ajouter le répertoire parent au path pour importer sync.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sync
+from synchro.budget import BudgetExhausted, CallBudget, fit_plan
+from synchro.plan import estimate_cost
+from tests.test_engines import add_person, add_member
+from tests.test_plan import empty_plan, write
+
+
+def cost(plan):
+    return estimate_cost(plan, copper_rate_limit=0, copper_workers=1, mailchimp_batch_size=500)
+
+
+class TestCallBudget:
+    """Comptage des appels et restant par API"""
+
+    def test_summary(self):
+        budget = CallBudget()
+        budget.consume("copper", 3)
+        budget.consume("mailchimp")
+        budget.consume("other")
+        budget.defer({"mailchimp_writes": 2, "copper_creates": 0})
+
+        summary = budget.summary({"copper": 10, "mailchimp": 0})
+        assert summary["calls"]["copper"] == {"used": 3, "limit": 10, "remaining": 7}
+        assert summary["calls"]["mailchimp"] == {"used": 1, "limit": None, "remaining": None}
+        assert summary["calls"]["other"]["used"] == 1
+        assert summary["deferred"] == {"mailchimp_writes": 2}
+        assert budget.available({"copper": 2, "mailchimp": 0}) == {"copper": 0, "mailchimp": None}
+
+
+    def test_spend_stops_at_limit(self):
+        budget = CallBudget()
+        budget.spend("copper", 2)
+        budget.spend("copper", 2)
+        with pytest.raises(BudgetExhausted):
+            budget.spend("copper", 2)
+        budget.spend("mailchimp", 0)
+        assert budget.used == {"copper": 2, "mailchimp": 1}
+        assert budget.summary({"copper": 2})["exhausted"] == ["copper"]
+
+
+class TestFitPlan:
+    """Réduction du plan au budget disponible"""
+
+    def plan(self):
+        return empty_plan(
+            mailchimp_writes=[write("a@exemple.com", ["VIP"]), write("b@exemple.com"), write("c@exemple.com")],
+            copper_creates=[{"email": f"{i}@exemple.com", "first_name": "C", "last_name": "D"} for i in range(3)],
+            marked=[{"email": "m@exemple.com", "action": "archive"}, {"email": "n@exemple.com", "action": "delete"},
+                    {"email": "o@exemple.com", "action": "defer"}]
+        )
+
+    def test_plan_within_budget_unchanged(self):
+        plan = self.plan()
+        fitted, deferred = fit_plan(plan, {"copper": None, "mailchimp": 100}, cost)
+        assert fitted is plan
+        assert not any(deferred.values())
+
+    def test_prefixes_kept_in_plan_order(self):
+        # Mailchimp : 2 + 1 + 1 écritures, puis 1 lot de désabonnement et 1 de suppression
+        fitted, deferred = fit_plan(self.plan(), {"copper": 4, "mailchimp": 4}, cost)
+        assert [w["email"] for w in fitted["mailchimp_writes"]] == ["a@exemple.com", "b@exemple.com", "c@exemple.com"]
+        assert len(fitted["copper_creates"]) == 3
+        # Le budget Mailchimp est épuisé par les écritures : actions marquées en attente
+        assert [c["action"] for c in fitted["marked"]] == ["defer", "defer", "defer"]
+        assert deferred == {"mailchimp_writes": 0, "copper_creates": 0, "marked": 2}
+        assert fitted["estimate"]["mailchimp_calls"] == 4
+
+    def test_exhausted_budget_defers_everything(self):
+        fitted, deferred = fit_plan(self.plan(), {"copper": 1, "mailchimp": 3}, cost)
+        assert [w["email"] for w in fitted["mailchimp_writes"]] == ["a@exemple.com", "b@exemple.com"]
+        assert len(fitted["copper_creates"]) == 1
+        assert deferred == {"mailchimp_writes": 1, "copper_creates": 2, "marked": 2}
+        assert cost(fitted)["copper_calls"] <= 1 and cost(fitted)["mailchimp_calls"] <= 3
+
+
+class TestRunBudget:
+    """Budget appliqué à une exécution complète"""
+
+    def populate(self, server):
+        for i in range(1, 4):
+            add_person(server, i, f"p{i}@exemple.com", "P", str(i))
+        add_member(server, "jane@exemple.com", "Jane", "Smith")
+
+    def test_remainder_deferred_to_next_run(self, mock_api_server, reset_operation_details):
+        self.populate(mock_api_server)
+        with patch('sync.TEST_MODE', True):
+            # Lectures Mailchimp d'une exécution, mesurées par une simulation
+            sync.main(dry_run=True)
+            reads = sync.call_budget.used["mailchimp"]
+
+            # Budget Mailchimp : les lectures et une écriture sur trois
+            with patch('sync.MAILCHIMP_CALL_BUDGET', reads + 1), \
+                 patch('sync.log_file'), patch('sync.write_import_report') as mock_report:
+                sync.main()
+
+        budget = mock_report.call_args[0][0]['budget']
+        assert budget['deferred'] == {"mailchimp_writes": 2}
+        assert budget['calls']['mailchimp'] == {"used": reads + 1, "limit": reads + 1, "remaining": 0}
+        assert budget['calls']['copper']['limit'] is None
+        assert len(mock_api_server.state.calls_for("PUT", "/members/")) == 1
+        assert sync.METRICS.get("sync_api_budget_remaining", api="mailchimp") == 0
+        # Report : la fenêtre delta n'avance pas, la prochaine exécution reprend le reste
+        assert not os.path.exists(sync.SYNC_STATE_FILE)
+
+        with patch('sync.TEST_MODE', True), patch('sync.log_file'), patch('sync.write_import_report'):
+            sync.main()
+        assert len(mock_api_server.state.calls_for("PUT", "/members/")) == 3
+        assert os.path.exists(sync.SYNC_STATE_FILE)
+
+    def test_retries_stop_at_budget(self):
+        """Chaque tentative compte : un retry qui dépasserait le budget n'est pas envoyé"""
+        error = sync.requests.exceptions.ConnectionError("coupure")
+        func = MagicMock(side_effect=error, __name__="get")
+        with patch('sync.COPPER_CALL_BUDGET', 1), patch('sync.MAX_RETRIES', 3), patch('sync.RETRY_DELAY', 0):
+            with pytest.raises(BudgetExhausted):
+                sync.safe_request(func, f"{sync.COPPER_API_URL}/people/1")
+        assert func.call_count == 1
+        assert sync.call_budget.used["copper"] == 1
+
+    def test_async_client_stops_at_budget(self, mock_api_server):
+        """Le client asynchrone compte ses tentatives dans le même budget"""
+        from synchro import async_engine
+
+        async def two_calls():
+            async with async_engine.AsyncClient() as client:
+                await client.request("mailchimp", "GET", f"{sync.MC_BASE}/lists/test_list_id/members")
+                await client.request("mailchimp", "GET", f"{sync.MC_BASE}/lists/test_list_id/members")
+
+        with patch('sync.MAILCHIMP_CALL_BUDGET', 1), pytest.raises(BudgetExhausted):
+            asyncio.run(two_calls())
+        assert len(mock_api_server.state.calls_for("GET", "/members")) == 1
+
+    def test_reads_exhaust_budget(self, mock_api_server, reset_operation_details):
+        """Lectures au-delà du budget : arrêt propre, sans écriture ni avance de la fenêtre delta"""
+        self.populate(mock_api_server)
+        # Deux pages de recherche Copper pour un budget d'un appel
+        with patch('sync.TEST_MODE', True), patch('sync.COPPER_CALL_BUDGET', 1), patch('sync.COPPER_PAGE_SIZE', 2), \
+             patch('sync.log') as log:
+            sync.main()
+        messages = [call.args[0] for call in log.call_args_list]
+        assert any(message.startswith("⛔ Budget d'appels Copper épuisé (1 appel(s))") for message in messages)
+        assert not any("ERREUR CRITIQUE" in message for message in messages)
+        assert len(mock_api_server.state.calls_for("POST", "/people/search")) == 1
+        assert mock_api_server.state.calls_for("PUT", "/members/") == []
+        assert not os.path.exists(sync.SYNC_STATE_FILE)
+
+    def test_dry_run_projects_deferral(self, mock_api_server, reset_operation_details):
+        self.populate(mock_api_server)
+        with patch('sync.TEST_MODE', True), patch('sync.COPPER_CALL_BUDGET', 1), \
+             patch('sync.log') as log:
+            sync.main(dry_run=True)
+        messages = [call.args[0] for call in log.call_args_list]
+        assert any(message.startswith("⏳ Budget d'appels insuffisant") for message in messages)
+        assert mock_api_server.state.calls_for("PUT", "/members/") == []
+
+
+class TestReportBudget:
+    """Budget dans le rapport texte"""
+
+    def test_report_lists_budget(self, reset_operation_details):
+        budget = CallBudget()
+        budget.consume("copper", 40)
+        budget.defer({"copper_creates": 5})
+        report_data = {'operations': sync.operation_details, 'copper_to_mc': 0, 'mc_to_copper': 0,
+                       'excluded': 0, 'marked_for_deletion': 0, 'marked_contacts': [],
+                       'budget': budget.summary({"copper": 50, "mailchimp": 0})}
+        report_file = sync.report_file
+        sync.write_import_report(report_data)
+        content = "".join(call.args[0] for call in report_file.write.call_args_list)
+        assert "BUDGET D'APPELS API:" in content
+        assert "• Copper: 40 appel(s) sur 50, 10 restant(s)" in content
+        assert "• Mailchimp: 0 appel(s) (sans limite)" in content
+        assert "• Reporté à la prochaine exécution (créations Copper): 5" in content
+
+
+class TestBudgetOption:
+    """Budget actif : moteur synchrone"""
+
+    @patch('sync.load_environment')
+    @patch('sync.main')
+    def test_budget_rejects_async_engine(self, mock_main, mock_load_environment):
+        """Le budget passe par le plan du moteur synchrone : --engine async est refusé, pas ignoré"""
+        try:
+            with pytest.raises(SystemExit):
+                sync.run(["--engine", "async", "--copper-call-budget", "500"])
+            mock_main.assert_not_called()
+        finally:
+            sync.load_settings()
@@ -0,0 +1,192 @@
+"""
+Tests de la configuration d'exécution (défauts, environnement, fichier de config, ligne de commande)
+"""
+import pytest
+import sys
+import os
+import subprocess
+from unittest.mock import patch
+
+# Ajouter le répertoire parent au path pour importer sync.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sync
+from synchro.config import ConfigError, resolve_settings, read_config_file, parse_setting
+
+
+@pytest.fixture
+def restore_settings():
+    """Recharge la configuration de l'environnement après un test qui la modifie"""
+    yield
+    sync.load_settings()
+
+
+def write_config(tmp_path, content):
+    path = tmp_path / "job.ini"
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+class TestResolveSettings:
+    """Résolution et priorité des sources de configuration"""
+
+    def test_defaults(self):
+        """Sans source, les valeurs par défaut historiques s'appliquent"""
+        settings = resolve_settings({})
+        assert settings["mode"] == "test"
+        assert settings["scope"] == []
+        assert settings["fetch"] == "full"
+        assert settings["copper_write_workers"] == 4
+        assert settings["mailchimp_batch_size"] == 500
+        assert settings["max_retries"] == 2
+
+    def test_priority(self, tmp_path):
+        """Ligne de commande > fichier de config > environnement > défauts"""
+        config_path = write_config(tmp_path, "[sync]\nfetch = delta\nmailchimp_page_size = 250\n")
+        environ = {"SYNC_FETCH": "full", "MAILCHIMP_PAGE_SIZE": "500", "REQUEST_TIMEOUT": "10", "SYNC_MODE": "production"}
+
+        settings = resolve_settings(environ, config_path, {"mode": "test", "fetch": None})
+
+        assert settings["mode"] == "test"
+        assert settings["fetch"] == "delta"
+        assert settings["mailchimp_page_size"] == 250
+        assert settings["request_timeout"] == 10.0
+
+    def test_list_and_bool_values(self, tmp_path):
+        """Les listes sont séparées par des virgules, les booléens acceptent oui/non"""
+        config_path = write_config(tmp_path, "[sync]\nscope = @exemple, @test.org\narchive_concurrency_check = oui\n")
+        settings = resolve_settings({}, config_path)
+        assert settings["scope"] == ["@exemple", "@test.org"]
+        assert settings["archive_concurrency_check"] is True
+        assert resolve_settings({"SYNC_REPORT_FORMATS": "jsonl, csv"})["report_formats"] == ["jsonl", "csv"]
+
+    @pytest.mark.parametrize("name,raw", [
+        ("mode", "prod"),
+        ("fetch", "incremental"),
+        ("copper_write_workers", "beaucoup"),
+        ("request_timeout", "-1"),
+        ("archive_concurrency_check", "peut-être"),
+        ("report_formats", "jsonl,xml"),
+        ("mailchimp_batch_size", "0"),
+        ("copper_page_size", "0"),
+        ("async_copper_concurrency", "0"),
+        ("async_mailchimp_concurrency", "0"),
+        ("copper_write_workers", "0"),
+        ("inconnu", "1")
+    ])
+    def test_invalid_values(self, name, raw):
+        """Valeurs invalides signalées avec le nom du réglage"""
+        with pytest.raises(ConfigError):
+            parse_setting(name, raw)
+
+    @pytest.mark.parametrize("name", ["copper_call_budget", "retention_days", "copper_rate_limit", "metrics_port"])
+    def test_zero_means_unlimited(self, name):
+        """0 reste admis pour les réglages où il signifie « sans limite » ou « désactivé »"""
+        assert parse_setting(name, "0") == 0
+
+    @pytest.mark.parametrize("policy,detail", [("delete:abc", "âge en jours attendu"), ("purge:3", "action inconnue"),
+                                               ("archive:-1", "âge négatif")])
+    def test_invalid_marked_policy(self, policy, detail):
+        """Une politique mal formée est signalée avec le nom du réglage"""
+        with pytest.raises(ConfigError) as error:
+            sync.parse_marked_policy(policy)
+        assert str(error.value).startswith(f"Valeur invalide pour marked_policy: '{policy}'")
+        assert detail in str(error.value)
+
+    def test_config_file_errors(self, tmp_path):
+        """Fichier absent, sans section [sync] ou avec un réglage inconnu"""
+        with pytest.raises(ConfigError):
+            read_config_file(str(tmp_path / "absent.ini"))
+        with pytest.raises(ConfigError):
+            read_config_file(write_config(tmp_path, "[autre]\nmode = test\n"))
+        with pytest.raises(ConfigError):
+            read_config_file(write_config(tmp_path, "[sync]\nmode = test\nbatch = 10\n"))
+
+
+class TestScope:
+    """Périmètre des emails traités"""
+
+    def test_test_mode_uses_test_domain(self):
+        with patch('sync.TEST_MODE', True), patch('sync.SCOPE_PATTERNS', ()), patch('sync.TEST_DOMAIN', '@qa.local'):
+            assert sync.in_scope("user@QA.local")
+            assert not sync.in_scope("user@exemple.com")
+            assert sync.scope_label() == "@qa.local uniquement"
+
+    def test_production_processes_everything(self):
+        with patch('sync.TEST_MODE', False), patch('sync.SCOPE_PATTERNS', ()):
+            assert sync.in_scope("anyone@gmail.com")
+            assert sync.scope_label() == "toute la base"
+
+    def test_explicit_scope_applies_in_production(self):
+        with patch('sync.TEST_MODE', False), patch('sync.SCOPE_PATTERNS', ("@client.fr",)):
+            assert sync.in_scope("a@client.fr")
+            assert not sync.in_scope("a@gmail.com")
+
+
+class TestCommandLine:
+    """Point d'entrée sync.run"""
+
+    @patch('sync.load_environment')
+    @patch('sync.main')
+    def test_flags_configure_run(self, mock_main, mock_load_environment, restore_settings):
+        """Les options remplacent l'ancienne réécriture de sync.py par toggle_mode.py"""
+        sync.run(["--mode", "production", "--scope", "@client.fr", "--fetch", "delta",
+                  "--copper-write-workers", "8", "--mailchimp-batch-size", "100", "--request-timeout", "5"])
+
+        mock_main.assert_called_once()
+        assert sync.TEST_MODE is False
+        assert sync.SCOPE_PATTERNS == ("@client.fr",)
+        assert sync.FETCH_MODE == "delta"
+        assert sync.COPPER_WRITE_WORKERS == 8
+        assert sync.MAILCHIMP_BATCH_SIZE == 100
+        assert sync.REQUEST_TIMEOUT == 5.0
+
+    @patch('sync.load_environment')
+    @patch('sync.main')
+    def test_config_file(self, mock_main, mock_load_environment, tmp_path, restore_settings):
+        """--config charge le fichier du job, les options restent prioritaires"""
+        config_path = write_config(tmp_path, "[sync]\nmode = production\nfetch = delta\ncopper_rate_limit = 1.5\n")
+
+        sync.run(["--config", config_path, "--fetch", "full"])
+
+        assert sync.TEST_MODE is False
+        assert sync.FETCH_MODE == "full"
+        assert sync.COPPER_RATE_LIMIT == 1.5
+
+    @pytest.mark.parametrize("argv", [
+        ["--copper-write-workers", "zéro"],
+        ["--marked-policy", "purge:3"],
+        ["--marked-policy", "delete:abc"],
+        ["--mailchimp-batch-size", "0"],
+        ["--config", "/chemin/absent.ini"]
+    ])
+    @patch('sync.load_environment')
+    @patch('sync.main')
+    def test_invalid_arguments(self, mock_main, mock_load_environment, argv, restore_settings):
+        """Erreur de configuration : sortie en erreur sans lancer la synchronisation"""
+        with pytest.raises(SystemExit):
+            sync.run(argv)
+        mock_main.assert_not_called()
+
+    @pytest.mark.parametrize("variable,value", [("SYNC_MODE", "prod"), ("MAILCHIMP_AUDIENCES", "sans-liste")])
+    @patch('sync.load_environment')
+    @patch('sync.main')
+    def test_invalid_environment(self, mock_main, mock_load_environment, variable, value, restore_settings):
+        """Valeur d'environnement invalide : erreur d'options, pas de traceback"""
+        with patch.dict(os.environ, {variable: value}), pytest.raises(SystemExit):
+            sync.run([])
+        mock_main.assert_not_called()
+
+    def test_invalid_environment_does_not_break_import(self):
+        """L'import retombe sur les défauts, la ligne de commande signale l'erreur"""
+        repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, SYNC_MODE="prod", PYTHONPATH=repo_root)
+        imported = subprocess.run([sys.executable, "-c", "import sync; print(sync.TEST_MODE)"], env=env,
+                                  capture_output=True, text=True)
+        assert imported.returncode == 0 and imported.stdout.strip() == "True"
+
+        command = subprocess.run([sys.executable, os.path.join(repo_root, "sync.py")], env=env, cwd=repo_root,
+                                 capture_output=True, text=True)
+        assert command.returncode == 2
+        assert "Valeur invalide pour mode: 'prod'" in command.stderr
+        assert "Traceback" not in command.stderr
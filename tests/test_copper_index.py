@@ -0,0 +1,190 @@
+"""
+Tests de l'index inversé des emails Copper (tous les emails d'une personne)
+"""
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Ajouter le répertoire parent au path pour importer sync.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sync
+from synchro import async_engine
+from synchro.copper_index import CopperEmailIndex, CopperLookupCache
+from synchro.utils import contacts_are_identical, get_subscriber_hash, person_emails, primary_email
+from tests.test_engines import ENGINES, add_person, add_member, call_engine
+
+
+def person(person_id, *emails, first_name="User", last_name="Test"):
+    return {"id": person_id, "first_name": first_name, "last_name": last_name,
+            "emails": [{"email": email} for email in emails], "tags": []}
+
+
+class TestEmails:
+    """Emails d'une personne et email principal"""
+
+    def test_person_emails_normalized_and_deduplicated(self):
+        contact = person(1, "A@Exemple.com ", "a@exemple.com", "b@gmail.com")
+        contact["emails"].append({"email": None})
+        assert person_emails(contact) == ["a@exemple.com", "b@gmail.com"]
+        assert person_emails({"emails": []}) == []
+
+    def test_primary_email(self):
+        contact = person(1, "perso@gmail.com", "pro@exemple.com")
+        assert primary_email(contact) == "perso@gmail.com"
+        assert primary_email(contact, lambda email: "@exemple" in email) == "pro@exemple.com"
+        assert primary_email(contact, lambda email: False) == "perso@gmail.com"
+        assert primary_email(person(2)) is None
+
+    def test_identical_on_secondary_email(self):
+        contact = person(1, "perso@gmail.com", "pro@exemple.com", first_name="Ana", last_name="Lopez")
+        member = {"email_address": "PRO@exemple.com", "merge_fields": {"FNAME": "Ana", "LNAME": "Lopez"}}
+        assert contacts_are_identical(contact, member)
+        member["email_address"] = "autre@exemple.com"
+        assert not contacts_are_identical(contact, member)
+
+
+class TestCopperEmailIndex:
+    """Index inversé email → personnes"""
+
+    def test_every_email_is_indexed(self):
+        index = CopperEmailIndex([person(1, "a@exemple.com", "A2@exemple.com"), person(2, "b@exemple.com")])
+        assert len(index) == 2
+        assert "a2@exemple.com" in index
+        assert index.get("a2@exemple.com")["id"] == 1
+        assert index.get("inconnu@exemple.com") is None
+        assert index.conflicts() == {}
+
+    def test_conflicts_and_owner(self):
+        first, second = person(1, "dup@exemple.com"), person(2, "x@exemple.com", "dup@exemple.com")
+        index = CopperEmailIndex([first, second])
+        assert index.conflicts() == {"dup@exemple.com": [1, 2]}
+        assert index.ids("dup@exemple.com") == [1, 2]
+        assert index.owns(first, "dup@exemple.com")
+        assert not index.owns(second, "dup@exemple.com")
+        assert index.owns(second, "x@exemple.com")
+
+
+class TestLookupCache:
+    """Cache des recherches d'existence"""
+
+    def test_positive_and_negative_results(self):
+        cache = CopperLookupCache()
+        assert cache.unknown(["a@x.fr", "b@x.fr", "a@x.fr"]) == ["a@x.fr", "b@x.fr"]
+        cache.record(["a@x.fr", "b@x.fr"], {"a@x.fr"})
+        assert cache.unknown(["a@x.fr", "b@x.fr", "c@x.fr"]) == ["c@x.fr"]
+        assert cache.existing(["a@x.fr", "b@x.fr"]) == {"a@x.fr"}
+        cache.add_existing(["b@x.fr"])
+        assert cache.existing(["b@x.fr"]) == {"b@x.fr"}
+
+    @pytest.mark.parametrize("setting,since,expected", [
+        ("auto", None, False),
+        ("auto", 1700000000, True),
+        ("always", None, True),
+        ("never", 1700000000, False)
+    ])
+    def test_should_verify_creations(self, setting, since, expected):
+        with patch('sync.VERIFY_CREATIONS', setting):
+            assert sync.should_verify_creations(since) is expected
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+class TestExistenceLookup:
+    """Recherche d'existence avant création contre le serveur local"""
+
+    def members(self, *emails):
+        return [{"email_address": email, "merge_fields": {"FNAME": "Mc", "LNAME": "User"}} for email in emails]
+
+    def test_lookup_is_batched_and_cached(self, engine, mock_api_server, reset_operation_details):
+        add_person(mock_api_server, 1, "a@exemple.com")
+        mock_api_server.state.people[1]["emails"].append({"email": "a2@exemple.com"})
+        members = self.members("a2@exemple.com", "b@exemple.com", "c@exemple.com")
+
+        with patch('sync.COPPER_PAGE_SIZE', 2):
+            created = call_engine(engine, "sync_mailchimp_to_copper", members, CopperEmailIndex(), True)
+            searches = len(mock_api_server.state.calls_for("POST", "^/copper/people/search$"))
+            # Deuxième passage : tout est en cache (a2 trouvé, b et c créés), aucune recherche
+            created_again = call_engine(engine, "sync_mailchimp_to_copper", members, CopperEmailIndex(), True)
+
+        assert created == 2 and created_again == 0
+        assert searches == 2
+        assert len(mock_api_server.state.calls_for("POST", "^/copper/people/search$")) == 2
+        emails = sorted(p["emails"][0]["email"] for p in mock_api_server.state.people.values())
+        assert emails == ["a@exemple.com", "b@exemple.com", "c@exemple.com"]
+
+    def test_failed_lookup_blocks_creation(self, engine, mock_api_server, reset_operation_details):
+        mock_api_server.state.fail_paths.add("/copper/people/search")
+
+        with patch('sync.RETRY_DELAY', 0):
+            created = call_engine(engine, "sync_mailchimp_to_copper", self.members("b@exemple.com"),
+                                  CopperEmailIndex(), True)
+
+        assert created == 0
+        assert mock_api_server.state.people == {}
+        assert [op["success"] for op in sync.operation_details] == [False]
+        assert sync.COPPER_LOOKUP_CACHE.unknown(["b@exemple.com"]) == ["b@exemple.com"]
+
+
+class TestCoalescing:
+    """Une seule écriture Mailchimp par abonné"""
+
+    def test_plan_merges_same_subscriber(self):
+        audience = sync.Audience("default", "test_list_id")
+        contacts = [person(7, "dup@exemple.com", first_name="Dup", last_name="Late"),
+                    person(2, "other@exemple.com"),
+                    person(3, "DUP@exemple.com", first_name="Dup", last_name="Early")]
+        contacts[0]["tags"] = ["VIP", "Client"]
+        contacts[2]["tags"] = ["Client", "Salon"]
+
+        with patch('sync.TEST_MODE', True), patch('sync.log') as mock_log:
+            plan = sync.plan_mailchimp_writes(audience, contacts, {})
+
+        assert [contact["id"] for contact, _, _ in plan] == [3, 2]
+        merged, tags, member = plan[0]
+        assert merged["last_name"] == "Early"
+        assert tags == ["Client", "Salon", "VIP"]
+        assert member is None
+        assert any("Données différentes" in call.args[0] for call in mock_log.call_args_list)
+
+    def test_plan_uses_existing_member(self):
+        audience = sync.Audience("default", "test_list_id")
+        contacts = [person(1, "perso@gmail.com", "ana@exemple.com"), person(2, "ana@exemple.com")]
+        member = {"email_address": "ana@exemple.com", "merge_fields": {}}
+
+        with patch('sync.TEST_MODE', True):
+            plan = sync.plan_mailchimp_writes(audience, contacts, {"ana@exemple.com": member})
+
+        assert len(plan) == 1
+        assert plan[0][0]["id"] == 1 and plan[0][2] is member
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+class TestSecondaryEmails:
+    """Synchronisation des personnes à plusieurs emails contre le serveur local"""
+
+    def test_secondary_email_prevents_duplicates(self, engine, mock_api_server, reset_operation_details):
+        # Inscrite dans Mailchimp avec son deuxième email : ni doublon Copper, ni second membre
+        add_person(mock_api_server, 1, "perso@gmail.com", "Ana", "Lopez")
+        mock_api_server.state.people[1]["emails"].append({"email": "ana@exemple.com"})
+        add_member(mock_api_server, "ana@exemple.com", "Ana", "Lopez")
+        # Même email principal pour deux personnes : une seule écriture, tags réunis
+        add_person(mock_api_server, 2, "dup@exemple.com", "Dup", "One", ["VIP"])
+        add_person(mock_api_server, 3, "dup@exemple.com", "Dup", "Two", ["Client"])
+
+        with patch('sync.TEST_MODE', True), patch('sync.write_import_report') as mock_report:
+            if engine == "sync":
+                sync.main()
+            else:
+                async_engine.main()
+
+        state = mock_api_server.state
+        assert sorted(state.people) == [1, 2, 3]
+        assert state.calls_for("PUT", "/members/") == [
+            f"/mc/3.0/lists/test_list_id/members/{get_subscriber_hash('dup@exemple.com')}"
+        ]
+        assert state.members[get_subscriber_hash("dup@exemple.com")]["merge_fields"]["LNAME"] == "One"
+        assert state.members[get_subscriber_hash("dup@exemple.com")]["tags"] == ["VIP", "Client"]
+        report = mock_report.call_args[0][0]
+        assert report["identical_contacts"] == 1
+        assert report["mc_to_copper"] == 0
@@ -0,0 +1,482 @@
+"""
+Tests des moteurs d'exécution (sync et async) contre un serveur d'API local
+"""
+import pytest
+import sys
+import os
+import asyncio
+from unittest.mock import patch
+
+# Ajouter le répertoire parent au path pour importer sync.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sync
+from synchro import async_engine as sync_async
+from sync import get_subscriber_hash
+
+
+ENGINES = ["sync", "async"]
+
+
+def call_engine(engine, func_name, *args):
+    """Appelle la fonction du moteur demandé (le moteur async reçoit un client partagé)"""
+    if engine == "sync":
+        return getattr(sync, func_name)(*args)
+
+    async def runner():
+        async with sync_async.AsyncClient() as client:
+            return await getattr(sync_async, func_name)(client, *args)
+
+    return asyncio.run(runner())
+
+
+def add_person(server, person_id, email, first_name="User", last_name="Test", tags=None):
+    """Ajoute une personne Copper sur le serveur local"""
+    person = {
+        "id": person_id,
+        "first_name": first_name,
+        "last_name": last_name,
+        "emails": [{"email": email}],
+        "tags": tags or []
+    }
+    server.state.add_person(person)
+    return person
+
+
+def add_member(server, email, first_name="User", last_name="Test", status="subscribed"):
+    """Ajoute un membre Mailchimp sur le serveur local"""
+    member = {
+        "email_address": email,
+        "merge_fields": {"FNAME": first_name, "LNAME": last_name},
+        "status": status
+    }
+    server.state.add_member(get_subscriber_hash(email), member)
+    return member
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+class TestEngineFetchers:
+    """Récupération paginée des contacts"""
+
+    def test_copper_fetch_multiple_pages(self, engine, mock_api_server):
+        """Les contacts cibles de toutes les pages sont récupérés dans l'ordre"""
+        for i in range(1, 451):
+            domain = "exemple.com" if i % 3 == 0 else "gmail.com"
+            add_person(mock_api_server, i, f"user{i}@{domain}")
+
+        with patch('sync.TEST_MODE', True):
+            contacts = call_engine(engine, "get_target_copper_contacts")
+
+        assert [c["id"] for c in contacts] == [i for i in range(1, 451) if i % 3 == 0]
+
+    def test_mailchimp_fetch_multiple_pages(self, engine, mock_api_server):
+        """Les membres cibles de toutes les pages Mailchimp sont récupérés"""
+        for i in range(2500):
+            domain = "exemple.com" if i % 2 == 0 else "gmail.com"
+            add_member(mock_api_server, f"user{i:04d}@{domain}")
+
+        with patch('sync.TEST_MODE', True):
+            members = call_engine(engine, "get_target_mailchimp_contacts")
+
+        assert len(members) == 1250
+        assert len({m["email_address"] for m in members}) == 1250
+
+    def test_copper_fetch_empty(self, engine, mock_api_server):
+        """Aucun contact sur le serveur"""
+        with patch('sync.TEST_MODE', True):
+            assert call_engine(engine, "get_target_copper_contacts") == []
+
+    @pytest.mark.parametrize("test_mode,scope,expected", [
+        (True, (), [2]),
+        (False, (), [1, 2, 3]),
+        (False, ("@gmail", "@test.org"), [1, 3])
+    ])
+    def test_fetch_scope(self, engine, mock_api_server, test_mode, scope, expected):
+        """Le périmètre suit le mode et les motifs configurés (plus de domaine codé en dur)"""
+        add_person(mock_api_server, 1, "a@gmail.com")
+        add_person(mock_api_server, 2, "b@exemple.com")
+        add_person(mock_api_server, 3, "c@test.org")
+
+        with patch('sync.TEST_MODE', test_mode), patch('sync.SCOPE_PATTERNS', scope):
+            contacts = call_engine(engine, "get_target_copper_contacts")
+
+        assert [c["id"] for c in contacts] == expected
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+class TestEngineWriters:
+    """Écritures vers Mailchimp et Copper"""
+
+    def test_sync_contact_to_mailchimp_with_tags(self, engine, mock_api_server, reset_operation_details):
+        """Le membre et ses tags sont créés dans Mailchimp"""
+        contact = add_person(mock_api_server, 1, "john@exemple.com", "John", "Doe", ["VIP", "Client"])
+
+        result = call_engine(engine, "sync_contact_to_mailchimp", contact, contact["tags"])
+
+        assert result is True
+        member = mock_api_server.state.members[get_subscriber_hash("john@exemple.com")]
+        assert member["merge_fields"] == {"FNAME": "John", "LNAME": "Doe"}
+        assert member["tags"] == ["VIP", "Client"]
+        assert sync.operation_details[-1]["success"] is True
+
+    def test_sync_contact_to_mailchimp_identical_skipped(self, engine, mock_api_server, reset_operation_details):
+        """Un contact identique ne génère aucun appel"""
+        contact = add_person(mock_api_server, 1, "john@exemple.com", "John", "Doe")
+        member = add_member(mock_api_server, "john@exemple.com", "John", "Doe")
+
+        result = call_engine(engine, "sync_contact_to_mailchimp", contact, [], member)
+
+        assert result is False
+        assert mock_api_server.state.calls == []
+
+    def test_sync_contact_to_mailchimp_error_recorded(self, engine, mock_api_server, reset_operation_details):
+        """Une erreur serveur est enregistrée dans les détails d'opération"""
+        contact = add_person(mock_api_server, 1, "john@exemple.com", "John", "Doe")
+        mock_api_server.state.fail_paths.add(
+            f"/mc/3.0/lists/test_list_id/members/{get_subscriber_hash('john@exemple.com')}"
+        )
+
+        with patch('time.sleep'):
+            result = call_engine(engine, "sync_contact_to_mailchimp", contact)
+
+        assert result is False
+        assert sync.operation_details[-1]["success"] is False
+
+    def test_sync_mailchimp_to_copper_creates_missing(self, engine, mock_api_server, reset_operation_details):
+        """Seuls les membres absents de Copper et nommés sont créés"""
+        members = [
+            add_member(mock_api_server, f"new{i}@exemple.com", f"New{i}", "User") for i in range(20)
+        ]
+        members.append(add_member(mock_api_server, "existing@exemple.com", "Existing", "User"))
+        members.append(add_member(mock_api_server, "noname@exemple.com", "", ""))
+
+        created = call_engine(engine, "sync_mailchimp_to_copper", members, {"existing@exemple.com": {"id": 1}})
+
+        assert created == 20
+        assert len(mock_api_server.state.people) == 20
+        # L'ordre du rapport suit l'ordre d'entrée
+        assert [op["email"] for op in sync.operation_details] == [f"new{i}@exemple.com" for i in range(20)]
+
+    def test_archive_contact(self, engine, mock_api_server):
+        """L'archivage remplace le tag de suppression et désabonne le membre"""
+        add_person(mock_api_server, 7, "old@exemple.com", tags=["VIP", "🗑 À SUPPRIMER"])
+        add_member(mock_api_server, "old@exemple.com")
+
+        call_engine(engine, "archive_contact", {"email": "old@exemple.com", "copper_id": 7, "name": "Old"})
+
+        tags = mock_api_server.state.people[7]["tags"]
+        assert "VIP" in tags and "📥 INACTIF" in tags
+        assert "🗑 À SUPPRIMER" not in tags
+        assert mock_api_server.state.members[get_subscriber_hash("old@exemple.com")]["status"] == "unsubscribed"
+
+    def test_delete_contact(self, engine, mock_api_server):
+        """La suppression retire le contact des deux côtés"""
+        add_person(mock_api_server, 7, "old@exemple.com")
+        add_member(mock_api_server, "old@exemple.com")
+
+        call_engine(engine, "delete_contact", {"email": "old@exemple.com", "copper_id": 7, "name": "Old"})
+
+        assert 7 not in mock_api_server.state.people
+        assert mock_api_server.state.members == {}
+
+    def test_copper_attempts_rate_limited(self, engine, mock_api_server, reset_operation_details):
+        """Chaque tentative Copper (retries compris) passe par le limiteur partagé ; Mailchimp n'y passe pas"""
+        add_person(mock_api_server, 7, "old@exemple.com", tags=["🗑 À SUPPRIMER"])
+        add_member(mock_api_server, "old@exemple.com")
+        mock_api_server.state.fail_paths.add("/copper/people/7")
+
+        with patch('time.sleep'), patch('sync.COPPER_RATE_LIMIT', 1000), \
+             patch.object(sync.RateLimiter, 'reserve', autospec=True, return_value=0.0) as reserve:
+            call_engine(engine, "archive_contact", {"email": "old@exemple.com", "copper_id": 7, "name": "Old",
+                                                    "tags": ["🗑 À SUPPRIMER"]})
+            limiter = sync.copper_rate_limiter()
+
+        copper_attempts = mock_api_server.state.calls_for("PUT", "^/copper/people/7$")
+        assert len(copper_attempts) == sync.MAX_RETRIES
+        assert reserve.call_count == sync.MAX_RETRIES
+        assert all(call.args[0] is limiter for call in reserve.call_args_list)
+
+    def test_archive_contact_failure_recorded(self, engine, mock_api_server, reset_operation_details):
+        """Un archivage en échec renvoie False et apparaît en erreur dans le rapport"""
+        add_person(mock_api_server, 7, "old@exemple.com", tags=["🗑 À SUPPRIMER"])
+        add_member(mock_api_server, "old@exemple.com")
+        mock_api_server.state.fail_paths.add("/copper/people/7")
+
+        with patch('time.sleep'):
+            result = call_engine(engine, "archive_contact", {"email": "old@exemple.com", "copper_id": 7, "name": "Old"})
+
+        assert result is False
+        assert sync.operation_details[-1]["success"] is False
+        assert sync.operation_details[-1]["direction"] == "Archivage (contact marqué)"
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+class TestEngineMain:
+    """Exécution complète des moteurs"""
+
+    def test_full_run(self, engine, mock_api_server, reset_operation_details):
+        """Synchronisation bidirectionnelle complète avec archivage des contacts marqués (politique)"""
+        add_person(mock_api_server, 1, "john@exemple.com", "John", "Doe", ["VIP"])
+        add_person(mock_api_server, 2, "same@exemple.com", "Same", "User")
+        add_person(mock_api_server, 3, "marked@exemple.com", "Marked", "User", ["🗑 À SUPPRIMER"])
+        add_person(mock_api_server, 4, "inactive@exemple.com", "Inactive", "User", ["📥 INACTIF"])
+        add_person(mock_api_server, 5, "other@gmail.com", "Other", "User")
+        add_member(mock_api_server, "same@exemple.com", "Same", "User")
+        add_member(mock_api_server, "marked@exemple.com", "Marked", "User")
+        add_member(mock_api_server, "jane@exemple.com", "Jane", "Smith")
+
+        with patch('sync.TEST_MODE', True), \
+             patch('sync.MARKED_POLICY', 'archive'), \
+             patch('sync.write_import_report') as mock_report:
+            if engine == "sync":
+                sync.main()
+            else:
+                sync_async.main()
+
+        state = mock_api_server.state
+        assert state.members[get_subscriber_hash("john@exemple.com")]["tags"] == ["VIP"]
+        assert state.members[get_subscriber_hash("marked@exemple.com")]["status"] == "unsubscribed"
+        assert "📥 INACTIF" in state.people[3]["tags"]
+        assert any(p["emails"][0]["email"] == "jane@exemple.com" for p in state.people.values())
+        # L'archivage réutilise les tags récupérés : aucun GET /people/{id}
+        assert state.calls_for("GET", "^/copper/people/") == []
+        # Les deux moteurs désabonnent en masse (un POST par audience, aucun PATCH par contact)
+        assert state.calls_for("POST", "^/mc/3.0/lists/test_list_id$") == ["/mc/3.0/lists/test_list_id"]
+        assert state.calls_for("PATCH", "/members/") == []
+        assert state.calls_for("PUT", "/members/") == [
+            f"/mc/3.0/lists/test_list_id/members/{get_subscriber_hash('john@exemple.com')}"
+        ]
+
+        report_data = mock_report.call_args[0][0]
+        assert report_data['copper_to_mc'] == 1
+        assert report_data['mc_to_copper'] == 1
+        assert report_data['identical_contacts'] == 1
+        assert report_data['excluded'] == 2
+        assert report_data['marked_for_deletion'] == 1
+
+    def test_nothing_to_sync_leaves_no_report(self, engine, mock_api_server, reset_operation_details):
+        """Sans contact cible, le rapport ouvert au démarrage n'est ni laissé vide ni gardé pour l'exécution suivante"""
+        with patch('sync.TEST_MODE', True), patch('sync.log_file', None), patch('sync.report_file', None):
+            if engine == "sync":
+                sync.main()
+            else:
+                sync_async.main()
+            assert sync.report_file is None
+
+        assert not any(name.startswith("import_report_") for name in os.listdir(sync.OUTPUT_DIR))
+
+    def test_delta_run(self, engine, mock_api_server, reset_operation_details):
+        """Le mode delta ne lit que les modifications et ne recrée pas les contacts Copper inchangés"""
+        recent, old = "2026-01-01T00:00:00+00:00", "1970-01-01T00:00:00+00:00"
+        add_person(mock_api_server, 1, "old@exemple.com", "Old", "User")["date_modified"] = 1000
+        add_person(mock_api_server, 2, "new@exemple.com", "New", "User")["date_modified"] = 5000
+        add_member(mock_api_server, "old@exemple.com", "Old", "Renamed")["last_changed"] = recent
+        add_member(mock_api_server, "fresh@exemple.com", "Fresh", "User")["last_changed"] = recent
+        add_member(mock_api_server, "stale@exemple.com", "Stale", "User")["last_changed"] = old
+        sync.save_sync_state({"last_success": 4000})
+
+        with patch('sync.TEST_MODE', True), \
+             patch('sync.FETCH_MODE', 'delta'), \
+             patch('sync.DELTA_OVERLAP', 0), \
+             patch('sync.write_import_report'):
+            if engine == "sync":
+                sync.main()
+            else:
+                sync_async.main()
+
+        state = mock_api_server.state
+        assert state.calls_for("PUT", "/members/") == [
+            f"/mc/3.0/lists/test_list_id/members/{get_subscriber_hash('new@exemple.com')}"
+        ]
+        created = [p["emails"][0]["email"] for p in state.people.values() if p["id"] > 2]
+        assert created == ["fresh@exemple.com"]
+        assert sync.load_sync_state()["last_success"] > 4000
+
+    def test_delta_watermark_kept_on_failure(self, engine, mock_api_server, reset_operation_details):
+        """Une opération en échec n'avance pas la fenêtre delta"""
+        add_person(mock_api_server, 1, "new@exemple.com", "New", "User")["date_modified"] = 5000
+        mock_api_server.state.fail_paths.add(
+            f"/mc/3.0/lists/test_list_id/members/{get_subscriber_hash('new@exemple.com')}")
+        sync.save_sync_state({"last_success": 4000})
+
+        with patch('sync.TEST_MODE', True), \
+             patch('sync.FETCH_MODE', 'delta'), \
+             patch('sync.RETRY_DELAY', 0), \
+             patch('sync.write_import_report'):
+            if engine == "sync":
+                sync.main()
+            else:
+                sync_async.main()
+
+        assert sync.load_sync_state() == {"last_success": 4000}
+
+    def test_delta_run_keeps_marked_queue(self, engine, mock_api_server, reset_operation_details):
+        """En delta, un contact en file non relu y reste avec sa date de première détection"""
+        add_person(mock_api_server, 1, "queued@exemple.com", tags=["🗑 À SUPPRIMER"])["date_modified"] = 1000
+        add_person(mock_api_server, 2, "marked@exemple.com", tags=["🗑 À SUPPRIMER"])["date_modified"] = 5000
+        add_person(mock_api_server, 3, "restored@exemple.com")["date_modified"] = 5000
+        sync.save_marked_queue({
+            "1": {"email": "queued@exemple.com", "name": "User Test", "detected_tag": "🗑 À SUPPRIMER",
+                  "first_seen": 1000.0},
+            "3": {"email": "restored@exemple.com", "name": "User Test", "detected_tag": "🗑 À SUPPRIMER",
+                  "first_seen": 1000.0}
+        })
+        sync.save_sync_state({"last_success": 4000})
+
+        with patch('sync.TEST_MODE', True), \
+             patch('sync.FETCH_MODE', 'delta'), \
+             patch('sync.DELTA_OVERLAP', 0), \
+             patch('sync.MARKED_POLICY', 'delete:90,defer'), \
+             patch('sync.write_import_report'):
+            if engine == "sync":
+                sync.main()
+            else:
+                sync_async.main()
+
+        queue = sync.load_marked_queue()
+        # 1 : non relu, gardé ; 2 : nouveau ; 3 : relu sans tag de suppression, retiré
+        assert sorted(queue) == ["1", "2"]
+        assert queue["1"]["first_seen"] == 1000.0
+        assert queue["2"]["first_seen"] > 4000
+
+
+class TestMarkedBulkActions:
+    """Actions en masse sur les contacts marqués (moteur synchrone)"""
+
+    def marked(self, server, count, tags=None):
+        contacts = []
+        for i in range(1, count + 1):
+            email = f"marked{i}@exemple.com"
+            person = add_person(server, i, email, tags=tags or ["VIP", "🗑 À SUPPRIMER"])
+            person["date_modified"] = 1000
+            add_member(server, email)
+            contacts.append(sync.build_marked_entry(person, "🗑 À SUPPRIMER"))
+        return contacts
+
+    def test_archive_bulk(self, mock_api_server):
+        """Les désabonnements partent par lots de 500 et Copper est mis à jour pour chaque contact"""
+        contacts = self.marked(mock_api_server, 501)
+
+        done = sync.archive_contacts_bulk(contacts)
+
+        state = mock_api_server.state
+        assert len(done) == 501
+        assert len(state.calls_for("POST", r"^/mc/3\.0/lists/test_list_id$")) == 2
+        assert state.calls_for("GET", "^/copper/people/") == []
+        assert all(m["status"] == "unsubscribed" for m in state.members.values())
+        assert all(p["tags"] == ["VIP", "📥 INACTIF"] for p in state.people.values())
+
+    def test_archive_bulk_reports_mailchimp_errors(self, mock_api_server):
+        """Un membre introuvable dans Mailchimp n'est pas compté comme archivé"""
+        contacts = self.marked(mock_api_server, 3)
+        mock_api_server.state.members.pop(get_subscriber_hash("marked2@exemple.com"))
+
+        done = sync.archive_contacts_bulk(contacts)
+
+        assert done == {"1", "3"}
+
+    def test_archive_bulk_concurrency_check(self, mock_api_server):
+        """Les contacts modifiés depuis la récupération sont rechargés (ou écartés s'ils ne sont plus marqués)"""
+        contacts = self.marked(mock_api_server, 3)
+        people = mock_api_server.state.people
+        people[1].update({"tags": ["VIP", "Nouveau", "🗑 À SUPPRIMER"], "date_modified": 2000})
+        people[2].update({"tags": ["VIP"], "date_modified": 2000})
+        # Autres fiches modifiées : jamais relues par le contrôle
+        for i in range(100, 400):
+            add_person(mock_api_server, i, f"other{i}@exemple.com")["date_modified"] = 3000
+
+        with patch('sync.ARCHIVE_CONCURRENCY_CHECK', True), \
+             patch('sync.search_copper_people', wraps=sync.search_copper_people) as search:
+            done = sync.archive_contacts_bulk(contacts)
+
+        assert done == {"1", "3"}
+        assert people[1]["tags"] == ["VIP", "Nouveau", "📥 INACTIF"]
+        assert people[2]["tags"] == ["VIP"]
+        assert people[3]["tags"] == ["VIP", "📥 INACTIF"]
+        # Une seule recherche, limitée aux emails des contacts marqués, au lieu d'un GET par contact
+        search.assert_called_once_with([c["email"] for c in contacts])
+        assert len(mock_api_server.state.calls_for("POST", "^/copper/people/search$")) == 1
+        assert mock_api_server.state.calls_for("GET", "^/copper/people/") == []
+
+    @patch('builtins.input', side_effect=['g', 'a'])
+    def test_interactive_archive_concurrency_check(self, mock_input, mock_api_server):
+        """Le mode interactif contrôle aussi les fiches avant d'archiver"""
+        contacts = self.marked(mock_api_server, 2)
+        mock_api_server.state.people[2].update({"tags": ["VIP"], "date_modified": 2000})
+
+        with patch('sync.ARCHIVE_CONCURRENCY_CHECK', True):
+            sync.handle_marked_contacts(contacts, policy="interactive")
+
+        assert mock_api_server.state.people[1]["tags"] == ["VIP", "📥 INACTIF"]
+        assert mock_api_server.state.people[2]["tags"] == ["VIP"]
+
+    def test_delete_bulk(self, mock_api_server):
+        """Les suppressions Mailchimp passent par un lot /batches"""
+        contacts = self.marked(mock_api_server, 5)
+
+        done = sync.delete_contacts_bulk(contacts)
+
+        state = mock_api_server.state
+        assert len(done) == 5
+        assert len(state.batches) == 1 and len(state.batches[0]) == 5
+        assert state.people == {} and state.members == {}
+        # Le lot est suivi jusqu'à sa fin
+        assert state.calls_for("GET", "^/mc/3.0/batches/batch1$") == ["/mc/3.0/batches/batch1"]
+
+    def test_delete_bulk_errored_operations(self, mock_api_server, reset_operation_details):
+        """Une opération en erreur dans le lot (errored_operations) garde le contact en file"""
+        contacts = self.marked(mock_api_server, 3)
+        mock_api_server.state.fail_paths.add(
+            f"/mc/3.0/lists/test_list_id/members/{get_subscriber_hash('marked2@exemple.com')}")
+
+        done = sync.delete_contacts_bulk(contacts)
+
+        assert done == {"1", "3"}
+        assert 2 in mock_api_server.state.people
+        assert [op["email"] for op in sync.operation_details if not op["success"]] == ["marked2@exemple.com"]
+        assert len(mock_api_server.state.calls_for("GET", "^/mc/batch-results/")) == 1
+
+    def test_delete_bulk_batch_still_running(self, mock_api_server):
+        """Lot toujours en cours à l'échéance : aucun contact n'est considéré supprimé ni retiré de Copper"""
+        contacts = self.marked(mock_api_server, 2)
+
+        with patch('sync.wait_mailchimp_batch', return_value=None):
+            done = sync.delete_contacts_bulk(contacts)
+
+        assert done == set()
+        assert sorted(mock_api_server.state.people) == [1, 2]
+
+    def test_policy_run_updates_queue(self, mock_api_server):
+        """Les contacts traités sortent de la file, les contacts différés y restent"""
+        contacts = self.marked(mock_api_server, 2)
+        queue = {"1": {"email": "marked1@exemple.com", "name": "User Test", "detected_tag": "🗑 À SUPPRIMER",
+                       "first_seen": 0}}
+        sync.save_marked_queue(queue)
+
+        sync.handle_marked_contacts(contacts, policy="archive:7,defer")
+
+        assert list(sync.load_marked_queue()) == ["2"]
+        assert "📥 INACTIF" in mock_api_server.state.people[1]["tags"]
+        assert "🗑 À SUPPRIMER" in mock_api_server.state.people[2]["tags"]
+
+
+class TestEngineSelection:
+    """Sélection du moteur en ligne de commande"""
+
+    @patch('sync.load_environment')
+    @patch('sync.main')
+    def test_run_default_engine(self, mock_main, mock_load_environment):
+        """Le moteur synchrone est utilisé par défaut"""
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("SYNC_ENGINE", None)
+            sync.run([])
+        mock_main.assert_called_once()
+
+    @patch('sync.load_environment')
+    @patch('synchro.async_engine.main')
+    @patch('sync.main')
+    def test_run_async_engine(self, mock_main, mock_async_main, mock_load_environment):
+        """--engine async lance le moteur asynchrone"""
+        sync.run(["--engine", "async"])
+        mock_async_main.assert_called_once()
+        mock_main.assert_not_called()
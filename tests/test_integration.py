@@ -15,6 +15,7 @@ from sync import main, operation_details
 
 
 @pytest.mark.integration
+@patch('sync.MARKED_POLICY', 'interactive')
 class TestIntegrationWorkflow:
     """Tests d'intégration pour le workflow complet"""
     
@@ -498,6 +499,7 @@ class TestIntegrationWorkflow:
 
 
 @pytest.mark.integration
+@patch('sync.MARKED_POLICY', 'interactive')
 class TestEndToEndScenarios:
     """Tests de scénarios end-to-end"""
     
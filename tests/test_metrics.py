@@ -0,0 +1,164 @@
+"""
+Tests des métriques Prometheus (registre, fichier texte, endpoint /metrics, instrumentation des moteurs)
+"""
+import pytest
+import sys
+import os
+import urllib.error
+import urllib.request
+from unittest.mock import MagicMock, patch
+
+import requests
+
+# Ajouter le répertoire parent au path pour importer sync.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sync
+from synchro import async_engine
+from synchro.metrics import MetricsRegistry, MetricsServer, endpoint_template, write_textfile
+from tests.test_engines import ENGINES, add_person, add_member
+
+
+class TestRegistry:
+    """Registre et exposition texte"""
+
+    def test_counters_and_gauges(self):
+        registry = MetricsRegistry()
+        registry.inc("sync_operations_total", direction="Copper → Mailchimp", result="success")
+        registry.inc("sync_operations_total", 2, direction="Copper → Mailchimp", result="success")
+        registry.set("sync_run_duration_seconds", 1.5)
+        text = registry.render()
+        assert "# TYPE sync_operations_total counter" in text
+        assert 'sync_operations_total{direction="Copper → Mailchimp",result="success"} 3' in text
+        assert "sync_run_duration_seconds 1.5" in text
+        # Métriques sans valeur absentes de l'exposition
+        assert "sync_http_retries_total" not in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            registry.observe("sync_http_request_duration_seconds", value, api="copper", method="POST",
+                             endpoint="/people/search")
+        text = registry.render()
+        labels = 'api="copper",method="POST",endpoint="/people/search"'
+        assert f'sync_http_request_duration_seconds_bucket{{{labels},le="0.1"}} 1' in text
+        assert f'sync_http_request_duration_seconds_bucket{{{labels},le="1.0"}} 3' in text
+        assert f'sync_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 4' in text
+        assert f"sync_http_request_duration_seconds_count{{{labels}}} 4" in text
+        assert f"sync_http_request_duration_seconds_sum{{{labels}}} 4.25" in text
+
+    def test_label_escaping(self):
+        registry = MetricsRegistry()
+        registry.inc("sync_operations_total", direction='a "b"\\c', result="error")
+        assert 'direction="a \\"b\\"\\\\c"' in registry.render()
+
+    @pytest.mark.parametrize("path,expected", [
+        ("/people/search", "/people/search"),
+        ("/people/12345", "/people/:id"),
+        ("/lists/test_list_id/members/0a1b2c3d/tags", "/lists/:id/members/:id/tags"),
+        ("/lists/abc123?skip_merge_validation=true", "/lists/:id"),
+    ])
+    def test_endpoint_template(self, path, expected):
+        assert endpoint_template(path) == expected
+
+
+class TestOutputs:
+    """Fichier texte et endpoint HTTP"""
+
+    def test_write_textfile(self, tmp_path):
+        registry = MetricsRegistry()
+        registry.set("sync_last_run_success", 1)
+        path = tmp_path / "textfile" / "synchro.prom"
+        write_textfile(registry, str(path))
+        assert "sync_last_run_success 1" in path.read_text(encoding="utf-8")
+        assert os.listdir(tmp_path / "textfile") == ["synchro.prom"]
+
+    def test_http_endpoint(self):
+        registry = MetricsRegistry()
+        registry.inc("sync_http_retries_total", api="mailchimp")
+        with MetricsServer(registry, 0, "127.0.0.1") as server:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics") as response:
+                assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+                assert 'sync_http_retries_total{api="mailchimp"} 1' in response.read().decode("utf-8")
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"http://127.0.0.1:{server.port}/autre")
+
+    def test_server_port_in_use_only_warns(self):
+        """Port déjà pris : avertissement, la synchronisation continue sans endpoint"""
+        with MetricsServer(MetricsRegistry(), 0) as busy, \
+             patch('sync.METRICS_PORT', busy.port), patch('sync.log') as log:
+            assert sync.start_metrics_server() is None
+        assert "indisponible" in log.call_args[0][0]
+
+
+class TestRequestMetrics:
+    """Instrumentation de safe_request"""
+
+    @patch('time.sleep')
+    def test_rate_limited_then_success(self, mock_sleep):
+        limited = MagicMock(status_code=429)
+        limited.raise_for_status.side_effect = requests.exceptions.HTTPError("429", response=limited)
+        ok = MagicMock(status_code=200)
+        func = MagicMock(side_effect=[limited, ok], __name__="put")
+
+        sync.safe_request(func, f"{sync.MC_BASE}/lists/test_list_id/members/abc123")
+
+        labels = dict(api="mailchimp", method="PUT", endpoint="/lists/:id/members/:id")
+        assert sync.METRICS.get("sync_http_requests_total", status=429, **labels) == 1
+        assert sync.METRICS.get("sync_http_requests_total", status=200, **labels) == 1
+        assert sync.METRICS.get("sync_http_request_duration_seconds", **labels) == 2
+        assert sync.METRICS.get("sync_http_rate_limited_total", api="mailchimp") == 1
+        assert sync.METRICS.get("sync_http_retries_total", api="mailchimp") == 1
+
+    @patch('time.sleep')
+    def test_connection_error_counted_without_status(self, mock_sleep):
+        func = MagicMock(side_effect=requests.exceptions.ConnectionError("refusé"), __name__="post")
+        with pytest.raises(requests.exceptions.ConnectionError):
+            sync.safe_request(func, f"{sync.COPPER_API_URL}/people/search")
+        assert sync.METRICS.get("sync_http_requests_total", api="copper", method="POST",
+                                endpoint="/people/search", status="error") == sync.MAX_RETRIES
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+class TestRunMetrics:
+    """Métriques d'une exécution complète des deux moteurs"""
+
+    def test_full_run_publishes_metrics(self, engine, mock_api_server, reset_operation_details, tmp_path):
+        add_person(mock_api_server, 1, "john@exemple.com", "John", "Doe", ["VIP"])
+        add_person(mock_api_server, 2, "marked@exemple.com", "Marked", "User", ["🗑 À SUPPRIMER"])
+        add_member(mock_api_server, "jane@exemple.com", "Jane", "Smith")
+        metrics_file = tmp_path / "synchro.prom"
+
+        with patch('sync.TEST_MODE', True), \
+             patch('sync.MARKED_POLICY', 'archive'), \
+             patch('sync.METRICS_FILE', str(metrics_file)), \
+             patch('sync.write_import_report'):
+            if engine == "sync":
+                sync.main()
+            else:
+                async_engine.main()
+
+        metrics = sync.METRICS
+        assert metrics.get("sync_operations_total", direction="Copper → Mailchimp", result="success") == 1
+        assert metrics.get("sync_operations_total", direction="Mailchimp → Copper", result="success") == 1
+        assert metrics.get("sync_marked_contacts_total", action="archive") == 1
+        assert metrics.get("sync_http_request_duration_seconds", api="copper", method="POST",
+                           endpoint="/people/search") >= 1
+        assert metrics.get("sync_last_run_success") == 1
+        assert metrics.get("sync_contacts_per_second") > 0
+        for phase in ("copper_fetch", "mailchimp_fetch", "index", "classify", "copper_to_mailchimp",
+                      "mailchimp_to_copper", "marked"):
+            assert metrics.get("sync_phase_duration_seconds", phase=phase) > 0
+
+        text = metrics_file.read_text(encoding="utf-8")
+        assert 'sync_http_requests_total{api="mailchimp",method="PUT",endpoint="/lists/:id/members/:id",status="200"} 1' in text
+        assert "sync_last_run_timestamp_seconds" in text
+
+    def test_failed_run_flagged(self, engine, mock_api_server, reset_operation_details):
+        with patch('sync.TEST_MODE', True), \
+             patch('sync.get_audiences', side_effect=RuntimeError("configuration invalide")):
+            if engine == "sync":
+                sync.main()
+            else:
+                async_engine.main()
+        assert sync.METRICS.get("sync_last_run_success") == 0
@@ -8,6 +8,10 @@ import time
 from unittest.mock import patch, MagicMock
 import threading
 import concurrent.futures
+import subprocess
+import json
+import hashlib
+import tracemalloc
 
 # Ajouter le répertoire parent au path pour importer sync.py
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -18,8 +22,14 @@ from sync import (
     contacts_are_identical,
     get_subscriber_hash,
     sync_contact_to_mailchimp,
-    operation_details
+    operation_details,
+    write_import_report
 )
+from synchro.email_keys import EmailKeyCache
+from synchro.records import CopperPerson, MailchimpMember
+from synchro.report import OperationRecorder
+from synchro.runlog import LogBuffer
+import sync
 
 
 class TestPerformance:
@@ -382,5 +392,352 @@ class TestResourceManagement:
         assert len(large_data) == 0
 
 
+KEYS_BENCHMARK = """
+import sys
+from tests.test_performance import TestEmailKeyCache
+
+print(TestEmailKeyCache().cpu_seconds(int(sys.argv[1]), sys.argv[2]))
+"""
+
+
+class TestEmailKeyCache:
+    """Micro-benchmarks du mémo des clés d'email (normalisation + hash subscriber)"""
+    
+    REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # Index, comparaison, écriture, archivage : quatre calculs par adresse et par exécution
+    PASSES = 4
+    # Chaque mesure de CPU dans un interpréteur neuf, meilleur temps sur plusieurs essais
+    REPEATS = 3
+    
+    @staticmethod
+    def plain_keys(email):
+        """Calcul sans mémo (implémentation précédente de normalize_email et get_subscriber_hash)"""
+        return email.lower().strip(), hashlib.md5(email.lower().encode()).hexdigest()
+    
+    @staticmethod
+    def emails(count):
+        return [f"User{i}@Exemple.com" for i in range(count)]
+    
+    def run_passes(self, keys, emails):
+        return [[keys(email) for email in emails] for _ in range(self.PASSES)]
+    
+    def cpu_seconds(self, count, mode):
+        """Temps CPU des passes : plain (sans mémo), cached (mémo vide), warm (mémo déjà rempli)"""
+        emails = self.emails(count)
+        keys = self.plain_keys if mode == "plain" else EmailKeyCache().key
+        if mode == "warm":
+            # Exécution suivante dans le même processus
+            self.run_passes(keys, emails)
+        start_time = time.process_time()
+        self.run_passes(keys, emails)
+        return time.process_time() - start_time
+    
+    def isolated_cpu_seconds(self, count, mode):
+        """Meilleur temps CPU sur REPEATS interpréteurs neufs (ni ordre d'exécution ni tas partagé)"""
+        env = dict(os.environ, PYTHONPATH=self.REPO_ROOT)
+        runs = [subprocess.run([sys.executable, "-c", KEYS_BENCHMARK, str(count), mode], env=env,
+                               capture_output=True, text=True, check=True)
+                for _ in range(self.REPEATS)]
+        return min(float(run.stdout.strip().splitlines()[-1]) for run in runs)
+    
+    def retained_memory(self, keys, emails):
+        """Mémoire retenue quand chaque passe garde ses clés (comme un index)"""
+        tracemalloc.start()
+        kept = self.run_passes(keys, emails)
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del kept
+        return retained
+    
+    def benchmark(self, count, cached_ratio):
+        plain_cpu = self.isolated_cpu_seconds(count, "plain")
+        cached_cpu = self.isolated_cpu_seconds(count, "cached")
+        warm_cpu = self.isolated_cpu_seconds(count, "warm")
+        assert cached_cpu < plain_cpu * cached_ratio
+        assert warm_cpu < plain_cpu * 0.5
+        
+        emails = self.emails(count)
+        plain_memory = self.retained_memory(self.plain_keys, emails)
+        cached_memory = self.retained_memory(EmailKeyCache().key, emails)
+        assert cached_memory < plain_memory * 0.7
+    
+    def test_same_keys_as_plain_computation(self):
+        cache = EmailKeyCache()
+        for email in ["A@Exemple.com ", "a@exemple.com", "  ", "北京@exemple.com"]:
+            assert cache.key(email) == self.plain_keys(email)
+        assert cache.normalize("A@Exemple.com") is cache.normalize(" a@exemple.com")
+    
+    def test_cache_is_bounded(self):
+        cache = EmailKeyCache(max_entries=10)
+        for i in range(25):
+            cache.key(f"user{i}@exemple.com")
+        assert len(cache) <= 10
+    
+    def test_memo_reduces_cpu_and_memory(self):
+        """20k adresses : CPU environ divisé par deux dès la première exécution (mesuré ~0,5x)"""
+        self.benchmark(20000, cached_ratio=0.8)
+    
+    @pytest.mark.slow
+    def test_memo_reduces_cpu_and_memory_1m(self):
+        """1M d'adresses (--run-slow) : le remplissage du dictionnaire domine, gain mesuré ~0,9x ; mémo chaud ~0,3x"""
+        self.benchmark(1000000, cached_ratio=1.0)
+
+
+def api_person(i):
+    """Personne telle que renvoyée par POST /people/search (champs non utilisés compris)"""
+    return {"id": i, "name": f"User{i} Test", "prefix": None, "first_name": f"User{i}", "middle_name": None,
+            "last_name": "Test", "suffix": None,
+            "address": {"street": f"{i} rue de la Paix", "city": "Paris", "state": None, "postal_code": "75002",
+                        "country": "FR"},
+            "assignee_id": 42, "company_id": i % 1000, "company_name": f"Société {i % 1000}", "contact_type_id": 7,
+            "details": "Rencontré au salon", "emails": [{"email": f"User{i}@Exemple.com", "category": "work"}],
+            "phone_numbers": [{"number": "+33 1 23 45 67 89", "category": "work"}],
+            "socials": [{"url": f"https://linkedin.com/in/user{i}", "category": "linkedin"}],
+            "tags": ["Client", "VIP"] if i % 3 else ["Prospect"], "title": "Directeur",
+            "websites": [{"url": f"https://user{i}.fr", "category": "work"}],
+            "custom_fields": [{"custom_field_definition_id": 100 + k, "value": None} for k in range(6)],
+            "date_created": 1600000000 + i, "date_modified": 1700000000 + i, "date_last_contacted": None,
+            "interaction_count": i % 20, "leads_converted_from": [], "date_lead_created": None}
+
+
+def api_member(i):
+    """Membre tel que renvoyé par GET /lists/{id}/members (champs non utilisés compris)"""
+    return {"id": f"{i:032x}", "email_address": f"user{i}@exemple.com", "unique_email_id": f"{i:010x}",
+            "contact_id": f"{i:032x}", "full_name": f"User{i} Test", "web_id": i, "email_type": "html",
+            "status": "subscribed", "consents_to_one_to_one_messaging": True,
+            "merge_fields": {"FNAME": f"User{i}", "LNAME": "Test", "ADDRESS": "", "PHONE": "", "BIRTHDAY": ""},
+            "interests": {}, "stats": {"avg_open_rate": 0.5, "avg_click_rate": 0.1},
+            "ip_signup": "", "timestamp_signup": "", "ip_opt": "192.0.2.1", "timestamp_opt": "2024-01-01T00:00:00+00:00",
+            "member_rating": 3, "last_changed": "2025-01-01T00:00:00+00:00", "language": "fr", "vip": False,
+            "email_client": "", "location": {"latitude": 0, "longitude": 0, "gmtoff": 0, "dstoff": 0,
+                                             "country_code": "FR", "timezone": "", "region": ""},
+            "source": "API - Generic", "tags_count": 1, "tags": [{"id": 1, "name": "Client"}], "list_id": "abc123",
+            "_links": [{"rel": rel, "href": f"https://us1.api.mailchimp.com/3.0/lists/abc123/members/{i:032x}/{rel}",
+                        "method": "GET", "targetSchema": "https://us1.api.mailchimp.com/schema/3.0/Definitions/Lists/Members/Response.json"}
+                       for rel in ("self", "parent", "update", "upsert", "delete", "activity", "goals", "notes")]}
+
+
+def encoded_pages(count):
+    """Pages de 200 personnes et membres, en JSON comme sur le réseau"""
+    for start in range(0, count, 200):
+        ids = range(start, min(start + 200, count))
+        yield json.dumps([api_person(i) for i in ids]), json.dumps([api_member(i) for i in ids])
+
+
+def read_pages(pages, compact):
+    """Décode les pages comme response.json() et les garde brutes ou projetées en enregistrements"""
+    kept = []
+    for people_page, members_page in pages:
+        people, members = json.loads(people_page), json.loads(members_page)
+        if compact:
+            people = [CopperPerson.from_api(p) for p in people]
+            members = [MailchimpMember.from_api(m) for m in members]
+        kept.append((people, members))
+    return kept
+
+
+# Pic de RSS lu dans VmHWM (propre à l'espace mémoire du processus, remis à zéro par exec),
+# contrairement à ru_maxrss qui hérite du pic du processus pytest après fork + exec
+RECORDS_BENCHMARK = """
+import json, sys
+from tests.test_performance import encoded_pages, read_pages
+
+def vm_hwm_kb():
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+
+baseline = vm_hwm_kb()
+kept = read_pages(encoded_pages(int(sys.argv[1])), sys.argv[2] == "compact")
+print(json.dumps({"peak_kb": vm_hwm_kb() - baseline}))
+"""
+
+
+class TestCompactRecords:
+    """Benchmark mémoire : réponses brutes des API contre enregistrements compacts"""
+    
+    REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    
+    def retained_bytes(self, count, compact):
+        """Mémoire retenue après décodage (le JSON reçu est préparé avant la mesure)"""
+        pages = list(encoded_pages(count))
+        tracemalloc.start()
+        kept = read_pages(pages, compact)
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del kept
+        return retained
+    
+    def peak_rss_kb(self, count, mode):
+        """Pic de RSS (Ko) d'un interpréteur neuf qui garde count personnes et count membres"""
+        env = dict(os.environ, PYTHONPATH=self.REPO_ROOT)
+        result = subprocess.run([sys.executable, "-c", RECORDS_BENCHMARK, str(count), mode], env=env,
+                                capture_output=True, text=True, check=True)
+        return json.loads(result.stdout.strip().splitlines()[-1])["peak_kb"]
+    
+    def test_records_keep_used_fields_only(self):
+        person, member = CopperPerson.from_api(api_person(1)), MailchimpMember.from_api(api_member(1))
+        assert dict(person) == {"id": 1, "first_name": "User1", "last_name": "Test",
+                                "emails": [{"email": "user1@exemple.com"}], "tags": ("Client", "VIP"),
+                                "date_modified": 1700000001}
+        assert member.get("merge_fields", {}).get("LNAME") == "Test"
+        assert member["tags"] == ("Client",) and "_links" not in member
+        assert person.get("socials") is None
+        assert dict(person, tags=["Salon"])["tags"] == ["Salon"]
+    
+    def test_records_reduce_retained_memory(self):
+        """2k contacts et 2k membres : moins d'un cinquième de la mémoire des réponses brutes"""
+        raw = self.retained_bytes(2000, compact=False)
+        compact = self.retained_bytes(2000, compact=True)
+        assert compact < raw * 0.2
+    
+    @pytest.mark.slow
+    @pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="VmHWM disponible sous Linux uniquement")
+    def test_records_reduce_peak_rss_500k(self):
+        """Pic de RSS pour 500k contacts (--run-slow) ; les réponses brutes (~6 Go) sont extrapolées depuis 50k"""
+        raw_per_contact = self.peak_rss_kb(50000, "raw") / 50000
+        compact = self.peak_rss_kb(500000, "compact")
+        assert raw_per_contact > 0
+        assert compact < raw_per_contact * 500000 * 0.1
+
+
+class TestStreamingReport:
+    """Benchmark du rapport d'importation : temps linéaire et mémoire bornée"""
+    
+    def report_data(self, count):
+        operations = OperationRecorder(
+            {'email': f'user{i}@exemple.com', 'name': f'User {i}', 'direction': 'Copper → Mailchimp',
+             'success': i % 50 != 0, 'error': None if i % 50 else 'API Error 500', 'tags': ['VIP', 'Client']}
+            for i in range(count)
+        )
+        return {'operations': operations, 'copper_to_mc': count, 'mc_to_copper': 0, 'identical_contacts': 0,
+                'excluded': 0, 'marked_for_deletion': 0, 'marked_contacts': []}
+    
+    def write_report(self, report_data, path):
+        """Temps d'écriture et pic de mémoire allouée pendant la génération"""
+        with patch('sync.report_file', open(path, "w", encoding="utf-8")), patch('sync.report_filename', str(path)):
+            tracemalloc.start()
+            start_time = time.perf_counter()
+            write_import_report(report_data)
+            elapsed = time.perf_counter() - start_time
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return elapsed, peak
+    
+    def test_report_100k_operations(self, tmp_path):
+        """100k opérations : pic mémoire sans rapport avec la taille du fichier, temps proportionnel"""
+        small_time, small_peak = self.write_report(self.report_data(10000), tmp_path / "small.txt")
+        large_time, large_peak = self.write_report(self.report_data(100000), tmp_path / "large.txt")
+        
+        report_size = os.path.getsize(tmp_path / "large.txt")
+        assert report_size > 10 * 1024 * 1024
+        # Tampon de 64 Ko (en caractères) : quelques centaines de Ko au plus
+        assert large_peak < 1024 * 1024
+        assert large_peak < small_peak * 2
+        # 10x plus d'opérations : ~10x plus de temps (une concaténation quadratique dépasse largement)
+        assert large_time < max(small_time, 0.01) * 20
+
+
+class TestOperationRecorder:
+    """Benchmark de l'enregistreur d'opérations : mémoire bornée par le plafond"""
+    
+    def operations(self, count):
+        for i in range(count):
+            yield {'email': f'user{i}@exemple.com', 'name': f'User {i}', 'direction': 'Copper → Mailchimp',
+                   'success': i % 50 != 0, 'error': None if i % 50 else 'API Error 500', 'tags': ['VIP', 'Client']}
+    
+    def retained(self, make, count):
+        tracemalloc.start()
+        recorder = make()
+        for operation in self.operations(count):
+            recorder.append(operation)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return recorder, memory
+    
+    def test_capped_recorder_20k(self, tmp_path):
+        """20k opérations, plafond de 2000 : mémoire retenue indépendante du volume, ordre et compteurs conservés"""
+        _, plain = self.retained(list, 20000)
+        compact, compact_memory = self.retained(OperationRecorder, 20000)
+        capped, capped_memory = self.retained(lambda: OperationRecorder(memory_limit=2000, spill_dir=str(tmp_path)), 20000)
+        
+        assert compact_memory < plain * 0.7
+        assert capped_memory < plain * 0.1
+        assert (len(capped), capped.errors) == (20000, 400)
+        assert [op['email'] for op in capped][::5000] == [f"user{i}@exemple.com" for i in range(0, 20000, 5000)]
+
+
+class TestBufferedLog:
+    """Benchmark du journal : une écriture par bloc au lieu d'un write + flush par ligne"""
+    
+    def test_log_20k_contact_lines(self, tmp_path):
+        path = tmp_path / "sync_log.txt"
+        with open(path, "w", encoding="utf-8") as log_file, patch('sync.log_file', log_file), \
+             patch('sync._log_buffer', LogBuffer(flush_interval=60)), patch('builtins.print') as mock_print, \
+             patch('sync.TEST_MODE', False), patch('sync.LOG_CONSOLE', "auto"), \
+             patch.object(log_file, "flush", wraps=log_file.flush) as mock_flush:
+            for i in range(20000):
+                sync.log(f"✅ Synchronisé: user{i}@exemple.com", "SUCCESS", email=f"user{i}@exemple.com")
+            sync.flush_log()
+        
+        # Lignes par contact absentes de la console en production, présentes dans le fichier
+        mock_print.assert_not_called()
+        assert path.read_text(encoding="utf-8").count("Synchronisé") == 20000
+        # Tampon de 64 Ko : une vingtaine de vidages au lieu de 20 000
+        assert mock_flush.call_count < 50
+
+
+class TestImportCost:
+    """Benchmark du coût d'import : aucun effet de bord, import de la bibliothèque léger"""
+    
+    REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    
+    def run_python(self, code, cwd):
+        """Exécute du code dans un interpréteur neuf (cache d'import vide) et renvoie sa sortie JSON"""
+        env = {k: v for k, v in os.environ.items() if not k.startswith(("MAILCHIMP_", "COPPER_"))}
+        env["PYTHONPATH"] = self.REPO_ROOT
+        result = subprocess.run([sys.executable, "-c", code], cwd=str(cwd), env=env,
+                                capture_output=True, text=True, check=True)
+        return json.loads(result.stdout.strip().splitlines()[-1])
+    
+    def test_import_sync_has_no_side_effects(self, tmp_path):
+        """Importer sync ne crée aucun fichier et ne lit pas .env"""
+        (tmp_path / ".env").write_text("MAILCHIMP_LIST_ID=depuis_dotenv\n")
+        
+        output = self.run_python(
+            "import json, sync; print(json.dumps({'list_id': sync.MC_LIST_ID, 'log': sync.log_filename}))",
+            tmp_path
+        )
+        
+        assert output == {"list_id": None, "log": None}
+        assert sorted(os.listdir(tmp_path)) == [".env"]
+    
+    def test_import_library_is_cheap(self, tmp_path):
+        """La bibliothèque s'importe sans requests ni dotenv, en quelques millisecondes"""
+        output = self.run_python(
+            "import json, sys, time\n"
+            "start = time.perf_counter()\n"
+            "import synchro, synchro.utils\n"
+            "elapsed = time.perf_counter() - start\n"
+            "print(json.dumps({'elapsed': elapsed, 'heavy': [m for m in ('requests', 'dotenv', 'aiohttp') if m in sys.modules]}))",
+            tmp_path
+        )
+        
+        assert output["heavy"] == []
+        assert output["elapsed"] < 0.05
+        assert os.listdir(tmp_path) == []
+    
+    def test_import_sync_time(self, tmp_path):
+        """L'import du module principal reste borné (dominé par requests)"""
+        output = self.run_python(
+            "import json, time\n"
+            "start = time.perf_counter()\n"
+            "import sync\n"
+            "print(json.dumps({'elapsed': time.perf_counter() - start}))",
+            tmp_path
+        )
+        
+        assert output["elapsed"] < 1.0
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,173 @@
+"""
+Tests du plan de synchronisation (--dry-run, --plan-out, --apply)
+"""
+import pytest
+import sys
+import os
+import json
+from unittest.mock import patch
+
+# Ajouter le répertoire parent au path pour importer sync.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sync
+from sync import get_subscriber_hash
+from synchro.plan import PLAN_VERSION, estimate_cost, load_plan, summarize, tags_added
+from tests.test_engines import add_person, add_member
+
+
+def empty_plan(**fields):
+    plan = {"version": PLAN_VERSION, "audiences": [{"name": "default", "list_id": "test_list_id"}],
+            "mailchimp_writes": [], "copper_creates": [], "copper_blocked": [], "marked": [],
+            "skipped": {"identical": 0, "excluded": 0}}
+    plan.update(fields)
+    return plan
+
+
+def write(email, tags=(), action="create", audience="default"):
+    return {"audience": audience, "copper_id": 1, "email": email, "first_name": "A", "last_name": "B",
+            "tags": list(tags), "action": action, "tags_added": list(tags)}
+
+
+class TestPlanHelpers:
+    """Fonctions pures du plan"""
+
+    def test_tags_added(self):
+        member = {"tags": [{"id": 1, "name": "VIP"}]}
+        assert tags_added(["vip", "Client"], member) == ["Client"]
+        assert tags_added(["VIP"], None) == ["VIP"]
+
+    def test_estimate_counts_calls(self):
+        plan = empty_plan(
+            mailchimp_writes=[write("a@exemple.com", ["VIP"]), write("b@exemple.com", action="update")],
+            copper_creates=[{"email": "c@exemple.com", "first_name": "C", "last_name": "D"}] * 3,
+            marked=[{"action": "archive"}, {"action": "archive"}, {"action": "delete"}, {"action": "defer"}]
+        )
+        estimate = estimate_cost(plan, copper_rate_limit=2, copper_workers=4, mailchimp_batch_size=500)
+        # 2 PUT + 1 POST de tags, 1 lot de désabonnement + 1 lot de suppression (soumission et suivi)
+        assert estimate["mailchimp_calls"] == 6
+        # 3 créations, 2 archivages, 1 suppression
+        assert estimate["copper_calls"] == 6
+        assert estimate["total_calls"] == 12
+        # 6 écritures Copper à 2/s dominent les workers
+        assert estimate["estimated_seconds"] == pytest.approx(6 * 0.3 + 3.0)
+
+        counts = summarize(plan)
+        assert (counts["mailchimp_create"], counts["mailchimp_update"], counts["tags_added"]) == (1, 1, 1)
+        assert (counts["archive"], counts["delete"], counts["defer"]) == (2, 1, 1)
+
+    def test_load_plan_rejects_other_version(self, tmp_path):
+        path = tmp_path / "plan.json"
+        path.write_text(json.dumps(empty_plan(version=99)))
+        with pytest.raises(ValueError):
+            load_plan(str(path))
+        with pytest.raises(ValueError):
+            load_plan(str(tmp_path / "absent.json"))
+
+
+class TestPlanRun:
+    """Planification et application contre le serveur local"""
+
+    def populate(self, server):
+        add_person(server, 1, "john@exemple.com", "John", "Doe", ["VIP"])
+        add_person(server, 2, "same@exemple.com", "Same", "User")
+        add_person(server, 3, "marked@exemple.com", "Marked", "User", ["🗑 À SUPPRIMER"])
+        add_member(server, "same@exemple.com", "Same", "User")
+        add_member(server, "marked@exemple.com", "Marked", "User")
+        add_member(server, "jane@exemple.com", "Jane", "Smith")
+
+    def test_dry_run_writes_nothing(self, mock_api_server, reset_operation_details, tmp_path):
+        self.populate(mock_api_server)
+        plan_file = str(tmp_path / "plan.json")
+
+        with patch('sync.TEST_MODE', True), patch('sync.MARKED_POLICY', 'archive'), \
+             patch('sync.write_import_report') as mock_report:
+            sync.main(dry_run=True, plan_file=plan_file)
+
+        state = mock_api_server.state
+        assert [call for call in state.calls if call[0] != "GET" and not call[1].endswith("/search")] == []
+        mock_report.assert_not_called()
+        assert not os.path.exists(sync.SYNC_STATE_FILE)
+        assert not os.path.exists(sync.MARKED_QUEUE_FILE)
+
+        plan = load_plan(plan_file)
+        assert [(w["email"], w["action"], w["tags_added"]) for w in plan["mailchimp_writes"]] == [
+            ("john@exemple.com", "create", ["VIP"])
+        ]
+        assert plan["copper_creates"] == [{"email": "jane@exemple.com", "first_name": "Jane", "last_name": "Smith"}]
+        assert [(c["email"], c["action"]) for c in plan["marked"]] == [("marked@exemple.com", "archive")]
+        assert plan["skipped"] == {"identical": 1, "excluded": 1}
+        assert plan["estimate"]["mailchimp_calls"] == 3
+        assert plan["estimate"]["copper_calls"] == 2
+
+    def test_apply_executes_saved_plan(self, mock_api_server, reset_operation_details, tmp_path):
+        self.populate(mock_api_server)
+        plan_file = str(tmp_path / "plan.json")
+
+        with patch('sync.TEST_MODE', True), patch('sync.MARKED_POLICY', 'archive'):
+            sync.main(dry_run=True, plan_file=plan_file)
+            # Modifié entre la planification et l'application : hors plan, relu au prochain passage
+            add_person(mock_api_server, 4, "late@exemple.com", "Late", "User")
+            # La première exécution a fermé le log : nouveau mock pour la seconde
+            with patch('sync.log_file'), patch('sync.write_import_report') as mock_report:
+                sync.apply_saved_plan(load_plan(plan_file), plan_file)
+
+        state = mock_api_server.state
+        assert state.calls_for("PUT", "/members/") == [
+            f"/mc/3.0/lists/test_list_id/members/{get_subscriber_hash('john@exemple.com')}"
+        ]
+        assert state.members[get_subscriber_hash("john@exemple.com")]["tags"] == ["VIP"]
+        assert "📥 INACTIF" in state.people[3]["tags"]
+        assert [p["emails"][0]["email"] for p in state.people.values() if p["id"] > 4] == ["jane@exemple.com"]
+
+        report_data = mock_report.call_args[0][0]
+        assert (report_data["copper_to_mc"], report_data["mc_to_copper"]) == (1, 1)
+        assert report_data["identical_contacts"] == 1
+        assert sync.load_sync_state()["last_success"] == int(load_plan(plan_file)["started_at"])
+
+
+class TestPlanOptions:
+    """Options --dry-run, --plan-out et --apply en ligne de commande"""
+
+    @patch('sync.load_environment')
+    @patch('sync.main')
+    def test_dry_run_option(self, mock_main, mock_load_environment):
+        try:
+            sync.run(["--dry-run", "--plan-out", "plan.json"])
+            mock_main.assert_called_once_with(dry_run=True, plan_file="plan.json")
+        finally:
+            sync.load_settings()
+
+    @pytest.mark.parametrize("argv", [["--dry-run"], ["--plan-out", "plan.json"], ["--apply", "plan.json"]])
+    @patch('sync.load_environment')
+    @patch('sync.main')
+    def test_plan_options_reject_async_engine(self, mock_main, mock_load_environment, argv, capsys):
+        """Le moteur asynchrone n'établit pas de plan : erreur d'options plutôt que bascule silencieuse"""
+        try:
+            with pytest.raises(SystemExit):
+                sync.run(argv + ["--engine", "async"])
+            mock_main.assert_not_called()
+            assert "ne se combine pas avec --engine async" in capsys.readouterr().err
+        finally:
+            sync.load_settings()
+
+    @patch('sync.load_environment')
+    @patch('sync.apply_saved_plan')
+    @patch('sync.main')
+    def test_apply_option(self, mock_main, mock_apply, mock_load_environment, tmp_path):
+        path = tmp_path / "plan.json"
+        path.write_text(json.dumps(empty_plan(shard=None, mode="test", scope=[], scope_exclude=[])))
+        try:
+            sync.run(["--apply", str(path)])
+            mock_apply.assert_called_once()
+            mock_main.assert_not_called()
+
+            # Plan établi en mode test : refusé en production
+            with pytest.raises(SystemExit) as exc:
+                sync.run(["--apply", str(path), "--mode", "production"])
+            assert exc.value.code == 2
+            with pytest.raises(SystemExit):
+                sync.run(["--apply", str(path), "--dry-run"])
+            assert mock_apply.call_count == 1
+        finally:
+            sync.load_settings()
@@ -0,0 +1,140 @@
+"""
+Tests du chronométrage des étapes et du profilage (--profile)
+"""
+import pytest
+import sys
+import os
+import pstats
+import tracemalloc
+from unittest.mock import patch
+
+# Ajouter le répertoire parent au path pour importer sync.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sync
+from synchro import async_engine
+from synchro.profiling import PhaseTimer, RunProfiler, format_phase_table
+from synchro.retention import latest
+from tests.test_engines import ENGINES, add_person, add_member
+
+
+class TestPhaseTimer:
+    """Durées et pics mémoire par étape"""
+
+    def test_durations_ordered_and_accumulated(self):
+        seen = []
+        timer = PhaseTimer(on_phase=lambda name, seconds: seen.append(name))
+        with timer.phase("report"):
+            pass
+        with timer.phase("copper_fetch"):
+            pass
+        with timer.phase("copper_fetch"):
+            pass
+        assert list(timer.summary()) == ["copper_fetch", "report"]
+        assert seen == ["report", "copper_fetch", "copper_fetch"]
+        assert timer.peaks == {}
+
+    def test_phase_recorded_on_error(self):
+        timer = PhaseTimer()
+        with pytest.raises(RuntimeError):
+            with timer.phase("index"):
+                raise RuntimeError("échec")
+        assert "index" in timer.durations
+
+    def test_peak_memory_per_phase(self):
+        timer = PhaseTimer()
+        tracemalloc.start()
+        try:
+            with timer.phase("index"):
+                big = [0] * 500000
+                del big
+            with timer.phase("classify"):
+                pass
+        finally:
+            tracemalloc.stop()
+        assert timer.peaks["index"] > 3 * 1024 * 1024
+        assert timer.peaks["classify"] < timer.peaks["index"]
+
+    def test_phase_table(self):
+        table = format_phase_table({"report": 1.0, "copper_fetch": 3.0}, {"copper_fetch": 2 * 1024 * 1024})
+        lines = table.splitlines()
+        assert lines[1].startswith("Récupération Copper") and "75.0%" in lines[1] and lines[1].endswith("2.0")
+        assert lines[2].startswith("Rapport") and lines[2].endswith("-")
+        assert lines[3].startswith("Total") and "4.000" in lines[3]
+
+
+class TestRunProfiler:
+    """Profil brut et tableau des étapes"""
+
+    def test_write_profile(self, tmp_path):
+        timer = PhaseTimer()
+        profiler = RunProfiler().start()
+        with timer.phase("classify"):
+            sorted(str(i) for i in range(10000))
+        profile_path, table_path = profiler.write(str(tmp_path / "profile_run"), timer)
+
+        assert not tracemalloc.is_tracing()
+        assert pstats.Stats(profile_path).total_calls > 0
+        text = open(table_path, encoding="utf-8").read()
+        assert "Classification et plan" in text
+        assert "Pic mémoire de l'exécution" in text
+        assert "FONCTIONS LES PLUS COÛTEUSES" in text
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+class TestRunPhases:
+    """Étapes d'une exécution complète des deux moteurs"""
+
+    def test_phases_in_report_data(self, engine, mock_api_server, reset_operation_details):
+        add_person(mock_api_server, 1, "john@exemple.com", "John", "Doe", ["VIP"])
+        add_member(mock_api_server, "jane@exemple.com", "Jane", "Smith")
+
+        with patch('sync.TEST_MODE', True), patch('sync.write_import_report') as mock_report:
+            if engine == "sync":
+                sync.main()
+            else:
+                async_engine.main()
+
+        phases = mock_report.call_args[0][0]['phases']
+        assert list(phases) == ["copper_fetch", "mailchimp_fetch", "index", "classify",
+                                "copper_to_mailchimp", "mailchimp_to_copper", "marked"]
+        assert sync.METRICS.get("sync_phase_duration_seconds", phase="copper_fetch") > 0
+
+
+class TestReportPhases:
+    """Durées des étapes dans le rapport texte"""
+
+    def test_report_lists_phases(self, reset_operation_details):
+        report_data = {'operations': sync.operation_details, 'copper_to_mc': 0, 'mc_to_copper': 0,
+                       'excluded': 0, 'marked_for_deletion': 0, 'marked_contacts': [],
+                       'phases': {"copper_fetch": 1.25, "index": 0.5}}
+        report_file = sync.report_file
+        sync.write_import_report(report_data)
+        content = "".join(call.args[0] for call in report_file.write.call_args_list)
+        assert "DURÉE DES ÉTAPES:" in content
+        assert "• Récupération Copper: 1.25s" in content
+        assert "• Construction des index: 0.50s" in content
+
+
+class TestProfileOption:
+    """--profile écrit le profil avec les fichiers de l'exécution"""
+
+    @patch('sync.load_environment')
+    def test_profile_written_and_indexed(self, mock_load_environment, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+
+        def fake_main():
+            sync.open_log_file("2024-01-01_00-00-00")
+            with sync.phase("copper_fetch"):
+                sum(range(10000))
+            sync.finish_run_files()
+
+        with patch('sync.main', side_effect=fake_main), patch('sync.log_file', None):
+            sync.run(["--profile"])
+
+        assert sync.profiler is None
+        assert not tracemalloc.is_tracing()
+        table = latest("runs", "profile")
+        assert table.endswith("profile_2024-01-01_00-00-00.txt")
+        assert "Récupération Copper" in open(table, encoding="utf-8").read()
+        assert os.path.exists(os.path.join("runs", "profile_2024-01-01_00-00-00.prof"))
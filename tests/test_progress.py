@@ -0,0 +1,138 @@
+"""
+Tests de l'avancement des écritures (barre, lignes périodiques, appels en cours)
+"""
+import pytest
+import sys
+import os
+import io
+from unittest.mock import MagicMock, patch
+
+# Ajouter le répertoire parent au path pour importer sync.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sync
+from synchro import async_engine
+from synchro.progress import NO_PROGRESS, InFlight, ProgressReporter, format_duration
+from tests.test_engines import ENGINES, add_person, add_member
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProgressReporter:
+    """Rendu de l'avancement"""
+
+    @pytest.mark.parametrize("seconds,expected", [(42.4, "42 s"), (306, "5 min 06 s"), (3900, "1 h 05 min")])
+    def test_format_duration(self, seconds, expected):
+        assert format_duration(seconds) == expected
+
+    def test_lines_emitted_at_interval(self):
+        clock, lines, in_flight = FakeClock(), [], InFlight()
+        reporter = ProgressReporter("Copper → Mailchimp", 100, "lines", emit=lines.append, interval=30,
+                                    in_flight=in_flight, clock=clock)
+        clock.now += 10
+        reporter.advance(10)
+        assert lines == []
+
+        clock.now += 15
+        with in_flight:
+            reporter.advance(15)
+        assert lines == []
+        with in_flight, in_flight:
+            clock.now += 5
+            reporter.advance(5)
+        assert lines == ["⏳ Copper → Mailchimp: 30/100 (30.0%), 1.0 contacts/s, 2 appel(s) en cours, "
+                         "fin dans ~1 min 10 s"]
+
+        clock.now += 10
+        reporter.advance(70)
+        reporter.finish()
+        assert len(lines) == 2
+        assert lines[1] == "⏳ Copper → Mailchimp: 100/100 traité(s) en 40 s"
+
+    def test_bar_redrawn_in_place(self):
+        clock, stream = FakeClock(), io.StringIO()
+        reporter = ProgressReporter("Écritures", 0, "bar", stream=stream, clock=clock)
+        reporter.add(4)
+        clock.now += 1
+        reporter.advance()
+        assert stream.getvalue().startswith("\r[██████░░░░░░░░░░░░░░░░░░] Écritures: 1/4 (25.0%), 1.0 contacts/s")
+        assert "fin dans ~3 s" in stream.getvalue()
+
+        reporter.clear()
+        assert stream.getvalue().endswith("\r\033[K")
+        clock.now += 1
+        reporter.advance(3)
+        reporter.finish()
+        assert stream.getvalue().endswith("Écritures: 4/4 (100.0%), 2.0 contacts/s\033[K\n")
+
+    def test_nothing_processed_nothing_written(self):
+        lines = []
+        ProgressReporter("Copper → Mailchimp", 10, "lines", emit=lines.append).finish()
+        assert lines == []
+
+
+class TestProgressInSync:
+    """Avancement branché sur le journal et les requêtes"""
+
+    def test_log_line_keeps_bar_below(self, capsys):
+        stream = io.StringIO()
+        reporter = ProgressReporter("Écritures", 2, "bar", stream=stream, clock=lambda: 0)
+        reporter.line = "[barre]"
+        with patch('sync.active_progress', reporter), patch('sync.LOG_CONSOLE', 'full'):
+            sync.log("Synchronisé: a@exemple.com", "SUCCESS")
+        assert stream.getvalue() == "\r\033[K\r[barre]\033[K"
+        assert "Synchronisé: a@exemple.com" in capsys.readouterr().out
+
+    def test_progress_off(self):
+        with patch('sync.PROGRESS', 'off'):
+            with sync.progress("Copper → Mailchimp", 10) as reporter:
+                assert reporter is NO_PROGRESS
+
+    def test_lines_visible_on_summary_console(self, capsys):
+        with patch('sync.LOG_CONSOLE', 'summary'):
+            sync.log_progress("⏳ Copper → Mailchimp: 5/10 (50.0%)")
+        assert "5/10" in capsys.readouterr().out
+        sync.log_file.flush.assert_called()
+
+    def test_calls_in_flight_counted(self):
+        seen = []
+        ok = MagicMock(status_code=200, content=b"")
+
+        def call(*args, **kwargs):
+            seen.append(sync.requests_in_flight.count)
+            return ok
+
+        sync.safe_request(MagicMock(side_effect=call, __name__="get"), f"{sync.COPPER_API_URL}/people/1")
+        assert seen == [1]
+        assert sync.requests_in_flight.count == 0
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+class TestRunProgress:
+    """Avancement d'une exécution complète des deux moteurs"""
+
+    def test_final_progress_line(self, engine, mock_api_server, reset_operation_details):
+        add_person(mock_api_server, 1, "john@exemple.com", "John", "Doe", ["VIP"])
+        add_person(mock_api_server, 2, "jack@exemple.com", "Jack", "Doe")
+        add_member(mock_api_server, "jane@exemple.com", "Jane", "Smith")
+
+        with patch('sync.TEST_MODE', True), patch('sync.PROGRESS', 'lines'), \
+             patch('sync.write_import_report'), patch('sync.log') as log:
+            if engine == "sync":
+                sync.main()
+            else:
+                async_engine.main()
+
+        messages = [call.args[0] for call in log.call_args_list if call.args[0].startswith("⏳")]
+        if engine == "sync":
+            assert messages[0].startswith("⏳ Copper → Mailchimp: 2/2 traité(s) en ")
+            assert messages[1].startswith("⏳ Mailchimp → Copper: 1/1 traité(s) en ")
+        else:
+            assert messages[0].startswith("⏳ Copper ↔ Mailchimp: 3/3 traité(s) en ")
+        assert sync.requests_in_flight.count == 0
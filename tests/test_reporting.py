@@ -6,19 +6,27 @@ import sys
 import os
 from unittest.mock import patch, MagicMock, mock_open, call
 import json
+import csv
 from datetime import datetime
 import io
+import threading
 
 # Ajouter le répertoire parent au path pour importer sync.py
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import sync
 from sync import (
     log,
     write_import_report,
     handle_marked_contacts,
+    parse_marked_policy,
+    decide_marked_actions,
+    load_marked_queue,
     Colors,
     operation_details
 )
+from synchro.runlog import LogBuffer
+from synchro.report import OPERATION_FIELDS, REPORT_SCHEMA_VERSION, OperationRecorder, ReportWriter
 
 
 class TestLogging:
@@ -26,12 +34,16 @@ class TestLogging:
     
     @patch('builtins.print')
     @patch('sync.log_file')
+    @patch('sync._log_buffer', LogBuffer(flush_interval=60, clock=lambda: 0))
     def test_log_info_message(self, mock_log_file, mock_print):
         """Test d'un message de log INFO"""
         mock_log_file.write = MagicMock()
         mock_log_file.flush = MagicMock()
         
         log("Test message", "INFO")
+        # Fichier écrit par blocs : rien avant le vidage du tampon
+        mock_log_file.write.assert_not_called()
+        sync.flush_log()
         
         # Vérifier que print a été appelé
         mock_print.assert_called_once()
@@ -100,6 +112,79 @@ class TestLogging:
         assert Colors.YELLOW in console_message
         assert "⚠️" in console_message
 
+    
+    @patch('builtins.print')
+    @patch('sync.log_file')
+    @patch('sync._log_buffer', LogBuffer(flush_interval=60, clock=lambda: 0))
+    def test_log_buffered_until_warning(self, mock_log_file, mock_print):
+        """Les lignes INFO attendent dans le tampon, un avertissement vide tout le tampon"""
+        for i in range(3):
+            log(f"Ligne {i}", "INFO")
+        mock_log_file.write.assert_not_called()
+        
+        log("Attention", "WARNING")
+        mock_log_file.write.assert_called_once()
+        written = mock_log_file.write.call_args[0][0]
+        assert written.count("\n") == 4
+        assert written.index("Ligne 2") < written.index("Attention")
+    
+    @patch('builtins.print')
+    @patch('sync.log_file')
+    @patch('sync._log_buffer', LogBuffer(flush_interval=60, clock=lambda: 0))
+    @patch('sync.LOG_LEVEL', "WARNING")
+    def test_log_level_filters(self, mock_log_file, mock_print):
+        log("Détail", "INFO")
+        log("Étape", "SUCCESS")
+        sync.flush_log()
+        mock_print.assert_not_called()
+        mock_log_file.write.assert_not_called()
+    
+    @patch('builtins.print')
+    @patch('sync.log_file')
+    @patch('sync._log_buffer', LogBuffer(flush_interval=60, clock=lambda: 0))
+    @patch('sync.LOG_FORMAT', "json")
+    def test_log_json_lines(self, mock_log_file, mock_print):
+        log("✅ Synchronisé: a@exemple.com", "SUCCESS", email="a@exemple.com")
+        log("Étape", "INFO")
+        sync.flush_log()
+        
+        lines = mock_log_file.write.call_args[0][0].splitlines()
+        records = [json.loads(line) for line in lines]
+        assert [(r["level"], r.get("email")) for r in records] == [("SUCCESS", "a@exemple.com"), ("INFO", None)]
+        assert records[0]["message"] == "✅ Synchronisé: a@exemple.com"
+        assert "T" in records[0]["time"]
+    
+    @patch('builtins.print')
+    @patch('sync.TEST_MODE', False)
+    @patch('sync.MARKED_POLICY', "defer")
+    @patch('sync.LOG_CONSOLE', "auto")
+    def test_production_console_shows_summary(self, mock_print):
+        """En production, la console ne montre que les étapes, avertissements et erreurs ; le fichier a tout"""
+        log("Page 1 récupérée", "INFO")
+        log("✅ Synchronisé: a@exemple.com", "SUCCESS", email="a@exemple.com")
+        log("✅ 10 contacts récupérés", "SUCCESS")
+        log("❌ Erreur sync b@exemple.com", "ERROR", email="b@exemple.com")
+        
+        printed = [c[0][0] for c in mock_print.call_args_list]
+        assert len(printed) == 2
+        assert "10 contacts récupérés" in printed[0] and "b@exemple.com" in printed[1]
+        
+        with patch('sync.MARKED_POLICY', "interactive"):
+            log("Page 2 récupérée", "INFO")
+        assert mock_print.call_count == 3
+
+    
+    def test_log_buffer_flush_interval(self):
+        """Le tampon est vidé après flush_interval secondes, même sans atteindre sa taille"""
+        now = [0.0]
+        buffer = LogBuffer(buffer_size=1000, flush_interval=1.0, clock=lambda: now[0])
+        assert buffer.add("a") is False
+        now[0] = 1.5
+        assert buffer.add("b") is True
+        assert buffer.drain() == "a\nb\n"
+        assert buffer.add("c") is False
+        assert buffer.add("x" * 1000) is True
+
 
 class TestReporting:
     """Tests pour le système de rapport"""
@@ -264,8 +349,9 @@ class TestReporting:
         assert "Aucune synchronisation nécessaire" in report_content
 
 
+@patch('sync.MARKED_POLICY', 'interactive')
 class TestContactHandling:
-    """Tests pour la gestion des contacts marqués"""
+    """Tests pour la gestion des contacts marqués (mode interactif)"""
     
     @patch('builtins.input', side_effect=['i'])
     @patch('sync.log')
@@ -397,6 +483,300 @@ class TestContactHandling:
         mock_log.assert_called_with("✅ Aucun contact marqué pour suppression", "SUCCESS")
 
 
+class TestMarkedPolicy:
+    """Tests de la politique déclarative des contacts marqués"""
+    
+    def contacts(self, count=3):
+        return [
+            {'email': f'test{i}@exemple.com', 'name': f'Test {i}', 'copper_id': i, 'detected_tag': '🗑 À SUPPRIMER'}
+            for i in range(1, count + 1)
+        ]
+    
+    def test_parse_marked_policy(self):
+        """Analyse des règles action:âge"""
+        assert parse_marked_policy("delete:90, archive:7,defer") == [("delete", 90.0), ("archive", 7.0), ("defer", 0.0)]
+        assert parse_marked_policy("archive") == [("archive", 0.0)]
+    
+    def test_parse_marked_policy_invalid(self):
+        """Une action inconnue ou une politique vide est refusée"""
+        with pytest.raises(ValueError):
+            parse_marked_policy("purge:3")
+        with pytest.raises(ValueError):
+            parse_marked_policy(" , ")
+    
+    def test_decide_marked_actions_by_age(self):
+        """La première règle dont l'âge minimal est atteint s'applique"""
+        now = 1000 * 86400
+        queue = {
+            "1": {"first_seen": now - 100 * 86400},
+            "2": {"first_seen": now - 10 * 86400}
+        }
+        contacts = self.contacts()
+        
+        decisions = decide_marked_actions(contacts, parse_marked_policy("delete:90,archive:7"), queue, now=now)
+        
+        assert [c['copper_id'] for c in decisions['delete']] == [1]
+        assert [c['copper_id'] for c in decisions['archive']] == [2]
+        # Nouveau contact (âge 0) : aucune règle atteinte, il reste en attente
+        assert [c['copper_id'] for c in decisions['defer']] == [3]
+        assert contacts[2]['first_seen'] == now
+    
+    @patch('sync.archive_contacts_bulk')
+    @patch('sync.delete_contacts_bulk')
+    @patch('builtins.input')
+    @patch('sync.log')
+    def test_defer_policy_runs_unattended(self, mock_log, mock_input, mock_delete, mock_archive):
+        """La politique par défaut ne demande rien et met les contacts en file"""
+        with patch('sync.MARKED_POLICY', 'defer'):
+            handle_marked_contacts(self.contacts())
+        
+        mock_input.assert_not_called()
+        mock_archive.assert_not_called()
+        mock_delete.assert_not_called()
+        assert sorted(load_marked_queue()) == ["1", "2", "3"]
+    
+    @patch('sync.archive_contacts_bulk', return_value={"1", "2", "3"})
+    @patch('sync.log')
+    def test_archive_policy_bulk(self, mock_log, mock_archive):
+        """La politique archive exécute un seul appel en masse et vide la file"""
+        contacts = self.contacts()
+        
+        handle_marked_contacts(contacts, policy="archive")
+        
+        mock_archive.assert_called_once_with(contacts)
+        assert load_marked_queue() == {}
+        assert all(c['action'] == "archive" for c in contacts)
+    
+    @patch('sync.log')
+    def test_failed_actions_stay_queued(self, mock_log):
+        """Une action en échec garde le contact en file avec sa date de première détection"""
+        sync.save_marked_queue({"2": {"email": "test2@exemple.com", "name": "Test 2",
+                                      "detected_tag": "🗑 À SUPPRIMER", "first_seen": 1000.0}})
+
+        handle_marked_contacts(self.contacts(), policy="archive", archive_func=lambda c: c['copper_id'] != 2)
+
+        assert list(load_marked_queue()) == ["2"]
+        assert load_marked_queue()["2"]["first_seen"] == 1000.0
+
+    @patch('sync.unsubscribe_mailchimp_bulk', return_value={"test2@exemple.com"})
+    @patch('sync.run_copper_writes', return_value={"1", "2", "3"})
+    @patch('sync.ARCHIVE_CONCURRENCY_CHECK', False)
+    @patch('sync.log')
+    def test_bulk_failures_recorded(self, mock_log, mock_writes, mock_unsubscribe, reset_operation_details):
+        """Les échecs d'une action en masse restent en file et apparaissent en erreur dans le rapport"""
+        handle_marked_contacts(self.contacts(), policy="archive")
+
+        assert list(load_marked_queue()) == ["2"]
+        failed = [op for op in sync.operation_details if not op['success']]
+        assert [(op['email'], op['direction']) for op in failed] == [("test2@exemple.com", "Archivage (contact marqué)")]
+        assert failed[0]['error'] == "désabonnement Mailchimp en échec"
+        assert sync.count_errors(sync.operation_details) == 1
+
+    @patch('sync.log')
+    def test_ignore_policy_not_queued(self, mock_log):
+        """Les contacts ignorés ne sont pas conservés en file"""
+        handle_marked_contacts(self.contacts(), policy="ignore")
+        
+        assert load_marked_queue() == {}
+    
+    @patch('builtins.input', side_effect=EOFError)
+    @patch('sync.archive_contact')
+    @patch('sync.log')
+    def test_interactive_without_stdin_falls_back_to_defer(self, mock_log, mock_archive, mock_input):
+        """Sans terminal (cron), le mode interactif ne plante pas et met les contacts en file"""
+        handle_marked_contacts(self.contacts(), policy="interactive")
+        
+        mock_archive.assert_not_called()
+        assert sorted(load_marked_queue()) == ["1", "2", "3"]
+    
+    @patch('sync.report_file')
+    @patch('sync.TEST_MODE', True)
+    def test_report_shows_policy_action(self, mock_report_file):
+        """Le rapport indique l'action appliquée à chaque contact marqué"""
+        report_data = {
+            'operations': [],
+            'copper_to_mc': 0,
+            'mc_to_copper': 0,
+            'identical_contacts': 0,
+            'excluded': 1,
+            'marked_for_deletion': 1,
+            'marked_contacts': [
+                {'email': 'marked@exemple.com', 'name': 'Marked', 'detected_tag': '🗑 À SUPPRIMER', 'action': 'defer'}
+            ]
+        }
+        
+        write_import_report(report_data)
+        
+        report_content = mock_report_file.write.call_args[0][0]
+        assert "Action (politique): en attente" in report_content
+
+
+def report_operation(i, success=True):
+    return {'email': f'user{i}@exemple.com', 'name': f'User {i}', 'direction': 'Copper → Mailchimp',
+            'success': success, 'error': None if success else 'API Error 500', 'tags': ['VIP']}
+
+
+class TestStreamingReport:
+    """Compteurs des opérations et écriture du rapport par blocs"""
+    
+    def test_recorder_keeps_error_count(self):
+        operations = OperationRecorder([report_operation(1), report_operation(2, success=False)])
+        assert (operations.successes, operations.errors) == (1, 1)
+        
+        operations.append(report_operation(3, success=False))
+        operations.extend([report_operation(4), report_operation(5)])
+        assert (len(operations), operations.successes, operations.errors) == (5, 3, 2)
+        
+        operations.clear()
+        assert (len(operations), operations.successes, operations.errors) == (0, 0, 0)
+    
+    def test_recorder_spills_to_disk(self, tmp_path):
+        """Au-delà du plafond, les plus anciennes opérations passent sur disque, dans l'ordre"""
+        operations = OperationRecorder(memory_limit=10, spill_dir=str(tmp_path))
+        operations.extend(report_operation(i, success=i % 4 != 0) for i in range(35))
+        
+        assert len(operations.memory) <= 10
+        assert operations.spilled == 35 - len(operations.memory)
+        assert (len(operations), operations.errors) == (35, 9)
+        assert [op['email'] for op in operations] == [f"user{i}@exemple.com" for i in range(35)]
+        assert dict(operations[3]) == {'email': 'user3@exemple.com', 'name': 'User 3', 'direction': 'Copper → Mailchimp',
+                                       'success': True, 'error': None, 'tags': ['VIP']}
+        assert (operations[0]['error'], operations[-1]['email']) == ('API Error 500', 'user34@exemple.com')
+        # Journal temporaire anonyme : rien ne reste dans le répertoire
+        assert list(tmp_path.iterdir()) == []
+        
+        operations.clear()
+        assert (len(operations), operations.spilled, list(operations)) == (0, 0, [])
+    
+    def test_buffered_groups_parallel_operations(self):
+        """Chaque fil remplit son tampon ; les tampons sont versés dans l'ordre choisi"""
+        operations = OperationRecorder()
+        buffers = {}
+        
+        def record(name):
+            with operations.buffered() as buffer:
+                for i in range(50):
+                    operations.append(dict(report_operation(i), direction=name))
+            buffers[name] = buffer
+        
+        threads = [threading.Thread(target=record, args=(name,)) for name in ("A", "B")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(operations) == 0
+        for name in ("B", "A"):
+            operations.extend(buffers[name])
+        assert [op['direction'] for op in operations] == ["B"] * 50 + ["A"] * 50
+    
+    def test_global_operations_are_counted(self, reset_operation_details):
+        sync.add_operation_detail("a@exemple.com", "A", "Copper → Mailchimp")
+        sync.add_operation_detail("b@exemple.com", "B", "Copper → Mailchimp", success=False, error="500")
+        assert sync.operation_details.errors == 1
+    
+    def test_writer_flushes_in_bounded_blocks(self):
+        file = io.StringIO()
+        writer = ReportWriter(file, buffer_size=100)
+        file.write = MagicMock(side_effect=file.write)
+        for i in range(50):
+            writer.write(f"ligne {i:03d}\n")
+        writer.flush()
+        
+        blocks = [c[0][0] for c in file.write.call_args_list]
+        assert "".join(blocks) == "".join(f"ligne {i:03d}\n" for i in range(50))
+        assert len(blocks) == 5
+        assert all(len(block) <= 100 + len("ligne 000\n") for block in blocks)
+    
+    @patch('sync.TEST_MODE', True)
+    def test_large_report_is_streamed(self, tmp_path):
+        """10k opérations : écritures par blocs, contenu et statistiques identiques"""
+        operations = OperationRecorder(report_operation(i, success=i % 10 != 0) for i in range(10000))
+        report_data = {
+            'operations': operations, 'copper_to_mc': 10000, 'mc_to_copper': 0, 'identical_contacts': 0,
+            'excluded': 0, 'marked_for_deletion': 0, 'marked_contacts': []
+        }
+        path = tmp_path / "rapport.txt"
+        report_file = open(path, "w", encoding="utf-8")
+        write_calls = []
+        original_write = report_file.write
+        
+        def counting_write(text):
+            write_calls.append(len(text))
+            return original_write(text)
+        
+        report_file.write = counting_write
+        with patch('sync.report_file', report_file), patch('sync.report_filename', str(path)):
+            assert write_import_report(report_data) == str(path)
+        
+        content = path.read_text(encoding="utf-8")
+        assert len(write_calls) > 10
+        assert max(write_calls) < 70000
+        assert "✅ Succès: 9000" in content
+        assert "❌ Erreurs: 1000" in content
+        assert "  10000. ✅ SUCCÈS | user9999@exemple.com" in content
+        assert content.count("Erreur: API Error 500") == 1000
+        assert content.endswith("=" * 80 + "\n")
+
+
+class TestStructuredSinks:
+    """Sorties structurées (--report-formats jsonl,json,csv) à côté du rapport texte"""
+    
+    def write_report(self, tmp_path, formats, **report_fields):
+        report_data = {
+            'operations': OperationRecorder([report_operation(1), report_operation(2, success=False)]),
+            'copper_to_mc': 2, 'mc_to_copper': 0, 'identical_contacts': 3, 'excluded': 1,
+            'marked_for_deletion': 1,
+            'marked_contacts': [{'email': 'marked@exemple.com', 'name': 'Marked', 'detected_tag': '🗑 À SUPPRIMER',
+                                 'action': 'defer'}]
+        }
+        report_data.update(report_fields)
+        path = tmp_path / "import_report_2025-01-01_00-00-00.txt"
+        with patch('sync.report_file', open(path, "w", encoding="utf-8")), patch('sync.report_filename', str(path)), \
+             patch('sync.log_filename', "sync_log.txt"), patch('sync.REPORT_FORMATS', formats), \
+             patch('sync.TEST_MODE', True):
+            write_import_report(report_data)
+        return tmp_path / "import_report_2025-01-01_00-00-00"
+    
+    def test_text_only_by_default(self, tmp_path):
+        self.write_report(tmp_path, ())
+        assert [p.name for p in tmp_path.iterdir()] == ["import_report_2025-01-01_00-00-00.txt"]
+    
+    def test_jsonl_operations(self, tmp_path):
+        base = self.write_report(tmp_path, ("jsonl",))
+        lines = [json.loads(line) for line in open(f"{base}.jsonl", encoding="utf-8")]
+        assert [tuple(record) for record in lines] == [OPERATION_FIELDS] * 2
+        assert lines[0] == {"seq": 1, "email": "user1@exemple.com", "name": "User 1",
+                            "direction": "Copper → Mailchimp", "success": True, "error": None, "tags": ["VIP"]}
+        assert (lines[1]["success"], lines[1]["error"]) == (False, "API Error 500")
+    
+    def test_csv_operations(self, tmp_path):
+        base = self.write_report(tmp_path, ("csv",))
+        with open(f"{base}.csv", encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == list(OPERATION_FIELDS)
+        assert rows[1] == ["1", "user1@exemple.com", "User 1", "Copper → Mailchimp", "true", "", "VIP"]
+        assert rows[2][4:6] == ["false", "API Error 500"]
+    
+    def test_run_summary(self, tmp_path):
+        base = self.write_report(tmp_path, ("jsonl", "json"))
+        with open(f"{base}.summary.json", encoding="utf-8") as f:
+            summary = json.load(f)
+        assert summary["schema_version"] == REPORT_SCHEMA_VERSION
+        assert (summary["mode"], summary["shard"]) == ("test", None)
+        assert (summary["operations"], summary["successes"], summary["errors"]) == (2, 1, 1)
+        assert summary["success_rate"] == 50.0
+        assert (summary["identical_contacts"], summary["excluded"]) == (3, 1)
+        assert summary["marked_contacts"][0]["action"] == "defer"
+        assert summary["files"] == {"log": "sync_log.txt", "report": f"{base}.txt", "operations": [f"{base}.jsonl"]}
+    
+    def test_merged_summary_lists_shards(self, tmp_path):
+        base = self.write_report(tmp_path, ("json",), shards=["1/2"], missing_shards=["2/2"])
+        with open(f"{base}.summary.json", encoding="utf-8") as f:
+            summary = json.load(f)
+        assert (summary["shards"], summary["missing_shards"]) == (["1/2"], ["2/2"])
+
+
 class TestStatisticsAndReporting:
     """Tests pour les statistiques et rapports"""
     
@@ -0,0 +1,181 @@
+"""
+Tests de la rétention des logs et rapports (répertoire runs/, index, rotation, compression)
+"""
+import gzip
+import json
+import os
+import sys
+import time
+from unittest.mock import patch
+
+# Ajouter le répertoire parent au path pour importer sync.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sync
+from synchro.retention import (INDEX_FILE, RetentionPolicy, apply_policy, latest, load_index, main,
+                               record_run, rotate_file, run_entry)
+
+DAY = 86400
+
+
+def write_run(output_dir, run_id, size=100, finished_at=None, extra=()):
+    """Crée les fichiers d'une exécution (log, rapport et sorties structurées éventuelles)"""
+    os.makedirs(output_dir, exist_ok=True)
+    names = [f"sync_log_{run_id}.txt", f"import_report_{run_id}.txt"] + [f"import_report_{run_id}{e}" for e in extra]
+    for name in names:
+        with open(os.path.join(output_dir, name), "w", encoding="utf-8") as f:
+            f.write("x" * size)
+    return run_entry(output_dir, run_id, names, finished_at)
+
+
+class TestRetentionPolicy:
+    """Âge, nombre, taille et compression"""
+
+    def test_age_removes_old_runs_but_keeps_latest(self, tmp_path):
+        now = time.time()
+        runs = [write_run(tmp_path, f"2024-01-0{i}_00-00-00", finished_at=now - (10 - i) * DAY) for i in range(1, 4)]
+        kept, removed = apply_policy(tmp_path, runs, RetentionPolicy(max_age_days=8, keep_plain=0), now)
+        assert [e["id"] for e in kept] == ["2024-01-02_00-00-00", "2024-01-03_00-00-00"]
+        assert [e["id"] for e in removed] == ["2024-01-01_00-00-00"]
+        assert not os.path.exists(tmp_path / "sync_log_2024-01-01_00-00-00.txt")
+
+        # Même trop ancienne, la dernière exécution reste
+        kept, _ = apply_policy(tmp_path, kept, RetentionPolicy(max_age_days=1, keep_plain=0), now)
+        assert [e["id"] for e in kept] == ["2024-01-03_00-00-00"]
+
+    def test_max_runs(self, tmp_path):
+        runs = [write_run(tmp_path, f"run{i}", finished_at=i) for i in range(5)]
+        kept, removed = apply_policy(tmp_path, runs, RetentionPolicy(max_age_days=0, max_runs=2, keep_plain=0))
+        assert [e["id"] for e in kept] == ["run3", "run4"]
+        assert len(removed) == 3
+        assert sorted(os.listdir(tmp_path)) == sorted(kept[0]["files"] + kept[1]["files"])
+
+    def test_compression_beyond_keep_plain(self, tmp_path):
+        runs = [write_run(tmp_path, f"run{i}", size=10000, finished_at=i, extra=(".jsonl",)) for i in range(3)]
+        kept, removed = apply_policy(tmp_path, runs, RetentionPolicy(max_age_days=0, keep_plain=1))
+        assert not removed
+        assert kept[0]["compressed"] and kept[1]["compressed"] and not kept[2]["compressed"]
+        assert "sync_log_run0.txt.gz" in kept[0]["files"]
+        assert kept[0]["bytes"] < 1000
+        with gzip.open(tmp_path / "import_report_run0.jsonl.gz", "rt", encoding="utf-8") as f:
+            assert f.read() == "x" * 10000
+        assert not os.path.exists(tmp_path / "import_report_run0.jsonl")
+
+    def test_max_bytes_after_compression(self, tmp_path):
+        """La compression passe avant le contrôle de taille, puis les plus anciennes partent"""
+        runs = [write_run(tmp_path, f"run{i}", size=5000, finished_at=i) for i in range(4)]
+        kept, removed = apply_policy(tmp_path, runs, RetentionPolicy(max_age_days=0, max_bytes=10500, keep_plain=1))
+        assert [e["id"] for e in kept] == ["run0", "run1", "run2", "run3"]
+        assert not removed
+
+        plain = tmp_path / "plain"
+        runs = [write_run(plain, f"run{i}", size=5000, finished_at=i) for i in range(4)]
+        kept, removed = apply_policy(plain, runs, RetentionPolicy(max_age_days=0, max_bytes=20000, keep_plain=0))
+        assert [e["id"] for e in kept] == ["run2", "run3"]
+        assert [e["id"] for e in removed] == ["run0", "run1"]
+
+
+class TestRunIndex:
+    """Index des exécutions et recherche de la dernière"""
+
+    def test_record_run_and_latest(self, tmp_path):
+        write_run(tmp_path, "2024-01-01_00-00-00", extra=(".jsonl",))
+        write_run(tmp_path, "2024-01-02_00-00-00")
+        (tmp_path / "notes.txt").write_text("à garder")
+
+        assert record_run(tmp_path, "2024-01-01_00-00-00", RetentionPolicy()) == 0
+        assert record_run(tmp_path, "2024-01-02_00-00-00", RetentionPolicy()) == 0
+        index = json.loads((tmp_path / INDEX_FILE).read_text())
+        assert [e["id"] for e in index["runs"]] == ["2024-01-01_00-00-00", "2024-01-02_00-00-00"]
+        assert "import_report_2024-01-01_00-00-00.jsonl" in index["runs"][0]["files"]
+
+        assert latest(tmp_path, "log") == os.path.join(tmp_path, "sync_log_2024-01-02_00-00-00.txt")
+        assert latest(tmp_path, "report") == os.path.join(tmp_path, "import_report_2024-01-02_00-00-00.txt")
+
+        record_run(tmp_path, "2024-01-02_00-00-00", RetentionPolicy(max_runs=1))
+        assert not os.path.exists(tmp_path / "sync_log_2024-01-01_00-00-00.txt")
+        assert (tmp_path / "notes.txt").exists()
+
+    def test_shard_prefix_not_confused(self, tmp_path):
+        """Les fichiers d'un shard n'appartiennent pas à l'exécution non partitionnée de même date"""
+        write_run(tmp_path, "2024-01-01_00-00-00")
+        write_run(tmp_path, "2024-01-01_00-00-00_shard1of2")
+        record_run(tmp_path, "2024-01-01_00-00-00", RetentionPolicy())
+        assert len(load_index(tmp_path)[0]["files"]) == 2
+
+    def test_index_rebuilt_when_missing_or_corrupt(self, tmp_path):
+        write_run(tmp_path, "old")
+        os.utime(tmp_path / "sync_log_old.txt", (1, 1))
+        os.utime(tmp_path / "import_report_old.txt", (1, 1))
+        write_run(tmp_path, "new")
+        assert [e["id"] for e in load_index(tmp_path)] == ["old", "new"]
+
+        (tmp_path / INDEX_FILE).write_text("{pas du json")
+        assert latest(tmp_path, "log").endswith("sync_log_new.txt")
+        assert latest(tmp_path / "absent", "log") is None
+
+    def test_cli(self, tmp_path, capsys):
+        write_run(tmp_path, "run1", finished_at=1)
+        write_run(tmp_path, "run2", finished_at=2)
+        assert main(["--dir", str(tmp_path), "prune", "--max-age-days", "0", "--max-runs", "1"]) == 0
+        assert "1 exécution(s) supprimée(s)" in capsys.readouterr().out
+        assert main(["--dir", str(tmp_path), "latest", "--kind", "report"]) == 0
+        assert capsys.readouterr().out.strip().endswith("import_report_run2.txt")
+        assert main(["--dir", str(tmp_path / "vide"), "latest"]) == 1
+
+
+class TestRotateFile:
+    """Rotation du log cron"""
+
+    def test_rotate_keeps_compressed_generations(self, tmp_path):
+        path = str(tmp_path / "sync_cron.log")
+        for generation in range(4):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"génération {generation}\n" * 100)
+            assert rotate_file(path, max_bytes=100, keep=2)
+        assert os.path.getsize(path) == 0
+        assert sorted(os.listdir(tmp_path)) == ["sync_cron.log", "sync_cron.log.1.gz", "sync_cron.log.2.gz"]
+        with gzip.open(path + ".1.gz", "rt", encoding="utf-8") as f:
+            assert f.readline() == "génération 3\n"
+        with gzip.open(path + ".2.gz", "rt", encoding="utf-8") as f:
+            assert f.readline() == "génération 2\n"
+
+    def test_small_or_missing_file_untouched(self, tmp_path):
+        path = tmp_path / "sync_cron.log"
+        assert not rotate_file(str(path), max_bytes=100)
+        path.write_text("court")
+        assert not rotate_file(str(path), max_bytes=100)
+        assert path.read_text() == "court"
+
+
+class TestRunFiles:
+    """Fichiers d'une exécution de sync.py dans OUTPUT_DIR, inscrits à la fin"""
+
+    def test_finish_run_files_records_run(self):
+        with patch('sync.log_file', None), patch('sync.report_file', None):
+            sync.open_log_file("2024-01-01_00-00-00")
+            sync.open_report_file("2024-01-01_00-00-00")
+            sync.report_file.close()
+            assert os.path.dirname(sync.log_filename) == sync.OUTPUT_DIR
+            sync.finish_run_files()
+        assert sync.run_id is None
+        assert latest(sync.OUTPUT_DIR, "log").endswith("sync_log_2024-01-01_00-00-00.txt")
+
+    def test_unwritten_report_discarded(self):
+        """Exécution arrêtée avant le rapport (rien à synchroniser, erreur) : rapport vide supprimé, non indexé"""
+        with patch('sync.log_file', None), patch('sync.report_file', None):
+            sync.open_run_files()
+            report_filename = sync.report_filename
+            sync.finish_run_files()
+            assert sync.report_file is None
+        assert not os.path.exists(report_filename)
+        assert latest(sync.OUTPUT_DIR, "report") is None
+        assert latest(sync.OUTPUT_DIR, "log") is not None
+
+    def test_index_error_only_warns(self):
+        with patch('sync.log_file', None), patch('sync.report_file', None), \
+             patch('sync.record_run', side_effect=OSError("disque plein")), \
+             patch('sync.log') as log:
+            sync.open_log_file("2024-01-01_00-00-00")
+            sync.finish_run_files()
+        assert "disque plein" in log.call_args[0][0]
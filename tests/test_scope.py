@@ -0,0 +1,141 @@
+"""
+Tests du périmètre (motifs autorisés / refusés, listes d'exclusion)
+"""
+import pytest
+import sys
+import os
+import time
+from unittest.mock import patch
+
+# Ajouter le répertoire parent au path pour importer sync.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sync
+from synchro.scope import PatternSet, ScopeMatcher, parse_pattern, read_exclusion_file
+from tests.test_engines import ENGINES, add_person, call_engine
+
+
+class TestPatterns:
+    """Syntaxe et correspondance des motifs"""
+
+    def test_parse_pattern(self):
+        assert parse_pattern("domain:exemple.com") == ("domain", "exemple.com")
+        assert parse_pattern(" Regex:^a:b ") == ("regex", "^a:b")
+        assert parse_pattern("@exemple") == ("contains", "@exemple")
+        assert parse_pattern("a@exemple.com", bare="email") == ("email", "a@exemple.com")
+
+    @pytest.mark.parametrize("pattern,email,expected", [
+        ("domain:exemple.com", "a@exemple.com", True),
+        ("domain:exemple.com", "a@mail.exemple.com", True),
+        ("domain:exemple.com", "a@notexemple.com", False),
+        ("domain:@Exemple.com", "a@exemple.com", True),
+        ("suffix:.gouv.fr", "a@interieur.gouv.fr", True),
+        ("suffix:.gouv.fr", "a@gouv.fr.com", False),
+        ("regex:^test\\+", "test+1@gmail.com", True),
+        ("regex:^test\\+", "contest+1@gmail.com", False),
+        ("email:A@Exemple.com", "a@exemple.com", True),
+        ("@exemple", "a@exemple.org", True),
+        ("@exemple", "a@gmail.com", False)
+    ])
+    def test_pattern_matches(self, pattern, email, expected):
+        assert PatternSet([pattern]).matches(email) is expected
+
+    @pytest.mark.parametrize("pattern", ["regex:(", "domain:", ""])
+    def test_invalid_pattern(self, pattern):
+        with pytest.raises(ValueError):
+            PatternSet([pattern])
+
+
+class TestScopeMatcher:
+    """Combinaison autorisés / refusés / exclusions"""
+
+    def test_deny_wins_over_allow(self):
+        matcher = ScopeMatcher(allow=["domain:client.fr"], deny=["regex:^noreply@"], excluded=["Boss@Client.fr"])
+        assert matcher.matches("a@client.fr")
+        assert not matcher.matches("noreply@client.fr")
+        assert not matcher.matches(" boss@client.fr")
+        assert not matcher.matches("a@gmail.com")
+
+    def test_no_allow_means_everyone(self):
+        matcher = ScopeMatcher(deny=["suffix:.test"])
+        assert matcher.matches("a@gmail.com")
+        assert not matcher.matches("a@qa.test")
+
+    def test_exclusion_file(self, tmp_path):
+        path = tmp_path / "exclusions.txt"
+        path.write_text("# désinscrits\nA@exemple.com\n\nb@exemple.com  # doublon CRM\ndomain:concurrent.fr\n")
+        entries = read_exclusion_file(str(path))
+        assert entries == ["A@exemple.com", "b@exemple.com", "domain:concurrent.fr"]
+        matcher = ScopeMatcher(excluded=entries)
+        assert not matcher.matches("a@exemple.com")
+        assert not matcher.matches("x@concurrent.fr")
+        assert matcher.matches("c@exemple.com")
+
+        with pytest.raises(ValueError):
+            read_exclusion_file(str(tmp_path / "absente.txt"))
+
+    def test_large_exclusion_list_is_fast(self):
+        """Des dizaines de milliers d'exclusions restent une recherche d'ensemble par email"""
+        matcher = ScopeMatcher(allow=["domain:exemple.com", "suffix:.fr"], deny=["regex:^noreply"],
+                               excluded=[f"excluded{i}@exemple.com" for i in range(50000)])
+        emails = [f"user{i}@exemple.com" for i in range(100000)]
+
+        start_time = time.time()
+        selected = sum(1 for email in emails if matcher.matches(email))
+        execution_time = time.time() - start_time
+
+        assert selected == 100000
+        assert execution_time < 1.0
+
+
+class TestSyncScope:
+    """Périmètre appliqué par sync.py"""
+
+    def test_matcher_is_cached_until_settings_change(self):
+        with patch('sync.TEST_MODE', False), patch('sync.SCOPE_PATTERNS', ("domain:client.fr",)):
+            matcher = sync.scope_matcher()
+            assert sync.scope_matcher() is matcher
+            with patch('sync.SCOPE_EXCLUDE', ("email:a@client.fr",)):
+                assert sync.scope_matcher() is not matcher
+                assert not sync.in_scope("a@client.fr")
+                assert sync.scope_label() == "domain:client.fr uniquement, sauf email:a@client.fr"
+
+    def test_production_with_exclusion_file(self, tmp_path):
+        path = tmp_path / "suppressed.txt"
+        path.write_text("a@gmail.com\n")
+        with patch('sync.TEST_MODE', False), patch('sync.SCOPE_PATTERNS', ()), \
+             patch('sync.SCOPE_EXCLUDE_FILE', str(path)):
+            assert not sync.in_scope("A@gmail.com")
+            assert sync.in_scope("b@gmail.com")
+            assert sync.scope_restricted()
+            assert sync.scope_label() == "toute la base, sauf suppressed.txt"
+
+    @patch('sync.load_environment')
+    @patch('sync.main')
+    @pytest.mark.parametrize("argv", [
+        ["--scope", "regex:("],
+        ["--scope-exclude-file", "absente.txt"]
+    ])
+    def test_run_rejects_invalid_scope(self, mock_main, mock_load_environment, argv, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        try:
+            with pytest.raises(SystemExit) as exc:
+                sync.run(argv)
+            assert exc.value.code == 2
+            mock_main.assert_not_called()
+        finally:
+            sync.load_settings()
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_fetch_applies_deny_patterns(engine, mock_api_server):
+    """Les exclusions s'appliquent pendant la récupération des pages"""
+    add_person(mock_api_server, 1, "a@client.fr")
+    add_person(mock_api_server, 2, "noreply@client.fr")
+    add_person(mock_api_server, 3, "b@gmail.com")
+
+    with patch('sync.TEST_MODE', False), patch('sync.SCOPE_PATTERNS', ("domain:client.fr",)), \
+         patch('sync.SCOPE_EXCLUDE', ("regex:^noreply@",)):
+        contacts = call_engine(engine, "get_target_copper_contacts")
+
+    assert [c["id"] for c in contacts] == [1]
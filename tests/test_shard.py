@@ -0,0 +1,214 @@
+"""
+Tests du partitionnement en shards (--shard i/N), du verrou d'exécution et de la fusion des rapports
+"""
+import pytest
+import sys
+import os
+import glob
+import json
+import subprocess
+from unittest.mock import patch
+
+# Ajouter le répertoire parent au path pour importer sync.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sync
+from synchro import async_engine
+from synchro.shard import LockError, RunLock, parse_shard, shard_of, shard_path
+from synchro.retention import load_index
+from synchro.report import count_errors
+from synchro.merge_reports import merge_summaries, load_summaries, shard_operations, main as merge_main
+from tests.test_engines import add_person, add_member
+
+
+class TestShardFunctions:
+    """Fonction de partitionnement"""
+
+    def test_parse_shard(self):
+        assert parse_shard("2/4") == (2, 4)
+        assert parse_shard(" 1/1 ") == (1, 1)
+        assert parse_shard("") is None
+        assert parse_shard(None) is None
+
+    @pytest.mark.parametrize("spec", ["0/4", "5/4", "1/0", "2", "a/b", "1/2/3"])
+    def test_parse_shard_invalid(self, spec):
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+    def test_shard_of_stable_and_normalized(self):
+        """Même shard quel que soit le côté (casse, espaces) et d'un processus à l'autre"""
+        assert shard_of("User@Exemple.com ", 8) == shard_of("user@exemple.com", 8)
+        code = "from synchro.shard import shard_of; print(shard_of('user@exemple.com', 8))"
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                   PYTHONHASHSEED="123")
+        other_process = subprocess.run([sys.executable, "-c", code], env=env,
+                                       capture_output=True, text=True, check=True)
+        assert int(other_process.stdout) == shard_of("user@exemple.com", 8)
+
+    def test_shard_of_distribution(self):
+        """Répartition équilibrée et couverture de tous les shards"""
+        counts = [0] * 4
+        for i in range(10000):
+            counts[shard_of(f"user{i}@exemple.com", 4) - 1] += 1
+        assert all(2200 < c < 2800 for c in counts)
+
+    def test_shard_path(self):
+        assert shard_path("sync_state.json", (2, 4)) == "sync_state_shard2of4.json"
+        assert shard_path("sync.lock", None) == "sync.lock"
+
+    def test_settings_apply_shard_to_files(self):
+        """Avec --shard, état, file d'attente et verrou sont propres au shard"""
+        try:
+            sync.load_settings(overrides={"shard": "3/4"})
+            assert sync.SHARD == (3, 4)
+            assert sync.SYNC_STATE_FILE == "sync_state_shard3of4.json"
+            assert sync.MARKED_QUEUE_FILE == "marked_contacts_queue_shard3of4.json"
+            assert sync.SYNC_LOCK_FILE == "sync_shard3of4.lock"
+        finally:
+            sync.load_settings()
+
+
+class TestRunLock:
+    """Verrou d'exécution"""
+
+    def test_lock_excludes_second_run(self, tmp_path):
+        path = str(tmp_path / "sync.lock")
+        with RunLock(path):
+            assert int(open(path).read()) == os.getpid()
+            with pytest.raises(LockError):
+                RunLock(path).acquire()
+        assert not os.path.exists(path)
+
+    def test_stale_lock_is_taken_over(self, tmp_path):
+        """Verrou laissé par un processus terminé"""
+        path = tmp_path / "sync.lock"
+        finished = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                                  capture_output=True, text=True, check=True)
+        path.write_text(finished.stdout.strip())
+
+        with RunLock(str(path)):
+            assert int(path.read_text()) == os.getpid()
+
+    @patch('sync.load_environment')
+    @patch('sync.main')
+    def test_run_refuses_concurrent_execution(self, mock_main, mock_load_environment, tmp_path):
+        lock_path = str(tmp_path / "held.lock")
+        try:
+            with RunLock(lock_path):
+                with pytest.raises(SystemExit) as exc:
+                    sync.run(["--lock-file", lock_path])
+            assert exc.value.code == 1
+            mock_main.assert_not_called()
+        finally:
+            sync.load_settings()
+
+
+@pytest.mark.parametrize("engine", ["sync", "async"])
+class TestShardedRuns:
+    """Exécutions partitionnées contre le serveur local"""
+
+    def test_shards_cover_base_disjointly(self, engine, mock_api_server, reset_operation_details, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        for i in range(1, 31):
+            add_person(mock_api_server, i, f"copper{i}@exemple.com", "Copper", f"User{i}")
+            add_member(mock_api_server, f"mc{i}@exemple.com", "Mc", f"User{i}")
+
+        for index in (1, 2, 3):
+            sync.operation_details.clear()
+            with patch('sync.TEST_MODE', True), \
+                 patch('sync.SHARD', (index, 3)), \
+                 patch('sync.log_file', None), \
+                 patch('sync.report_file', None):
+                if engine == "sync":
+                    sync.main()
+                else:
+                    async_engine.main()
+
+        state = mock_api_server.state
+        pushed = state.calls_for("PUT", "/members/")
+        assert len(pushed) == len(set(pushed)) == 30
+        created = [p["emails"][0]["email"] for p in state.people.values() if p["id"] > 30]
+        assert sorted(created) == sorted(f"mc{i}@exemple.com" for i in range(1, 31))
+
+        summaries = sorted(glob.glob(os.path.join(sync.OUTPUT_DIR, "import_report_*_shard*of3.json")))
+        assert len(summaries) == 3
+        assert len(glob.glob(os.path.join(sync.OUTPUT_DIR, "sync_log_*_shard*of3.txt"))) == 3
+        assert len(load_index(sync.OUTPUT_DIR)) == 3
+        per_shard = load_summaries(summaries)
+        # Opérations en JSON Lines à côté du résumé, qui n'en garde que les compteurs
+        assert all("operations" not in summary and summary["operations_file"].endswith(".jsonl")
+                   for summary in per_shard)
+        emails = [op["email"] for s in per_shard for op in shard_operations(s)]
+        assert len(emails) == len(set(emails)) == 60
+        assert sum(summary["operations_count"] for summary in per_shard) == 60
+        for summary in per_shard:
+            index = int(summary["shard"].split("/")[0])
+            assert all(shard_of(op["email"], 3) == index for op in shard_operations(summary))
+
+        # L'outil de fusion configure le module sync comme un processus à part
+        with patch.multiple('sync', TEST_MODE=True, SCOPE_PATTERNS=(), SCOPE_EXCLUDE=(), SHARD=None,
+                            log_filename=None, report_file=None, report_filename=None):
+            report_filename = merge_main(summaries)
+        assert report_filename.endswith("_merged.txt")
+        content = open(report_filename, encoding="utf-8").read()
+        assert "Shards fusionnés: 1/3, 2/3, 3/3" in content
+        assert "Contacts Copper → Mailchimp: 30" in content
+        assert "Contacts Mailchimp → Copper: 30" in content
+        assert "Total d'opérations: 60" in content
+        assert content.count("✅ SUCCÈS |") == 60
+
+
+class TestMergeSummaries:
+    """Fusion des résumés de shards"""
+
+    def summary(self, shard, copper_to_mc=1, mode="test"):
+        return {"shard": shard, "mode": mode, "scope": [], "copper_to_mc": copper_to_mc, "mc_to_copper": 0,
+                "identical_contacts": 2, "excluded": 0, "marked_for_deletion": 1,
+                "operations": [{"email": f"{shard}@exemple.com", "success": True}],
+                "marked_contacts": [{"email": f"marked{shard}@exemple.com"}], "log_file": f"log_{shard}"}
+
+    def test_merge_counters_and_order(self):
+        merged = merge_summaries([self.summary("2/3", 5), self.summary("1/3", 3)])
+        assert merged["copper_to_mc"] == 8
+        assert merged["identical_contacts"] == 4
+        assert merged["marked_for_deletion"] == 2
+        assert [op["email"] for op in merged["operations"]] == ["1/3@exemple.com", "2/3@exemple.com"]
+        assert merged["shards"] == ["1/3", "2/3"]
+        assert merged["missing_shards"] == ["3/3"]
+
+    def test_merge_streams_operation_files(self, tmp_path):
+        """Opérations relues depuis les fichiers JSON Lines des shards, compteurs tirés des résumés"""
+        paths = []
+        for index, emails in ((2, ["c@exemple.com"]), (1, ["a@exemple.com", "b@exemple.com"])):
+            summary = self.summary(f"{index}/2")
+            del summary["operations"]
+            operations_file = tmp_path / f"import_report_shard{index}of2.jsonl"
+            operations_file.write_text("".join(
+                json.dumps({"email": email, "success": email != "b@exemple.com"}) + "\n" for email in emails))
+            summary.update(operations_file=operations_file.name, operations_count=len(emails),
+                           operations_errors=int("b@exemple.com" in emails))
+            path = tmp_path / f"import_report_shard{index}of2.json"
+            path.write_text(json.dumps(summary))
+            paths.append(str(path))
+
+        merged = merge_summaries(load_summaries(paths))
+        operations = merged["operations"]
+        assert len(operations) == 3 and count_errors(operations) == 1
+        assert [op["email"] for op in operations] == ["a@exemple.com", "b@exemple.com", "c@exemple.com"]
+
+    @pytest.mark.parametrize("shards,mode", [
+        (["1/3", "1/4"], "test"),
+        (["1/3", "1/3"], "test"),
+        (["1/2", "2/2"], "production")
+    ])
+    def test_merge_rejects_inconsistent_shards(self, shards, mode):
+        summaries = [self.summary(shards[0]), self.summary(shards[1], mode=mode)]
+        with pytest.raises(ValueError):
+            merge_summaries(summaries)
+
+    def test_merge_command_reports_errors(self, tmp_path):
+        bad = tmp_path / "bad.json"
+        bad.write_text(json.dumps(self.summary("1/2")) + "}")
+        with pytest.raises(SystemExit) as exc:
+            merge_main([str(bad)])
+        assert exc.value.code == 1
@@ -0,0 +1,130 @@
+"""
+Tests du traçage des appels HTTP (latence par endpoint, percentiles, appels lents)
+"""
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+import requests
+
+# Ajouter le répertoire parent au path pour importer sync.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sync
+from synchro import async_engine
+from synchro.tracing import RequestStats, format_request_table, percentile
+from tests.test_engines import ENGINES, add_person, add_member
+
+
+class TestRequestStats:
+    """Agrégation par endpoint"""
+
+    @pytest.mark.parametrize("q,expected", [(50, 5), (90, 9), (99, 10), (100, 10)])
+    def test_percentile_nearest_rank(self, q, expected):
+        assert percentile(list(range(1, 11)), q) == expected
+
+    def test_percentile_empty(self):
+        assert percentile([], 99) == 0.0
+
+    def test_summary_sorted_by_total_time(self):
+        stats = RequestStats()
+        for seconds in (0.1, 0.2, 0.3):
+            stats.record("copper", "POST", "/people/search", 200, 1000, 1, seconds)
+        stats.record("mailchimp", "PUT", "/lists/:id/members/:id", 429, 0, 3, 2.0)
+
+        rows = stats.summary()
+        assert len(stats) == 4
+        assert [row["api"] for row in rows] == ["mailchimp", "copper"]
+        assert rows[0]["errors"] == 1 and rows[0]["retries"] == 2
+        copper = rows[1]
+        assert copper["calls"] == 3 and copper["errors"] == 0 and copper["bytes"] == 3000
+        assert copper["p50_ms"] == 200.0 and copper["p99_ms"] == 300.0 and copper["max_ms"] == 300.0
+        assert copper["total_seconds"] == 0.6
+
+    def test_table(self):
+        stats = RequestStats()
+        stats.record("copper", "POST", "/people/search", "error", 0, 3, 1.5)
+        lines = format_request_table(stats.summary()).splitlines()
+        assert lines[0].endswith("Endpoint")
+        assert lines[1].endswith("POST copper /people/search")
+        assert lines[1].split()[:3] == ["1", "1", "2"]
+
+
+class TestSafeRequestTracing:
+    """Trace des appels de safe_request"""
+
+    @patch('time.sleep')
+    def test_call_traced_once_with_retries(self, mock_sleep):
+        limited = MagicMock(status_code=429)
+        limited.raise_for_status.side_effect = requests.exceptions.HTTPError("429", response=limited)
+        ok = MagicMock(status_code=200, content=b'{"id": 1}')
+        func = MagicMock(side_effect=[limited, ok], __name__="put")
+
+        sync.safe_request(func, f"{sync.MC_BASE}/lists/test_list_id/members/abc123")
+
+        row, = sync.request_stats.summary()
+        assert (row["method"], row["endpoint"]) == ("PUT", "/lists/:id/members/:id")
+        assert row["calls"] == 1 and row["retries"] == 1 and row["errors"] == 0
+        assert row["bytes"] == 9
+
+    @patch('time.sleep')
+    def test_final_failure_traced_as_error(self, mock_sleep):
+        func = MagicMock(side_effect=requests.exceptions.ConnectionError("refusé"), __name__="post")
+        with pytest.raises(requests.exceptions.ConnectionError):
+            sync.safe_request(func, f"{sync.COPPER_API_URL}/people/search")
+        row, = sync.request_stats.summary()
+        assert row["errors"] == 1 and row["retries"] == sync.MAX_RETRIES - 1
+
+    def test_slow_call_logged(self):
+        with patch('sync.SLOW_REQUEST_SECONDS', 0.5), patch('sync.log') as log:
+            sync.trace_call("copper", "POST", "/people/search", 200, 10, 1, 0.2)
+            assert log.call_args[0][1] == "DEBUG"
+            sync.trace_call("copper", "POST", "/people/search", 200, 10, 2, 0.75)
+        message, level = log.call_args[0]
+        assert level == "WARNING"
+        assert message.startswith("🐢 Appel lent: POST copper /people/search → 200 en 750 ms")
+
+    def test_slow_log_disabled(self):
+        with patch('sync.SLOW_REQUEST_SECONDS', 0), patch('sync.log') as log:
+            sync.trace_call("copper", "POST", "/people/search", 200, 10, 1, 60.0)
+        assert log.call_args[0][1] == "DEBUG"
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+class TestRunTracing:
+    """Statistiques des appels d'une exécution complète des deux moteurs"""
+
+    def test_requests_in_report_data(self, engine, mock_api_server, reset_operation_details):
+        add_person(mock_api_server, 1, "john@exemple.com", "John", "Doe", ["VIP"])
+        add_member(mock_api_server, "jane@exemple.com", "Jane", "Smith")
+
+        with patch('sync.TEST_MODE', True), patch('sync.write_import_report') as mock_report:
+            if engine == "sync":
+                sync.main()
+            else:
+                async_engine.main()
+
+        rows = mock_report.call_args[0][0]['requests']
+        by_endpoint = {(row["api"], row["method"], row["endpoint"]): row for row in rows}
+        search = by_endpoint[("copper", "POST", "/people/search")]
+        assert search["calls"] >= 1 and search["bytes"] > 0 and search["errors"] == 0
+        assert ("mailchimp", "PUT", "/lists/:id/members/:id") in by_endpoint
+        totals = [row["total_seconds"] for row in rows]
+        assert totals == sorted(totals, reverse=True)
+
+
+class TestReportRequests:
+    """Tableau des requêtes dans le rapport texte"""
+
+    def test_report_lists_endpoints(self, reset_operation_details):
+        stats = RequestStats()
+        stats.record("copper", "POST", "/people/search", 200, 100, 1, 0.05)
+        report_data = {'operations': sync.operation_details, 'copper_to_mc': 0, 'mc_to_copper': 0,
+                       'excluded': 0, 'marked_for_deletion': 0, 'marked_contacts': [],
+                       'requests': stats.summary()}
+        report_file = sync.report_file
+        sync.write_import_report(report_data)
+        content = "".join(call.args[0] for call in report_file.write.call_args_list)
+        assert "REQUÊTES API" in content
+        assert "POST copper /people/search" in content
@@ -13,15 +13,14 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sync import (
     normalize_email, 
-    is_target_email, 
     is_delete_tag_robust,
     is_inactive_tag,
     get_subscriber_hash,
-    normalize_contact_data,
     contacts_are_identical,
     add_operation_detail,
     operation_details
 )
+from synchro.utils import is_target_email, normalize_contact_data
 
 
 class TestUtilityFunctions:
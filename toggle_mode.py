@@ -1,59 +1,56 @@
 #!/usr/bin/env python3
 """
 Script pour basculer entre mode TEST et PRODUCTION
+
+Le mode n'est plus écrit dans sync.py : il est enregistré dans .env
+(SYNC_MODE=test|production). Pour un job ponctuel, préférer l'option
+en ligne de commande : python sync.py --mode production
 """
 
 import os
-import sys
+
+from dotenv import dotenv_values, set_key
+
+ENV_FILE = ".env"
+
 
 def toggle_mode():
-    """Bascule entre mode TEST et PRODUCTION"""
-    sync_file = "sync.py"
-    
-    if not os.path.exists(sync_file):
-        print("❌ Fichier sync.py non trouvé")
+    """Bascule SYNC_MODE entre test et production dans .env"""
+    if not os.path.exists(ENV_FILE):
+        print(f"❌ Fichier {ENV_FILE} non trouvé (copier .env.example)")
         return
-    
-    # Lire le fichier
-    with open(sync_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Détecter le mode actuel
-    if "TEST_MODE = True" in content:
-        current_mode = "TEST"
-        new_content = content.replace("TEST_MODE = True", "TEST_MODE = False")
-        new_mode = "PRODUCTION"
-    elif "TEST_MODE = False" in content:
-        current_mode = "PRODUCTION"
-        new_content = content.replace("TEST_MODE = False", "TEST_MODE = True")
-        new_mode = "TEST"
-    else:
-        print("❌ Impossible de détecter le mode actuel")
+
+    # Détecter le mode actuel (test par défaut)
+    current = (dotenv_values(ENV_FILE).get("SYNC_MODE") or "test").strip().lower()
+    if current not in ("test", "production"):
+        print(f"❌ Valeur SYNC_MODE inattendue dans {ENV_FILE}: {current}")
         return
-    
+
+    current_mode = current.upper()
+    new_value = "production" if current == "test" else "test"
+    new_mode = new_value.upper()
+
     # Demander confirmation
     print(f"🔄 Mode actuel: {current_mode}")
     print(f"🎯 Nouveau mode: {new_mode}")
-    
+
     if new_mode == "PRODUCTION":
         print("⚠️  ATTENTION: Le mode PRODUCTION traitera TOUTE la base de données !")
         print("   Assurez-vous que c'est bien ce que vous voulez.")
-    
+
     response = input("\n✅ Confirmer le changement ? (o/N): ").lower()
-    
+
     if response in ['o', 'oui', 'y', 'yes']:
-        # Écrire le fichier modifié
-        with open(sync_file, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        
+        set_key(ENV_FILE, "SYNC_MODE", new_value, quote_mode="never")
+
         print(f"✅ Mode basculé vers {new_mode}")
-        print(f"📝 Fichier {sync_file} mis à jour")
-        
+        print(f"📝 SYNC_MODE={new_value} enregistré dans {ENV_FILE}")
+
         if new_mode == "PRODUCTION":
             print("🔥 RAPPEL: Vous êtes maintenant en mode PRODUCTION")
             print("   Tous les contacts seront traités !")
         else:
-            print("🧪 Mode TEST activé - seuls les emails @exemple seront traités")
+            print("🧪 Mode TEST activé - seuls les emails du périmètre de test seront traités")
     else:
         print("❌ Changement annulé")
 